@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+One-off backfill: rewrite dealids built with Python hash() to stable ids.
+
+Older runs keyed deals on f"deal_{hash(link)}", which changes every process, so
+each daily run inserted new rows instead of updating. This script walks the
+deals table in primary-key chunks, computes the stable id for every row
+(see dealnews_scraper/dealids.py) and rewrites deals, deal_images,
+related_deals and deal_categories (if present) to use it. When the stable id
+already exists, the duplicate row is merged into it and deleted. Rows whose
+stable id cannot be rebuilt (hash() ids of deals without a numeric DealNews id)
+are left unchanged and reported.
+
+Each chunk is committed on its own, so the script can be stopped and re-run.
+"""
+import os
+import sys
+import argparse
+import mysql.connector
+from dotenv import load_dotenv
+from dealnews_scraper.dealids import stable_dealid_for_row
+
+load_dotenv()
+
+CHILD_TABLES = ['deal_images', 'related_deals', 'deal_categories']
+
+
+def repoint_children(cursor, tables, old_id, new_id):
+    """Move child rows to new_id; rows that would duplicate an existing one are dropped"""
+    for table in tables:
+        cursor.execute(f"UPDATE IGNORE {table} SET dealid = %s WHERE dealid = %s", (new_id, old_id))
+        cursor.execute(f"DELETE FROM {table} WHERE dealid = %s", (old_id,))
+
+
+def backfill_dealids(chunk_size=1000, dry_run=False):
+    """Rewrite unstable dealids in chunks"""
+    mysql_host = os.getenv('MYSQL_HOST', 'localhost')
+    mysql_port = int(os.getenv('MYSQL_PORT', '3306'))
+    mysql_user = os.getenv('MYSQL_USER', 'root')
+    mysql_password = os.getenv('MYSQL_PASSWORD', '')
+    mysql_database = os.getenv('MYSQL_DATABASE', 'dealnews')
+
+    print("=" * 60)
+    print("Stable dealid backfill")
+    print("=" * 60)
+    print(f"Host: {mysql_host}:{mysql_port}")
+    print(f"Database: {mysql_database}")
+    print(f"Chunk size: {chunk_size:,}{' (dry run)' if dry_run else ''}")
+    print()
+
+    conn = None
+    try:
+        conn = mysql.connector.connect(
+            host=mysql_host,
+            port=mysql_port,
+            user=mysql_user,
+            password=mysql_password,
+            database=mysql_database,
+            autocommit=False
+        )
+        cursor = conn.cursor()
+
+        # Only touch child tables that exist in this schema version
+        tables = []
+        for table in CHILD_TABLES:
+            cursor.execute("SHOW TABLES LIKE %s", (table,))
+            if cursor.fetchone():
+                tables.append(table)
+        print(f"Child tables: {', '.join(tables) or 'none'}")
+        print()
+
+        last_id = 0
+        scanned = rewritten = merged = unresolved = 0
+        while True:
+            cursor.execute(
+                "SELECT id, dealid, url FROM deals WHERE id > %s ORDER BY id LIMIT %s",
+                (last_id, chunk_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            scanned += len(rows)
+
+            for row_id, old_id, url in rows:
+                new_id = stable_dealid_for_row(old_id, url or '')
+                if new_id is None:
+                    unresolved += 1
+                    continue
+                if not new_id or new_id == old_id:
+                    continue
+
+                cursor.execute("SELECT id FROM deals WHERE dealid = %s", (new_id,))
+                existing = cursor.fetchone()
+                if existing and existing[0] != row_id:
+                    # Same deal stored twice under different hash() ids - keep the stable row
+                    merged += 1
+                    if not dry_run:
+                        repoint_children(cursor, tables, old_id, new_id)
+                        cursor.execute("DELETE FROM deals WHERE id = %s", (row_id,))
+                else:
+                    rewritten += 1
+                    if not dry_run:
+                        cursor.execute("UPDATE deals SET dealid = %s WHERE id = %s", (new_id, row_id))
+                        repoint_children(cursor, tables, old_id, new_id)
+
+            if dry_run:
+                conn.rollback()
+            else:
+                conn.commit()
+            print(f"  ... {scanned:,} rows scanned, {rewritten:,} rewritten, {merged:,} merged, {unresolved:,} unresolved (last id {last_id})")
+
+        cursor.close()
+        conn.close()
+
+        print()
+        print("=" * 60)
+        print(f"✅ Backfill {'simulated' if dry_run else 'completed'}: {scanned:,} scanned, {rewritten:,} rewritten, {merged:,} duplicates merged")
+        if unresolved:
+            print(f"⚠️  {unresolved:,} rows left unchanged: hash()-based ids without a numeric DealNews id,")
+            print("   whose stable id depends on a link the deals table does not store")
+        print("=" * 60)
+        return True
+
+    except mysql.connector.Error as err:
+        print(f"❌ MySQL Error: {err}")
+        if conn:
+            conn.rollback()
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Rewrite hash()-based dealids to stable ids')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per transaction (default: 1000)')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    args = parser.parse_args()
+
+    success = backfill_dealids(chunk_size=args.chunk_size, dry_run=args.dry_run)
+    sys.exit(0 if success else 1)
@@ -0,0 +1 @@
+"""Offline benchmarks for the DealNews scraper (run with python -m benchmarks.<name>)"""
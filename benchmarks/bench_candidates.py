@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-pass candidate discovery vs. the six-strategy version.
+
+legacy_candidates() is a verbatim copy of the candidate code DealnewsSpider.parse()
+ran before dealnews_scraper/candidates.py, kept here as the baseline. Both run
+on the same parsed pages; the script reports pages/sec for each and any page
+where they pick different containers. Differences are expected from Strategy 4,
+which now matches on container text instead of serialized markup and skips
+containers nested in an already-checked one.
+
+Usage:
+    python -m benchmarks.bench_candidates                 # benchmarks/corpus/, else synthetic listing pages
+    python -m benchmarks.bench_candidates --pages DIR     # saved listing pages (*.html)
+"""
+import json
+import time
+import argparse
+from benchmarks.fixtures import get_pages, make_response
+from dealnews_scraper.candidates import find_deal_candidates
+from dealnews_scraper.structured_data import StructuredDataCache
+
+
+def legacy_candidates(response):
+    """Candidate discovery as it was in DealnewsSpider.parse()"""
+    # IMPROVED DEAL EXTRACTION - Try multiple strategies
+    deals = []
+    
+    # Strategy 1: Look for deal links (most reliable)
+    deal_links = response.css('a[href*="/deals/"], a[href*="/deal/"], a[href*="/d/"]')
+    for link in deal_links:
+        # Get parent container
+        parent = link.xpath('./ancestor::*[contains(@class, "deal") or contains(@class, "item") or contains(@class, "card")][1]')
+        if parent:
+            deals.extend(parent)
+        else:
+            # Use the link itself as deal container
+            deals.append(link.xpath('./..'))
+    
+    # Strategy 2: Data attributes
+    data_deals = response.css('[data-deal-id], [data-rec-id], [data-deal], [data-id*="deal"]')
+    deals.extend(data_deals)
+    
+    # Strategy 3: Common deal container classes
+    container_selectors = [
+        'article.deal', 'article[class*="deal"]',
+        'div.deal-item', 'div[class*="deal-item"]',
+        'div.deal-card', 'div[class*="deal-card"]',
+        'div.deal-tile', 'div[class*="deal-tile"]',
+        'div[class*="deal-container"]',
+        'div[class*="deal-wrapper"]',
+        'div[class*="deal-box"]',
+        'div[class*="deal-content"]',
+        'div[class*="deal-listing"]',
+        'div[class*="deal-post"]',
+        'div[class*="deal-entry"]',
+        '.item[class*="deal"]',
+        '.card[class*="deal"]',
+        '.tile[class*="deal"]',
+    ]
+    
+    for selector in container_selectors:
+        found = response.css(selector)
+        if found:
+            deals.extend(found)
+    
+    # Strategy 4: Look for product/offer containers
+    product_containers = response.css('[class*="product"], [class*="offer"], [class*="listing"]')
+    for container in product_containers:
+        # Check if it has deal-like content
+        text = container.get()
+        if text and ('deal' in text.lower() or '$' in text or 'off' in text.lower() or 'sale' in text.lower()):
+            deals.append(container)
+    
+    # Strategy 5: Extract from JSON-LD structured data first (fastest)
+    json_deals = response.css('script[type="application/ld+json"]::text').getall()
+    if json_deals:
+        for json_str in json_deals:
+            try:
+                data = json.loads(json_str)
+                if isinstance(data, dict) and data.get('@type') in ['Offer', 'Product', 'ItemList']:
+                    # Create a virtual deal container for JSON data
+                    deals.append(response.css('body').xpath('./script[contains(text(), "@type")][1]'))
+            except:
+                pass
+    
+    # Strategy 6: DealNews click-out links (very common on listing pages)
+    click_links = response.css('a[href*="lw/click.html"]')
+    for a in click_links:
+        # Prefer nearest meaningful container
+        parent = (
+            a.xpath('./ancestor::article[1]') or
+            a.xpath('./ancestor::*[contains(@class, "deal") or contains(@class, "offer") or contains(@class, "snippet") or contains(@class, "item") or contains(@class, "card")][1]')
+        )
+        if parent:
+            deals.extend(parent)
+        else:
+            # Fallback to link's immediate parent
+            deals.append(a.xpath('..'))
+    
+    # Remove duplicates
+    seen = set()
+    unique_deals = []
+    for deal in deals:
+        if deal:
+            deal_html = deal.get() or ''
+            deal_id = deal.css('::attr(data-deal-id)').get() or deal.css('::attr(data-rec-id)').get() or ''
+            deal_url = deal.css('a::attr(href)').get() or ''
+            
+            # Create unique identifier
+            unique_id = deal_id or deal_url or hash(deal_html[:200])
+            if unique_id not in seen:
+                seen.add(unique_id)
+                unique_deals.append(deal)
+    return unique_deals
+
+
+def candidate_roots(candidates):
+    """lxml elements behind a candidate list (legacy entries may be SelectorLists)"""
+    roots = []
+    for candidate in candidates:
+        roots.append(candidate[0].root if isinstance(candidate, list) else candidate.root)
+    return roots
+
+
+def time_runs(func, responses, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for response in responses:
+            func(response)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark deal candidate discovery')
+    parser.add_argument('--pages', help='Directory of saved listing pages (*.html) (default: benchmarks/corpus/, else synthetic)')
+    parser.add_argument('--count', type=int, default=20, help='Synthetic pages to generate (default: 20)')
+    parser.add_argument('--deals', type=int, default=40, help='Deals per synthetic page (default: 40)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs; the best is reported (default: 5)')
+    args = parser.parse_args()
+
+    responses = [make_response(url, html) for url, html in get_pages(args.pages, args.count, args.deals)]
+    for response in responses:
+        response.selector  # parse HTML up front; only candidate discovery is timed
+
+    mismatches = 0
+    total = 0
+    for response in responses:
+        legacy = candidate_roots(legacy_candidates(response))
+        current = candidate_roots(find_deal_candidates(response, StructuredDataCache(response)))
+        total += len(current)
+        if legacy != current:
+            mismatches += 1
+            print(f"ℹ️  {response.url}: legacy {len(legacy)} candidates, single-pass {len(current)}")
+
+    legacy_time = time_runs(legacy_candidates, responses, args.repeat)
+    current_time = time_runs(lambda r: find_deal_candidates(r, StructuredDataCache(r)), responses, args.repeat)
+
+    print("=" * 60)
+    print(f"Candidate discovery on {len(responses)} pages ({total:,} candidates)")
+    print("=" * 60)
+    print(f"Legacy (6 strategies):  {legacy_time * 1000:8.1f} ms  ({len(responses) / legacy_time:,.1f} pages/sec)")
+    print(f"Single pass:            {current_time * 1000:8.1f} ms  ({len(responses) / current_time:,.1f} pages/sec)")
+    print(f"Speed-up:               {legacy_time / current_time:8.2f}x")
+    print(f"Pages with different candidates: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark: filter-variable classifier vs. the keyword chains it replaced.
+
+legacy_filter_variables() is a copy of the classification code that
+DealnewsSpider.extract_filter_variables() ran before dealnews_scraper/classifier.py.
+Both classify the same synthetic deal texts and titles; the script reports
+texts/sec for each, any text where offer_type / condition / events /
+offer_status differ (there should be none), and titles where the brand differs.
+Brand differences are expected: the old list had 11 brands matched as
+substrings, the dictionary has well over a thousand matched on whole words.
+
+Usage:
+    python -m benchmarks.bench_classifier                 # 100,000 texts
+    python -m benchmarks.bench_classifier --texts 20000
+"""
+import time
+import random
+import argparse
+from dealnews_scraper.classifier import DealClassifier
+
+PHRASES = [
+    'Up to 80% off', 'Save 25%', '$50 off', 'free shipping', 'free shipping w/ $35',
+    'free shipping w/ Prime', 'Free delivery on orders over $49', 'w/ coupon code SAVE10',
+    'promo code TAKE20', 'after $30 mail-in rebate', '5% cashback', 'clearance',
+    'Black Friday pricing', 'Cyber Monday deal', 'Prime Day exclusive', 'holiday gift guide',
+    'Christmas delivery', 'back to school sale', 'limited time only', 'expires today',
+    'ending soon', 'this deal has ended', 'no longer available', 'brand new', 'refurbished',
+    'certified refurb', 'pre-owned', 'used - like new', 'open box', 'a low by $12',
+    'Popularity: 4/5', 'Staff Pick', 'Published 3 hrs ago', 'in several colors',
+    'sold by Amazon', 'in-store pickup', 'includes 2-year warranty', 'for members',
+]
+TITLE_BRANDS = [
+    'Apple', 'Samsung', 'Sony', 'Dell', 'Lenovo', 'DeWalt', 'Levi\'s', 'The North Face',
+    'Ninja', 'KitchenAid', 'Best Buy', 'Nike', 'Under Armour', 'Instant Pot', 'Dyson', 'LEGO',
+]
+TITLE_PRODUCTS = [
+    '65" 4K Smart TV', 'Laptop', 'Wireless Earbuds', 'Air Fryer', 'Cordless Drill Kit',
+    'Men\'s Jacket', 'Running Shoes', 'Stand Mixer', 'Robot Vacuum', 'Building Set',
+    'Smartwatch', 'Gift Card', 'Headphones', 'Monitor', 'Office Chair',
+]
+LEGACY_BRANDS = ['apple', 'samsung', 'nike', 'adidas', 'sony', 'microsoft', 'google', 'amazon', 'walmart', 'target', 'best buy']
+
+
+def legacy_filter_variables(deal_text, title, brands=LEGACY_BRANDS):
+    """Classification as it was in DealnewsSpider.extract_filter_variables()
+
+    brands defaults to the old hard-coded list; passing the full dictionary shows
+    how the substring loop scales.
+    """
+    item = {}
+    # Offer type extraction
+    if any(word in deal_text for word in ['free shipping', 'free delivery']):
+        item['offer_type'] = 'Free Shipping'
+    elif any(word in deal_text for word in ['coupon', 'discount code', 'promo code']):
+        item['offer_type'] = 'Coupon'
+    elif any(word in deal_text for word in ['rebate', 'cashback', 'cash back']):
+        item['offer_type'] = 'Rebate'
+    elif any(word in deal_text for word in ['clearance', 'sale', 'off']):
+        item['offer_type'] = 'Sale'
+    else:
+        item['offer_type'] = ''
+
+    # Condition extraction
+    if any(word in deal_text for word in ['new', 'brand new']):
+        item['condition'] = 'New'
+    elif any(word in deal_text for word in ['used', 'pre-owned', 'second hand']):
+        item['condition'] = 'Used'
+    elif any(word in deal_text for word in ['refurbished', 'refurb']):
+        item['condition'] = 'Refurbished'
+    else:
+        item['condition'] = 'New'  # Default to new
+
+    # Events extraction
+    if any(word in deal_text for word in ['black friday', 'cyber monday', 'prime day']):
+        item['events'] = 'Black Friday'
+    elif any(word in deal_text for word in ['christmas', 'holiday', 'xmas']):
+        item['events'] = 'Holiday'
+    elif any(word in deal_text for word in ['back to school', 'school']):
+        item['events'] = 'Back to School'
+    else:
+        item['events'] = ''
+
+    # Offer status extraction
+    if any(word in deal_text for word in ['limited time', 'expires', 'ending soon']):
+        item['offer_status'] = 'Limited'
+    elif any(word in deal_text for word in ['expired', 'ended', 'no longer available']):
+        item['offer_status'] = 'Expired'
+    else:
+        item['offer_status'] = 'Active'  # Default to active
+
+    # Brand extraction from title
+    title = title.lower()
+    for brand in brands:
+        if brand in title:
+            item['brand'] = brand.title()
+            break
+    else:
+        item['brand'] = ''
+    return item
+
+
+def current_filter_variables(classifier, deal_text, title):
+    item = classifier.classify(deal_text)
+    item['brand'] = classifier.brand(title)
+    return item
+
+
+def synthetic_texts(count, seed=0):
+    """(lowercase deal text, title) pairs shaped like deal + dealplus + detail"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        deal_text = ' '.join(rng.sample(PHRASES, rng.randrange(1, 6))).lower()
+        title = f"{rng.choice(TITLE_BRANDS)} {rng.choice(TITLE_PRODUCTS)} for ${rng.randrange(5, 1500)}"
+        texts.append((deal_text, title))
+    return texts
+
+
+def time_runs(func, texts, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for deal_text, title in texts:
+            func(deal_text, title)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the filter-variable classifier')
+    parser.add_argument('--texts', type=int, default=100000, help='Synthetic deal texts (default: 100000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs; the best is reported (default: 3)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    classifier = DealClassifier()
+    load_time = time.perf_counter() - start
+    texts = synthetic_texts(args.texts)
+
+    label_mismatches = brand_mismatches = 0
+    for deal_text, title in texts:
+        legacy = legacy_filter_variables(deal_text, title)
+        current = current_filter_variables(classifier, deal_text, title)
+        if legacy['brand'] != current.pop('brand'):
+            brand_mismatches += 1
+        legacy.pop('brand')
+        if legacy != current:
+            label_mismatches += 1
+            if label_mismatches <= 5:
+                print(f"⚠️  {deal_text!r}: legacy {legacy}, classifier {current}")
+
+    legacy_time = time_runs(legacy_filter_variables, texts, args.repeat)
+    dictionary = list(classifier.brands)
+    legacy_dictionary_time = time_runs(lambda deal_text, title: legacy_filter_variables(deal_text, title, dictionary),
+                                       texts, args.repeat)
+    current_time = time_runs(lambda deal_text, title: current_filter_variables(classifier, deal_text, title),
+                             texts, args.repeat)
+
+    print("=" * 60)
+    print(f"Filter variables for {len(texts):,} deal texts ({len(classifier.brands):,} brands, loaded in {load_time * 1000:.1f} ms)")
+    print("=" * 60)
+    print(f"Legacy keyword chains:  {legacy_time * 1000:8.1f} ms  ({len(texts) / legacy_time:,.0f} texts/sec)")
+    print(f"Legacy, full brand list:{legacy_dictionary_time * 1000:8.1f} ms  ({len(texts) / legacy_dictionary_time:,.0f} texts/sec)")
+    print(f"Classifier:             {current_time * 1000:8.1f} ms  ({len(texts) / current_time:,.0f} texts/sec)")
+    print(f"Speed-up:               {legacy_time / current_time:8.2f}x vs. legacy, "
+          f"{legacy_dictionary_time / current_time:.2f}x vs. legacy with the full brand list")
+    print(f"Texts with different labels: {label_mismatches}")
+    print(f"Titles with a different brand: {brand_mismatches}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full-stack crawl throughput against the local mock DealNews site.
+
+Starts benchmarks/mock_site.py in a separate process and crawls it with
+DealnewsSpider once per CONCURRENT_REQUESTS level, with the project's
+scheduler, dupefilter, downloader middlewares, spider callbacks and
+NormalizedMySQLPipeline all in the loop. Requests keep their
+https://www.dealnews.com URLs; only the download handler sends them to the
+mock site over plain HTTP, so the spider sees the URLs it would in production.
+
+The pipeline writes to a SQLite stand-in by default (the same buffered batches
+and writer thread, with the upserts translated to SQLite), or to a real MySQL
+database with --mysql DATABASE (the database is cleared first).
+
+Reported per concurrency level:
+- sustained requests/sec, items/sec and DB rows/sec, measured between 10% and
+  90% of the run so start-up and the final drain do not count;
+- the same rates over the whole run, response status counts and DB row totals.
+
+AutoThrottle and DOWNLOAD_DELAY are off, so concurrency is the only knob.
+Results are saved as benchmarks/results/e2e-<commit>.json.
+
+Usage:
+    python -m benchmarks.bench_e2e                                   # 8, 16, 32, 64
+    python -m benchmarks.bench_e2e --concurrency 16,64 --latency 50 --errors 429=0.02,503=0.01
+    python -m benchmarks.bench_e2e --mysql dealnews_bench
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import tempfile
+import multiprocessing
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from twisted.internet import defer, task
+from scrapy.settings import Settings
+from scrapy.crawler import CrawlerRunner
+from scrapy.exceptions import IgnoreRequest
+from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+from benchmarks.bench_parser import RESULTS_DIR, git_commit, library_versions
+from benchmarks.mock_site import MockSite, add_site_arguments, serve
+from dealnews_scraper.normalized_pipeline import NormalizedMySQLPipeline
+from dealnews_scraper.spiders.dealnews_spider import DealnewsSpider
+
+SAMPLE_INTERVAL = 0.5  # seconds between throughput samples
+SUSTAINED_WINDOW = (0.1, 0.9)  # fraction of the run the sustained rates cover
+
+DEAL_COLUMNS = ('dealid', 'recid', 'url', 'title', 'price', 'promo', 'category', 'category_id', 'store', 'deal',
+                'dealplus', 'deallink', 'dealtext', 'dealhover', 'published', 'popularity', 'staffpick', 'detail',
+                'raw_html')
+SQLITE_SCHEMA = [
+    f"CREATE TABLE IF NOT EXISTS deals ({', '.join(DEAL_COLUMNS)}, created_at, updated_at, PRIMARY KEY (dealid))",
+    "CREATE TABLE IF NOT EXISTS deal_images (dealid, imageurl, created_at, UNIQUE (dealid, imageurl))",
+    "CREATE TABLE IF NOT EXISTS categories (category_id PRIMARY KEY, category_name, category_url, "
+    "category_description, created_at, updated_at)",
+    "CREATE TABLE IF NOT EXISTS related_deals (dealid, relatedurl, created_at, UNIQUE (dealid, relatedurl))",
+]
+# The pipeline's MySQL statements and their SQLite equivalents
+SQLITE_STATEMENTS = {
+    NormalizedMySQLPipeline.DEAL_UPSERT_SQL:
+        f"INSERT INTO deals ({', '.join(DEAL_COLUMNS)}, created_at) "
+        f"VALUES ({', '.join('?' * len(DEAL_COLUMNS))}, CURRENT_TIMESTAMP) "
+        f"ON CONFLICT (dealid) DO UPDATE SET "
+        f"{', '.join(f'{c} = excluded.{c}' for c in DEAL_COLUMNS[1:])}, updated_at = CURRENT_TIMESTAMP",
+    NormalizedMySQLPipeline.IMAGE_UPSERT_SQL:
+        "INSERT OR IGNORE INTO deal_images (dealid, imageurl, created_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+    NormalizedMySQLPipeline.CATEGORY_UPSERT_SQL:
+        "INSERT INTO categories (category_id, category_name, category_url, category_description, created_at) "
+        "VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP) ON CONFLICT (category_id) DO UPDATE SET "
+        "category_name = excluded.category_name, category_url = excluded.category_url, "
+        "category_description = excluded.category_description, updated_at = CURRENT_TIMESTAMP",
+    NormalizedMySQLPipeline.DEAL_CATEGORY_ID_SQL:
+        "UPDATE deals SET category_id = ? WHERE dealid = ? AND (category_id IS NULL OR category_id = '')",
+    NormalizedMySQLPipeline.RELATED_UPSERT_SQL:
+        "INSERT OR IGNORE INTO related_deals (dealid, relatedurl, created_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+}
+
+
+class SQLiteCursor:
+    """mysql.connector-style cursor running the pipeline's statements on SQLite"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.execute(SQLITE_STATEMENTS.get(sql, sql), params or ())
+
+    def executemany(self, sql, rows):
+        self.conn.executemany(SQLITE_STATEMENTS.get(sql, sql), rows)
+
+    def close(self):
+        pass
+
+
+class SQLiteConnection:
+    """The parts of a mysql.connector connection the pipeline's writer uses"""
+
+    def __init__(self, path):
+        # Only the writer thread uses it after open_spider
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SQLITE_SCHEMA:
+            self.conn.execute(statement)
+
+    def cursor(self):
+        return SQLiteCursor(self.conn)
+
+    def start_transaction(self):
+        self.conn.execute("BEGIN")
+
+    def commit(self):
+        self.conn.execute("COMMIT")
+
+    def rollback(self):
+        self.conn.execute("ROLLBACK")
+
+    def reconnect(self):
+        pass
+
+    def close(self):
+        self.conn.close()
+
+
+class SQLitePipeline(NormalizedMySQLPipeline):
+    """NormalizedMySQLPipeline writing to the SQLite file in BENCHMARK_SQLITE_PATH"""
+
+    def open_spider(self, spider):
+        self.conn = SQLiteConnection(spider.settings.get('BENCHMARK_SQLITE_PATH'))
+        self.cursor = self.conn.cursor()
+        self.mysql_enabled = True
+        self.start_writes(spider)
+
+
+class MockSiteDownloadHandler(HTTP11DownloadHandler):
+    """Fetches https://www.dealnews.com/... from the mock site (MOCK_SITE_URL) over HTTP.
+
+    Other hosts (click-out redirects to merchants) are dropped with IgnoreRequest
+    and counted as benchmark/offsite_requests.
+    """
+
+    def __init__(self, settings, crawler=None):
+        super().__init__(settings, crawler)
+        self.crawler = crawler
+        self.site_url = settings.get('MOCK_SITE_URL').rstrip('/')
+
+    def download_request(self, request, spider):
+        parts = urlsplit(request.url)
+        if not (parts.hostname or '').endswith('dealnews.com'):
+            self.crawler.stats.inc_value('benchmark/offsite_requests', spider=spider)
+            raise IgnoreRequest(f"Not on the mock site: {request.url}")
+        local = request.replace(url=f"{self.site_url}{parts.path or '/'}{'?' + parts.query if parts.query else ''}")
+        local.meta.pop('proxy', None)
+        d = super().download_request(local, spider)
+        d.addCallback(self._restore, request, local)
+        return d
+
+    @staticmethod
+    def _restore(response, request, local):
+        # The handler timed the local copy of the request (meta is copied by replace())
+        if 'download_latency' in local.meta:
+            request.meta['download_latency'] = local.meta['download_latency']
+        return response.replace(url=request.url)
+
+
+class ThroughputSampler:
+    """Cumulative downloaded responses (redirects and retried errors included), items and DB rows over time"""
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.samples = []  # (seconds, responses, items, rows)
+        self.started = time.perf_counter()
+
+    def sample(self):
+        self.samples.append((
+            time.perf_counter() - self.started,
+            self.stats.get_value('downloader/response_count', 0),
+            self.stats.get_value('item_scraped_count', 0),
+            self.stats.get_value('mysql/rows_flushed', 0),
+        ))
+
+    def at(self, seconds):
+        """Last sample taken at or before seconds into the run"""
+        best = self.samples[0]
+        for sample in self.samples:
+            if sample[0] > seconds:
+                break
+            best = sample
+        return best
+
+    def rates(self, window=(0.0, 1.0)):
+        """(requests, items, rows) per second between two fractions of the run"""
+        total = self.samples[-1][0]
+        first, last = self.at(total * window[0]), self.at(total * window[1])
+        seconds = last[0] - first[0]
+        if seconds <= 0:
+            return 0.0, 0.0, 0.0
+        return tuple(round((last[i] - first[i]) / seconds, 1) for i in (1, 2, 3))
+
+
+def crawl_settings(args, concurrency, site_url, workdir):
+    settings = Settings()
+    settings.setmodule('dealnews_scraper.settings', priority='project')
+    settings.setdict({
+        'CONCURRENT_REQUESTS': concurrency,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': concurrency,
+        'DOWNLOAD_DELAY': 0,
+        'AUTOTHROTTLE_ENABLED': False,
+        'LOG_FILE': None,
+        'TELNETCONSOLE_ENABLED': False,
+        'CLOSESPIDER_TIMEOUT': args.max_seconds,
+        'DOWNLOAD_HANDLERS': {'https': 'benchmarks.bench_e2e.MockSiteDownloadHandler',
+                              'http': 'benchmarks.bench_e2e.MockSiteDownloadHandler'},
+        'MOCK_SITE_URL': site_url,
+        # Every level starts from an empty seen-URL store and without caches
+        'SEEN_URLS_PATH': os.path.join(workdir, f'seen_urls_{concurrency}.fp'),
+        'INCREMENTAL_CRAWL': False,
+        'CONDITIONAL_REQUESTS_ENABLED': False,
+        'HTTPCACHE_ENABLED': False,
+        'MYSQL_BATCH_SIZE': args.batch_size,
+        'BENCHMARK_SQLITE_PATH': os.path.join(workdir, f'deals_{concurrency}.sqlite'),
+        'ITEM_PIPELINES': ({'dealnews_scraper.normalized_pipeline.NormalizedMySQLPipeline': 300} if args.mysql
+                           else {'benchmarks.bench_e2e.SQLitePipeline': 300}),
+    }, priority='cmdline')
+    return settings
+
+
+def db_row_counts(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('deals', 'deal_images', 'categories', 'related_deals')}
+    finally:
+        conn.close()
+
+
+@defer.inlineCallbacks
+def crawl_once(args, concurrency, site_url, workdir):
+    settings = crawl_settings(args, concurrency, site_url, workdir)
+    runner = CrawlerRunner(settings)
+    crawler = runner.create_crawler(DealnewsSpider)
+    d = runner.crawl(crawler)  # the crawler's stats exist once this returns
+    sampler = ThroughputSampler(crawler.stats)
+    loop = task.LoopingCall(sampler.sample)
+    loop.start(SAMPLE_INTERVAL, now=True)
+    try:
+        yield d
+    finally:
+        if loop.running:
+            loop.stop()
+    sampler.sample()
+
+    stats = crawler.stats.get_stats()
+    seconds = sampler.samples[-1][0]
+    requests, items, rows = sampler.rates(SUSTAINED_WINDOW)
+    mean_requests, mean_items, mean_rows = sampler.rates()
+    prefix = 'downloader/response_status_count/'
+    return {
+        'concurrency': concurrency,
+        'seconds': round(seconds, 2),
+        'finish_reason': stats.get('finish_reason'),
+        'requests': stats.get('downloader/response_count', 0),
+        'items': stats.get('item_scraped_count', 0),
+        'deals': crawler.spider.deals_extracted,
+        'db_rows': stats.get('mysql/rows_flushed', 0),
+        'requests_per_sec': requests,
+        'items_per_sec': items,
+        'db_rows_per_sec': rows,
+        'mean': {'requests_per_sec': mean_requests, 'items_per_sec': mean_items, 'db_rows_per_sec': mean_rows},
+        'statuses': {key[len(prefix):]: value for key, value in sorted(stats.items()) if key.startswith(prefix)},
+        'offsite_requests': stats.get('benchmark/offsite_requests', 0),
+        'tables': None if args.mysql else db_row_counts(settings.get('BENCHMARK_SQLITE_PATH')),
+    }
+
+
+def start_site(args):
+    """Start the mock site in a child process; returns (process, base URL)"""
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    options = {key: getattr(args, key) for key in
+               ('subcategories', 'pages', 'deals', 'stores', 'related', 'page_kb', 'latency', 'jitter', 'errors', 'gzip')}
+    process = context.Process(target=serve, args=(options, ready), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{ready.get(timeout=30)}"
+
+
+def run(args):
+    from twisted.internet import reactor
+
+    process, site_url = start_site(args)
+    results = []
+
+    @defer.inlineCallbacks
+    def crawl_all(workdir):
+        try:
+            for concurrency in args.concurrency:
+                result = yield crawl_once(args, concurrency, site_url, workdir)
+                results.append(result)
+                print(f"  CONCURRENT_REQUESTS={concurrency}: {result['requests']:,} requests in {result['seconds']:.1f}s "
+                      f"({result['finish_reason']})")
+        finally:
+            reactor.stop()
+
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            reactor.callWhenRunning(crawl_all, workdir)
+            reactor.run()
+    finally:
+        process.terminate()
+    return results
+
+
+def report(result):
+    site = result['site']
+    print("=" * 78)
+    print(f"End-to-end benchmark at {result['commit']}{' (dirty)' if result['dirty'] else ''}: "
+          f"{site['deals']:,} deals, {site['latency']:.0f} ms latency, errors {site['errors'] or 'none'}, "
+          f"DB {result['database']}")
+    print("=" * 78)
+    print(f"{'concurrency':>11s} {'seconds':>8s} {'requests':>9s} {'req/s':>8s} {'items/s':>9s} {'rows/s':>9s}  statuses")
+    for row in result['levels']:
+        print(f"{row['concurrency']:11d} {row['seconds']:8.1f} {row['requests']:9,d} {row['requests_per_sec']:8,.1f} "
+              f"{row['items_per_sec']:9,.1f} {row['db_rows_per_sec']:9,.1f}  {row['statuses']}")
+    print("(rates are sustained: between 10% and 90% of each run)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crawl a local mock DealNews site and report full-stack throughput')
+    parser.add_argument('--concurrency', type=lambda value: [int(v) for v in value.split(',')], default=[8, 16, 32, 64],
+                        help='CONCURRENT_REQUESTS levels, comma separated (default: 8,16,32,64)')
+    parser.add_argument('--max-seconds', type=int, default=120, help='Stop each crawl after this long (default: 120)')
+    parser.add_argument('--batch-size', type=int, default=500, help='MYSQL_BATCH_SIZE for the pipeline (default: 500)')
+    parser.add_argument('--mysql', metavar='DATABASE',
+                        help='Write to this MySQL database (MYSQL_* from .env; cleared first) instead of SQLite')
+    parser.add_argument('--log-level', default='ERROR', help='Log level of the crawls (default: ERROR)')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/e2e-<commit>.json)')
+    parser.add_argument('--no-save', action='store_true', help='Do not write a result file')
+    add_site_arguments(parser)
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error('--batch-size must be at least 1 (DB rows/sec is measured from flushed batches)')
+
+    logging.basicConfig(level=args.log_level, format='%(asctime)s [%(name)s] %(levelname)s: %(message)s')
+    os.environ['DISABLE_PROXY'] = 'true'
+    if args.mysql:
+        os.environ['MYSQL_DATABASE'] = args.mysql
+        os.environ['CLEAR_DATA'] = 'true'
+    else:
+        os.environ.pop('DISABLE_MYSQL', None)
+
+    site = MockSite(args.subcategories, args.pages, args.deals, args.stores, args.related, args.page_kb)
+    print(f"Mock site: {len(site.categories)} categories, {len(site.stores)} stores, {site.total_deals:,} deals")
+    levels = run(args)
+    sha, dirty = git_commit()
+    result = {
+        'commit': sha,
+        'dirty': dirty,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'versions': library_versions(),
+        'database': f"mysql:{args.mysql}" if args.mysql else 'sqlite',
+        'site': {'categories': len(site.categories), 'stores': len(site.stores), 'deals': site.total_deals,
+                 'pages': args.pages, 'page_kb': args.page_kb, 'latency': args.latency, 'jitter': args.jitter,
+                 'errors': {str(status): rate for status, rate in args.errors.items()}, 'gzip': args.gzip},
+        'levels': levels,
+    }
+    report(result)
+
+    if not args.no_save:
+        output = args.output or os.path.join(RESULTS_DIR, f"e2e-{sha}{'-dirty' if dirty else ''}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Saved {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Benchmark: DealnewsSpider callbacks over a fixed page corpus, comparable across commits.
+
+The corpus is a mix of home, category, store and deal detail pages: the real
+pages in benchmarks/corpus/ by default (saved *.html or a recorded
+dealnews.pack), other saved pages (--pages DIR) or a crawl recorded with
+RESPONSE_CACHE_MODE=record (--pack .scrapy/httpcache/dealnews). Without a
+corpus, or with --synthetic, synthetic pages from benchmarks/fixtures.py are
+used; the result is marked synthetic, since their markup is only
+DealNews-shaped and the numbers are not those of the live site.
+The spider is built without a crawler, so there is no MySQL connection, no
+persisted seen-URL store and no network: requests the callbacks yield are only
+counted. Each timed run uses fresh spiders, so no deal is skipped as seen.
+
+Reported per run:
+- pages/sec and deals/sec of the crawl callbacks (parse for listing pages,
+  parse_deal_detail for detail pages);
+- latency percentiles per callback, also for parse_json_ld_deals and
+  extract_deal_item (every candidate of a listing page), which parse runs;
+- traced memory per page (tracemalloc peak above the baseline), in a
+  separate untimed pass.
+
+Results are saved as JSON named after the git commit (benchmarks/results/),
+together with a digest of the corpus; --compare BASE.json prints the change
+of every metric against an earlier result and exits with status 1 when
+throughput, memory or a callback's median latency regressed by more than
+--threshold (tail percentiles are shown, but too noisy to gate on).
+
+Usage:
+    python -m benchmarks.bench_parser                         # benchmarks/corpus/, else synthetic
+    python -m benchmarks.bench_parser --synthetic             # synthetic corpus
+    python -m benchmarks.bench_parser --pages DIR             # saved pages (*.html)
+    python -m benchmarks.bench_parser --pack .scrapy/httpcache/dealnews
+    python -m benchmarks.bench_parser --compare benchmarks/results/1a2b3c4.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import logging
+import hashlib
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+import scrapy
+from scrapy.http import HtmlResponse
+from benchmarks.fixtures import CORPUS_DIR, default_corpus, synthetic_corpus, load_pages
+from dealnews_scraper.items import DealnewsItem
+from dealnews_scraper.dealids import make_dealid
+from dealnews_scraper.detail_page import DETAIL_PATH_RE
+from dealnews_scraper.candidates import find_deal_candidates
+from dealnews_scraper.structured_data import StructuredDataCache
+from dealnews_scraper.spiders.dealnews_spider import DealnewsSpider
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+LISTING_CALLBACKS = ('parse', 'parse_json_ld_deals', 'extract_deal_item')
+DETAIL_CALLBACKS = ('parse_deal_detail',)
+STORE_RE = re.compile(r'dealnews\.com/s\d+/')
+CATEGORY_RE = re.compile(r'dealnews\.com/c\d+/')
+
+# Metrics compared by --compare: (key, higher is better, counts as a regression)
+COMPARED = [('pages_per_sec', True, True), ('deals_per_sec', True, True), ('memory.peak_kb_per_page', False, True)]
+
+
+def page_kind(url):
+    if DETAIL_PATH_RE.search(url):
+        return 'detail'
+    if STORE_RE.search(url):
+        return 'store'
+    if CATEGORY_RE.search(url):
+        return 'category'
+    return 'home'
+
+
+def make_page(kind, url, body):
+    """Response for a corpus page; detail pages carry the dealid their request would"""
+    meta = {'dealid': make_dealid(url=url)} if kind == 'detail' else {}
+    return HtmlResponse(url=url, body=body, encoding='utf-8', request=scrapy.Request(url, meta=meta))
+
+
+def load_corpus(args):
+    """(kind, response) pairs plus a description of the source"""
+    if not (args.pack or args.pages or args.synthetic):
+        default = default_corpus()
+        if default is None:
+            print(f"⚠️  No corpus in {CORPUS_DIR}; using synthetic pages (not comparable with real-page results)")
+        elif default[0] == 'pack':
+            args.pack = default[1]
+        else:
+            args.pages = default[1]
+    if args.pack:
+        from dealnews_scraper.httpcache import ResponsePack
+        pack = ResponsePack(args.pack)
+        pages = [(r.url, r.body) for r in pack.responses() if r.status == 200 and isinstance(r, HtmlResponse)]
+        pack.close()
+        source = f"pack:{args.pack}"
+    elif args.pages:
+        pages = [(url, html.encode('utf-8')) for url, html in load_pages(args.pages)]
+        source = f"pages:{args.pages}"
+    else:
+        corpus = synthetic_corpus(args.count, args.deals)
+        pages = [(url, html.encode('utf-8')) for _, url, html in corpus]
+        source = f"synthetic:{args.count}x{args.deals}"
+    return [(page_kind(url), make_page(page_kind(url), url, body)) for url, body in pages], source
+
+
+def corpus_digest(corpus):
+    digest = hashlib.blake2b(digest_size=8)
+    for kind, response in corpus:
+        digest.update(response.url.encode('utf-8'))
+        digest.update(response.body)
+    return digest.hexdigest()
+
+
+def run_callback(spider, name, response):
+    """Run one callback to completion; returns the number of deal items it produced"""
+    if name == 'extract_deal_item':
+        structured = StructuredDataCache(response)
+        items = [spider.extract_deal_item(deal, response, structured)
+                 for deal in find_deal_candidates(response, structured)]
+        return sum(1 for item in items if item)
+    results = getattr(spider, name)(response)
+    return sum(1 for result in results or () if isinstance(result, DealnewsItem))
+
+
+def crawl_callback(kind):
+    return 'parse_deal_detail' if kind == 'detail' else 'parse'
+
+
+def timed_run(corpus):
+    """One pass over the corpus: (crawl seconds, deals, latencies per callback)
+
+    Every callback gets its own fresh spider, so parse_json_ld_deals() does not
+    skip the deals parse() has just marked as seen.
+    """
+    spiders = {name: DealnewsSpider() for name in LISTING_CALLBACKS + DETAIL_CALLBACKS}
+    latencies = {name: [] for name in LISTING_CALLBACKS + DETAIL_CALLBACKS}
+    crawl_seconds = 0.0
+    deals = 0
+    for kind, response in corpus:
+        for name in (DETAIL_CALLBACKS if kind == 'detail' else LISTING_CALLBACKS):
+            start = time.perf_counter()
+            produced = run_callback(spiders[name], name, response)
+            elapsed = time.perf_counter() - start
+            latencies[name].append(elapsed)
+            if name == crawl_callback(kind):
+                crawl_seconds += elapsed
+                deals += produced
+    return crawl_seconds, deals, latencies
+
+
+def memory_pass(corpus):
+    """tracemalloc peak above the baseline per page, in KB, for the crawl callbacks"""
+    spider = DealnewsSpider()
+    peaks = []
+    tracemalloc.start()
+    try:
+        for kind, response in corpus:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            run_callback(spider, crawl_callback(kind), response)
+            peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * pct // 100))  # ceil
+    return ordered[int(rank) - 1]
+
+
+def git_commit():
+    """(short sha, dirty) of the working tree, ('unknown', False) outside git"""
+    try:
+        sha = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD', '--'], capture_output=True).returncode != 0
+        return sha, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+
+
+def library_versions():
+    import lxml.etree
+    import parsel
+    return {'python': platform.python_version(), 'scrapy': scrapy.__version__,
+            'parsel': parsel.__version__, 'lxml': '.'.join(map(str, lxml.etree.LXML_VERSION))}
+
+
+def benchmark(corpus, source, repeat):
+    runs = [timed_run(corpus) for _ in range(repeat)]
+    best_seconds, deals, _ = min(runs, key=lambda run: run[0])
+    callbacks = {}
+    for name in LISTING_CALLBACKS + DETAIL_CALLBACKS:
+        samples = [seconds * 1000 for run in runs for seconds in run[2][name]]
+        if samples:
+            callbacks[name] = {
+                'calls': len(samples) // repeat,
+                'mean_ms': round(sum(samples) / len(samples), 3),
+                'p50_ms': round(percentile(samples, 50), 3),
+                'p90_ms': round(percentile(samples, 90), 3),
+                'p99_ms': round(percentile(samples, 99), 3),
+            }
+    peaks = memory_pass(corpus)
+    kinds = {}
+    for kind, _ in corpus:
+        kinds[kind] = kinds.get(kind, 0) + 1
+    sha, dirty = git_commit()
+    return {
+        'commit': sha,
+        'dirty': dirty,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'versions': library_versions(),
+        'corpus': {'source': source, 'synthetic': source.startswith('synthetic:'), 'pages': len(corpus),
+                   'kinds': kinds, 'digest': corpus_digest(corpus)},
+        'repeat': repeat,
+        'pages_per_sec': round(len(corpus) / best_seconds, 2) if best_seconds else 0.0,
+        'deals_per_sec': round(deals / best_seconds, 2) if best_seconds else 0.0,
+        'deals': deals,
+        'callbacks': callbacks,
+        'memory': {
+            'peak_kb_per_page': round(sum(peaks) / len(peaks), 1) if peaks else 0.0,
+            'max_peak_kb': round(max(peaks), 1) if peaks else 0.0,
+        },
+    }
+
+
+def metric(result, key):
+    value = result
+    for part in key.split('.'):
+        value = value.get(part, {}) if isinstance(value, dict) else {}
+    return value if isinstance(value, (int, float)) else None
+
+
+def compare(base, current, threshold):
+    """Print the change of each metric; returns the regressed metric names"""
+    if base.get('corpus', {}).get('digest') != current['corpus']['digest']:
+        print(f"⚠️  Corpus differs from the baseline ({base.get('corpus', {}).get('source')}); numbers are not comparable")
+    print(f"Compared with {base.get('commit')}{' (dirty)' if base.get('dirty') else ''} from {base.get('created')}:")
+    keys = list(COMPARED)
+    for name in current['callbacks']:
+        keys.append((f'callbacks.{name}.p50_ms', False, True))
+        keys.append((f'callbacks.{name}.p99_ms', False, False))
+    regressions = []
+    for key, higher_is_better, gated in keys:
+        old, new = metric(base, key), metric(current, key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        regressed = gated and (-change if higher_is_better else change) > threshold
+        if regressed:
+            regressions.append(key)
+        print(f"  {key:40s} {old:12,.2f} -> {new:12,.2f}  ({change:+7.1%}){'  ❌ regression' if regressed else ''}")
+    return regressions
+
+
+def report(result):
+    corpus = result['corpus']
+    print("=" * 60)
+    print(f"Parser benchmark at {result['commit']}{' (dirty)' if result['dirty'] else ''}: "
+          f"{corpus['pages']} {'synthetic ' if corpus.get('synthetic') else ''}pages {corpus['kinds']}, "
+          f"best of {result['repeat']}")
+    print("=" * 60)
+    print(f"Pages/sec:  {result['pages_per_sec']:10,.1f}")
+    print(f"Deals/sec:  {result['deals_per_sec']:10,.1f}  ({result['deals']:,} deals per pass)")
+    print(f"Traced memory per page: {result['memory']['peak_kb_per_page']:,.1f} KB (max {result['memory']['max_peak_kb']:,.1f} KB)")
+    print(f"{'Callback':22s} {'calls':>6s} {'mean':>9s} {'p50':>9s} {'p90':>9s} {'p99':>9s}  (ms)")
+    for name, row in result['callbacks'].items():
+        print(f"{name:22s} {row['calls']:6d} {row['mean_ms']:9.2f} {row['p50_ms']:9.2f} {row['p90_ms']:9.2f} {row['p99_ms']:9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the spider callbacks over a fixed page corpus')
+    parser.add_argument('--pages', help='Directory of saved pages (*.html) (default: benchmarks/corpus/)')
+    parser.add_argument('--pack', help='Response pack recorded with RESPONSE_CACHE_MODE=record (path without .pack)')
+    parser.add_argument('--synthetic', action='store_true', help='Use synthetic pages even if benchmarks/corpus/ has pages')
+    parser.add_argument('--count', type=int, default=40, help='Synthetic pages to generate (default: 40)')
+    parser.add_argument('--deals', type=int, default=40, help='Deals per synthetic listing page (default: 40)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs; throughput is the best run (default: 5)')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--no-save', action='store_true', help='Do not write a result file')
+    parser.add_argument('--compare', help='Earlier result file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative change counted as a regression (default: 0.10)')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)  # production runs at LOG_LEVEL=WARNING
+    corpus, source = load_corpus(args)
+    if not corpus:
+        parser.error('the corpus is empty')
+    result = benchmark(corpus, source, args.repeat)
+    report(result)
+
+    if not args.no_save:
+        output = args.output or os.path.join(RESULTS_DIR, f"{result['commit']}{'-dirty' if result['dirty'] else ''}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Saved {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), result, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Page fixtures for the benchmarks.
+
+Pages are either loaded from a directory of saved DealNews HTML files
+(--pages DIR; the URL is read from a <!-- url: ... --> first line when present)
+or generated here: deterministic synthetic pages with the structure of a
+DealNews listing (nav menu, deal cards with JSON-LD, click-out links, product
+blocks, sidebar and footer) or deal detail page (one deal plus related deals).
+synthetic_corpus() mixes home, category, store and detail pages.
+
+Real pages are the default once they are in benchmarks/corpus/ (saved *.html
+files, or a dealnews.pack / dealnews.idx pair recorded with
+RESPONSE_CACHE_MODE=record); the synthetic pages are the fallback when that
+directory is missing, and results say which one was used.
+"""
+import os
+import json
+import random
+from scrapy.http import HtmlResponse
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+STORES = ['Amazon', 'Best Buy', 'Walmart', 'Target', 'eBay', 'Newegg', 'Home Depot', "Macy's", 'Dell', 'Lowe\'s']
+CATEGORIES = [
+    ('142', 'Electronics'), ('39', 'Computers'), ('202', 'Clothing & Accessories'),
+    ('196', 'Home & Garden'), ('756', 'Laptops'), ('191', 'Tools & Hardware'),
+]
+PRODUCTS = [
+    'Apple AirPods Pro 2nd Gen', 'Samsung 65" 4K Smart TV', 'Dell Inspiron 15 Laptop',
+    'Nike Men\'s Running Shoes', 'DeWalt 20V Drill Kit', 'Instant Pot Duo 6-Quart',
+    'Sony WH-1000XM5 Headphones', 'Levi\'s 501 Jeans', 'Ninja Air Fryer', 'Lenovo ThinkPad X1',
+]
+
+
+def deal_card(rng, index, deal_id=None):
+    if deal_id is None:
+        deal_id = 21000000 + rng.randrange(1000000)
+    product = rng.choice(PRODUCTS)
+    store = rng.choice(STORES)
+    category_id, category = rng.choice(CATEGORIES)
+    price = rng.randrange(5, 1500) + 0.99
+    slug = product.replace(' ', '-').replace('"', '').replace("'", '')
+    detail_url = f"https://www.dealnews.com/{slug}/{deal_id}.html"
+    click_url = f"https://www.dealnews.com/lw/click.html?1_{deal_id}&t={index}"
+    offer = {
+        '@context': 'https://schema.org',
+        '@type': 'Offer',
+        'name': product,
+        'url': detail_url,
+        'price': f"{price:.2f}",
+        'seller': {'@type': 'Organization', 'name': store},
+        'category': {'name': category, 'url': f"https://www.dealnews.com/c{category_id}/{category.replace(' ', '-')}/"},
+    }
+    return f"""
+    <div class="content-card deal-item snippet" data-deal-id="{deal_id}" data-content-id="{deal_id}" data-offer-url="{click_url}">
+      <div class="content-card-image"><a href="{detail_url}"><img src="https://c.dlnws.com/image/upload/{deal_id}.jpg" alt="{product}"></a></div>
+      <div class="content-card-body">
+        <h3 class="title"><a href="{detail_url}" class="title-link">{product} for ${price:.2f}</a></h3>
+        <div class="key-attribute">{store} · {rng.randrange(1, 23)} hrs ago</div>
+        <div class="callout">${price:.2f} <span class="callout-comparison">${price * 1.4:.2f}</span></div>
+        <div class="snippet summary">Save ${price * 0.4:.0f} off list price. {'Free shipping w/ Prime.' if rng.random() < 0.3 else 'Free shipping.'}</div>
+        <div class="product-badges"><span class="badge">Popularity: {rng.randrange(1, 5)}/5</span>{' <span class="badge staff-pick">Staff Pick</span>' if rng.random() < 0.2 else ''}</div>
+        <a class="btn btn-primary shop-button" href="{click_url}" title="Shop Now at {store}">Shop Now at {store}</a>
+      </div>
+      <script type="application/ld+json">{json.dumps(offer)}</script>
+    </div>"""
+
+
+def listing_page(seed=0, deals=40):
+    """Synthetic DealNews listing page; same seed gives the same HTML"""
+    rng = random.Random(seed)
+    category_id, category = CATEGORIES[seed % len(CATEGORIES)]
+    nav = ''.join(
+        f'<li class="menu-item"><a href="https://www.dealnews.com/c{cid}/{name.replace(" ", "-")}/">{name}</a></li>'
+        for cid, name in CATEGORIES
+    )
+    cards = ''.join(deal_card(rng, index) for index in range(deals))
+    sidebar = ''.join(
+        f'<li class="listing-row"><a href="https://www.dealnews.com/s{300 + n}/{store.replace(" ", "-")}/">{store} coupons</a></li>'
+        for n, store in enumerate(STORES)
+    )
+    item_list = {'@context': 'https://schema.org', '@type': 'ItemList', 'numberOfItems': deals}
+    return f"""<!DOCTYPE html>
+<html><head><title>{category} Deals | DealNews</title>
+<script type="application/ld+json">{json.dumps({'@type': 'WebSite', 'name': 'DealNews'})}</script>
+</head>
+<body>
+<script type="application/ld+json">{json.dumps(item_list)}</script>
+<header class="site-header"><nav class="nav-menu-main"><ul>{nav}</ul></nav>
+<form class="search"><input name="q"></form></header>
+<main class="page-content">
+  <h1>{category} Deals</h1>
+  <div class="filter-bar"><a href="?sort=newest">Newest</a> <a href="?sort=popular">Popular</a></div>
+  <section class="content-list">{cards}</section>
+  <div class="pagination"><a href="https://www.dealnews.com/c{category_id}/{category.replace(' ', '-')}/?start=20">Next</a></div>
+</main>
+<aside class="sidebar"><h4>Popular Stores</h4><ul class="store-listing">{sidebar}</ul></aside>
+<footer class="site-footer"><a href="/about/">About Us</a> <a href="/contact/">Contact</a></footer>
+</body></html>"""
+
+
+def detail_page(seed=0, related=8):
+    """Synthetic DealNews deal detail page; same seed gives the same HTML"""
+    rng = random.Random(seed)
+    card = deal_card(rng, 0)
+    links = ''.join(
+        f'<li><a href="https://www.dealnews.com/{slug.replace(" ", "-")}/{21000000 + rng.randrange(1000000)}.html">{slug}</a></li>'
+        for slug in rng.sample(PRODUCTS, min(related, len(PRODUCTS)))
+    )
+    nav = ''.join(
+        f'<li class="menu-item"><a href="https://www.dealnews.com/c{cid}/{name.replace(" ", "-")}/">{name}</a></li>'
+        for cid, name in CATEGORIES
+    )
+    return f"""<!DOCTYPE html>
+<html><head><title>Deal | DealNews</title></head>
+<body>
+<header class="site-header"><nav class="nav-menu-main"><ul>{nav}</ul></nav></header>
+<main class="page-content">{card}
+  <section class="related-deals"><h2>Related Deals</h2><ul>{links}</ul></section>
+</main>
+<aside class="sidebar"><a href="https://www.dealnews.com/s313/Amazon/">Amazon coupons</a></aside>
+<footer class="site-footer"><a href="/about/">About Us</a></footer>
+</body></html>"""
+
+
+def detail_url(html):
+    """URL of a synthetic detail page: its deal's own /<id>.html link"""
+    start = html.index('<h3 class="title"><a href="') + len('<h3 class="title"><a href="')
+    return html[start:html.index('"', start)]
+
+
+def synthetic_corpus(count=40, deals=40):
+    """(kind, url, html) triples: home, category, store and detail pages in a fixed mix"""
+    corpus = []
+    for seed in range(count):
+        kind = ('category', 'detail', 'store', 'detail', 'category', 'home', 'detail', 'category')[seed % 8]
+        if kind == 'detail':
+            html = detail_page(seed)
+            corpus.append((kind, detail_url(html), html))
+            continue
+        if kind == 'home':
+            url = 'https://www.dealnews.com/'
+        elif kind == 'store':
+            store = STORES[seed % len(STORES)]
+            url = f"https://www.dealnews.com/s{300 + seed % len(STORES)}/{store.replace(' ', '-')}/"
+        else:
+            category_id, category = CATEGORIES[seed % len(CATEGORIES)]
+            url = f"https://www.dealnews.com/c{category_id}/{category.replace(' ', '-')}/?start={20 * (seed // 8)}"
+        corpus.append((kind, url, listing_page(seed, deals)))
+    return corpus
+
+
+def synthetic_pages(count=20, deals=40):
+    """(url, html) pairs of synthetic listing pages"""
+    pages = []
+    for seed in range(count):
+        category_id, category = CATEGORIES[seed % len(CATEGORIES)]
+        url = f"https://www.dealnews.com/c{category_id}/{category.replace(' ', '-')}/?start={20 * (seed // len(CATEGORIES))}"
+        pages.append((url, listing_page(seed, deals)))
+    return pages
+
+
+def default_corpus():
+    """('pack', path) or ('pages', directory) for benchmarks/corpus/, or None if it holds no pages"""
+    if os.path.exists(os.path.join(CORPUS_DIR, 'dealnews.pack')):
+        return 'pack', os.path.join(CORPUS_DIR, 'dealnews')
+    if os.path.isdir(CORPUS_DIR) and any(name.endswith('.html') for name in os.listdir(CORPUS_DIR)):
+        return 'pages', CORPUS_DIR
+    return None
+
+
+def load_pages(directory):
+    """(url, html) pairs from saved .html files in a directory"""
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.html'):
+            continue
+        with open(os.path.join(directory, name), encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        url = 'https://www.dealnews.com/'
+        first_line = html.split('\n', 1)[0].strip()
+        if first_line.startswith('<!-- url:') and first_line.endswith('-->'):
+            url = first_line[len('<!-- url:'):-len('-->')].strip()
+        pages.append((url, html))
+    return pages
+
+
+def make_response(url, html):
+    return HtmlResponse(url=url, body=html.encode('utf-8'), encoding='utf-8')
+
+
+def get_pages(directory=None, count=20, deals=40):
+    """Saved pages when a directory is given or benchmarks/corpus/ has some, synthetic pages otherwise"""
+    if directory is None:
+        default = default_corpus()
+        if default is not None and default[0] == 'pages':
+            directory = default[1]
+    if directory:
+        return load_pages(directory)
+    print(f"⚠️  No saved pages in {CORPUS_DIR}; using {count} synthetic listing pages")
+    return synthetic_pages(count, deals)
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Local mock of the DealNews site for end-to-end benchmarks.
+
+Serves a deterministic, finite site with the URL shapes the spider crawls:
+
+- /, /?e=1, /?pf=1 and /cNNN/<path>/ listing pages with ?start= pagination
+  (an empty page past the last one);
+- a category tree: the spider's start categories, each with --subcategories
+  children linked from its page, plus /sitemap/ listing all of them;
+- /online-stores/ linking to /stores/<Name>/ listing pages;
+- /<slug>/<id>.html detail pages with one deal and --related related deal links;
+- /lw/click.html click-out links, redirecting to a merchant URL off the site.
+
+Every listing stream (home, each category, each store) owns a block of deal
+ids, so listing and detail pages agree on a deal and related links always point
+at deals that exist. Links are absolute https://www.dealnews.com URLs, as on the
+real site; benchmarks/bench_e2e.py routes those requests here.
+
+Latency (--latency, --jitter), page size (--page-kb) and injected 403/429/503
+responses (--errors 429=0.02,503=0.01) are configurable.
+
+Usage:
+    python -m benchmarks.mock_site --port 8800 --latency 20 --errors 429=0.02
+"""
+import re
+import sys
+import gzip
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from benchmarks.fixtures import STORES, deal_card, detail_url
+
+SITE = 'https://www.dealnews.com'
+MERCHANT = 'https://merchant.example.com'
+# Top-level categories: the spider's start URLs plus the ones fixtures.deal_card links to
+ROOT_CATEGORIES = [
+    ('142', 'Electronics'), ('39', 'Computers'), ('196', 'Home-Garden'),
+    ('202', 'Clothing-Accessories'), ('191', 'Gaming-Toys/Video-Games'), ('298', 'Sports-Fitness'),
+    ('765', 'Health-Beauty'), ('206', 'Travel-Entertainment'), ('203', 'Clothing-Accessories/Mens-Clothing'),
+    ('204', 'Clothing-Accessories/Womens-Clothing'), ('143', 'Electronics/Audio'),
+    ('144', 'Electronics/Cell-Phones'), ('145', 'Electronics/Cameras'), ('40', 'Computers/Laptops'),
+    ('41', 'Computers/Tablets'), ('756', 'Laptops'),
+]
+HOME_STREAMS = ('', 'e=1', 'pf=1')
+DEAL_ID_BASE = 20000000
+STREAM_SPAN = 10000  # deal ids per listing stream
+CATEGORY_RE = re.compile(r'^/c(\d+)(?:/|$)')
+STORE_RE = re.compile(r'^/stores/([^/]+)/?$')
+DETAIL_RE = re.compile(r'^/[^/]+/(\d+)\.html$')
+FILLER = 'Prices and availability are subject to change. ' * 32
+
+
+class MockSite:
+    """Page generator for the mock site; render() maps a path and query to (status, html)"""
+
+    def __init__(self, subcategories=2, pages=3, deals=20, stores=10, related=6, page_kb=0):
+        self.pages = pages
+        self.deals = deals
+        self.related = related
+        self.page_kb = page_kb
+        self.categories = {}  # id -> (path, children ids)
+        for index, (category_id, path) in enumerate(ROOT_CATEGORIES):
+            children = [str(1000 + index * subcategories + k) for k in range(subcategories)]
+            self.categories[category_id] = (path, children)
+            for k, child_id in enumerate(children):
+                self.categories[child_id] = (f"{path}/Sub-{k + 1}", [])
+        self.stores = [name.replace(' ', '-').replace("'", '') for name in STORES[:stores]]
+        # Stream ordinal -> deal id block
+        self.streams = [f"home:{query}" for query in HOME_STREAMS]
+        self.streams += [f"category:{category_id}" for category_id in self.categories]
+        self.streams += [f"store:{name}" for name in self.stores]
+        self.ordinals = {stream: n for n, stream in enumerate(self.streams)}
+
+    @property
+    def total_deals(self):
+        return len(self.streams) * self.pages * self.deals
+
+    def deal_exists(self, deal_id):
+        ordinal, position = divmod(deal_id - DEAL_ID_BASE, STREAM_SPAN)
+        return 0 <= ordinal < len(self.streams) and position < self.pages * self.deals
+
+    def category_url(self, category_id):
+        return f"{SITE}/c{category_id}/{self.categories[category_id][0]}/"
+
+    def render(self, path, query):
+        """(status, html) for a request path and query string; (302, location) for redirects"""
+        params = parse_qs(query)
+        start = int((params.get('start') or ['0'])[0] or 0)
+        if path in ('', '/'):
+            home = 'e=1' if 'e' in params else 'pf=1' if 'pf' in params else ''
+            return 200, self.listing('DealNews', f"home:{home}", start)
+        if path.rstrip('/') == '/sitemap':
+            links = ''.join(f'<li><a href="{self.category_url(cid)}">{cid}</a></li>' for cid in self.categories)
+            return 200, self.page('Sitemap', f'<ul class="sitemap">{links}</ul>')
+        if path.rstrip('/') == '/online-stores':
+            links = ''.join(f'<li class="store"><a href="{SITE}/stores/{name}/">{name}</a></li>' for name in self.stores)
+            return 200, self.page('Online Stores', f'<ul class="stores">{links}</ul>')
+        match = CATEGORY_RE.match(path)
+        if match:
+            category_id = match.group(1)
+            if category_id not in self.categories:
+                return 404, self.page('Not Found', '')
+            children = ''.join(
+                f'<li><a href="{self.category_url(child)}">{self.categories[child][0]}</a></li>'
+                for child in self.categories[category_id][1]
+            )
+            return 200, self.listing(self.categories[category_id][0], f"category:{category_id}", start,
+                                     f'<ul class="categories">{children}</ul>')
+        match = STORE_RE.match(path)
+        if match:
+            if match.group(1) not in self.stores:
+                return 404, self.page('Not Found', '')
+            return 200, self.listing(match.group(1), f"store:{match.group(1)}", start)
+        if path == '/lw/click.html':
+            return 302, f"{MERCHANT}/{query.split('&', 1)[0]}"
+        match = DETAIL_RE.match(path)
+        if match and self.deal_exists(int(match.group(1))):
+            return 200, self.detail(int(match.group(1)))
+        return 404, self.page('Not Found', '')
+
+    def card(self, deal_id, index=0):
+        return deal_card(random.Random(deal_id), index, deal_id)
+
+    def listing(self, title, stream, start, extra=''):
+        """Listing page of a stream at a start= offset; empty past the last page"""
+        first = DEAL_ID_BASE + self.ordinals[stream] * STREAM_SPAN + start
+        count = max(0, min(self.deals, self.pages * self.deals - start))
+        cards = ''.join(self.card(first + i, i) for i in range(count))
+        return self.page(f"{title} Deals", f'{extra}<section class="content-list">{cards}</section>')
+
+    def detail(self, deal_id):
+        """Detail page: the deal plus related deals from its own and the next stream"""
+        span = self.pages * self.deals
+        ordinal, position = divmod(deal_id - DEAL_ID_BASE, STREAM_SPAN)
+        related = []
+        for k in range(1, self.related + 1):
+            other = (ordinal + k % 2) % len(self.streams)
+            related.append(DEAL_ID_BASE + other * STREAM_SPAN + (position + k) % span)
+        links = ''.join(f'<li><a href="{detail_url(self.card(rid))}">Related deal {rid}</a></li>' for rid in related)
+        return self.page('Deal', f'{self.card(deal_id)}<section class="related-deals"><h2>Related Deals</h2><ul>{links}</ul></section>')
+
+    def page(self, title, content):
+        nav = ''.join(f'<li class="menu-item"><a href="{self.category_url(cid)}">{path}</a></li>'
+                      for cid, path in ROOT_CATEGORIES)
+        filler = ''
+        if self.page_kb:
+            filler = f'<div class="legal" hidden>{FILLER * (self.page_kb * 1024 // len(FILLER) + 1)}</div>'
+        return f"""<!DOCTYPE html>
+<html><head><title>{title} | DealNews</title>
+<script type="application/ld+json">{json.dumps({'@type': 'WebSite', 'name': 'DealNews'})}</script>
+</head>
+<body>
+<header class="site-header"><nav class="nav-menu-main"><ul>{nav}</ul></nav></header>
+<main class="page-content"><h1>{title}</h1>{content}</main>
+<footer class="site-footer"><a href="/about/">About Us</a>{filler}</footer>
+</body></html>"""
+
+
+def parse_errors(spec):
+    """'429=0.02,503=0.01' -> {429: 0.02, 503: 0.01}"""
+    errors = {}
+    for part in filter(None, (spec or '').split(',')):
+        status, _, rate = part.partition('=')
+        if int(status) not in (403, 429, 503):
+            raise ValueError(f"Only 403, 429 and 503 can be injected, not {status}")
+        errors[int(status)] = float(rate)
+    return errors
+
+
+class MockSiteHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real site
+
+    def do_GET(self):
+        server = self.server
+        delay = server.latency * (1 + server.jitter * (2 * random.random() - 1))
+        if delay > 0:
+            time.sleep(delay)
+        status, html = None, ''
+        roll = random.random()
+        for error_status, rate in server.errors.items():
+            if roll < rate:
+                status, html = error_status, f'<html><body><h1>{error_status}</h1></body></html>'
+                break
+            roll -= rate
+        if status is None:
+            parts = urlsplit(self.path)
+            status, html = server.site.render(parts.path, parts.query)
+        self.send_response(status)
+        if status == 302:
+            self.send_header('Location', html)
+            html = ''
+        body = html.encode('utf-8')
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if server.gzip and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            body = gzip.compress(body, compresslevel=5)
+            self.send_header('Content-Encoding', 'gzip')
+        if status == 503:
+            self.send_header('Retry-After', '1')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.counts[status] = server.counts.get(status, 0) + 1
+
+    def log_message(self, format, *args):
+        pass  # one line per request would dominate the benchmark
+
+
+def make_server(site, port=0, latency_ms=0.0, jitter=0.5, errors=None, gzip_enabled=True):
+    server = ThreadingHTTPServer(('127.0.0.1', port), MockSiteHandler)
+    server.daemon_threads = True
+    server.site = site
+    server.latency = latency_ms / 1000
+    server.jitter = jitter
+    server.errors = errors or {}
+    server.gzip = gzip_enabled
+    server.lock = threading.Lock()
+    server.counts = {}
+    return server
+
+
+def serve(options, ready=None):
+    """Run the mock site until killed; the bound port is put on the ready queue"""
+    site = MockSite(options['subcategories'], options['pages'], options['deals'],
+                    options['stores'], options['related'], options['page_kb'])
+    server = make_server(site, options.get('port', 0), options['latency'], options['jitter'],
+                         options['errors'], options['gzip'])
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def add_site_arguments(parser):
+    """Site shape and behaviour options, shared with bench_e2e"""
+    parser.add_argument('--subcategories', type=int, default=2, help='Subcategories per top-level category (default: 2)')
+    parser.add_argument('--pages', type=int, default=3, help='Listing pages per category / store / home stream (default: 3)')
+    parser.add_argument('--deals', type=int, default=20, help='Deals per listing page (default: 20)')
+    parser.add_argument('--stores', type=int, default=10, help=f'Store pages, up to {len(STORES)} (default: 10)')
+    parser.add_argument('--related', type=int, default=6, help='Related deal links per detail page (default: 6)')
+    parser.add_argument('--page-kb', type=int, default=0, help='Filler added to every page, in KB (default: 0)')
+    parser.add_argument('--latency', type=float, default=20.0, help='Mean response latency in ms (default: 20)')
+    parser.add_argument('--jitter', type=float, default=0.5, help='Latency varies by +/- this fraction (default: 0.5)')
+    parser.add_argument('--errors', type=parse_errors, default={}, help='Injected error rates, e.g. 429=0.02,503=0.01,403=0.005')
+    parser.add_argument('--no-gzip', dest='gzip', action='store_false', help='Do not gzip responses')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a local mock of the DealNews site')
+    parser.add_argument('--port', type=int, default=8800, help='Port to listen on (default: 8800)')
+    add_site_arguments(parser)
+    options = vars(parser.parse_args())
+    site = MockSite(options['subcategories'], options['pages'], options['deals'],
+                    options['stores'], options['related'], options['page_kb'])
+    print(f"Mock DealNews site on http://127.0.0.1:{options['port']}/ : {len(site.categories)} categories, "
+          f"{len(site.stores)} stores, {site.total_deals:,} deals")
+    try:
+        serve(options)
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
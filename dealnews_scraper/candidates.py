@@ -0,0 +1,215 @@
+"""
+Single-pass deal candidate discovery for listing pages.
+
+DealnewsSpider.parse() used to run six independent selector strategies over the
+page (each a full tree scan, plus one ancestor XPath per link) and then dedup
+the results by serializing every candidate. find_deal_candidates() walks the
+lxml tree once with iterwalk, classifies each element against all strategies,
+and tracks the nearest matching ancestors on stacks so link containers are
+found without extra XPath queries. Candidates are returned in the same order as
+before (strategy 1 first, then 2, ...) and deduped by the same data-deal-id /
+first-link key, falling back to element identity instead of hashed HTML.
+
+Strategy 4 (product/offer containers) checks descendant text with a compiled
+string() XPath instead of serializing each container, and only for the
+outermost container of a nested group.
+"""
+from lxml import etree
+from scrapy import Selector
+
+# Strategy 1: deal links, contained by the nearest deal/item/card ancestor
+DEAL_LINK_PATTERNS = ('/deals/', '/deal/', '/d/')
+LINK_CONTAINER_CLASSES = ('deal', 'item', 'card')
+
+# Strategy 3: container selectors, in the order parse() used to run them.
+# Each entry is (tag or None, class token or None, class substring or None).
+CONTAINER_RULES = [
+    ('article', 'deal', None),          # article.deal
+    ('article', None, 'deal'),          # article[class*="deal"]
+    ('div', 'deal-item', None),         # div.deal-item
+    ('div', None, 'deal-item'),         # div[class*="deal-item"]
+    ('div', 'deal-card', None),         # div.deal-card
+    ('div', None, 'deal-card'),         # div[class*="deal-card"]
+    ('div', 'deal-tile', None),         # div.deal-tile
+    ('div', None, 'deal-tile'),         # div[class*="deal-tile"]
+    ('div', None, 'deal-container'),    # div[class*="deal-container"]
+    ('div', None, 'deal-wrapper'),      # div[class*="deal-wrapper"]
+    ('div', None, 'deal-box'),          # div[class*="deal-box"]
+    ('div', None, 'deal-content'),      # div[class*="deal-content"]
+    ('div', None, 'deal-listing'),      # div[class*="deal-listing"]
+    ('div', None, 'deal-post'),         # div[class*="deal-post"]
+    ('div', None, 'deal-entry'),        # div[class*="deal-entry"]
+    (None, 'item', 'deal'),             # .item[class*="deal"]
+    (None, 'card', 'deal'),             # .card[class*="deal"]
+    (None, 'tile', 'deal'),             # .tile[class*="deal"]
+]
+
+# Strategy 4: product/offer containers with deal-like content
+PRODUCT_CLASSES = ('product', 'offer', 'listing')
+DEAL_TEXT_MARKERS = ('deal', '$', 'off', 'sale')
+
+# Strategy 5: JSON-LD types that mark a page as carrying structured deals
+JSON_LD_DEAL_TYPES = ('Offer', 'Product', 'ItemList')
+
+# Strategy 6: click-out links, contained by the nearest article or deal-ish ancestor
+CLICK_LINK_PATTERN = 'lw/click.html'
+CLICK_CONTAINER_CLASSES = ('deal', 'offer', 'snippet', 'item', 'card')
+
+# Dedup key lookups (same as deal.css('::attr(data-deal-id)') etc.)
+DEAL_ID_XPATH = etree.XPath('descendant-or-self::*/@data-deal-id')
+REC_ID_XPATH = etree.XPath('descendant-or-self::*/@data-rec-id')
+FIRST_HREF_XPATH = etree.XPath('descendant-or-self::a/@href')
+
+# Descendant text of a node, without serializing its markup
+NODE_TEXT_XPATH = etree.XPath('string(.)')
+
+STRATEGY_NAMES = ('links', 'data_attributes', 'containers', 'products', 'json_ld', 'click_links')
+
+
+def has_deal_text(node):
+    """Strategy 4 predicate: container text mentions a deal, price or sale.
+
+    Only descendant text is checked (not tag names, classes or URLs), so a
+    container is not matched just for class="offer" or a dealnews.com link.
+    """
+    text = NODE_TEXT_XPATH(node).lower()
+    return any(marker in text for marker in DEAL_TEXT_MARKERS)
+
+
+def matches_container_rule(tag, classes, tokens, rule):
+    rule_tag, token, substring = rule
+    if rule_tag is not None and tag != rule_tag:
+        return False
+    if token is not None and token not in tokens:
+        return False
+    if substring is not None and substring not in classes:
+        return False
+    return True
+
+
+def json_ld_has_deals(structured):
+    if structured is None:
+        return False
+    return any(
+        isinstance(data, dict) and data.get('@type') in JSON_LD_DEAL_TYPES
+        for data in structured.page_blocks()
+    )
+
+
+def dedup_key(node):
+    """data-deal-id, data-rec-id or first link of a candidate; None if it has none"""
+    for xpath in (DEAL_ID_XPATH, REC_ID_XPATH, FIRST_HREF_XPATH):
+        values = xpath(node)
+        if values and values[0]:
+            return values[0]
+    return None
+
+
+def find_deal_candidates(response, structured=None, stats=None):
+    """Return unique deal container Selectors for a listing page, in strategy order.
+
+    stats, if given, is a dict that receives per-strategy candidate counts plus
+    nodes_visited, product_checks and products_covered.
+    """
+    root = response.selector.root
+    buckets = {name: [] for name in STRATEGY_NAMES}
+    container_buckets = [[] for _ in CONTAINER_RULES]
+
+    link_containers = []    # nearest ancestors with deal/item/card in @class
+    articles = []           # nearest article ancestors
+    click_containers = []   # nearest ancestors with deal/offer/snippet/item/card in @class
+    json_ld_script = None   # first <body>/<script> whose text mentions @type
+    # Outermost product/offer container currently open. Its text includes all of
+    # its descendants' text, so nested containers are never checked: if it matched
+    # they are already covered, if it did not they cannot match either.
+    product_scope = None
+    nodes_visited = product_checks = products_covered = 0
+
+    for event, node in etree.iterwalk(root, events=('start', 'end')):
+        tag = node.tag
+        if not isinstance(tag, str):
+            continue  # comments and processing instructions
+
+        if event == 'end':
+            if node is product_scope:
+                product_scope = None
+            if link_containers and link_containers[-1] is node:
+                link_containers.pop()
+            if articles and articles[-1] is node:
+                articles.pop()
+            if click_containers and click_containers[-1] is node:
+                click_containers.pop()
+            continue
+
+        nodes_visited += 1
+        classes = node.get('class') or ''
+
+        if tag == 'a':
+            href = node.get('href') or ''
+            if any(pattern in href for pattern in DEAL_LINK_PATTERNS):
+                parent = link_containers[-1] if link_containers else node.getparent()
+                if parent is not None:
+                    buckets['links'].append(parent)
+            if CLICK_LINK_PATTERN in href:
+                parent = articles[-1] if articles else (click_containers[-1] if click_containers else node.getparent())
+                if parent is not None:
+                    buckets['click_links'].append(parent)
+
+        if (node.get('data-deal-id') is not None or node.get('data-rec-id') is not None
+                or node.get('data-deal') is not None or 'deal' in (node.get('data-id') or '')):
+            buckets['data_attributes'].append(node)
+
+        if classes:
+            tokens = classes.split()
+            for index, rule in enumerate(CONTAINER_RULES):
+                if matches_container_rule(tag, classes, tokens, rule):
+                    container_buckets[index].append(node)
+            if any(name in classes for name in PRODUCT_CLASSES):
+                if product_scope is None:
+                    product_scope = node
+                    product_checks += 1
+                    if has_deal_text(node):
+                        buckets['products'].append(node)
+                else:
+                    products_covered += 1
+
+        if (json_ld_script is None and tag == 'script' and '@type' in (node.text or '')
+                and node.getparent() is not None and node.getparent().tag == 'body'):
+            json_ld_script = node
+
+        # Push after handling the node itself: the stacks hold ancestors only
+        if classes:
+            if any(name in classes for name in LINK_CONTAINER_CLASSES):
+                link_containers.append(node)
+            if any(name in classes for name in CLICK_CONTAINER_CLASSES):
+                click_containers.append(node)
+        if tag == 'article':
+            articles.append(node)
+
+    for bucket in container_buckets:
+        buckets['containers'].extend(bucket)
+    if json_ld_script is not None and json_ld_has_deals(structured):
+        buckets['json_ld'].append(json_ld_script)
+
+    if stats is not None:
+        stats['nodes_visited'] = nodes_visited
+        stats['product_checks'] = product_checks
+        stats['products_covered'] = products_covered
+
+    seen_keys = set()
+    seen_nodes = set()
+    candidates = []
+    for name in STRATEGY_NAMES:
+        if stats is not None:
+            stats[name] = len(buckets[name])
+        for node in buckets[name]:
+            if node in seen_nodes:
+                continue
+            seen_nodes.add(node)
+            key = dedup_key(node)
+            if key is not None:
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+            candidates.append(Selector(root=node, type='html'))
+    return candidates
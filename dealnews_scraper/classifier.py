@@ -0,0 +1,209 @@
+"""
+Keyword classifier for the deal filter variables.
+
+extract_filter_variables() used to derive offer_type, condition, events and
+offer_status with chains of any(word in deal_text ...) checks, one pass over the
+text per keyword, and brand with a substring test per brand. DealClassifier
+compiles every keyword of every field into one alternation regex and scans the
+text once; the labels are then resolved with the same priority order and
+defaults as before. Keywords keep their substring semantics ('off' still matches
+inside 'office', 'new' inside 'news').
+
+Brands are loaded from data/brands.txt (plus an optional extra file, see
+BRANDS_FILE) into a dict keyed by the brand's word tokens, so a title is matched
+with a handful of dict lookups however many brands are listed. Brands match on
+whole words: with thousands of entries, substring matching would find 'hp' in
+'shipping'. When a title names several brands, the one listed first in the file
+wins, as with the old list.
+
+The deal-text, dealplus and popularity patterns used by extract_deal_item() and
+parse_json_ld_deals() are compiled here once instead of per text node.
+"""
+import os
+import re
+
+BRANDS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'brands.txt')
+
+# field -> ([(label, keywords), ...] in priority order, default label)
+FILTER_RULES = {
+    'offer_type': ([
+        ('Free Shipping', ('free shipping', 'free delivery')),
+        ('Coupon', ('coupon', 'discount code', 'promo code')),
+        ('Rebate', ('rebate', 'cashback', 'cash back')),
+        ('Sale', ('clearance', 'sale', 'off')),
+    ], ''),
+    'condition': ([
+        ('New', ('new', 'brand new')),
+        ('Used', ('used', 'pre-owned', 'second hand')),
+        ('Refurbished', ('refurbished', 'refurb')),
+    ], 'New'),
+    'events': ([
+        ('Black Friday', ('black friday', 'cyber monday', 'prime day')),
+        ('Holiday', ('christmas', 'holiday', 'xmas')),
+        ('Back to School', ('back to school', 'school')),
+    ], ''),
+    'offer_status': ([
+        ('Limited', ('limited time', 'expires', 'ending soon')),
+        ('Expired', ('expired', 'ended', 'no longer available')),
+    ], 'Active'),
+}
+
+# Discount phrases in a deal card's text nodes ("Up to 80% off"), in preference order
+DEAL_TEXT_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'Up to \d+% off',
+    r'Up to \d+%',
+    r'Save \d+%',
+    r'\d+% off',
+    r'\$\d+ off',
+    r'\d+-\w+ deals?',  # e.g., "1-cent deals"
+)]
+
+# Same for JSON-LD names and descriptions, which also carry gift card and per-item offers
+JSON_DEAL_TEXT_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'Up to \d+% off',
+    r'Up to \d+%',
+    r'Save \d+%',
+    r'\d+% off',
+    r'\$\d+ off',
+    r'\$\d+ gift card',
+    r'\d+-\w+ deals?',  # e.g., "1-cent deals"
+    r'\$\d+/\w+',  # e.g., "$5/item"
+)]
+
+GIFT_CARD_RE = re.compile(r'\$?\d+ gift card', re.IGNORECASE)
+FREE_SHIPPING_MIN_RE = re.compile(r'free shipping\s+w/?\s*\$?(\d+)', re.IGNORECASE)
+SHIPPING_MIN_RE = re.compile(r'w/?\s*\$?(\d+)', re.IGNORECASE)
+POPULARITY_RE = re.compile(r'(Popularity:?\s*)?(\d+/\d+)', re.IGNORECASE)
+JSON_POPULARITY_RE = re.compile(r'(Popularity:?\s*\d+/\d+|\d+/\d+)', re.IGNORECASE)
+
+# Brand names and titles are compared as lowercase word tokens ("levi's", "at&t", "b&h")
+WORD_RE = re.compile(r"[a-z0-9]+(?:['&.+-][a-z0-9]+)*")
+
+
+def first_match(patterns, text):
+    """Text of the first pattern (in list order) that matches, else ''"""
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return match.group(0)
+    return ''
+
+
+def words(text):
+    return WORD_RE.findall(text.lower())
+
+
+def load_brands(*paths):
+    """Brand display names from one or more files, in file order, without duplicates.
+
+    One brand per line as it should be displayed; blank lines and lines starting
+    with # are skipped. Missing files are ignored.
+    """
+    brands = []
+    seen = set()
+    for path in paths:
+        if not path or not os.path.exists(path):
+            continue
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                name = line.strip()
+                if not name or name.startswith('#'):
+                    continue
+                key = tuple(words(name))
+                if key and key not in seen:
+                    seen.add(key)
+                    brands.append(name)
+    return brands
+
+
+class DealClassifier:
+    """Compiled filter-variable keyword sets and brand dictionary"""
+
+    def __init__(self, rules=None, brands=None):
+        self.rules = FILTER_RULES if rules is None else rules
+        self.defaults = {field: default for field, (_labels, default) in self.rules.items()}
+
+        # keyword -> [(field, priority), ...]
+        self.keyword_labels = {}
+        for field, (labels, _default) in self.rules.items():
+            for priority, (_label, keywords) in enumerate(labels):
+                for keyword in keywords:
+                    self.keyword_labels.setdefault(keyword, []).append((field, priority))
+        # Alternatives are grouped by first character and longest first, so each
+        # match is the longest keyword at its position and the engine rejects
+        # most positions with one comparison. Matches do not overlap: a match
+        # also credits the keywords inside it ('brand new' -> 'new'), and the
+        # few keywords that could start inside it and run past its end
+        # ('cash back' -> 'back to school') are checked directly.
+        keywords = sorted(self.keyword_labels, key=lambda keyword: (-len(keyword), keyword))
+        groups = {}
+        for keyword in keywords:
+            groups.setdefault(keyword[0], []).append(re.escape(keyword[1:]))
+        self.keyword_re = re.compile('|'.join(
+            '%s(?:%s)' % (re.escape(first), '|'.join(rests)) for first, rests in sorted(groups.items())
+        ))
+        self.inner = {
+            keyword: frozenset(other for other in keywords if other in keyword)
+            for keyword in keywords
+        }
+        self.straddling = {
+            keyword: tuple(
+                other for other in keywords
+                if any(other.startswith(keyword[i:]) for i in range(1, len(keyword)))
+                and other not in keyword
+            )
+            for keyword in keywords
+        }
+
+        if brands is None:
+            brands = load_brands(BRANDS_PATH)
+        # 'word word' -> display name, first listed wins; ranks keep the list order
+        self.brands = {}
+        self.brand_ranks = {}
+        # first word -> word counts of the brands starting with it
+        self.brand_sizes = {}
+        for name in brands:
+            tokens = words(name)
+            key = ' '.join(tokens)
+            if not tokens or key in self.brands:
+                continue
+            self.brand_ranks[key] = len(self.brands)
+            self.brands[key] = name
+            self.brand_sizes.setdefault(tokens[0], set()).add(len(tokens))
+        self.brand_sizes = {token: sorted(sizes) for token, sizes in self.brand_sizes.items()}
+
+    def keywords_in(self, text):
+        """Set of keywords that occur in text (lowercase), overlapping ones included"""
+        found = set()
+        for keyword in set(self.keyword_re.findall(text)):
+            found |= self.inner[keyword]
+            for other in self.straddling[keyword]:
+                if other in text:
+                    found.add(other)
+        return found
+
+    def classify(self, text):
+        """Label of every field in the rules for a lowercase deal text"""
+        best = {}
+        for keyword in self.keywords_in(text):
+            for field, priority in self.keyword_labels[keyword]:
+                if field not in best or priority < best[field]:
+                    best[field] = priority
+        result = dict(self.defaults)
+        for field, priority in best.items():
+            result[field] = self.rules[field][0][priority][0]
+        return result
+
+    def brand(self, title):
+        """Brand named in a title (whole words), earliest-listed brand first; '' if none"""
+        tokens = words(title)
+        found = None
+        for start, token in enumerate(tokens):
+            sizes = self.brand_sizes.get(token)
+            if sizes is None:
+                continue
+            for size in sizes:
+                key = token if size == 1 else ' '.join(tokens[start:start + size])
+                if key in self.brands and (found is None or self.brand_ranks[key] < self.brand_ranks[found]):
+                    found = key
+        return self.brands[found] if found else ''
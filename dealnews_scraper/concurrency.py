@@ -0,0 +1,309 @@
+"""
+Adaptive (AIMD) concurrency instead of hand-tuned limits.
+
+CONCURRENT_REQUESTS, CONCURRENT_REQUESTS_PER_DOMAIN and the AutoThrottle target
+were retuned by hand for every proxy plan. AdaptiveConcurrency
+(ADAPTIVE_CONCURRENCY_ENABLED) sets them at runtime instead, with additive
+increase / multiplicative decrease on independent lanes:
+
+- one lane per downloader slot (domain), applied as the slot's concurrency;
+- one lane per PROXY_LIST proxy, applied as that proxy's in-flight cap in the
+  ProxyPool (see proxy_pool.py); the gateway and PROXY_URL modes only have
+  domain lanes.
+
+Every ADAPTIVE_CONCURRENCY_INTERVAL seconds each lane looks at the responses
+it got since the last decision (response_downloaded, so 403/429 are seen
+before ProxyMiddleware parks their retries):
+
+- a burst of 403/429 (at least ADAPTIVE_CONCURRENCY_BAN_BURST, and at least
+  ADAPTIVE_CONCURRENCY_BAN_RATE of the interval's responses, so a steady trickle
+  on a fast crawl is not mistaken for one): limit x ADAPTIVE_CONCURRENCY_BACKOFF;
+- p95 latency above ADAPTIVE_CONCURRENCY_LATENCY_FACTOR x the lane's baseline
+  (its lowest p95, drifting up 5% per interval so a slower but stable site is
+  accepted again), or more than 10% 5xx: limit x 0.75;
+- otherwise, when the lane was saturated (as many requests in flight as its
+  limit), limit + 1; an unsaturated lane holds, since more room would not be
+  used. After a decrease the next interval only holds.
+
+Limits stay between ADAPTIVE_CONCURRENCY_MIN and the configured ceilings
+(CONCURRENT_REQUESTS_PER_DOMAIN per domain, PROXY_MAX_IN_FLIGHT per proxy);
+CONCURRENT_REQUESTS caps the sum of the domain limits, which becomes the
+downloader's total concurrency. DOWNLOAD_DELAY still spaces requests per slot,
+and AutoThrottle is left off while the controller runs.
+
+Every decision is appended to a JSON-lines time series (ADAPTIVE_CONCURRENCY_LOG,
+by default .scrapy/concurrency/concurrency-<time>.jsonl) with the numbers behind
+it; decreases are also logged, and final limits become adaptive_concurrency/* stats.
+"""
+import os
+import json
+import math
+import time
+import logging
+from datetime import datetime
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+from dealnews_scraper.proxy_pool import proxy_label
+
+logger = logging.getLogger(__name__)
+
+BAN_STATUSES = (403, 429)
+LATENCY_BACKOFF = 0.75      # decrease factor for latency and 5xx
+ERROR_RATE_LIMIT = 0.10     # share of 5xx in an interval that counts as overload
+BASELINE_DRIFT = 1.05       # baseline p95 may rise this much per interval
+MIN_SAMPLES = 10            # fewer responses than this: no latency or growth decision
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * pct / 100) - 1))]
+
+
+class Lane:
+    """AIMD state of one domain or proxy"""
+
+    __slots__ = ('kind', 'key', 'limit', 'minimum', 'maximum', 'baseline', 'latencies', 'responses',
+                 'bans', 'errors', 'peak', 'saturated', 'cooldown', 'increases', 'decreases', 'start')
+
+    def __init__(self, kind, key, start, minimum, maximum):
+        self.kind = kind
+        self.key = key
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = self.start = min(self.maximum, max(minimum, start))
+        self.baseline = None
+        self.cooldown = False
+        self.increases = 0
+        self.decreases = {}
+        self.reset()
+
+    def reset(self):
+        self.latencies = []
+        self.responses = 0
+        self.bans = 0
+        self.errors = 0
+        self.peak = 0
+        self.saturated = False
+
+    def record(self, status, latency, in_flight, waiting=False):
+        self.responses += 1
+        if status in BAN_STATUSES:
+            self.bans += 1
+        elif status >= 500:
+            self.errors += 1
+        elif latency is not None:
+            self.latencies.append(latency)
+        self.observe(in_flight, waiting)
+
+    def observe(self, in_flight, waiting=False):
+        self.peak = max(self.peak, in_flight)
+        if waiting or in_flight >= self.limit:
+            self.saturated = True
+
+    def decide(self, backoff, ban_burst, ban_rate, latency_factor):
+        """Apply one AIMD step from the interval's responses; returns (action, reason, p95)"""
+        p95 = percentile(self.latencies, 95) if len(self.latencies) >= MIN_SAMPLES else None
+        if p95 is not None:
+            self.baseline = p95 if self.baseline is None else min(p95, self.baseline * BASELINE_DRIFT)
+        if self.bans >= ban_burst and self.bans >= self.responses * ban_rate:
+            action, reason = self.decrease(backoff, 'bans')
+        elif p95 is not None and p95 > self.baseline * latency_factor:
+            action, reason = self.decrease(LATENCY_BACKOFF, 'latency')
+        elif self.responses >= MIN_SAMPLES and self.errors > self.responses * ERROR_RATE_LIMIT:
+            action, reason = self.decrease(LATENCY_BACKOFF, 'errors')
+        elif self.cooldown:
+            action, reason = 'hold', 'cooldown'
+        elif self.responses < MIN_SAMPLES:
+            action, reason = 'hold', 'few responses'
+        elif not self.saturated:
+            action, reason = 'hold', 'not saturated'
+        elif self.limit >= self.maximum:
+            action, reason = 'hold', 'at maximum'
+        else:
+            self.limit += 1
+            self.increases += 1
+            action, reason = 'increase', 'healthy'
+        self.cooldown = action == 'decrease'
+        return action, reason, p95
+
+    def decrease(self, factor, reason):
+        limit = max(self.minimum, int(self.limit * factor))
+        if limit == self.limit:
+            return 'hold', f'{reason} (at minimum)'
+        self.limit = limit
+        self.decreases[reason] = self.decreases.get(reason, 0) + 1
+        return 'decrease', reason
+
+
+class AdaptiveConcurrency:
+    """Scrapy extension adjusting domain and proxy concurrency from observed responses"""
+
+    def __init__(self, output=None, stats=None, interval=5.0, minimum=2, start=8, domain_max=32,
+                 total_max=64, proxy_max=8, backoff=0.5, ban_burst=3, ban_rate=0.05, latency_factor=2.0,
+                 clock=None):
+        self.output = output
+        self.stats = stats
+        self.interval = interval
+        self.minimum = minimum
+        self.start = start
+        self.domain_max = domain_max
+        self.total_max = total_max
+        self.proxy_max = proxy_max
+        self.backoff = backoff
+        self.ban_burst = ban_burst
+        self.ban_rate = ban_rate
+        self.latency_factor = latency_factor
+        self.clock = clock
+        self.lanes = {}          # (kind, key) -> Lane
+        self.downloader = None
+        self.pool = None
+        self.loop = None
+        self.file = None
+        self.started = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        from scrapy.utils.project import data_path
+
+        settings = crawler.settings
+        if not settings.getbool('ADAPTIVE_CONCURRENCY_ENABLED'):
+            raise NotConfigured
+        output = settings.get('ADAPTIVE_CONCURRENCY_LOG') or data_path(
+            os.path.join('concurrency', f"concurrency-{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl"))
+        extension = cls(
+            output, crawler.stats,
+            interval=settings.getfloat('ADAPTIVE_CONCURRENCY_INTERVAL', 5.0),
+            minimum=settings.getint('ADAPTIVE_CONCURRENCY_MIN', 2),
+            start=settings.getint('ADAPTIVE_CONCURRENCY_START', 8),
+            domain_max=settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN', 32),
+            total_max=settings.getint('CONCURRENT_REQUESTS', 64),
+            proxy_max=settings.getint('PROXY_MAX_IN_FLIGHT', 8),
+            backoff=settings.getfloat('ADAPTIVE_CONCURRENCY_BACKOFF', 0.5),
+            ban_burst=settings.getint('ADAPTIVE_CONCURRENCY_BAN_BURST', 3),
+            ban_rate=settings.getfloat('ADAPTIVE_CONCURRENCY_BAN_RATE', 0.05),
+            latency_factor=settings.getfloat('ADAPTIVE_CONCURRENCY_LATENCY_FACTOR', 2.0),
+        )
+        extension.crawler = crawler
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.response_downloaded, signal=signals.response_downloaded)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def spider_opened(self, spider):
+        engine = self.crawler.engine
+        self.attach(engine.downloader, spider)
+        for middleware in engine.downloader.middleware.middlewares:
+            if getattr(middleware, 'pool', None) is not None:
+                self.pool = middleware.pool
+
+    def attach(self, downloader, spider):
+        """Take over the downloader's total concurrency and start the decision loop"""
+        self.downloader = downloader
+        self.spider = spider
+        self.started = time.time()
+        downloader.total_concurrency = min(self.total_max, self.start)
+        os.makedirs(os.path.dirname(os.path.abspath(self.output)), exist_ok=True)
+        self.file = open(self.output, 'a', buffering=1)
+        self.loop = task.LoopingCall(self.tick)
+        if self.clock is not None:
+            self.loop.clock = self.clock
+        self.loop.start(self.interval, now=False)
+        spider.logger.info(f"🎚️ Adaptive concurrency: start {self.start}, per domain {self.minimum}-{self.domain_max}, "
+                           f"total up to {self.total_max}; decisions logged to {self.output}")
+
+    def lane(self, kind, key):
+        lane = self.lanes.get((kind, key))
+        if lane is None:
+            maximum = self.domain_max if kind == 'domain' else self.proxy_max
+            lane = self.lanes[(kind, key)] = Lane(kind, key, self.start, self.minimum, maximum)
+            self.apply(lane)
+        return lane
+
+    def response_downloaded(self, response, request, spider):
+        latency = request.meta.get('download_latency')
+        slot_key = request.meta.get('download_slot')
+        if slot_key is not None and self.downloader is not None:
+            slot = self.downloader.slots.get(slot_key)
+            lane = self.lane('domain', slot_key)
+            lane.record(response.status, latency, len(slot.transferring) if slot else 0,
+                        bool(slot and slot.queue))
+        proxy = request.meta.get('proxy_slot')
+        if proxy is not None and self.pool is not None:
+            health = self.pool.health.get(proxy)
+            lane = self.lane('proxy', proxy)
+            lane.record(response.status, latency, health.in_flight if health else 0, bool(self.pool.waiters))
+
+    def apply(self, lane):
+        if lane.kind == 'domain':
+            slot = self.downloader.slots.get(lane.key) if self.downloader is not None else None
+            if slot is not None:
+                slot.concurrency = lane.limit
+        elif self.pool is not None:
+            self.pool.set_limit(lane.key, lane.limit)
+
+    def tick(self):
+        now = round(time.time() - self.started, 1)
+        for lane in self.lanes.values():
+            if lane.kind == 'domain':
+                slot = self.downloader.slots.get(lane.key)
+                if slot is not None:
+                    lane.observe(len(slot.transferring), bool(slot.queue))
+            before = lane.limit
+            responses, bans, errors, peak, saturated = lane.responses, lane.bans, lane.errors, lane.peak, lane.saturated
+            action, reason, p95 = lane.decide(self.backoff, self.ban_burst, self.ban_rate, self.latency_factor)
+            lane.reset()
+            self.apply(lane)
+            if action == 'decrease':
+                self.spider.logger.info(f"🎚️ {lane.kind} {self.label(lane)}: concurrency {before} → {lane.limit} ({reason}: "
+                                        f"{bans} bans, {errors} errors, p95 {self.ms(p95)} ms / baseline {self.ms(lane.baseline)} ms)")
+                self._inc(f'adaptive_concurrency/decreases/{reason}')
+            elif action == 'increase':
+                self._inc('adaptive_concurrency/increases')
+            if responses or action != 'hold':
+                self.write({
+                    't': now, 'lane': lane.kind, 'key': self.label(lane), 'action': action, 'reason': reason,
+                    'limit_before': before, 'limit': lane.limit, 'responses': responses, 'bans': bans,
+                    'errors': errors, 'p95_ms': self.ms(p95), 'baseline_ms': self.ms(lane.baseline),
+                    'peak_in_flight': peak, 'saturated': saturated,
+                })
+        domain_limits = [lane.limit for lane in self.lanes.values() if lane.kind == 'domain']
+        if domain_limits:
+            total = max(self.minimum, min(self.total_max, sum(domain_limits)))
+            if total != self.downloader.total_concurrency:
+                self.write({'t': now, 'lane': 'total', 'limit_before': self.downloader.total_concurrency, 'limit': total})
+                self.downloader.total_concurrency = total
+            if self.stats is not None:
+                self.stats.max_value('adaptive_concurrency/max_total', total, spider=self.spider)
+
+    @staticmethod
+    def label(lane):
+        return proxy_label(lane.key) if lane.kind == 'proxy' else lane.key
+
+    @staticmethod
+    def ms(seconds):
+        return round(seconds * 1000, 1) if seconds is not None else None
+
+    def write(self, row):
+        if self.file is not None:
+            self.file.write(json.dumps(row) + '\n')
+
+    def _inc(self, key):
+        if self.stats is not None:
+            self.stats.inc_value(key, spider=self.spider)
+
+    def spider_closed(self, spider):
+        if self.loop is not None and self.loop.running:
+            self.loop.stop()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        for lane in self.lanes.values():
+            label = self.label(lane)
+            if self.stats is not None:
+                self.stats.set_value(f'adaptive_concurrency/final/{lane.kind}/{label}', lane.limit, spider=spider)
+            decreases = ', '.join(f"{reason} {count}" for reason, count in sorted(lane.decreases.items())) or 'none'
+            spider.logger.info(f"🎚️ {lane.kind} {label}: concurrency {lane.start} → {lane.limit} "
+                               f"({lane.increases} increases; decreases: {decreases})")
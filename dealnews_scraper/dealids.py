@@ -0,0 +1,95 @@
+"""
+Stable, process-independent deal identifiers.
+
+Python's built-in hash() is randomized per process, so ids built from it change
+on every run. Deal ids are built here from the numeric DealNews id when one is
+available (data-content-id or the /<id>.html detail URL), and otherwise from a
+fixed-width digest of the canonical URL.
+"""
+import re
+import hashlib
+from w3lib.url import canonicalize_url
+
+# DealNews detail pages look like /Some-Title/21791913.html
+DETAIL_ID_RE = re.compile(r'/(\d+)\.html')
+
+# Element ids generated by the site's templates, not real deal ids
+AUTO_ID_PREFIX = 'auto-id-'
+
+
+def canonical_deal_url(url):
+    """Canonical form of a deal URL (sorted query, no fragment)"""
+    return canonicalize_url(url.strip(), keep_fragments=False)
+
+
+def numeric_deal_id(url):
+    """Return the numeric DealNews id from a /<id>.html URL, or None"""
+    if not url:
+        return None
+    match = DETAIL_ID_RE.search(url)
+    return match.group(1) if match else None
+
+
+def digest(text):
+    """16 hex chars (64 bits) of BLAKE2b - identical in every process"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def make_dealid(url=None, content_id=None, site_id=None, fallback=None):
+    """Build a stable dealid.
+
+    Priority:
+    1. data-content-id (numeric DealNews id)       -> deal_<id>
+    2. numeric id in the /<id>.html detail URL      -> deal_<id>
+    3. explicit site id (data-deal-id, element id) -> used as-is
+    4. digest of the canonical URL                  -> deal_u<digest>
+    5. digest of any other stable text              -> deal_t<digest>
+    """
+    content_id = (content_id or '').strip()
+    if content_id.isdigit():
+        return f"deal_{content_id}"
+
+    numeric_id = numeric_deal_id(url)
+    if numeric_id:
+        return f"deal_{numeric_id}"
+
+    site_id = (site_id or '').strip()
+    if site_id and not site_id.startswith(AUTO_ID_PREFIX):
+        return site_id
+
+    if url and url.strip():
+        return f"deal_u{digest(canonical_deal_url(url))}"
+
+    if fallback:
+        return f"deal_t{digest(fallback)}"
+    return ''
+
+
+# Ids from data-content-id / auto-id fallbacks: short digit runs. Python hash()
+# values are 18-19 digits (optionally negative), so they never match this.
+LEGACY_CONTENT_ID_RE = re.compile(r'^(?:deal_)?(\d{1,12})$')
+
+# Ids already produced by make_dealid() from a digest
+STABLE_DIGEST_ID_RE = re.compile(r'^deal_[ut][0-9a-f]{16}$')
+
+
+def stable_dealid_for_row(dealid, url):
+    """Stable dealid for a row written before make_dealid() existed.
+
+    Used by backfill_dealids.py. Returns None for a hash()-based id whose URL
+    has no numeric id: the spider digests the offer URL (or first href) for
+    such deals, which the row does not keep - its deallink is usually the
+    "Shop Now" link - so the stable id cannot be rebuilt from the row.
+    """
+    numeric_id = numeric_deal_id(url)
+    if numeric_id:
+        return f"deal_{numeric_id}"
+    if STABLE_DIGEST_ID_RE.match(dealid or ''):
+        return dealid
+    legacy = LEGACY_CONTENT_ID_RE.match(dealid or '')
+    if legacy:
+        return f"deal_{legacy.group(1)}"
+    if dealid and not dealid.startswith(('deal_', 'json_deal_', AUTO_ID_PREFIX)):
+        # Explicit site id (data-deal-id) - already stable
+        return dealid
+    return None
@@ -0,0 +1,111 @@
+"""
+Fixed, precompiled queries for DealNews deal detail pages.
+
+A detail page (/Title/21791913.html) carries one deal plus links to related
+deals. parse_deal_detail() and parse_related_detail() only need those two
+things, so instead of the listing-page machinery (six candidate strategies,
+category / store discovery, pagination) they use the short query lists below,
+compiled once at import.
+"""
+import re
+from lxml import etree
+from scrapy import Selector
+from dealnews_scraper.extraction_plan import compile_css
+
+# The deal's own container, first query with a match wins. The main column comes
+# before the page-wide fallbacks so sidebar deal cards are not picked up.
+DETAIL_CONTAINER_XPATHS = [etree.XPath(xpath) for xpath in (
+    '(//main//*[@data-content-id])[1]',
+    '(//*[@data-content-id])[1]',
+    '(//article[contains(@class, "deal")])[1]',
+    '(//main//article)[1]',
+    '(//main)[1]',
+    '(//body)[1]',
+)]
+
+# Related-deal link sections, in priority order; every selector with links contributes
+RELATED_SELECTORS = [
+    # DealNews specific related sections (highest priority)
+    'section[class*="related"] a[href*=".html"]::attr(href)',
+    'section[class*="similar"] a[href*=".html"]::attr(href)',
+    'section[class*="recommended"] a[href*=".html"]::attr(href)',
+    'section[class*="more"] a[href*=".html"]::attr(href)',
+    '.related-deals a[href*=".html"]::attr(href)',
+    '.related-items a[href*=".html"]::attr(href)',
+    '.similar-deals a[href*=".html"]::attr(href)',
+    '.recommended-deals a[href*=".html"]::attr(href)',
+    '.you-may-also-like a[href*=".html"]::attr(href)',
+    # Generic related sections
+    '[class*="related"] a[href*=".html"]::attr(href)',
+    '[class*="similar"] a[href*=".html"]::attr(href)',
+    '[class*="recommended"] a[href*=".html"]::attr(href)',
+    # Sidebar and recommendations
+    'aside a[href*=".html"]::attr(href)',
+    '.sidebar a[href*=".html"]::attr(href)',
+    'nav[class*="related"] a[href*=".html"]::attr(href)',
+    # DealNews specific containers
+    '.deal-list a[href*=".html"]::attr(href)',
+    '.deal-items a[href*=".html"]::attr(href)',
+    '.deals-grid a[href*=".html"]::attr(href)',
+    '.deals-list a[href*=".html"]::attr(href)',
+    # Main content area (but exclude navigation/footer)
+    'main article a[href*=".html"]::attr(href)',
+    'main section a[href*=".html"]::attr(href)',
+    'article[class*="deal"] a[href*=".html"]::attr(href)',
+    # Generic patterns
+    'article a[href*=".html"]::attr(href)',
+    '.deal-item a[href*=".html"]::attr(href)',
+]
+RELATED_QUERIES = [compile_css(css) for css in RELATED_SELECTORS]
+ALL_HTML_LINKS = compile_css('a[href*=".html"]::attr(href)')
+SIDEBAR_DEAL_LINKS = compile_css('aside a[href*="/deals/"]::attr(href), .sidebar a[href*="/deals/"]::attr(href)')
+
+DETAIL_PATH_RE = re.compile(r'/\d+\.html')
+
+
+def find_detail_container(response):
+    """Selector for the deal container of a detail page, or None"""
+    root = response.selector.root
+    for xpath in DETAIL_CONTAINER_XPATHS:
+        nodes = xpath(root)
+        if nodes:
+            return Selector(root=nodes[0], type='html')
+    return None
+
+
+def collect_related_links(response):
+    """Related-deal hrefs of a detail page, as (links, source).
+
+    source names the strategy that found them: 'sections' (related / sidebar /
+    main content selectors), 'html_links' (any other deal detail link on the
+    page), 'sidebar_deals' (/deals/ links in the sidebar) or '' for none.
+    """
+    root = response.selector.root
+
+    # Strategy 1: specific related/similar sections and content areas
+    related_links = []
+    for query in RELATED_QUERIES:
+        related_links.extend(query(root))
+    if related_links:
+        return related_links, 'sections'
+
+    # Strategy 2: all .html links that look like other deal detail pages
+    current_url_path = response.url.split('/')[-1]  # e.g., "21791913.html"
+    for link in ALL_HTML_LINKS(root):
+        # Make absolute
+        if not link.startswith('http'):
+            link = response.urljoin(link)
+        # Skip current deal
+        if link == response.url or current_url_path in link:
+            continue
+        # DealNews detail pages have format: /Title/21791913.html
+        if '.html' in link and 'dealnews.com' in link and DETAIL_PATH_RE.search(link):
+            related_links.append(link)
+    if related_links:
+        return related_links, 'html_links'
+
+    # Strategy 3: fallback to /deals/ links in the sidebar
+    sidebar_deals = SIDEBAR_DEAL_LINKS(root)
+    if sidebar_deals:
+        return sidebar_deals[:10], 'sidebar_deals'
+    return [], ''
@@ -0,0 +1,73 @@
+"""
+Request dupefilter that stores 8-byte integer fingerprints.
+
+Scrapy's RFPDupeFilter keeps every request fingerprint as a 40-char hex string
+in a Python set (~100+ bytes each). This filter keeps the first 8 bytes of the
+same fingerprint as an integer in one of the compact stores from
+fingerprints.py, and persists it to JOBDIR when one is configured.
+"""
+import os
+import logging
+from scrapy.dupefilters import RFPDupeFilter
+from scrapy.utils.job import job_dir
+from scrapy.utils.request import RequestFingerprinter
+from dealnews_scraper.fingerprints import FingerprintSet, ScalableBloomFilter
+
+
+class FingerprintDupeFilter(RFPDupeFilter):
+    """Duplicate filter backed by a FingerprintSet or ScalableBloomFilter
+
+    DUPEFILTER_BACKEND selects 'set' (exact) or 'bloom' (probabilistic, sized by
+    DUPEFILTER_CAPACITY / DUPEFILTER_ERROR_RATE and grown as needed).
+    """
+
+    def __init__(self, path=None, debug=False, *, fingerprinter=None,
+                 backend='set', capacity=1000000, error_rate=0.0001, stats=None):
+        self.file = None
+        self.fingerprinter = fingerprinter or RequestFingerprinter()
+        self.logdupes = True
+        self.debug = debug
+        self.logger = logging.getLogger(__name__)
+        self.stats = stats
+        self.backend = backend
+        if backend == 'bloom':
+            self.fingerprints = ScalableBloomFilter(
+                path=os.path.join(path, 'requests.seen.bloom') if path else None,
+                initial_capacity=capacity,
+                error_rate=error_rate,
+            )
+        elif backend == 'set':
+            self.fingerprints = FingerprintSet(path=os.path.join(path, 'requests.seen.fp') if path else None)
+        else:
+            raise ValueError(f"Unknown DUPEFILTER_BACKEND: {backend!r} (expected 'set' or 'bloom')")
+
+    @classmethod
+    def from_settings(cls, settings, *, fingerprinter=None, stats=None):
+        return cls(
+            job_dir(settings),
+            settings.getbool('DUPEFILTER_DEBUG'),
+            fingerprinter=fingerprinter,
+            backend=settings.get('DUPEFILTER_BACKEND', 'set'),
+            capacity=settings.getint('DUPEFILTER_CAPACITY', 1000000),
+            error_rate=settings.getfloat('DUPEFILTER_ERROR_RATE', 0.0001),
+            stats=stats,
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls.from_settings(crawler.settings, fingerprinter=crawler.request_fingerprinter, stats=crawler.stats)
+
+    def request_fingerprint(self, request):
+        """First 8 bytes of Scrapy's request fingerprint as an unsigned integer"""
+        return int.from_bytes(self.fingerprinter.fingerprint(request)[:8], 'big')
+
+    def request_seen(self, request):
+        return not self.fingerprints.add_fingerprint(self.request_fingerprint(request))
+
+    def close(self, reason):
+        if self.stats:
+            self.stats.set_value('dupefilter/backend', self.backend)
+            self.stats.set_value('dupefilter/fingerprints', len(self.fingerprints))
+            self.stats.set_value('dupefilter/bytes', self.fingerprints.nbytes)
+            self.stats.set_value('dupefilter/false_positive_rate', self.fingerprints.false_positive_rate())
+        self.fingerprints.close()
@@ -0,0 +1,446 @@
+"""
+Compiled field-extraction plan for deal containers.
+
+extract_deal_item() fills most fields by trying a list of CSS selectors in
+priority order and keeping the first acceptable value. Each deal.css() call
+translated the CSS again, compiled a new XPath and wrapped every result in a
+Selector. Here every selector is translated once (with parsel's HTMLTranslator,
+so ::text and ::attr() work as before) and compiled to an lxml.etree.XPath
+when the plan is built. Cascades then run directly on the container's lxml
+element, and skip selectors whose classes or tags do not occur in the container
+at all (one pass over the container builds that profile).
+
+Each extract() records which selector won (or 'none'), via the optional
+inc_stat callback (crawl stats plan/<field>/<selector>) and in plan.wins, so
+dead selectors can be pruned from the stats rather than by guesswork.
+"""
+import re
+from collections import Counter
+from lxml import etree
+from parsel.csstranslator import HTMLTranslator
+
+_translator = HTMLTranslator()
+
+
+def compile_css(css):
+    """Compile a parsel-style CSS query to an XPath relative to a container element"""
+    return etree.XPath(_translator.css_to_xpath(css), smart_strings=False)
+
+
+_BRACKET_RE = re.compile(r'\[([^\]]*)\]')
+_PSEUDO_RE = re.compile(r'::?[\w-]+(?:\([^)]*\))?')
+_CLASS_RE = re.compile(r'\.([\w-]+)')
+_TAG_RE = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)')
+_CLASS_SUBSTRING_RE = re.compile(r'^class\*=["\']([^"\']+)["\']$')
+
+
+def selector_requirements(css):
+    """What a container must contain for css to possibly match.
+
+    Returns one (class tokens, tag names, class substrings) triple per
+    comma-separated alternative. Only .class, tag and [class*="..."] parts are
+    used; anything else (other attributes, :contains) is left to the XPath.
+    """
+    alternatives = []
+    for part in css.split(','):
+        substrings = []
+        for condition in _BRACKET_RE.findall(part):
+            match = _CLASS_SUBSTRING_RE.match(condition.strip())
+            if match:
+                substrings.append(match.group(1))
+        part = _PSEUDO_RE.sub('', _BRACKET_RE.sub('', part)).strip()
+        alternatives.append((
+            frozenset(_CLASS_RE.findall(part)),
+            frozenset(tag.lower() for tag in _TAG_RE.findall(part)),
+            tuple(substrings),
+        ))
+    return alternatives
+
+
+class ContainerProfile:
+    """Class tokens, tag names and class attributes present in a container subtree"""
+
+    __slots__ = ('tokens', 'tags', 'class_blob')
+
+    def __init__(self, node):
+        tokens = set()
+        tags = set()
+        classes = []
+        for element in node.iter():
+            tag = element.tag
+            if not isinstance(tag, str):
+                continue
+            tags.add(tag)
+            value = element.get('class')
+            if value:
+                classes.append(value)
+                tokens.update(value.split())
+        self.tokens = tokens
+        self.tags = tags
+        self.class_blob = ' | '.join(classes)
+
+    def may_match(self, requirements):
+        for tokens, tags, substrings in requirements:
+            if (tokens <= self.tokens and tags <= self.tags
+                    and all(substring in self.class_blob for substring in substrings)):
+                return True
+        return False
+
+
+# Accept predicates: return the cleaned value, or None to try the next selector
+
+TITLE_SKIP = {'more options', 'more', 'less', 'buy now', 'shop now', 'read more'}
+
+
+def accept_title(value):
+    value = value.strip()
+    if len(value) > 5 and value.lower() not in TITLE_SKIP:
+        return value
+    return None
+
+
+def accept_price(value):
+    if '$' in value or 'USD' in value or 'price' in value.lower():
+        return value.strip()
+    return None
+
+
+def accept_text(value):
+    return value.strip() or None
+
+
+def accept_raw(value):
+    """First value as-is, like .get() in an `a or b or c` chain"""
+    return value or None
+
+
+def accept_deal_text(value):
+    value = value.strip()
+    lower = value.lower()
+    if value and ('%' in value or 'off' in lower or 'save' in lower):
+        return value
+    return None
+
+
+def accept_dealplus(value):
+    value = value.strip()
+    if not value:
+        return None
+    lower = value.lower()
+    if 'free shipping' in lower:
+        return 'free shipping w/ Prime' if 'prime' in lower else 'free shipping'
+    return value
+
+
+def accept_popularity(value):
+    if not value.strip():
+        return None
+    match = re.search(r'(\d+/\d+)', value)
+    return match.group(1) if match else value.strip()
+
+
+class FieldCascade:
+    """Compiled selectors for one field, tried in priority order"""
+
+    def __init__(self, field, selectors, accept=accept_text, all_matches=False):
+        self.field = field
+        self.selectors = [(css, compile_css(css), selector_requirements(css)) for css in selectors]
+        self.accept = accept
+        # Check every match of a selector (like .getall()) instead of only the first (.get())
+        self.all_matches = all_matches
+
+    def run(self, node, accept=None, profile=None):
+        """Return (value, winning selector) or (None, None).
+
+        With a ContainerProfile, selectors that cannot match the container
+        (missing class or tag) are skipped without evaluating their XPath.
+        """
+        accept = accept or self.accept
+        for css, xpath, requirements in self.selectors:
+            if profile is not None and not profile.may_match(requirements):
+                continue
+            results = xpath(node)
+            if not results:
+                continue
+            for value in (results if self.all_matches else results[:1]):
+                if not isinstance(value, str):
+                    continue
+                accepted = accept(value)
+                if accepted:
+                    return accepted, css
+        return None, None
+
+
+# Field cascades, highest priority first (selector lists as in extract_deal_item)
+FIELD_SELECTORS = {
+    'detail_url': dict(all_matches=True, accept=None, selectors=[
+        # Priority 1: Title links (most reliable)
+        '.title-link::attr(href)',
+        '.pitch .title-link::attr(href)',
+        '.deal-title a::attr(href)',
+        'h2 a::attr(href), h3 a::attr(href)',  # Headings with links
+        # Priority 2: Any .html link in deal container
+        'a[href*=".html"]::attr(href)',  # Links ending in .html (DealNews detail pages)
+        # Priority 3: Deal links
+        'a[href*="/deals/"]::attr(href)',  # Deal links (but these might be listing pages)
+    ]),
+    'title': dict(accept=accept_title, selectors=[
+        # New DealNews structure (priority)
+        '.title-link::text',  # Actual deal title link
+        '.title a::text',  # Title with link
+        '.pitch .title::text',  # Title in pitch section
+        '.pitch .title-link::text',  # Title link in pitch
+        # DealNews specific (current site structure)
+        '.deal-title::text',
+        '.deal-name::text',
+        '.deal-headline::text',
+        '.deal-text::text',
+        '.deal-description::text',
+        '.deal-summary::text',
+        # Current site selectors
+        '.deal-title-text::text',
+        '.deal-content h3::text',
+        '.deal-content h4::text',
+        '.deal-content .title::text',
+        # Generic fallbacks (avoid .title::text as it matches "More Options" button)
+        'h1::text',
+        'h2::text',
+        'h3::text',
+        'h4::text',
+        '.product-title::text',
+        '.item-title::text',
+        '.listing-title::text',
+        '.post-title::text',
+        '.entry-title::text',
+        # Link text (more targeted)
+        'a[href*="/deals/"]::text',
+        'a[href*="/deal/"]::text',
+        'a[href*="/products/"]::text',
+        # Other possibilities
+        '.name::text',
+        '.headline::text',
+        '.description::text',
+        '.summary::text',
+    ]),
+    'title_attr': dict(accept=accept_raw, selectors=[
+        '[aria-label*="details"], [aria-label*="Read More"]::attr(aria-label)',
+        '[title]::attr(title)',
+    ]),
+    'title_para': dict(accept=accept_raw, selectors=[
+        '.snippet.summary p::text, .summary p::text',
+    ]),
+    'price': dict(accept=accept_price, selectors=[
+        # DealNews specific (current site)
+        '.deal-price::text',
+        '.price::text',
+        '.sale-price::text',
+        '.current-price::text',
+        '.deal-amount::text',
+        '.deal-cost::text',
+        # Current site structure
+        '.price-amount::text',
+        '.price-value::text',
+        '.price-text::text',
+        '.price-current::text',
+        '.deal-price-value::text',
+        # With spans (current structure)
+        'span[class*="price"]::text',
+        'span[class*="cost"]::text',
+        'span[class*="amount"]::text',
+        '.price span::text',
+        '.deal-price span::text',
+        # With divs (current structure)
+        'div[class*="price"]::text',
+        'div[class*="cost"]::text',
+        'div[class*="amount"]::text',
+        '.price div::text',
+        # Generic fallbacks
+        '.cost::text',
+        '.amount::text',
+        '.value::text',
+        # Look for price patterns
+        'span:contains("$")::text',
+        'div:contains("$")::text',
+        # Very generic
+        '*::text',  # Last resort - scan all text for price patterns
+    ]),
+    'store_line': dict(accept=accept_raw, selectors=[
+        '.key-attribute::text',  # e.g. "Best Buy · 4 hrs ago"
+    ]),
+    'store': dict(selectors=[
+        # DealNews specific
+        '.store::text',
+        '.merchant::text',
+        '.retailer::text',
+        '.vendor::text',
+        '.deal-store::text',
+        '.deal-merchant::text',
+        # Generic
+        '.store-name::text',
+        '.merchant-name::text',
+        '.retailer-name::text',
+        '.vendor-name::text',
+        # With spans
+        'span[class*="store"]::text',
+        'span[class*="merchant"]::text',
+        'span[class*="retailer"]::text',
+        'span[class*="vendor"]::text',
+    ]),
+    'category': dict(selectors=[
+        '.category::text',
+        '.deal-category::text',
+        '.breadcrumb::text',
+        '.deal-breadcrumb::text',
+        '.category-name::text',
+        '.cat::text',
+        '.section::text',
+        '.department::text',
+    ]),
+    'deal_text': dict(accept=accept_deal_text, selectors=[
+        '.deal-text::text',
+        '.deal-description::text',
+        '.discount::text',
+        '.savings::text',
+        '[class*="deal"]::text',
+        '[class*="discount"]::text',
+        '.promo-text::text',
+        '.offer-text::text',
+    ]),
+    'dealplus': dict(accept=accept_dealplus, selectors=[
+        '.deal-plus::text',
+        '.shipping::text',
+        '.bonus::text',
+        '[class*="plus"]::text',
+        '[class*="shipping"]::text',
+    ]),
+    'published': dict(selectors=[
+        '.published::text',
+        '.date::text',
+        '.timestamp::text',
+        '.time::text',
+        '[class*="published"]::text',
+        '[class*="date"]::text',
+    ]),
+    'popularity': dict(accept=accept_popularity, selectors=[
+        '.popularity::text',
+        '.rating::text',
+        '.score::text',
+        '[class*="popularity"]::text',
+        '[class*="rating"]::text',
+        '[data-popularity]::attr(data-popularity)',
+        '[data-rating]::attr(data-rating)',
+    ]),
+    'staffpick': dict(selectors=[
+        '.staff-pick::text',
+        '.featured::text',
+        '[class*="staff"]::text',
+        '[class*="pick"]::text',
+    ]),
+    'promo': dict(accept=accept_raw, selectors=[
+        '.promo::text',
+        '.promotion::text',
+    ]),
+    'dealtext': dict(accept=accept_raw, selectors=[
+        '.deal-description::text',
+        '.deal-summary::text',
+    ]),
+    'detail': dict(accept=accept_raw, selectors=[
+        '.deal-detail::text',
+        '.details::text',
+        '.description::text',
+    ]),
+}
+
+# Plain queries used by extract_deal_item outside the cascades (no winner stats).
+# A tuple lists alternatives; the first one with results is used, like an
+# `a.getall() or b.getall()` chain. Entries starting with './' or '/' are XPath.
+QUERIES = {
+    'content_id': '::attr(data-content-id)',
+    'site_id': '::attr(data-deal-id)',
+    'element_id': '::attr(id)',
+    'offer_url': '::attr(data-offer-url)',
+    'first_href': 'a::attr(href)',
+    'recid': '::attr(data-rec-id)',
+    'text': '::text',
+    'hover': '::attr(title)',
+    'paragraphs': 'p::text',
+    'shop_now_href': './/a[contains(text(), "Shop Now") or contains(text(), "Buy Now")]/@href',
+    'shop_now_text': './/a[contains(text(), "Shop Now") or contains(text(), "Buy Now")]/text()',
+    'shop_now_title': './/a[contains(text(), "Shop Now") or contains(text(), "Buy Now")]/@title',
+    'images': (
+        'img::attr(src)',
+        'img::attr(data-src)',  # Lazy-loaded images
+        'img::attr(data-lazy-src)',
+        '[class*="image"] img::attr(src)',
+        '[class*="deal"] img::attr(src)',
+    ),
+    'related_links': (
+        '.related-deals a::attr(href), .related a::attr(href), .similar a::attr(href)',
+        '[class*="related"] a::attr(href), [class*="similar"] a::attr(href)',
+    ),
+}
+
+
+def compile_query(query):
+    if query.startswith(('./', '/')):
+        return etree.XPath(query, smart_strings=False)
+    return compile_css(query)
+
+
+class ExtractionPlan:
+    """All field cascades for a deal container, compiled once"""
+
+    def __init__(self, field_selectors=None, inc_stat=None):
+        self.inc_stat = inc_stat
+        self.wins = Counter()
+        self.profiled_node = None
+        self.node_profile = None
+        self.cascades = {}
+        for field, spec in (field_selectors or FIELD_SELECTORS).items():
+            spec = dict(spec)
+            selectors = spec.pop('selectors')
+            if spec.get('accept') is None:
+                spec.pop('accept', None)
+            self.cascades[field] = FieldCascade(field, selectors, **spec)
+        self.queries = {
+            name: tuple(compile_query(q) for q in (query if isinstance(query, tuple) else (query,)))
+            for name, query in QUERIES.items()
+        }
+
+    def all(self, name, node):
+        """All string results of a named query (first alternative with results)"""
+        for xpath in self.queries[name]:
+            results = [value for value in xpath(node) if isinstance(value, str)]
+            if results:
+                return results
+        return []
+
+    def first(self, name, node):
+        """First string result of a named query, or None (like .get())"""
+        results = self.all(name, node)
+        return results[0] if results else None
+
+    def profile(self, node):
+        """ContainerProfile for node, reused while the same container is extracted"""
+        if node is not self.profiled_node:
+            self.profiled_node = node
+            self.node_profile = ContainerProfile(node)
+        return self.node_profile
+
+    def extract(self, field, node, accept=None):
+        """First accepted value for field in the container element node, or None"""
+        value, css = self.cascades[field].run(node, accept, self.profile(node))
+        winner = css or 'none'
+        self.wins[(field, winner)] += 1
+        if self.inc_stat:
+            self.inc_stat(f'plan/{field}/{winner}')
+        return value
+
+    def report(self):
+        """{field: [(selector, wins), ...]} with selectors that never won listed as 0"""
+        table = {}
+        for field, cascade in self.cascades.items():
+            rows = [(css, self.wins.get((field, css), 0)) for css, _, _ in cascade.selectors]
+            rows.append(('none', self.wins.get((field, 'none'), 0)))
+            table[field] = rows
+        return table
@@ -0,0 +1,336 @@
+"""
+Compact URL fingerprint stores.
+
+URLs are reduced to 64-bit BLAKE2b fingerprints of their canonical form, so a
+seen-set costs 8 bytes per URL instead of a full Python string. The stores share
+the same interface (add / in / len / close, plus add_fingerprint /
+contains_fingerprint for callers that already have a 64-bit value):
+
+- FingerprintSet: exact set kept in a sorted array('Q') plus a small pending set,
+  optionally saved to a file between runs.
+- BloomFilter: fixed-size bit array in a file opened with mmap; probabilistic,
+  with a configurable false-positive rate.
+- ScalableBloomFilter: chain of BloomFilter slices that grows with the crawl.
+"""
+import os
+import math
+import mmap
+import struct
+import bisect
+import hashlib
+from array import array
+from w3lib.url import canonicalize_url
+
+FINGERPRINT_BITS = 64
+
+
+def fingerprint(data):
+    """64-bit fingerprint of a string or bytes value"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def url_fingerprint(url):
+    """64-bit fingerprint of the canonical form of a URL"""
+    try:
+        url = canonicalize_url(url.strip(), keep_fragments=False)
+    except Exception:
+        pass
+    return fingerprint(url)
+
+
+class FingerprintSet:
+    """Exact set of 64-bit URL fingerprints.
+
+    Lookups binary-search a sorted array('Q') and then check a small pending set.
+    New fingerprints go to the pending set, which is merged into the array once
+    it reaches 1/16 of the array size, so merges stay amortized O(1) per add.
+    """
+
+    MIN_PENDING = 4096
+
+    def __init__(self, path=None):
+        self.path = path
+        self.sorted = array('Q')
+        self.pending = set()
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.sorted.frombytes(f.read())
+
+    def __len__(self):
+        return len(self.sorted) + len(self.pending)
+
+    def __contains__(self, url):
+        if not url:
+            return False
+        return self.contains_fingerprint(url_fingerprint(url))
+
+    def add(self, url):
+        if url:
+            self.add_fingerprint(url_fingerprint(url))
+
+    def contains_fingerprint(self, fp):
+        if fp in self.pending:
+            return True
+        index = bisect.bisect_left(self.sorted, fp)
+        return index < len(self.sorted) and self.sorted[index] == fp
+
+    def add_fingerprint(self, fp):
+        """Add a fingerprint; returns True if it was not present yet"""
+        if self.contains_fingerprint(fp):
+            return False
+        self.pending.add(fp)
+        if len(self.pending) >= max(self.MIN_PENDING, len(self.sorted) >> 4):
+            self.merge()
+        return True
+
+    def merge(self):
+        """Fold the pending set into the sorted array"""
+        if self.pending:
+            # Copy the runs of the old array between insertion points straight into
+            # a new array (memoryview slices, no intermediate copies), so the peak
+            # is the old and new arrays at 8 bytes per fingerprint rather than a
+            # Python list of ints
+            old = self.sorted
+            view = memoryview(old).cast('B')
+            size = old.itemsize
+            merged = array('Q')
+            start = 0
+            for fp in sorted(self.pending):
+                index = bisect.bisect_left(old, fp, start)
+                merged.frombytes(view[start * size:index * size])
+                merged.append(fp)
+                start = index
+            merged.frombytes(view[start * size:])
+            view.release()
+            self.sorted = merged
+            self.pending = set()
+
+    @property
+    def nbytes(self):
+        return self.sorted.itemsize * len(self.sorted) + len(self.pending) * 8
+
+    def false_positive_rate(self):
+        """Chance that an unseen URL collides with a stored 64-bit fingerprint"""
+        return len(self) / float(2 ** FINGERPRINT_BITS)
+
+    def save(self):
+        if not self.path:
+            return
+        self.merge()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            self.sorted.tofile(f)
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        self.save()
+
+
+class BloomFilter:
+    """Bloom filter over URL fingerprints, persisted in a file opened with mmap.
+
+    File layout: 32-byte header (magic, bit count, hash count, item count)
+    followed by the bit array. k bit positions are derived from one 64-bit
+    fingerprint with double hashing.
+    """
+
+    MAGIC = b'DNBLOOM1'
+    HEADER = struct.Struct('<8sQQQ')
+
+    def __init__(self, path=None, capacity=5000000, error_rate=0.001):
+        self.path = path
+        self.error_rate = error_rate
+        if path and os.path.exists(path):
+            self._open(path)
+        else:
+            self.num_bits, self.num_hashes = self.optimal_parameters(capacity, error_rate)
+            self.count = 0
+            self._create(path)
+        # Items the bit array was sized for (recovered from m and k for existing files)
+        self.capacity = int(self.num_bits * math.log(2) / self.num_hashes)
+
+    @staticmethod
+    def optimal_parameters(capacity, error_rate):
+        """Bit count (m) and hash count (k) for n items at false-positive rate p"""
+        capacity = max(1, int(capacity))
+        num_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        num_hashes = max(1, int(round(num_bits / capacity * math.log(2))))
+        return num_bits, num_hashes
+
+    def _create(self, path):
+        size = (self.num_bits + 7) // 8
+        if not path:
+            self.file = None
+            self.bits = bytearray(size)
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.num_bits, self.num_hashes, 0))
+            f.truncate(self.HEADER.size + size)
+        self._open(path)
+
+    def _open(self, path):
+        self.file = open(path, 'r+b')
+        self.mm = mmap.mmap(self.file.fileno(), 0)
+        magic, self.num_bits, self.num_hashes, self.count = self.HEADER.unpack_from(self.mm, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f"{path} is not a seen-URL Bloom filter file")
+        self.bits = memoryview(self.mm)[self.HEADER.size:]
+
+    def _positions(self, fp):
+        h1 = fp & 0xFFFFFFFF
+        h2 = (fp >> 32) | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, url):
+        if not url:
+            return False
+        return self.contains_fingerprint(url_fingerprint(url))
+
+    def add(self, url):
+        if url:
+            self.add_fingerprint(url_fingerprint(url))
+
+    def contains_fingerprint(self, fp):
+        bits = self.bits
+        for pos in self._positions(fp):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add_fingerprint(self, fp):
+        """Set the bits for fp; returns True if at least one bit was new"""
+        bits = self.bits
+        added = False
+        for pos in self._positions(fp):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    @property
+    def nbytes(self):
+        return (self.num_bits + 7) // 8
+
+    def false_positive_rate(self):
+        """Expected false-positive rate at the current fill level"""
+        return (1 - math.exp(-self.num_hashes * self.count / float(self.num_bits))) ** self.num_hashes
+
+    def save(self):
+        if self.file is None:
+            return
+        self.HEADER.pack_into(self.mm, 0, self.MAGIC, self.num_bits, self.num_hashes, self.count)
+        self.mm.flush()
+
+    def close(self):
+        if self.file is None:
+            return
+        self.save()
+        self.bits.release()
+        self.mm.close()
+        self.file.close()
+        self.file = None
+
+
+class ScalableBloomFilter:
+    """Bloom filter that grows by adding slices instead of needing a fixed capacity.
+
+    Each new slice has GROWTH times the capacity of the previous one and a tighter
+    error rate (TIGHTENING), so the compound false-positive rate stays below the
+    configured one. Slices are stored as <path>.0, <path>.1, ...
+    """
+
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(self, path=None, initial_capacity=1000000, error_rate=0.001):
+        self.path = path
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.slices = []
+        if path:
+            while os.path.exists(self.slice_path(len(self.slices))):
+                self.slices.append(BloomFilter(self.slice_path(len(self.slices))))
+        if not self.slices:
+            self.add_slice()
+
+    def slice_path(self, index):
+        return f"{self.path}.{index}" if self.path else None
+
+    def add_slice(self):
+        index = len(self.slices)
+        capacity = self.initial_capacity * (self.GROWTH ** index)
+        error_rate = self.error_rate * (1 - self.TIGHTENING) * (self.TIGHTENING ** index)
+        self.slices.append(BloomFilter(self.slice_path(index), capacity=capacity, error_rate=error_rate))
+
+    def __len__(self):
+        return sum(len(bloom) for bloom in self.slices)
+
+    def __contains__(self, url):
+        if not url:
+            return False
+        return self.contains_fingerprint(url_fingerprint(url))
+
+    def add(self, url):
+        if url:
+            self.add_fingerprint(url_fingerprint(url))
+
+    def contains_fingerprint(self, fp):
+        return any(bloom.contains_fingerprint(fp) for bloom in self.slices)
+
+    def add_fingerprint(self, fp):
+        """Add fp to the newest slice; returns True if it was not present yet"""
+        if self.contains_fingerprint(fp):
+            return False
+        current = self.slices[-1]
+        if len(current) >= current.capacity:
+            self.add_slice()
+            current = self.slices[-1]
+        current.add_fingerprint(fp)
+        return True
+
+    @property
+    def nbytes(self):
+        return sum(bloom.nbytes for bloom in self.slices)
+
+    def false_positive_rate(self):
+        """Compound false-positive rate over all slices"""
+        miss = 1.0
+        for bloom in self.slices:
+            miss *= 1 - bloom.false_positive_rate()
+        return 1 - miss
+
+    def save(self):
+        for bloom in self.slices:
+            bloom.save()
+
+    def close(self):
+        for bloom in self.slices:
+            bloom.close()
+
+
+def open_seen_url_store(settings):
+    """Build the seen-URL store selected by SEEN_URLS_BACKEND ('memory' or 'bloom')"""
+    from scrapy.utils.project import data_path
+
+    backend = settings.get('SEEN_URLS_BACKEND', 'memory')
+    path = settings.get('SEEN_URLS_PATH') or None
+    if backend == 'bloom':
+        return BloomFilter(
+            path=data_path(path or 'seen_urls.bloom'),
+            capacity=settings.getint('SEEN_URLS_CAPACITY', 5000000),
+            error_rate=settings.getfloat('SEEN_URLS_ERROR_RATE', 0.001),
+        )
+    if backend == 'memory':
+        return FingerprintSet(path=data_path(path or 'seen_urls.fp'))
+    raise ValueError(f"Unknown SEEN_URLS_BACKEND: {backend!r} (expected 'memory' or 'bloom')")
@@ -0,0 +1,202 @@
+"""
+Append-only pack-file response cache (HTTPCACHE_STORAGE).
+
+Iterating on selectors used to mean re-downloading dealnews.com through the
+paid proxy. With RESPONSE_CACHE_MODE set, Scrapy's HttpCacheMiddleware keeps
+responses in a ResponsePack:
+
+- <name>.pack holds compressed records, only ever appended to: response
+  bodies, stored once per distinct body (content-addressed by a BLAKE2b digest),
+  and response entries (url, status, headers, body digest) per request;
+- <name>.idx holds one fixed-size row per record (kind, key, offset, length,
+  codec, timestamp) and is read into two dicts on open: request fingerprint ->
+  entry and body digest -> body.
+
+Records are zstd-compressed when the optional zstandard package is installed
+and zlib-compressed otherwise; the codec is stored per record, so a pack can be
+read with either. Replaying a recorded crawl needs no network, and
+ResponsePack.responses() iterates a pack directly as a parser benchmark corpus.
+"""
+import os
+import json
+import time
+import zlib
+import struct
+import hashlib
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is used instead
+    zstandard = None
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+KIND_BODY = b'B'
+KIND_ENTRY = b'R'
+
+# kind, key (20 bytes: request fingerprint or body digest), offset, length, codec, timestamp
+INDEX_ROW = struct.Struct('<c20sQIBd')
+
+
+def body_digest(body):
+    return hashlib.blake2b(body, digest_size=20).digest()
+
+
+def compress(data, codec):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress(data, codec):
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Response pack record is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def default_codec(name='auto'):
+    """Codec for new records: 'zstd', 'gzip'/'zlib', or 'auto' (zstd when installed)"""
+    if name == 'zstd' or (name == 'auto' and zstandard is not None):
+        if zstandard is None:
+            raise ValueError("RESPONSE_CACHE_COMPRESSION=zstd needs the zstandard package")
+        return CODEC_ZSTD
+    if name in ('auto', 'gzip', 'zlib'):
+        return CODEC_ZLIB
+    raise ValueError(f"Unknown RESPONSE_CACHE_COMPRESSION: {name!r} (expected 'auto', 'zstd' or 'gzip')")
+
+
+class ResponsePack:
+    """Pack file of compressed responses plus its index"""
+
+    def __init__(self, path, codec=None):
+        self.path = path
+        self.codec = codec or default_codec()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.entries = {}  # request fingerprint -> (offset, length, codec, timestamp)
+        self.bodies = {}   # body digest -> (offset, length, codec)
+        self.load_index()
+        self.writer = open(f"{path}.pack", 'ab')
+        self.reader = open(f"{path}.pack", 'rb')
+        self.index = open(f"{path}.idx", 'ab')
+
+    def load_index(self):
+        index_path = f"{self.path}.idx"
+        pack_size = os.path.getsize(f"{self.path}.pack") if os.path.exists(f"{self.path}.pack") else 0
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_ROW.size  # ignore a torn last row
+        for kind, key, offset, length, codec, stored_at in INDEX_ROW.iter_unpack(data[:usable]):
+            if offset + length > pack_size:
+                continue  # record never made it to the pack file
+            if kind == KIND_BODY:
+                self.bodies[key] = (offset, length, codec)
+            elif kind == KIND_ENTRY:
+                self.entries[key] = (offset, length, codec, stored_at)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, fingerprint):
+        return fingerprint in self.entries
+
+    def _append(self, kind, key, data, stored_at):
+        payload = compress(data, self.codec)
+        offset = self.writer.tell()
+        self.writer.write(payload)
+        self.writer.flush()
+        self.index.write(INDEX_ROW.pack(kind, key, offset, len(payload), self.codec, stored_at))
+        self.index.flush()
+        return offset, len(payload)
+
+    def _read(self, offset, length, codec):
+        self.reader.seek(offset)
+        return decompress(self.reader.read(length), codec)
+
+    def put(self, fingerprint, url, status, headers, body, stored_at=None):
+        """Store a response under a 20-byte request fingerprint"""
+        stored_at = time.time() if stored_at is None else stored_at
+        digest = body_digest(body)
+        if digest not in self.bodies:
+            offset, length = self._append(KIND_BODY, digest, body, stored_at)
+            self.bodies[digest] = (offset, length, self.codec)
+        entry = json.dumps({
+            'url': url,
+            'status': status,
+            'headers': {k.decode('latin-1'): [v.decode('latin-1') for v in values]
+                        for k, values in headers.items()},
+            'body': digest.hex(),
+        }).encode('utf-8')
+        offset, length = self._append(KIND_ENTRY, fingerprint, entry, stored_at)
+        self.entries[fingerprint] = (offset, length, self.codec, stored_at)
+
+    def stored_at(self, fingerprint):
+        entry = self.entries.get(fingerprint)
+        return entry[3] if entry else None
+
+    def get(self, fingerprint):
+        """Response stored under fingerprint, or None"""
+        entry = self.entries.get(fingerprint)
+        if entry is None:
+            return None
+        meta = json.loads(self._read(*entry[:3]))
+        body = self._read(*self.bodies[bytes.fromhex(meta['body'])])
+        headers = Headers(meta['headers'])
+        respcls = responsetypes.from_args(headers=headers, url=meta['url'], body=body)
+        return respcls(url=meta['url'], headers=headers, status=meta['status'], body=body)
+
+    def responses(self):
+        """Every stored response, in the order they were recorded"""
+        for fingerprint, _ in sorted(self.entries.items(), key=lambda item: item[1][0]):
+            yield self.get(fingerprint)
+
+    @property
+    def nbytes(self):
+        return self.writer.tell()
+
+    def close(self):
+        for f in (self.writer, self.reader, self.index):
+            f.close()
+
+
+class PackFileCacheStorage:
+    """HTTPCACHE_STORAGE backed by one ResponsePack per spider under HTTPCACHE_DIR"""
+
+    def __init__(self, settings):
+        from scrapy.utils.project import data_path
+
+        self.cachedir = data_path(settings['HTTPCACHE_DIR'], createdir=True)
+        self.expiration_secs = settings.getint('HTTPCACHE_EXPIRATION_SECS')
+        self.codec = default_codec(settings.get('RESPONSE_CACHE_COMPRESSION', 'auto'))
+        self.pack = None
+
+    def open_spider(self, spider):
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        self.pack = ResponsePack(os.path.join(self.cachedir, spider.name), codec=self.codec)
+        spider.logger.info(f"🗄️ Response cache: {len(self.pack):,} responses in {self.pack.path}.pack "
+                           f"({self.pack.nbytes / 1048576:.1f} MB)")
+
+    def close_spider(self, spider):
+        spider.logger.info(f"🗄️ Response cache: {len(self.pack):,} responses, {len(self.pack.bodies):,} distinct bodies "
+                           f"({self.pack.nbytes / 1048576:.1f} MB)")
+        self.pack.close()
+
+    def retrieve_response(self, spider, request):
+        """Return the cached response, or None if missing or older than HTTPCACHE_EXPIRATION_SECS"""
+        fingerprint = self._fingerprinter.fingerprint(request)
+        stored_at = self.pack.stored_at(fingerprint)
+        if stored_at is None:
+            return None
+        if 0 < self.expiration_secs < time.time() - stored_at:
+            return None  # expired: fetched again and appended (the newest entry wins)
+        return self.pack.get(fingerprint)
+
+    def store_response(self, spider, request, response):
+        self.pack.put(self._fingerprinter.fingerprint(request), response.url, response.status,
+                      response.headers, response.body)
@@ -0,0 +1,105 @@
+"""
+Per-listing change detection for incremental crawls.
+
+A full crawl walks every category to its last start= offset, although a daily
+run only finds new deals near the top of each listing. ListingStateStore keeps,
+per listing URL, a digest of the ordered deal ids the page showed on the last
+run in a small SQLite file. With INCREMENTAL_CRAWL on, parse() stops a
+category's pagination at the first page that has nothing new: every deal on it
+is already in the seen-URL store, or its digest matches the previous run.
+
+Each listing row also records how many new deals the page had, so the counts
+per category (the listing URL without start=) are kept for the next run to
+compare against, and are reported as incremental/new_deals/<category> stats.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+from urllib.parse import urlparse
+from dealnews_scraper.pagination import stream_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listing_state (
+    url TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    deal_count INTEGER NOT NULL,
+    new_deals INTEGER NOT NULL,
+    crawled_at REAL NOT NULL
+)
+"""
+
+
+def listing_digest(dealids):
+    """16 hex chars identifying an ordered list of deal ids"""
+    return hashlib.blake2b('\n'.join(dealids).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def category_of(url):
+    """Category label of a listing URL: its path without start= (e.g. 'c142/Electronics')"""
+    parsed = urlparse(stream_key(url))
+    category = parsed.path.strip('/') or 'home'
+    return f"{category}?{parsed.query}" if parsed.query else category
+
+
+class ListingStateStore:
+    """url -> (digest of ordered deal ids, deal count, new deals) from the last run"""
+
+    COMMIT_EVERY = 100
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(SCHEMA)
+        self.previous = dict(self.conn.execute('SELECT url, digest FROM listing_state'))
+        self.pending = 0
+        self.unchanged = 0
+        self.changed = 0
+        self.new_by_category = {}
+
+    def __len__(self):
+        return len(self.previous)
+
+    def record(self, url, dealids, new_deals):
+        """Store the page's deal ids; returns True if they match the previous run"""
+        digest = listing_digest(dealids)
+        unchanged = self.previous.get(url) == digest
+        if unchanged:
+            self.unchanged += 1
+        else:
+            self.changed += 1
+        category = category_of(url)
+        self.new_by_category[category] = self.new_by_category.get(category, 0) + new_deals
+        self.conn.execute(
+            'INSERT OR REPLACE INTO listing_state (url, category, digest, deal_count, new_deals, crawled_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (url, category, digest, len(dealids), new_deals, time.time()),
+        )
+        self.pending += 1
+        if self.pending >= self.COMMIT_EVERY:
+            self.commit()
+        return unchanged
+
+    def commit(self):
+        if self.pending:
+            self.conn.commit()
+            self.pending = 0
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.commit()
+        self.conn.close()
+        self.conn = None
+
+
+def open_listing_state(settings):
+    """ListingStateStore for INCREMENTAL_CRAWL, or None when the mode is off"""
+    from scrapy.utils.project import data_path
+
+    if not settings.getbool('INCREMENTAL_CRAWL'):
+        return None
+    return ListingStateStore(data_path(settings.get('LISTING_STATE_PATH') or 'listing_state.sqlite'))
@@ -1,8 +1,28 @@
 import os
+import re
+import html
 import time
+import itertools
 import mysql.connector
 import logging
+from twisted.internet import defer, task, threads
+from twisted.python.failure import Failure
+from twisted.python.threadpool import ThreadPool
 from dealnews_scraper.items import DealnewsItem, DealImageItem, DealCategoryItem, RelatedDealItem
+from dealnews_scraper.runtime_config import RuntimeConfig
+from dealnews_scraper.signals import batch_committed, batch_flushing
+
+# Category names that are labels rather than real categories
+INVALID_CATEGORY_NAMES = {
+    'sponsored', 'expired', 'active', 'inactive', 'new', 'used', 'refurbished',
+    'deal', 'sale', 'offer', 'buy', 'shop', 'more', 'less', 'read more',
+    'staff pick', 'popular', 'featured', 'hot', 'trending', 'best seller',
+    'limited time', 'ending soon', 'expires', 'ended', 'no longer available'
+}
+
+# Position of category_id in the deal row built by build_deal_row()
+DEAL_ROW_CATEGORY_ID = 7
+
 
 class NormalizedMySQLPipeline:
     """MySQL pipeline that stores all deal data in normalized tables.
@@ -12,13 +32,133 @@ class NormalizedMySQLPipeline:
     - deal_images: Multiple images per deal (unique constraint on dealid+imageurl)
     - deal_categories: Multiple categories per deal
     - related_deals: Multiple related deals per deal (unique constraint on dealid+relatedurl)
+
+    With MYSQL_BATCH_SIZE > 0 rows are buffered in memory and written with
+    multi-row executemany() upserts inside one transaction. A flush happens when
+    the batch size is reached, when MYSQL_FLUSH_INTERVAL seconds have passed since
+    the last flush, and when the spider closes.
+
+    All MySQL statements after open_spider run on a dedicated single-thread writer
+    pool, so the reactor keeps crawling while MySQL is busy. When more than
+    MYSQL_MAX_PENDING_WRITES batches are queued, process_item returns a Deferred
+    that waits for the writer; Scrapy keeps the response in the scraper slot and
+    stops pulling new requests from the scheduler until the queue drains.
     """
-    
+
+    DEAL_UPSERT_SQL = """
+    INSERT INTO deals (dealid, recid, url, title, price, promo, category, category_id, store, deal, dealplus, 
+                     deallink, dealtext, dealhover, published, popularity, staffpick, 
+                     detail, raw_html, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+    ON DUPLICATE KEY UPDATE 
+        recid = VALUES(recid),
+        url = VALUES(url),
+        title = VALUES(title),
+        price = VALUES(price),
+        promo = VALUES(promo),
+        category = VALUES(category),
+        category_id = VALUES(category_id),
+        store = VALUES(store),
+        deal = VALUES(deal),
+        dealplus = VALUES(dealplus),
+        deallink = VALUES(deallink),
+        dealtext = VALUES(dealtext),
+        dealhover = VALUES(dealhover),
+        published = VALUES(published),
+        popularity = VALUES(popularity),
+        staffpick = VALUES(staffpick),
+        detail = VALUES(detail),
+        raw_html = VALUES(raw_html),
+        updated_at = NOW()
+    """
+
+    IMAGE_UPSERT_SQL = """
+    INSERT INTO deal_images (dealid, imageurl, created_at)
+    VALUES (%s, %s, NOW())
+    ON DUPLICATE KEY UPDATE created_at = created_at
+    """
+
+    # Save to categories lookup table (normalized - one row per unique category)
+    CATEGORY_UPSERT_SQL = """
+    INSERT INTO categories (category_id, category_name, category_url, category_description, created_at)
+    VALUES (%s, %s, %s, %s, NOW())
+    ON DUPLICATE KEY UPDATE 
+        category_name = VALUES(category_name),
+        category_url = VALUES(category_url),
+        category_description = VALUES(category_description),
+        updated_at = NOW()
+    """
+
+    # Update the deal's category_id to reference this category
+    DEAL_CATEGORY_ID_SQL = """
+    UPDATE deals 
+    SET category_id = %s 
+    WHERE dealid = %s AND (category_id IS NULL OR category_id = '')
+    """
+
+    RELATED_UPSERT_SQL = """
+    INSERT INTO related_deals (dealid, relatedurl, created_at)
+    VALUES (%s, %s, NOW())
+    ON DUPLICATE KEY UPDATE created_at = created_at
+    """
+
+    def __init__(self, batch_size=0, flush_interval=0.0, stats=None, max_pending_writes=4, config=None, signals=None):
+        self.mysql_enabled = False
+        self.config = config  # RuntimeConfig; built from the environment in open_spider when not given
+        self.signals = signals  # crawler.signals, for batch_flushing / batch_committed (see signals.py)
+        self.batch_ids = itertools.count(1)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = stats
+        self.max_pending_writes = max_pending_writes
+        self.reset_buffers()
+        self.last_flush = time.time()
+        self.rows_flushed = 0
+        self.flush_seconds = 0.0
+        # Writer thread state (None = run statements inline, e.g. in tests)
+        self.writer = None
+        self.flush_loop = None
+        self.pending_writes = 0
+        self.backpressure_waiters = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            batch_size=crawler.settings.getint('MYSQL_BATCH_SIZE', 0),
+            flush_interval=crawler.settings.getfloat('MYSQL_FLUSH_INTERVAL', 0.0),
+            stats=crawler.stats,
+            max_pending_writes=crawler.settings.getint('MYSQL_MAX_PENDING_WRITES', 4),
+            config=RuntimeConfig.from_crawler(crawler),
+            signals=crawler.signals,
+        )
+
+    @property
+    def mysql_config(self):
+        if self.config is None:
+            self.config = RuntimeConfig.from_settings()
+        return self.config.mysql
+
+    @property
+    def buffered(self):
+        return self.batch_size > 0
+
+    def reset_buffers(self):
+        """Start a new, empty write batch"""
+        self.deal_rows = {}              # dealid -> deal row (last write wins)
+        self.image_rows = []             # (dealid, imageurl)
+        self.category_rows = {}          # category_id -> categories row
+        self.deal_category_rows = []     # (category_id, dealid) for deals outside the batch
+        self.related_rows = []           # (dealid, relatedurl)
+
+    def pending_rows(self):
+        return (len(self.deal_rows) + len(self.image_rows) + len(self.category_rows) +
+                len(self.deal_category_rows) + len(self.related_rows))
+
     def open_spider(self, spider):
         try:
             # Check if MySQL is disabled
-            disable_mysql = os.getenv('DISABLE_MYSQL', 'false').lower() in ('1', 'true', 'yes')
-            if disable_mysql:
+            mysql_config = self.mysql_config
+            if not mysql_config.enabled:
                 logging.info("MySQL pipeline disabled by DISABLE_MYSQL flag")
                 spider.logger.info("MySQL pipeline disabled by DISABLE_MYSQL flag")
                 self.mysql_enabled = False
@@ -27,22 +167,15 @@ class NormalizedMySQLPipeline:
             self.mysql_enabled = True
             spider.logger.info("Normalized MySQL pipeline enabled - attempting connection...")
             
-            # Get MySQL connection settings
-            mysql_host = os.getenv('MYSQL_HOST', 'localhost')
-            mysql_port = int(os.getenv('MYSQL_PORT', '3306'))
-            mysql_user = os.getenv('MYSQL_USER', 'root')
-            mysql_password = os.getenv('MYSQL_PASSWORD', 'root')
-            mysql_database = os.getenv('MYSQL_DATABASE', 'dealnews')
+            # MySQL connection settings (read once, see runtime_config.py)
+            mysql_database = mysql_config.database
             
-            spider.logger.info(f"Connecting to MySQL: {mysql_host}:{mysql_port} as {mysql_user} to database {mysql_database}")
+            spider.logger.info(f"Connecting to MySQL: {mysql_config.host}:{mysql_config.port} as {mysql_config.user} to database {mysql_database}")
             
             # Test connection first
             try:
                 test_conn = mysql.connector.connect(
-                    host=mysql_host,
-                    port=mysql_port,
-                    user=mysql_user,
-                    password=mysql_password,
+                    **mysql_config.connect_kwargs(),
                     connection_timeout=10
                 )
                 test_conn.close()
@@ -57,10 +190,7 @@ class NormalizedMySQLPipeline:
             # If connection test passed, create main connection
             # First connect WITHOUT database to ensure we can create it if needed
             self.conn = mysql.connector.connect(
-                host=mysql_host,
-                port=mysql_port,
-                user=mysql_user,
-                password=mysql_password,
+                **mysql_config.connect_kwargs(),
                 use_pure=True,
                 connection_timeout=60,
                 autocommit=True
@@ -80,23 +210,32 @@ class NormalizedMySQLPipeline:
             self.create_all_tables()
             
             # Check if we should clear existing data
-            clear_data = os.getenv('CLEAR_DATA', 'false').lower() in ('1', 'true', 'yes')
-            if clear_data:
+            if mysql_config.clear_data:
                 spider.logger.info("🔄 CLEAR_DATA=true - Clearing all existing data...")
                 self.clear_all_data()
                 spider.logger.info("✅ All existing data cleared")
             
-            # Initialize counters
-            self.deals_saved = 0
-            self.images_saved = 0
-            self.categories_saved = 0
-            self.related_deals_saved = 0
+            self.start_writes(spider)
             
         except Exception as e:
             spider.logger.error(f"❌ Unexpected error in pipeline setup: {e}")
             spider.logger.info("Disabling MySQL pipeline - data will only be exported to JSON/CSV")
             self.mysql_enabled = False
     
+    def start_writes(self, spider):
+        """Reset the counters and start the writer thread and flush timer (connection is open)"""
+        self.deals_saved = 0
+        self.images_saved = 0
+        self.categories_saved = 0
+        self.related_deals_saved = 0
+        self.last_flush = time.time()
+        self.start_writer(spider)
+        if self.buffered:
+            spider.logger.info(f"📦 Buffered MySQL writes enabled: batch size {self.batch_size}, flush interval {self.flush_interval}s")
+            if self.flush_interval > 0:
+                self.flush_loop = task.LoopingCall(self.interval_flush, spider)
+                self.flush_loop.start(self.flush_interval, now=False)
+    
     def create_all_tables(self):
         """Create all normalized tables if they don't exist."""
         try:
@@ -217,12 +356,28 @@ class NormalizedMySQLPipeline:
             raise
 
     def close_spider(self, spider):
+        if not self.mysql_enabled:
+            return None
+        if self.flush_loop is not None and self.flush_loop.running:
+            self.flush_loop.stop()
+        # The writer runs jobs in order, so closing after the final flush
+        # also waits for every write queued before it
+        # (unbuffered, the flush has no rows but still confirms the last item writes)
+        d = self.flush(spider, reason='close')
+        d.addBoth(lambda _: self.run_in_writer(self.close_connection, spider))
+        d.addBoth(lambda _: self.stop_writer())
+        return d
+
+    def close_connection(self, spider):
+        """Log final counters and close the connection (runs on the writer thread)"""
         if self.mysql_enabled:
             spider.logger.info(f"📊 Final stats:")
             spider.logger.info(f"   Deals saved: {self.deals_saved:,}")
             spider.logger.info(f"   Images saved: {self.images_saved:,}")
             spider.logger.info(f"   Categories saved: {self.categories_saved:,}")
             spider.logger.info(f"   Related deals saved: {self.related_deals_saved:,}")
+            if self.flush_seconds > 0:
+                spider.logger.info(f"   Buffered writes: {self.rows_flushed:,} rows in {self.flush_seconds:.1f}s ({self.rows_flushed / self.flush_seconds:,.0f} rows/sec)")
             
             if hasattr(self, 'cursor'):
                 self.cursor.close()
@@ -233,7 +388,26 @@ class NormalizedMySQLPipeline:
     def process_item(self, item, spider):
         if not self.mysql_enabled:
             return item
-            
+        
+        if not self.buffered:
+            # One write per item on the writer thread; the item moves on once stored
+            # (store_item returns None when the write was dropped)
+            batch_id = self.start_batch(spider)
+            d = self.run_in_writer(self.store_item, item, spider)
+            if isinstance(item, DealnewsItem):
+                d.addCallback(self.item_stored, spider)
+            d.addBoth(self.batch_done, batch_id, spider)
+            d.addCallback(lambda _: item)
+            return d
+        
+        # Buffered mode only appends to the in-memory batch here (no I/O)
+        self.store_item(item, spider)
+        if len(self.deal_rows) >= self.batch_size or self.pending_rows() >= self.batch_size * 10:
+            self.flush(spider, reason='size')
+        return self.wait_for_writer(item)
+
+    def store_item(self, item, spider):
+        """Route an item to the matching save path; None if it could not be saved"""
         try:
             if isinstance(item, DealnewsItem):
                 return self.process_deal_item(item, spider)
@@ -245,155 +419,35 @@ class NormalizedMySQLPipeline:
                 return self.process_related_deal_item(item, spider)
         except Exception as e:
             spider.logger.error(f"❌ Error processing item: {e}")
+            return None
             
         return item
 
     def process_deal_item(self, item, spider):
-        """Process main deal item and save to deals table"""
+        """Process main deal item and save to deals table.
+        
+        Unbuffered, returns None when the upsert failed every attempt, so the
+        deal is neither marked seen nor reported as committed.
+        """
+        deal_values = self.build_deal_row(item, spider)
+        if deal_values is None:
+            return item
+        dealid = deal_values[0]
+        
+        if self.buffered:
+            # Newer copy of the same deal replaces the buffered one
+            self.deal_rows[dealid] = list(deal_values)
+            self.save_deal_children(dealid, item, spider)
+            return item
+        
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                dealid = item.get('dealid', '')
-                title = item.get('title', '').strip()
-                
-                if not dealid:
-                    spider.logger.debug("Skipping deal without dealid")
-                    return item
-                
-                # Skip obvious non-deal placeholders
-                if dealid.startswith('dealnewsjs') or dealid.startswith('simpleslider'):
-                    spider.logger.debug(f"Skipping placeholder dealid: {dealid}")
-                    return item
-                
-                url = item.get('url', '').strip()
-                if not url or (url == 'https://www.dealnews.com/' and not dealid):
-                    spider.logger.debug(f"Skipping deal {dealid} with invalid URL: {url}")
-                    return item
-                
-                if (not title or title == 'No title found') and not (item.get('deallink') or url):
-                    spider.logger.debug(f"Skipping empty item for dealid {dealid}")
-                    return item
-                
-                # Save to deals table
-                deal_sql = """
-                INSERT INTO deals (dealid, recid, url, title, price, promo, category, category_id, store, deal, dealplus, 
-                                 deallink, dealtext, dealhover, published, popularity, staffpick, 
-                                 detail, raw_html, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                ON DUPLICATE KEY UPDATE 
-                    recid = VALUES(recid),
-                    url = VALUES(url),
-                    title = VALUES(title),
-                    price = VALUES(price),
-                    promo = VALUES(promo),
-                    category = VALUES(category),
-                    category_id = VALUES(category_id),
-                    store = VALUES(store),
-                    deal = VALUES(deal),
-                    dealplus = VALUES(dealplus),
-                    deallink = VALUES(deallink),
-                    dealtext = VALUES(dealtext),
-                    dealhover = VALUES(dealhover),
-                    published = VALUES(published),
-                    popularity = VALUES(popularity),
-                    staffpick = VALUES(staffpick),
-                    detail = VALUES(detail),
-                    raw_html = VALUES(raw_html),
-                    updated_at = NOW()
-                """
-                
-                # Clean HTML entities from category field and truncate if needed
-                category_value = (item.get('category', '') or '').strip()
-                # Decode HTML entities (e.g., &amp; -> &, &nbsp; -> space, &gt; -> >)
-                if category_value:
-                    import html
-                    import re
-                    category_value = html.unescape(category_value)
-                    # Also replace &nbsp; with space (html.unescape doesn't handle all cases)
-                    category_value = category_value.replace('&nbsp;', ' ').replace('\xa0', ' ')
-                    # Clean up multiple spaces
-                    category_value = re.sub(r'\s+', ' ', category_value).strip()
-                    # Truncate to 255 characters to fit VARCHAR(255)
-                    category_value = category_value[:255]
-                
-                # Validate and clean deal field - prevent JSON data from being saved
-                deal_value = item.get('deal', '') or ''
-                # Check if deal field contains JSON (should not happen)
-                if deal_value and ('@context' in deal_value or 'schema.org' in deal_value or deal_value.strip().startswith('{')):
-                    spider.logger.warning(f"⚠️ Deal field contains JSON for deal {dealid}, clearing it")
-                    deal_value = ''  # Clear invalid JSON data
-                
-                # Validate dealplus field
-                dealplus_value = item.get('dealplus', '') or ''
-                if dealplus_value and ('@context' in dealplus_value or 'schema.org' in dealplus_value):
-                    spider.logger.warning(f"⚠️ Dealplus field contains JSON for deal {dealid}, clearing it")
-                    dealplus_value = ''
-                
-                # Extract category_id from first category if available
-                category_id_value = ''
-                if hasattr(item, 'get') and 'category_id' in item:
-                    category_id_value = item.get('category_id', '') or ''
-                
-                deal_values = (
-                    dealid,
-                    item.get('recid', '') or '',
-                    url,
-                    title,
-                    item.get('price', '') or '',
-                    item.get('promo', '') or '',
-                    category_value,
-                    category_id_value,  # Add category_id
-                    item.get('store', '') or '',
-                    deal_value,  # Use cleaned deal value
-                    dealplus_value,  # Use cleaned dealplus value
-                    item.get('deallink', '') or url,
-                    item.get('dealtext', '') or item.get('detail', '') or '',
-                    item.get('dealhover', '') or '',
-                    item.get('published', '') or '',
-                    item.get('popularity', '') or '',
-                    item.get('staffpick', '') or '',
-                    item.get('detail', '') or '',
-                    item.get('raw_html', '')[:50000] if item.get('raw_html') else ''  # Limit raw_html size
-                )
-                
-                self.cursor.execute(deal_sql, deal_values)
+                self.cursor.execute(self.DEAL_UPSERT_SQL, deal_values)
                 self.deals_saved += 1
                 
                 # Also save images, categories, and related deals from the main item if present
-                images_list = item.get('images', [])
-                if images_list:
-                    spider.logger.debug(f"Saving {len(images_list)} images for deal {dealid}")
-                    for img_url in images_list:
-                        if img_url and img_url.strip():
-                            self.save_image(dealid, img_url.strip(), spider)
-                else:
-                    spider.logger.debug(f"No images found for deal {dealid}")
-                
-                categories_list = item.get('categories', [])
-                if categories_list:
-                    spider.logger.debug(f"Saving {len(categories_list)} categories for deal {dealid}")
-                    for cat in categories_list:
-                        if isinstance(cat, dict):
-                            self.save_category(dealid, cat, spider)
-                        elif isinstance(cat, str) and cat.strip():
-                            self.save_category(dealid, {'category_name': cat.strip()}, spider)
-                else:
-                    # At least save the main category from item if available
-                    main_category = item.get('category', '').strip()
-                    if main_category:
-                        spider.logger.debug(f"Saving main category '{main_category}' for deal {dealid}")
-                        self.save_category(dealid, {'category_name': main_category}, spider)
-                    else:
-                        spider.logger.debug(f"No categories found for deal {dealid}")
-                
-                related_deals_list = item.get('related_deals', [])
-                if related_deals_list:
-                    spider.logger.debug(f"Saving {len(related_deals_list)} related deals for deal {dealid}")
-                    for rel_url in related_deals_list:
-                        if rel_url and rel_url.strip():
-                            self.save_related_deal(dealid, rel_url.strip(), spider)
-                else:
-                    spider.logger.debug(f"No related deals found for deal {dealid}")
+                self.save_deal_children(dealid, item, spider)
                 
                 if self.deals_saved % 100 == 0:
                     spider.logger.info(f"✅ Saved {self.deals_saved:,} deals, {self.images_saved:,} images, {self.categories_saved:,} categories, {self.related_deals_saved:,} related deals")
@@ -403,47 +457,338 @@ class NormalizedMySQLPipeline:
             except mysql.connector.Error as err:
                 spider.logger.error(f"❌ MySQL error saving deal (attempt {attempt + 1}/{max_retries}): {err}")
                 if attempt < max_retries - 1:
+                    # Runs on the writer thread, so this only delays MySQL writes
                     time.sleep(2)
-                    try:
-                        # Reconnect with database selection
-                        mysql_database = os.getenv('MYSQL_DATABASE', 'dealnews')
-                        self.conn.reconnect()
-                        self.cursor = self.conn.cursor()
-                        # Explicitly select database after reconnect
-                        self.cursor.execute(f"CREATE DATABASE IF NOT EXISTS {mysql_database} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
-                        self.cursor.execute(f"USE {mysql_database}")
-                    except Exception as reconnect_err:
-                        spider.logger.error(f"❌ Reconnection failed: {reconnect_err}")
-                        # Create new connection if reconnect fails
-                        mysql_host = os.getenv('MYSQL_HOST', 'localhost')
-                        mysql_port = int(os.getenv('MYSQL_PORT', '3306'))
-                        mysql_user = os.getenv('MYSQL_USER', 'root')
-                        mysql_password = os.getenv('MYSQL_PASSWORD', 'root')
-                        self.conn = mysql.connector.connect(
-                            host=mysql_host,
-                            port=mysql_port,
-                            user=mysql_user,
-                            password=mysql_password,
-                            # database=mysql_database,  # Don't specify database yet
-                            use_pure=True,  # Add explicit use_pure=True for consistency
-                            connection_timeout=60,
-                            autocommit=True
-                        )
-                        self.cursor = self.conn.cursor()
-                        # Ensure database exists and select it
-                        self.cursor.execute(f"CREATE DATABASE IF NOT EXISTS {mysql_database} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
-                        self.cursor.execute(f"USE {mysql_database}")
+                    self.reconnect(spider)
                 else:
                     spider.logger.error(f"❌ Failed to save deal after {max_retries} attempts")
+                    return None
             except Exception as e:
                 spider.logger.error(f"❌ Error saving deal (attempt {attempt + 1}/{max_retries}): {e}")
                 if attempt < max_retries - 1:
                     time.sleep(2)
                 else:
                     spider.logger.error(f"❌ Failed to save deal after {max_retries} attempts")
+                    return None
             
         return item
 
+    def build_deal_row(self, item, spider):
+        """Validate a deal item and return its deals-table row, or None to skip it"""
+        dealid = item.get('dealid', '')
+        title = item.get('title', '').strip()
+        
+        if not dealid:
+            spider.logger.debug("Skipping deal without dealid")
+            return None
+        
+        # Skip obvious non-deal placeholders
+        if dealid.startswith('dealnewsjs') or dealid.startswith('simpleslider'):
+            spider.logger.debug(f"Skipping placeholder dealid: {dealid}")
+            return None
+        
+        url = item.get('url', '').strip()
+        if not url or (url == 'https://www.dealnews.com/' and not dealid):
+            spider.logger.debug(f"Skipping deal {dealid} with invalid URL: {url}")
+            return None
+        
+        if (not title or title == 'No title found') and not (item.get('deallink') or url):
+            spider.logger.debug(f"Skipping empty item for dealid {dealid}")
+            return None
+        
+        # Clean HTML entities from category field and truncate if needed
+        category_value = (item.get('category', '') or '').strip()
+        # Decode HTML entities (e.g., &amp; -> &, &nbsp; -> space, &gt; -> >)
+        if category_value:
+            category_value = html.unescape(category_value)
+            # Also replace &nbsp; with space (html.unescape doesn't handle all cases)
+            category_value = category_value.replace('&nbsp;', ' ').replace('\xa0', ' ')
+            # Clean up multiple spaces
+            category_value = re.sub(r'\s+', ' ', category_value).strip()
+            # Truncate to 255 characters to fit VARCHAR(255)
+            category_value = category_value[:255]
+        
+        # Validate and clean deal field - prevent JSON data from being saved
+        deal_value = item.get('deal', '') or ''
+        # Check if deal field contains JSON (should not happen)
+        if deal_value and ('@context' in deal_value or 'schema.org' in deal_value or deal_value.strip().startswith('{')):
+            spider.logger.warning(f"⚠️ Deal field contains JSON for deal {dealid}, clearing it")
+            deal_value = ''  # Clear invalid JSON data
+        
+        # Validate dealplus field
+        dealplus_value = item.get('dealplus', '') or ''
+        if dealplus_value and ('@context' in dealplus_value or 'schema.org' in dealplus_value):
+            spider.logger.warning(f"⚠️ Dealplus field contains JSON for deal {dealid}, clearing it")
+            dealplus_value = ''
+        
+        # Extract category_id from first category if available
+        category_id_value = ''
+        if hasattr(item, 'get') and 'category_id' in item:
+            category_id_value = item.get('category_id', '') or ''
+        
+        return (
+            dealid,
+            item.get('recid', '') or '',
+            url,
+            title,
+            item.get('price', '') or '',
+            item.get('promo', '') or '',
+            category_value,
+            category_id_value,  # Add category_id
+            item.get('store', '') or '',
+            deal_value,  # Use cleaned deal value
+            dealplus_value,  # Use cleaned dealplus value
+            item.get('deallink', '') or url,
+            item.get('dealtext', '') or item.get('detail', '') or '',
+            item.get('dealhover', '') or '',
+            item.get('published', '') or '',
+            item.get('popularity', '') or '',
+            item.get('staffpick', '') or '',
+            item.get('detail', '') or '',
+            item.get('raw_html', '')[:50000] if item.get('raw_html') else ''  # Limit raw_html size
+        )
+
+    def save_deal_children(self, dealid, item, spider):
+        """Save images, categories and related deals carried on the main deal item"""
+        images_list = item.get('images', [])
+        if images_list:
+            spider.logger.debug(f"Saving {len(images_list)} images for deal {dealid}")
+            for img_url in images_list:
+                if img_url and img_url.strip():
+                    self.save_image(dealid, img_url.strip(), spider)
+        else:
+            spider.logger.debug(f"No images found for deal {dealid}")
+        
+        categories_list = item.get('categories', [])
+        if categories_list:
+            spider.logger.debug(f"Saving {len(categories_list)} categories for deal {dealid}")
+            for cat in categories_list:
+                if isinstance(cat, dict):
+                    self.save_category(dealid, cat, spider)
+                elif isinstance(cat, str) and cat.strip():
+                    self.save_category(dealid, {'category_name': cat.strip()}, spider)
+        else:
+            # At least save the main category from item if available
+            main_category = item.get('category', '').strip()
+            if main_category:
+                spider.logger.debug(f"Saving main category '{main_category}' for deal {dealid}")
+                self.save_category(dealid, {'category_name': main_category}, spider)
+            else:
+                spider.logger.debug(f"No categories found for deal {dealid}")
+        
+        related_deals_list = item.get('related_deals', [])
+        if related_deals_list:
+            spider.logger.debug(f"Saving {len(related_deals_list)} related deals for deal {dealid}")
+            for rel_url in related_deals_list:
+                if rel_url and rel_url.strip():
+                    self.save_related_deal(dealid, rel_url.strip(), spider)
+        else:
+            spider.logger.debug(f"No related deals found for deal {dealid}")
+
+    def reconnect(self, spider):
+        """Re-establish the MySQL connection and select the database"""
+        # Reconnect with database selection
+        mysql_config = self.mysql_config
+        mysql_database = mysql_config.database
+        try:
+            self.conn.reconnect()
+            self.cursor = self.conn.cursor()
+            # Explicitly select database after reconnect
+            self.cursor.execute(f"CREATE DATABASE IF NOT EXISTS {mysql_database} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+            self.cursor.execute(f"USE {mysql_database}")
+        except Exception as reconnect_err:
+            spider.logger.error(f"❌ Reconnection failed: {reconnect_err}")
+            # Create new connection if reconnect fails
+            self.conn = mysql.connector.connect(
+                **mysql_config.connect_kwargs(),
+                # database=mysql_database,  # Don't specify database yet
+                use_pure=True,  # Add explicit use_pure=True for consistency
+                connection_timeout=60,
+                autocommit=True
+            )
+            self.cursor = self.conn.cursor()
+            # Ensure database exists and select it
+            self.cursor.execute(f"CREATE DATABASE IF NOT EXISTS {mysql_database} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+            self.cursor.execute(f"USE {mysql_database}")
+
+    def start_writer(self, spider):
+        """Start the single-thread pool that owns the MySQL connection"""
+        from twisted.internet import reactor
+        self.writer = ThreadPool(minthreads=1, maxthreads=1, name='mysql-writer')
+        self.writer.start()
+        reactor.addSystemEventTrigger('during', 'shutdown', self.stop_writer)
+        spider.logger.info("🧵 MySQL writes run on a dedicated writer thread")
+
+    def stop_writer(self):
+        if self.writer is not None and self.writer.started:
+            self.writer.stop()
+
+    def run_in_writer(self, func, *args):
+        """Run func on the writer thread and return a Deferred with its result"""
+        if self.writer is None:
+            return defer.maybeDeferred(func, *args)
+        from twisted.internet import reactor
+        return threads.deferToThreadPool(reactor, self.writer, func, *args)
+
+    def wait_for_writer(self, item):
+        """Apply backpressure: hold the item while too many batches are queued"""
+        if self.pending_writes <= self.max_pending_writes:
+            return item
+        if self.stats:
+            self.stats.inc_value('mysql/backpressure_waits')
+        d = defer.Deferred()
+        self.backpressure_waiters.append((d, item))
+        return d
+
+    def release_waiters(self):
+        while self.backpressure_waiters and self.pending_writes <= self.max_pending_writes:
+            d, item = self.backpressure_waiters.pop(0)
+            d.callback(item)
+
+    def interval_flush(self, spider):
+        """LoopingCall target: flush if nothing was flushed for a whole interval"""
+        if time.time() - self.last_flush >= self.flush_interval:
+            self.flush(spider, reason='interval')
+
+    def take_batch(self):
+        """Detach the buffered rows so the reactor can keep filling a new batch"""
+        batch = {
+            'deals': [tuple(row) for row in self.deal_rows.values()],
+            'images': self.image_rows,
+            'categories': list(self.category_rows.values()),
+            'deal_categories': self.deal_category_rows,
+            'related': self.related_rows,
+        }
+        self.reset_buffers()
+        return batch
+
+    def flush(self, spider, reason='manual'):
+        """Hand the current batch to the writer thread; returns a Deferred"""
+        self.last_flush = time.time()
+        batch_id = self.start_batch(spider)
+        if not self.pending_rows():
+            # Nothing buffered: confirm once the writer has finished the batches queued before
+            d = self.run_in_writer(time.time)
+            d.addBoth(self.batch_done, batch_id, spider)
+            return d
+        batch = self.take_batch()
+        self.pending_writes += 1
+        d = self.run_in_writer(self.write_batch, batch, spider)
+        d.addCallback(self.batch_written, batch, spider, reason)
+        d.addErrback(lambda failure: spider.logger.error(f"❌ Buffered flush failed: {failure.value}"))
+        d.addBoth(self.batch_done, batch_id, spider)
+        d.addBoth(self.writer_done)
+        return d
+
+    def start_batch(self, spider):
+        """Number the next write and tell listeners that earlier items belong to it"""
+        batch_id = next(self.batch_ids)
+        self.send(batch_flushing, spider, batch_id=batch_id)
+        return batch_id
+
+    def batch_done(self, result, batch_id, spider):
+        """Tell listeners whether a write was committed (None or a Failure = dropped)"""
+        stored = result is not None and not isinstance(result, Failure)
+        self.send(batch_committed, spider, batch_id=batch_id, stored=stored)
+        return result
+
+    def send(self, signal, spider, **kwargs):
+        if self.signals is not None:
+            self.signals.send_catch_log(signal, spider=spider, **kwargs)
+
+    def writer_done(self, result):
+        self.pending_writes -= 1
+        self.release_waiters()
+        return result
+
+    def write_batch(self, batch, spider):
+        """Write one batch inside a transaction (runs on the writer thread).
+
+        Returns the elapsed seconds, or None when the batch had to be dropped.
+        """
+        total_rows = sum(len(rows) for rows in batch.values())
+        started = time.time()
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                self.conn.start_transaction()
+                if batch['deals']:
+                    self.cursor.executemany(self.DEAL_UPSERT_SQL, batch['deals'])
+                if batch['images']:
+                    self.cursor.executemany(self.IMAGE_UPSERT_SQL, batch['images'])
+                if batch['categories']:
+                    self.cursor.executemany(self.CATEGORY_UPSERT_SQL, batch['categories'])
+                if batch['deal_categories']:
+                    self.cursor.executemany(self.DEAL_CATEGORY_ID_SQL, batch['deal_categories'])
+                if batch['related']:
+                    self.cursor.executemany(self.RELATED_UPSERT_SQL, batch['related'])
+                self.conn.commit()
+                return time.time() - started
+            except mysql.connector.Error as err:
+                spider.logger.error(f"❌ MySQL error flushing {total_rows:,} rows (attempt {attempt + 1}/{max_retries}): {err}")
+                try:
+                    self.conn.rollback()
+                except Exception:
+                    pass
+                if attempt < max_retries - 1:
+                    # Sleeping here only blocks the writer thread, not the reactor
+                    time.sleep(2)
+                    try:
+                        self.reconnect(spider)
+                    except Exception as reconnect_err:
+                        spider.logger.error(f"❌ Reconnection failed: {reconnect_err}")
+        spider.logger.error(f"❌ Dropping batch of {total_rows:,} rows after {max_retries} attempts")
+        return None
+
+    def batch_written(self, elapsed, batch, spider, reason):
+        """Update counters and stats for a finished batch (reactor thread); returns elapsed"""
+        total_rows = sum(len(rows) for rows in batch.values())
+        if elapsed is None:
+            if self.stats:
+                self.stats.inc_value('mysql/rows_dropped', total_rows, spider=spider)
+            return None
+        
+        self.deals_saved += len(batch['deals'])
+        self.images_saved += len(batch['images'])
+        self.categories_saved += len(batch['categories']) + len(batch['deal_categories'])
+        self.related_deals_saved += len(batch['related'])
+        self.rows_flushed += total_rows
+        self.flush_seconds += elapsed
+        self.mark_seen([row[2] for row in batch['deals']], spider)
+        rate = total_rows / elapsed if elapsed > 0 else 0
+        spider.logger.info(
+            f"💾 Flushed {total_rows:,} rows ({len(batch['deals'])} deals, {len(batch['images'])} images, "
+            f"{len(batch['categories'])} categories, {len(batch['related'])} related) on {reason} "
+            f"in {elapsed:.2f}s ({rate:,.0f} rows/sec)"
+        )
+        if self.stats:
+            self.stats.inc_value('mysql/flushes', spider=spider)
+            self.stats.inc_value(f'mysql/flushes/{reason}', spider=spider)
+            self.stats.inc_value('mysql/rows_flushed', total_rows, spider=spider)
+            if self.flush_seconds > 0:
+                self.stats.set_value('mysql/rows_per_sec', round(self.rows_flushed / self.flush_seconds, 1), spider=spider)
+        return elapsed
+
+    def item_stored(self, item, spider):
+        """Record a deal written in unbuffered mode in the seen-URL store (reactor thread);
+        item is None when its write was dropped"""
+        if item is None:
+            if self.stats:
+                self.stats.inc_value('mysql/rows_dropped', spider=spider)
+            return None
+        self.mark_seen([item.get('url')], spider)
+        return item
+
+    def mark_seen(self, urls, spider):
+        """Add stored deal URLs to the spider's seen-URL store, so the next run
+        skips them without scanning the deals table"""
+        store = getattr(spider, 'scanned_urls', None)
+        if store is None:
+            return
+        for url in urls:
+            if url:
+                store.add(url)
+
     def process_image_item(self, item, spider):
         """Process deal image item"""
         dealid = item.get('dealid', '')
@@ -483,18 +828,17 @@ class NormalizedMySQLPipeline:
         if not dealid or not imageurl or not imageurl.strip():
             return
         
+        if self.buffered:
+            self.image_rows.append((dealid, imageurl.strip()))
+            return
+        
         try:
             # Make image URL absolute if relative
             if not imageurl.startswith('http'):
                 # Try to construct absolute URL (will be handled by spider if needed)
                 pass
             
-            image_sql = """
-            INSERT INTO deal_images (dealid, imageurl, created_at)
-            VALUES (%s, %s, NOW())
-            ON DUPLICATE KEY UPDATE created_at = created_at
-            """
-            self.cursor.execute(image_sql, (dealid, imageurl.strip()))
+            self.cursor.execute(self.IMAGE_UPSERT_SQL, (dealid, imageurl.strip()))
             self.images_saved += 1
             spider.logger.debug(f"✅ Saved image for deal {dealid}: {imageurl[:50]}...")
         except mysql.connector.Error as err:
@@ -510,23 +854,15 @@ class NormalizedMySQLPipeline:
                 return  # Skip empty categories
             
             # Filter out invalid category names (not real categories)
-            invalid_categories = [
-                'sponsored', 'expired', 'active', 'inactive', 'new', 'used', 'refurbished',
-                'deal', 'sale', 'offer', 'buy', 'shop', 'more', 'less', 'read more',
-                'staff pick', 'popular', 'featured', 'hot', 'trending', 'best seller',
-                'limited time', 'ending soon', 'expires', 'ended', 'no longer available'
-            ]
-            if category_name.lower() in invalid_categories:
+            if category_name.lower() in INVALID_CATEGORY_NAMES:
                 spider.logger.debug(f"⏭️ Skipping invalid category '{category_name}' for deal {dealid}")
                 return
             
             # Clean HTML entities from category name
-            import html
             category_name = html.unescape(category_name)
             # Also replace &nbsp; with space (html.unescape doesn't handle all cases)
             category_name = category_name.replace('&nbsp;', ' ').replace('\xa0', ' ')
             # Clean up multiple spaces
-            import re
             category_name = re.sub(r'\s+', ' ', category_name).strip()
             # Truncate to 255 characters
             category_name = category_name[:255]
@@ -536,30 +872,26 @@ class NormalizedMySQLPipeline:
             if not category_id:
                 category_id = category_name
             
-            # Save to categories lookup table (normalized - one row per unique category)
-            category_sql = """
-            INSERT INTO categories (category_id, category_name, category_url, category_description, created_at)
-            VALUES (%s, %s, %s, %s, NOW())
-            ON DUPLICATE KEY UPDATE 
-                category_name = VALUES(category_name),
-                category_url = VALUES(category_url),
-                category_description = VALUES(category_description),
-                updated_at = NOW()
-            """
-            self.cursor.execute(category_sql, (
+            category_row = (
                 category_id,
                 category_name,
                 cat_data.get('category_url', '') or '',
                 cat_data.get('category_title', '') or ''
-            ))
+            )
             
-            # Update the deal's category_id to reference this category
-            update_deal_sql = """
-            UPDATE deals 
-            SET category_id = %s 
-            WHERE dealid = %s AND (category_id IS NULL OR category_id = '')
-            """
-            self.cursor.execute(update_deal_sql, (category_id, dealid))
+            if self.buffered:
+                self.category_rows[category_id] = category_row
+                deal_row = self.deal_rows.get(dealid)
+                if deal_row is not None:
+                    # Deal is in the same batch: set category_id on the row instead of a separate UPDATE
+                    if not deal_row[DEAL_ROW_CATEGORY_ID]:
+                        deal_row[DEAL_ROW_CATEGORY_ID] = category_id
+                else:
+                    self.deal_category_rows.append((category_id, dealid))
+                return
+            
+            self.cursor.execute(self.CATEGORY_UPSERT_SQL, category_row)
+            self.cursor.execute(self.DEAL_CATEGORY_ID_SQL, (category_id, dealid))
             self.categories_saved += 1
             spider.logger.debug(f"✅ Saved category '{category_name}' for deal {dealid}")
         except mysql.connector.Error as err:
@@ -572,13 +904,12 @@ class NormalizedMySQLPipeline:
         if not dealid or not relatedurl or not relatedurl.strip():
             return
         
+        if self.buffered:
+            self.related_rows.append((dealid, relatedurl.strip()))
+            return
+        
         try:
-            related_sql = """
-            INSERT INTO related_deals (dealid, relatedurl, created_at)
-            VALUES (%s, %s, NOW())
-            ON DUPLICATE KEY UPDATE created_at = created_at
-            """
-            self.cursor.execute(related_sql, (dealid, relatedurl.strip()))
+            self.cursor.execute(self.RELATED_UPSERT_SQL, (dealid, relatedurl.strip()))
             self.related_deals_saved += 1
             spider.logger.debug(f"✅ Saved related deal for deal {dealid}: {relatedurl[:50]}...")
         except mysql.connector.Error as err:
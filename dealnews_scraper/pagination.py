@@ -0,0 +1,140 @@
+"""
+Speculative pagination planner for listing pages.
+
+handle_pagination() used to queue only the next start=+20 page of a category,
+so every category was a serial chain of requests, one page per round trip.
+PaginationPlanner keeps a window of upcoming offsets in flight per pagination
+stream (the listing URL without its start= parameter) instead:
+
+- every full page grows the stream's window by one page (up to max_window);
+  a short page halves it, since the end is probably near;
+- an empty page, or a 400/404 for an offset, marks the end of the stream, and
+  queued requests past it are cancelled (PaginationCancelMiddleware drops them
+  before download);
+- offsets are issued once per stream, in order, however many responses
+  arrive out of order.
+
+"Full" is relative to the stream's own fullest page so far, so the planner does
+not depend on how many candidates a DealNews page yields.
+"""
+import re
+
+START_RE = re.compile(r'([?&])start=(\d+)')
+FULL_PAGE_RATIO = 0.75
+
+
+def offset_of(url):
+    """start= offset of a listing URL (0 when absent)"""
+    match = START_RE.search(url)
+    return int(match.group(2)) if match else 0
+
+
+def stream_key(url):
+    """Listing URL without its start= parameter and fragment"""
+    url = url.split('#', 1)[0]
+    key = START_RE.sub(lambda m: m.group(1), url)
+    return key.replace('?&', '?').rstrip('?&')
+
+
+def with_offset(url, start):
+    """url with its start= parameter set to start (same forms handle_pagination built)"""
+    if '?' in url:
+        if START_RE.search(url):
+            return START_RE.sub(lambda m: f'{m.group(1)}start={start}', url, count=1)
+        return f"{url}&start={start}"
+    return f"{url}?start={start}"
+
+
+class StreamState:
+    __slots__ = ('window', 'issued_until', 'end', 'fullest', 'pages', 'cancelled')
+
+    def __init__(self, window):
+        self.window = window
+        self.issued_until = 0   # highest offset issued (0: only the first page)
+        self.end = None         # first offset known to be past the last page
+        self.fullest = 0        # most deals seen on one page of this stream
+        self.pages = 0
+        self.cancelled = 0
+
+
+class PaginationPlanner:
+    """Per-stream window of speculative listing-page offsets"""
+
+    def __init__(self, page_size=20, initial_window=2, min_window=1, max_window=8):
+        self.page_size = page_size
+        self.initial_window = max(min_window, initial_window)
+        self.min_window = min_window
+        self.max_window = max(max_window, self.initial_window)
+        self.streams = {}
+        self.issued = 0
+        self.cancelled = 0
+        self.ended = 0
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            page_size=settings.getint('PAGINATION_PAGE_SIZE', 20),
+            initial_window=settings.getint('PAGINATION_WINDOW', 2),
+            min_window=settings.getint('PAGINATION_MIN_WINDOW', 1),
+            max_window=settings.getint('PAGINATION_MAX_WINDOW', 8),
+        )
+
+    def stream(self, url):
+        key = stream_key(url)
+        state = self.streams.get(key)
+        if state is None:
+            state = self.streams[key] = StreamState(self.initial_window)
+            state.issued_until = offset_of(url)
+        return state
+
+    def on_page(self, url, deal_count):
+        """Record a listing page with deal_count deals; return the URLs to request next"""
+        state = self.stream(url)
+        offset = offset_of(url)
+        state.pages += 1
+        if deal_count <= 0:
+            self.on_end(url)
+            return []
+        if state.end is not None and offset >= state.end:
+            return []
+
+        if deal_count >= state.fullest * FULL_PAGE_RATIO:
+            state.window = min(self.max_window, state.window + 1) if state.pages > 1 else state.window
+        else:
+            state.window = max(self.min_window, state.window // 2)
+        state.fullest = max(state.fullest, deal_count)
+
+        target = offset + state.window * self.page_size
+        if state.end is not None:
+            target = min(target, state.end - self.page_size)
+        urls = []
+        next_offset = state.issued_until + self.page_size
+        while next_offset <= target:
+            urls.append(with_offset(url, next_offset))
+            next_offset += self.page_size
+        if urls:
+            state.issued_until = next_offset - self.page_size
+            self.issued += len(urls)
+        return urls
+
+    def on_end(self, url):
+        """Mark url's offset as past the end of its stream (empty page, 400, 404)"""
+        state = self.stream(url)
+        offset = offset_of(url)
+        if state.end is None or offset < state.end:
+            if state.end is None:
+                self.ended += 1
+            state.end = offset
+            state.window = self.min_window
+
+    def is_cancelled(self, url):
+        """True for a queued page beyond its stream's known end"""
+        state = self.streams.get(stream_key(url))
+        return state is not None and state.end is not None and offset_of(url) > state.end
+
+    def cancel(self, url):
+        """Count a request dropped because of is_cancelled()"""
+        self.cancelled += 1
+        state = self.streams.get(stream_key(url))
+        if state is not None:
+            state.cancelled += 1
@@ -0,0 +1,299 @@
+"""
+Per-callback and per-pipeline-method profile of a crawl.
+
+closed() only reports a total deals/sec figure and the CPU time of the main
+callbacks. CallbackProfiler (PROFILE_ENABLED) records, for every run of a spider
+callback (parse, parse_sitemap, parse_deal_detail, parse_related_detail and the
+parse_json_ld_deals pass inside parse), its wall and CPU time, the response
+size and the number of items and requests it yielded. Every call of the
+NormalizedMySQLPipeline methods (store_item, process_deal_item, save_category,
+write_batch, ...) gets its wall and CPU time recorded too.
+
+Only time spent inside a callback's generator is counted, not the time Scrapy
+spends on what it yields. Times are inclusive (parse includes its
+parse_json_ld_deals pass, store_item the process_* method it routes to). CPU
+time is per thread, so writes on the MySQL writer thread are not charged to the
+reactor and vice versa. For pipeline methods that return a Deferred, only the
+synchronous part is timed.
+
+Totals and fixed-bucket histograms are written to a JSON file at close
+(PROFILE_OUTPUT, by default .scrapy/profile/profile-<time>.json). PROFILE_SAMPLER
+adds a profiler:
+- 'cprofile': every PROFILE_SAMPLE_EVERY-th callback run is profiled with
+  cProfile, and the merged profile is saved next to the JSON (.pstats);
+- 'pyinstrument': the whole crawl runs under pyinstrument's sampling profiler
+  (optional dependency) and an HTML report is saved next to the JSON.
+"""
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+import functools
+from datetime import datetime
+import scrapy
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds; the last bucket holds everything above
+WALL_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+SIZE_BUCKETS_KB = (1, 4, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+PIPELINE_METHODS = (
+    'store_item', 'process_deal_item', 'process_image_item', 'process_category_item',
+    'process_related_deal_item', 'build_deal_row', 'save_deal_children', 'save_image',
+    'save_category', 'save_related_deal', 'flush', 'write_batch',
+)
+
+
+class Histogram:
+    """Counts per fixed bucket; percentiles are the upper bound of the bucket they fall in"""
+
+    __slots__ = ('bounds', 'counts')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+
+    def percentile(self, pct, maximum=None):
+        total = sum(self.counts)
+        if not total:
+            return 0.0
+        rank = total * pct / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                if index < len(self.bounds):
+                    return self.bounds[index]
+                return maximum if maximum is not None else self.bounds[-1]
+        return self.bounds[-1]
+
+    def to_dict(self):
+        return {'bounds': list(self.bounds), 'counts': list(self.counts)}
+
+
+class Timing:
+    """Totals and histograms of one callback or pipeline method"""
+
+    __slots__ = ('calls', 'wall', 'cpu', 'max_wall', 'bytes', 'items', 'requests', 'wall_hist', 'size_hist')
+
+    def __init__(self, callback=False):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.max_wall = 0.0
+        self.bytes = 0
+        self.items = 0
+        self.requests = 0
+        self.wall_hist = Histogram(WALL_BUCKETS_MS)
+        self.size_hist = Histogram(SIZE_BUCKETS_KB) if callback else None
+
+    def add(self, wall, cpu, size=None, items=0, requests=0):
+        self.calls += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.max_wall = max(self.max_wall, wall)
+        self.items += items
+        self.requests += requests
+        self.wall_hist.add(wall * 1000)
+        if size is not None and self.size_hist is not None:
+            self.bytes += size
+            self.size_hist.add(size / 1024)
+
+    def summary(self):
+        calls = self.calls or 1
+        max_ms = round(self.max_wall * 1000, 3)
+        row = {
+            'calls': self.calls,
+            'wall_seconds': round(self.wall, 3),
+            'cpu_seconds': round(self.cpu, 3),
+            'wall_ms_mean': round(self.wall * 1000 / calls, 3),
+            'cpu_ms_mean': round(self.cpu * 1000 / calls, 3),
+            'wall_ms_p50': self.wall_hist.percentile(50, max_ms),
+            'wall_ms_p90': self.wall_hist.percentile(90, max_ms),
+            'wall_ms_p99': self.wall_hist.percentile(99, max_ms),
+            'wall_ms_max': max_ms,
+            'histograms': {'wall_ms': self.wall_hist.to_dict()},
+        }
+        if self.size_hist is not None:
+            row.update({
+                'items': self.items,
+                'requests': self.requests,
+                'items_per_call': round(self.items / calls, 2),
+                'requests_per_call': round(self.requests / calls, 2),
+                'kb_mean': round(self.bytes / 1024 / calls, 1),
+                'kb_total': round(self.bytes / 1024, 1),
+            })
+            row['histograms']['size_kb'] = self.size_hist.to_dict()
+        return row
+
+
+class CallbackProfiler:
+    """Scrapy extension recording per-callback and per-pipeline-method timings.
+
+    The spider hands each callback's generator to timed() (see
+    DealnewsSpider._cpu_timed); pipeline methods are wrapped on the pipeline
+    instances when the spider opens.
+    """
+
+    def __init__(self, output=None, stats=None, sampler='', sample_every=100):
+        self.output = output
+        self.stats = stats
+        self.sampler = sampler
+        self.sample_every = max(1, sample_every)
+        self.timings = {'callbacks': {}, 'pipeline': {}}
+        self.lock = threading.Lock()  # pipeline writes record from the writer thread
+        self.started = time.time()
+        self.runs = 0
+        self.sampled = 0
+        self.cprofile = None
+        self.profiling = False  # a sampled callback step is running under cProfile
+        self.pyinstrument = None
+        if sampler == 'cprofile':
+            import cProfile
+            self.cprofile = cProfile.Profile()
+        elif sampler not in ('', 'pyinstrument'):
+            raise NotConfigured(f"Unknown PROFILE_SAMPLER: {sampler!r} (expected 'cprofile' or 'pyinstrument')")
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        from scrapy.utils.project import data_path
+
+        settings = crawler.settings
+        if not settings.getbool('PROFILE_ENABLED'):
+            raise NotConfigured
+        output = settings.get('PROFILE_OUTPUT') or data_path(
+            os.path.join('profile', f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"))
+        extension = cls(output, crawler.stats, settings.get('PROFILE_SAMPLER', '').lower(),
+                        settings.getint('PROFILE_SAMPLE_EVERY', 100))
+        extension.crawler = crawler
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def spider_opened(self, spider):
+        spider.profiler = self
+        engine = getattr(getattr(self, 'crawler', None), 'engine', None)
+        if engine is not None:
+            for pipeline in engine.scraper.itemproc.middlewares:
+                self.wrap_pipeline(pipeline)
+        if self.sampler == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logger.warning("PROFILE_SAMPLER=pyinstrument but pyinstrument is not installed (pip install pyinstrument)")
+                return
+            self.pyinstrument = Profiler(interval=0.001)
+            self.pyinstrument.start()
+
+    def wrap_pipeline(self, pipeline):
+        """Time the PIPELINE_METHODS a pipeline instance has (instance attributes shadow the class)"""
+        for name in PIPELINE_METHODS:
+            method = getattr(pipeline, name, None)
+            if callable(method):
+                setattr(pipeline, name, self.wrap('pipeline', name, method))
+
+    def wrap(self, kind, name, method):
+        @functools.wraps(method)
+        def timed_method(*args, **kwargs):
+            start_wall, start_cpu = time.perf_counter(), time.thread_time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(kind, name, time.perf_counter() - start_wall, time.thread_time() - start_cpu)
+        return timed_method
+
+    def next_sample(self):
+        """The cProfile profile for every sample_every-th callback run, else None"""
+        if self.cprofile is None or self.profiling:
+            return None
+        self.runs += 1
+        if self.runs % self.sample_every:
+            return None
+        self.sampled += 1
+        return self.cprofile
+
+    def timed(self, kind, name, results, response=None):
+        """Yield from a callback's results, recording time, size and what it yielded"""
+        profile = self.next_sample()
+        wall = cpu = 0.0
+        items = requests = 0
+        iterator = iter(results if results is not None else ())
+        try:
+            while True:
+                owner = profile is not None and not self.profiling
+                if owner:
+                    self.profiling = True
+                    profile.enable()
+                start_wall, start_cpu = time.perf_counter(), time.thread_time()
+                try:
+                    result = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    wall += time.perf_counter() - start_wall
+                    cpu += time.thread_time() - start_cpu
+                    if owner:
+                        profile.disable()
+                        self.profiling = False
+                if isinstance(result, scrapy.Request):
+                    requests += 1
+                elif result is not None:
+                    items += 1
+                yield result
+        finally:
+            size = len(response.body) if response is not None else None
+            self.record(kind, name, wall, cpu, size, items, requests)
+
+    def record(self, kind, name, wall, cpu, size=None, items=0, requests=0):
+        table = self.timings['callbacks' if kind == 'callback' else kind]
+        with self.lock:
+            timing = table.get(name)
+            if timing is None:
+                timing = table[name] = Timing(callback=kind == 'callback')
+            timing.add(wall, cpu, size, items, requests)
+
+    def report(self):
+        with self.lock:
+            return {
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'elapsed_seconds': round(time.time() - self.started, 1),
+                'sampler': self.sampler or None,
+                'sampled_runs': self.sampled,
+                'callbacks': {name: timing.summary() for name, timing in sorted(self.timings['callbacks'].items())},
+                'pipeline': {name: timing.summary() for name, timing in sorted(self.timings['pipeline'].items())},
+            }
+
+    def spider_closed(self, spider):
+        report = self.report()
+        base = os.path.splitext(self.output)[0]
+        os.makedirs(os.path.dirname(os.path.abspath(self.output)), exist_ok=True)
+        with open(self.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        if self.cprofile is not None and self.sampled:
+            self.cprofile.dump_stats(base + '.pstats')
+        if self.pyinstrument is not None:
+            self.pyinstrument.stop()
+            with open(base + '.html', 'w') as f:
+                f.write(self.pyinstrument.output_html())
+
+        for section in ('callbacks', 'pipeline'):
+            for name, row in report[section].items():
+                if self.stats is not None:
+                    self.stats.set_value(f'profile/{section}/{name}/wall_ms_p50', row['wall_ms_p50'], spider=spider)
+                    self.stats.set_value(f'profile/{section}/{name}/wall_seconds', row['wall_seconds'], spider=spider)
+        busiest = sorted(report['callbacks'].items(), key=lambda row: -row[1]['wall_seconds'])
+        for name, row in busiest:
+            spider.logger.info(
+                f"⏱️ {name}: {row['calls']:,} runs, {row['wall_seconds']:.1f}s wall / {row['cpu_seconds']:.1f}s CPU, "
+                f"p50 {row['wall_ms_p50']} ms, p99 {row['wall_ms_p99']} ms, {row['kb_mean']:.0f} KB, "
+                f"{row['items_per_call']:.1f} items / {row['requests_per_call']:.1f} requests per run"
+            )
+        spider.logger.info(f"⏱️ Profile saved to {self.output}")
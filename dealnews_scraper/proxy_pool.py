@@ -0,0 +1,248 @@
+"""
+Health-scored proxy pool for ProxyMiddleware.
+
+With PROXY_LIST set, ProxyMiddleware used to pick a proxy per request with
+random.choice, and a 429 or a timeout only triggered another random pick, so
+slow and banned proxies kept getting their share of the traffic. ProxyPool
+keeps per-proxy health instead:
+
+- moving averages (EWMA) of download latency and success rate, plus the 403/429
+  responses of the last ban_window seconds;
+- requests are routed at random, weighted by success_rate^2 / (latency x
+  (1 + recent bans)), so fast, healthy proxies carry most of the traffic and
+  the others are still probed;
+- at most max_in_flight requests per proxy; when every proxy is full, acquire()
+  returns None and wait() gives a Deferred that fires as soon as a slot frees up;
+- ban_threshold bans within the window, or failure_threshold failures in a
+  row, quarantine a proxy for cooldown seconds, doubling on every repeat up to
+  max_cooldown. A quarantined proxy comes back on probation, and
+  recovery_successes successes in a row clear its record.
+
+Proxies are keyed by the URL given in PROXY_LIST; credentials are added by the
+middleware. report() returns the per-proxy counters that are exported as crawl
+stats at close.
+"""
+import random
+from collections import deque
+from urllib.parse import urlparse
+from twisted.internet import defer
+
+BAN_STATUSES = (403, 429)
+EWMA_ALPHA = 0.2
+
+
+def proxy_label(proxy):
+    """host:port of a proxy URL, for logs and stats (never the credentials)"""
+    parsed = urlparse(proxy)
+    return f"{parsed.hostname}:{parsed.port or 80}"
+
+
+class ProxyHealth:
+    __slots__ = ('proxy', 'latency', 'success', 'bans', 'failures_in_row', 'successes_in_row',
+                 'in_flight', 'limit', 'quarantined_until', 'strikes', 'requests', 'succeeded', 'banned',
+                 'failed', 'quarantines', 'quarantined_seconds', 'max_in_flight')
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.latency = None          # EWMA of download latency (seconds); None until measured
+        self.success = 1.0           # EWMA of success (1) / failure or ban (0)
+        self.bans = deque()          # times of recent 403/429 responses
+        self.failures_in_row = 0
+        self.successes_in_row = 0
+        self.in_flight = 0
+        self.limit = None            # in-flight cap set by the concurrency controller; None = pool default
+        self.quarantined_until = 0.0
+        self.strikes = 0             # quarantines since the proxy last fully recovered
+        self.requests = 0
+        self.succeeded = 0
+        self.banned = 0
+        self.failed = 0
+        self.quarantines = 0
+        self.quarantined_seconds = 0.0
+        self.max_in_flight = 0
+
+
+class ProxyPool:
+    """Routes requests over a list of proxies by health score, with per-proxy caps"""
+
+    def __init__(self, proxies, max_in_flight=8, ban_window=60.0, ban_threshold=3, failure_threshold=5,
+                 cooldown=30.0, max_cooldown=600.0, recovery_successes=20, clock=None, rng=None):
+        if not proxies:
+            raise ValueError("ProxyPool needs at least one proxy")
+        self.health = {proxy: ProxyHealth(proxy) for proxy in dict.fromkeys(proxies)}
+        self.max_in_flight = max_in_flight
+        self.ban_window = ban_window
+        self.ban_threshold = ban_threshold
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.recovery_successes = recovery_successes
+        self.rng = rng or random.Random()
+        self.waiters = deque()   # (Deferred, avoid) waiting for a free slot
+        self.wakeup = None       # DelayedCall for the end of the earliest quarantine
+        self.waits = 0
+        if clock is None:
+            from twisted.internet import reactor as clock
+        self.clock = clock
+
+    def __len__(self):
+        return len(self.health)
+
+    def cap(self, health):
+        return health.limit if health.limit is not None else self.max_in_flight
+
+    def available(self, now):
+        return [h for h in self.health.values()
+                if h.quarantined_until <= now and (not self.cap(h) or h.in_flight < self.cap(h))]
+
+    def set_limit(self, proxy, limit):
+        """Per-proxy in-flight cap (see concurrency.py); waiting requests get any new room"""
+        health = self.health.get(proxy)
+        if health is not None and health.limit != limit:
+            health.limit = limit
+            self.wake()
+
+    def score(self, health, now):
+        latency = health.latency
+        if latency is None:
+            # Unmeasured proxies are tried as if they were as fast as the best one
+            known = [h.latency for h in self.health.values() if h.latency is not None]
+            latency = min(known) if known else 1.0
+        self.expire_bans(health, now)
+        return health.success ** 2 / (max(latency, 0.01) * (1 + len(health.bans)))
+
+    def expire_bans(self, health, now):
+        while health.bans and health.bans[0] <= now - self.ban_window:
+            health.bans.popleft()
+
+    def acquire(self, avoid=None):
+        """Take a slot on a proxy chosen by score; None when every proxy is full or quarantined.
+
+        avoid (the proxy a retried request just failed on) is skipped unless it
+        is the only one available.
+        """
+        now = self.clock.seconds()
+        candidates = self.available(now)
+        if avoid is not None and len(candidates) > 1:
+            candidates = [h for h in candidates if h.proxy != avoid]
+        if not candidates:
+            return None
+        weights = [self.score(h, now) for h in candidates]
+        if sum(weights) > 0:
+            health = self.rng.choices(candidates, weights)[0]
+        else:
+            health = self.rng.choice(candidates)
+        health.in_flight += 1
+        health.requests += 1
+        health.max_in_flight = max(health.max_in_flight, health.in_flight)
+        return health.proxy
+
+    def wait(self, avoid=None):
+        """Deferred firing with a proxy slot (as from acquire) once one frees up"""
+        d = defer.Deferred()
+        self.waiters.append((d, avoid))
+        self.waits += 1
+        self.schedule_wakeup()
+        return d
+
+    def release(self, proxy, latency=None, status=None, error=False):
+        """Give back a slot and record the outcome.
+
+        status is the response status (403/429 count as bans, 5xx as failures);
+        error marks a download exception (timeout, connection refused, ...).
+        Neither given means the request was dropped, and nothing is recorded.
+        """
+        health = self.health.get(proxy)
+        if health is None:
+            return
+        health.in_flight = max(0, health.in_flight - 1)
+        now = self.clock.seconds()
+        if status in BAN_STATUSES:
+            health.banned += 1
+            health.bans.append(now)
+            self.expire_bans(health, now)
+            self.record_outcome(health, False)
+            if len(health.bans) >= self.ban_threshold:
+                self.quarantine(health, now)
+        elif error or (status is not None and status >= 500):
+            health.failed += 1
+            self.record_outcome(health, False)
+            if health.failures_in_row >= self.failure_threshold:
+                self.quarantine(health, now)
+        elif status is not None:
+            health.succeeded += 1
+            self.record_outcome(health, True)
+            if latency is not None:
+                health.latency = latency if health.latency is None else (
+                    EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * health.latency)
+        self.wake()
+
+    def record_outcome(self, health, ok):
+        health.success = EWMA_ALPHA * (1.0 if ok else 0.0) + (1 - EWMA_ALPHA) * health.success
+        if ok:
+            health.failures_in_row = 0
+            health.successes_in_row += 1
+            if health.strikes and health.successes_in_row >= self.recovery_successes:
+                health.strikes = 0
+        else:
+            health.successes_in_row = 0
+            health.failures_in_row += 1
+
+    def quarantine(self, health, now):
+        if health.quarantined_until > now:
+            return
+        cooldown = min(self.max_cooldown, self.cooldown * 2 ** health.strikes)
+        health.strikes += 1
+        health.quarantines += 1
+        health.quarantined_seconds += cooldown
+        health.quarantined_until = now + cooldown
+        # Back on probation afterwards: half trusted, with a clean ban record
+        health.success = 0.5
+        health.bans.clear()
+        health.failures_in_row = 0
+
+    def quarantined(self):
+        now = self.clock.seconds()
+        return [h.proxy for h in self.health.values() if h.quarantined_until > now]
+
+    def wake(self):
+        """Hand freed slots to waiting requests, oldest first"""
+        while self.waiters:
+            d, avoid = self.waiters[0]
+            proxy = self.acquire(avoid)
+            if proxy is None:
+                break
+            self.waiters.popleft()
+            d.callback(proxy)
+        self.schedule_wakeup()
+
+    def schedule_wakeup(self):
+        """With requests waiting and nothing in flight to free a slot, wake at the first quarantine end"""
+        if self.wakeup is not None and self.wakeup.active():
+            return
+        if not self.waiters:
+            return
+        now = self.clock.seconds()
+        ends = [h.quarantined_until for h in self.health.values() if h.quarantined_until > now]
+        if ends:
+            self.wakeup = self.clock.callLater(max(0.0, min(ends) - now), self.wake)
+
+    def report(self):
+        """Per-proxy counters, keyed by host:port"""
+        now = self.clock.seconds()
+        rows = {}
+        for health in self.health.values():
+            self.expire_bans(health, now)
+            rows[proxy_label(health.proxy)] = {
+                'requests': health.requests,
+                'succeeded': health.succeeded,
+                'banned': health.banned,
+                'failed': health.failed,
+                'success_rate': round(health.success, 3),
+                'latency_ms': round(health.latency * 1000, 1) if health.latency is not None else None,
+                'quarantines': health.quarantines,
+                'quarantined_seconds': round(health.quarantined_seconds, 1),
+                'max_in_flight': health.max_in_flight,
+                'score': round(self.score(health, now), 3),
+            }
+        return rows
@@ -0,0 +1,108 @@
+"""
+Page-level deal-link index for proximity-based related deals.
+
+extract_related_deals() treats the deal links next to a deal on a listing page
+as related to it. It used to re-run the page-wide a[href*="/deals/"] query for
+every deal and then scan the result with substring tests to find the deal's own
+link, which is O(deals x links) per page. PageDealLinks runs the query once per
+response, on first use, and indexes each link by its absolute URL (with and
+without the query string), so finding a deal's neighbours is a dict lookup and
+a slice.
+
+DetailContextCache is the bounded side-cache behind detail-page requests. Those
+requests carry only the dealid in meta; the listing page leaves the related URLs
+it already emitted for the deal here, keyed by dealid, so parse_deal_detail()
+does not emit them again. Entries are a tuple of 64-bit fingerprints and the
+least recently used ones are evicted, so a miss only means a few duplicate
+related rows for the pipeline's unique key to absorb.
+"""
+from collections import OrderedDict
+from lxml import etree
+from dealnews_scraper.fingerprints import fingerprint
+
+# Same links as response.css('a[href*="/deals/"]::attr(href), a[href*="/deal/"]::attr(href)'), in page order
+DEAL_LINK_XPATH = etree.XPath(
+    '//a[contains(@href, "/deals/") or contains(@href, "/deal/")]/@href',
+    smart_strings=False,
+)
+
+
+def link_keys(url):
+    """Index keys for an absolute URL: without fragment, then also without query"""
+    url = url.split('#', 1)[0]
+    keys = [url]
+    if '?' in url:
+        keys.append(url.split('?', 1)[0])
+    return keys
+
+
+class PageDealLinks:
+    """Deal links of one listing page with a position index, built on first use"""
+
+    def __init__(self, response):
+        self.response = response
+        self.links = None
+        self.position = None
+        self.emitted = 0  # related links yielded for this page (see extract_related_deals)
+
+    def build(self):
+        self.links = DEAL_LINK_XPATH(self.response.selector.root)
+        self.position = {}
+        for index, link in enumerate(self.links):
+            try:
+                absolute = self.response.urljoin(link)
+            except ValueError:
+                continue
+            for key in link_keys(absolute):
+                self.position.setdefault(key, index)  # first occurrence wins
+
+    def index_of(self, url):
+        """Position of url among the page's deal links, or -1"""
+        if self.position is None:
+            self.build()
+        if not url:
+            return -1
+        for key in link_keys(url):
+            index = self.position.get(key)
+            if index is not None:
+                return index
+        return -1
+
+    def neighbours(self, url, window=2):
+        """Up to window links before and after url's own link, in page order"""
+        index = self.index_of(url)
+        if index < 0 or window <= 0:
+            return []
+        return self.links[max(0, index - window):index] + self.links[index + 1:index + 1 + window]
+
+
+class DetailContextCache:
+    """dealid -> fingerprints of related URLs already emitted, LRU-bounded"""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def put(self, dealid, urls):
+        if self.maxsize <= 0 or not dealid:
+            return
+        self.entries[dealid] = tuple(fingerprint(url) for url in urls)
+        self.entries.move_to_end(dealid)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, dealid):
+        """Fingerprint set for dealid, removed from the cache (empty on a miss)"""
+        fingerprints = self.entries.pop(dealid, None)
+        if fingerprints is None:
+            self.misses += 1
+            return frozenset()
+        self.hits += 1
+        return frozenset(fingerprints)
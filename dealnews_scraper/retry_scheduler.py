@@ -0,0 +1,146 @@
+"""
+Backoff for 403/429/503 retries that does not hold download slots.
+
+ProxyMiddleware used to answer a 403 by setting meta['download_delay'] (which
+Scrapy ignores per request) and a 503 by re-issuing the request at once, with
+no cap, so an overloaded site got a hot retry loop. RetryScheduler parks such
+requests instead:
+
+- the request leaves the downloader right away (process_response raises
+  RequestParked, an IgnoreRequest, so the original response is dropped quietly)
+  and waits in a heap ordered by due time, fed by a single reactor.callLater
+  for the earliest entry; parked requests hold no download slot;
+- when due, it goes back through engine.crawl() and the scheduler, with
+  RETRY_PRIORITY_ADJUST applied, like RetryMiddleware's retries;
+- the delay is RETRY_BACKOFF_BASE x 2^attempt with jitter, capped at
+  RETRY_BACKOFF_MAX; a Retry-After header, when present, is used instead
+  (within the same cap);
+- each status gets its budget from RETRY_TIMES_PER_STATUS (download errors
+  from RETRY_TIMES); once it is spent the response goes on to the spider.
+
+The spider is kept open while requests are parked. Retry counts, total backoff
+time and the parked high-water mark become retry_backoff/* stats.
+"""
+import heapq
+import random
+import itertools
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from scrapy.exceptions import IgnoreRequest
+
+# Same budgets as RETRY_TIMES_PER_STATUS in settings.py, for use without a crawler
+DEFAULT_BUDGETS = {403: 5, 429: 3, 503: 3}
+
+
+class RequestParked(IgnoreRequest):
+    """The request was handed to the RetryScheduler and will be re-crawled later"""
+
+
+def retry_after_seconds(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date); None if unparseable"""
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('latin-1')
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryScheduler:
+    """Time-ordered delay queue of requests waiting for their retry"""
+
+    def __init__(self, budgets=None, base_delay=5.0, max_delay=120.0, priority_adjust=-1,
+                 stats=None, crawl=None, clock=None, rng=None):
+        self.budgets = dict(DEFAULT_BUDGETS if budgets is None else budgets)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.priority_adjust = priority_adjust
+        self.stats = stats
+        self.crawl = crawl       # engine.crawl, set by the middleware's from_crawler
+        self.rng = rng or random.Random()
+        self.heap = []           # (due, seq, request, spider)
+        self.seq = itertools.count()
+        self.call = None         # DelayedCall for the earliest due time
+        self.max_parked = 0
+        if clock is None:
+            from twisted.internet import reactor as clock
+        self.clock = clock
+
+    def __len__(self):
+        return len(self.heap)
+
+    def budget(self, reason):
+        return int(self.budgets.get(reason, 0))
+
+    def delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay / 2 + self.rng.uniform(0, delay / 2)
+
+    def park(self, request, reason, spider, retry_after=None):
+        """Queue the request for a later retry; False when its budget for reason is spent.
+
+        reason is the HTTP status, or 'exception' for download errors. Attempts
+        are counted in meta['retry_<reason>_count'].
+        """
+        key = f'retry_{reason}_count'
+        attempt = request.meta.get(key, 0)
+        if attempt >= self.budget(reason):
+            self._inc(f'retry_backoff/gave_up/{reason}', 1, spider)
+            return False
+        delay = self.delay(attempt, retry_after)
+        request.meta[key] = attempt + 1
+        request.dont_filter = True
+        request.priority += self.priority_adjust
+        heapq.heappush(self.heap, (self.clock.seconds() + delay, next(self.seq), request, spider))
+        self.max_parked = max(self.max_parked, len(self.heap))
+        self._inc('retry_backoff/count', 1, spider)
+        self._inc(f'retry_backoff/reason/{reason}', 1, spider)
+        self._inc('retry_backoff/seconds', round(delay, 3), spider)
+        if self.stats is not None:
+            self.stats.max_value('retry_backoff/max_parked', self.max_parked, spider=spider)
+        self.schedule()
+        return True
+
+    def schedule(self):
+        """Point the single callLater at the earliest due request"""
+        if not self.heap:
+            return
+        due = self.heap[0][0]
+        if self.call is not None and self.call.active():
+            if self.call.getTime() <= due:
+                return
+            self.call.cancel()
+        self.call = self.clock.callLater(max(0.0, due - self.clock.seconds()), self.release)
+
+    def release(self):
+        """Send every due request back to the engine"""
+        now = self.clock.seconds()
+        while self.heap and self.heap[0][0] <= now:
+            _, _, request, spider = heapq.heappop(self.heap)
+            if self.crawl is not None:
+                self.crawl(request)
+        self.call = None
+        self.schedule()
+
+    def close(self, spider):
+        """Cancel the timer; requests still parked are dropped (and counted)"""
+        if self.call is not None and self.call.active():
+            self.call.cancel()
+        self.call = None
+        if self.heap:
+            self._inc('retry_backoff/dropped_at_close', len(self.heap), spider)
+        self.heap.clear()
+
+    def _inc(self, key, count, spider):
+        if self.stats is not None:
+            self.stats.inc_value(key, count, spider=spider)
@@ -0,0 +1,233 @@
+"""
+Runtime configuration read once from the environment and Scrapy settings.
+
+ProxyMiddleware used to call os.getenv for DISABLE_PROXY, PROXY_URL,
+PROXY_USER and PROXY_PASS on every request, re-parse the proxy URL and
+base64-encode the credentials each time; NormalizedMySQLPipeline re-read the
+MYSQL_* variables on every reconnect. RuntimeConfig collects all of that into
+frozen objects built once per crawler (RuntimeConfig.from_crawler, shared by
+the middleware, the pipeline and the spider), with the Proxy-Authorization
+header, the normalised PROXY_LIST and each proxy's URL with credentials worked
+out up front.
+
+A Scrapy setting of the same name (e.g. -s MYSQL_HOST=...) takes precedence
+over the environment. Values are checked at startup (ports, proxy URLs, the
+database name used in SQL) and a ConfigError stops the crawl before anything
+is downloaded; summary() is the effective config with secrets masked, logged
+once when the crawler builds it.
+"""
+import os
+import re
+import base64
+import logging
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+class ConfigError(ValueError):
+    """An environment variable or setting has a value the scraper cannot use"""
+
+
+def parse_proxy_list(raw):
+    """Proxy URLs from a comma or newline separated list (http:// added when missing)"""
+    proxies = []
+    for line in (raw or '').replace('\r', '\n').replace(',', '\n').split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith('http://') and not line.startswith('https://'):
+            line = f'http://{line}'
+        proxies.append(line)
+    return proxies
+
+
+def host_port(proxy, name):
+    """host:port of a proxy URL; ConfigError if it has no host or a bad port"""
+    try:
+        parsed = urlparse(proxy)
+        port = parsed.port or 80
+    except ValueError as e:
+        raise ConfigError(f"{name}: invalid proxy URL {proxy!r} ({e})") from None
+    if not parsed.hostname:
+        raise ConfigError(f"{name}: proxy URL {proxy!r} has no host")
+    return f"{parsed.hostname}:{port}"
+
+
+@dataclass(frozen=True)
+class ProxyConfig:
+    disabled: bool = False                  # DISABLE_PROXY
+    url_override: str = ''                  # PROXY_URL (full URL, credentials included)
+    user: Optional[str] = None              # PROXY_USER
+    password: Optional[str] = field(default=None, repr=False)  # PROXY_PASS
+    gateway: str = 'http://p.webshare.io:80'  # PROXY_HOST / PROXY_PORT
+    proxy_list: Tuple[str, ...] = ()        # PROXY_LIST, normalised, without credentials
+    auth_header: Optional[str] = field(default=None, repr=False)  # 'Basic ...' for user/pass
+    urls: Mapping[str, str] = field(default_factory=dict, repr=False)  # proxy -> URL to use
+    labels: Mapping[str, str] = field(default_factory=dict)  # proxy -> host:port for logs
+    # Health-scored pool for PROXY_LIST (see proxy_pool.py)
+    max_in_flight: int = 8
+    ban_window: float = 60.0
+    ban_threshold: int = 3
+    failure_threshold: int = 5
+    cooldown: float = 30.0
+    max_cooldown: float = 600.0
+
+    @property
+    def enabled(self):
+        """A proxy URL or a user/password pair is configured"""
+        return bool(self.url_override or (self.user and self.password))
+
+    @property
+    def with_credentials(self):
+        """Credentials are added by the middleware (not part of PROXY_URL)"""
+        return not self.url_override and bool(self.user and self.password)
+
+    def url(self, proxy):
+        return self.urls.get(proxy, proxy)
+
+    def label(self, proxy):
+        return self.labels.get(proxy) or host_port(proxy, 'proxy')
+
+
+@dataclass(frozen=True)
+class MySQLConfig:
+    enabled: bool = True                    # not DISABLE_MYSQL
+    host: str = 'localhost'
+    port: int = 3306
+    user: str = 'root'
+    password: str = field(default='root', repr=False)
+    database: str = 'dealnews'
+    clear_data: bool = False                # CLEAR_DATA
+
+    def connect_kwargs(self):
+        """Arguments for mysql.connector.connect (without the database)"""
+        return {'host': self.host, 'port': self.port, 'user': self.user, 'password': self.password}
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    proxy: ProxyConfig
+    mysql: MySQLConfig
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """The crawler's config, built on first use and shared by its components"""
+        config = getattr(crawler, 'runtime_config', None)
+        if config is None:
+            config = crawler.runtime_config = cls.from_settings(crawler.settings)
+            logger.info(f"⚙️ Runtime config: {config.summary()}")
+        return config
+
+    @classmethod
+    def from_settings(cls, settings=None, environ=None):
+        environ = os.environ if environ is None else environ
+
+        def get(name, default=''):
+            value = settings.get(name) if settings is not None else None
+            if value is None or value == '':
+                value = environ.get(name, default)
+            return value.strip() if isinstance(value, str) else value
+
+        def get_bool(name, default='false'):
+            value = get(name, default)
+            return value if isinstance(value, bool) else str(value).lower() in TRUE_VALUES
+
+        def get_number(name, default, kind=int, minimum=0):
+            value = get(name, default)
+            try:
+                value = kind(value)
+            except (TypeError, ValueError):
+                raise ConfigError(f"{name} must be a number, got {value!r}") from None
+            if value < minimum:
+                raise ConfigError(f"{name} must be at least {minimum}, got {value}")
+            return value
+
+        return cls(proxy=cls.proxy_config(get, get_bool, get_number),
+                   mysql=cls.mysql_config(get, get_bool, get_number))
+
+    @staticmethod
+    def proxy_config(get, get_bool, get_number):
+        url_override = get('PROXY_URL')
+        user = get('PROXY_USER') or None
+        password = get('PROXY_PASS') or None
+        port = get_number('PROXY_PORT', '80', minimum=1)
+        gateway = f"http://{get('PROXY_HOST', 'p.webshare.io')}:{port}"
+        proxies = tuple(dict.fromkeys(parse_proxy_list(get('PROXY_LIST'))))
+        if url_override:
+            host_port(url_override, 'PROXY_URL')
+        elif bool(user) != bool(password):
+            logger.warning("Only one of PROXY_USER / PROXY_PASS is set - running without proxy")
+
+        labels = {proxy: host_port(proxy, 'PROXY_LIST') for proxy in proxies}
+        labels[gateway] = host_port(gateway, 'PROXY_HOST/PROXY_PORT')
+        auth_header = None
+        urls = {}
+        if not url_override and user and password:
+            auth_header = 'Basic ' + base64.b64encode(f"{user}:{password}".encode()).decode()
+            for proxy, label in labels.items():
+                urls[proxy] = f"{urlparse(proxy).scheme or 'http'}://{user}:{password}@{label}"
+        if url_override:
+            labels[url_override] = host_port(url_override, 'PROXY_URL')
+
+        return ProxyConfig(
+            disabled=get_bool('DISABLE_PROXY'),
+            url_override=url_override,
+            user=user,
+            password=password,
+            gateway=gateway,
+            proxy_list=proxies,
+            auth_header=auth_header,
+            urls=MappingProxyType(urls),
+            labels=MappingProxyType(labels),
+            max_in_flight=get_number('PROXY_MAX_IN_FLIGHT', 8),
+            ban_window=get_number('PROXY_BAN_WINDOW', 60.0, float),
+            ban_threshold=get_number('PROXY_BAN_THRESHOLD', 3, minimum=1),
+            failure_threshold=get_number('PROXY_FAILURE_THRESHOLD', 5, minimum=1),
+            cooldown=get_number('PROXY_COOLDOWN', 30.0, float),
+            max_cooldown=get_number('PROXY_MAX_COOLDOWN', 600.0, float),
+        )
+
+    @staticmethod
+    def mysql_config(get, get_bool, get_number):
+        database = get('MYSQL_DATABASE', 'dealnews')
+        # Interpolated into CREATE DATABASE / USE statements
+        if not re.fullmatch(r'\w+', database or ''):
+            raise ConfigError(f"MYSQL_DATABASE must be a plain identifier, got {database!r}")
+        return MySQLConfig(
+            enabled=not get_bool('DISABLE_MYSQL'),
+            host=get('MYSQL_HOST', 'localhost'),
+            port=get_number('MYSQL_PORT', '3306', minimum=1),
+            user=get('MYSQL_USER', 'root'),
+            password=get('MYSQL_PASSWORD', 'root'),
+            database=database,
+            clear_data=get_bool('CLEAR_DATA'),
+        )
+
+    def summary(self):
+        """Effective config with credentials masked"""
+        proxy, mysql = self.proxy, self.mysql
+        if proxy.disabled:
+            proxy_mode = 'disabled'
+        elif not proxy.enabled:
+            proxy_mode = 'no credentials'
+        elif proxy.proxy_list:
+            proxy_mode = f"pool of {len(proxy.proxy_list)} ({', '.join(proxy.label(p) for p in proxy.proxy_list)})"
+        elif proxy.url_override:
+            proxy_mode = f"PROXY_URL {proxy.label(proxy.url_override)}"
+        else:
+            proxy_mode = f"gateway {proxy.label(proxy.gateway)}"
+        return {
+            'proxy': proxy_mode,
+            'proxy_user': proxy.user if proxy.with_credentials else None,
+            'mysql': f"{mysql.user}@{mysql.host}:{mysql.port}/{mysql.database}" if mysql.enabled else 'disabled',
+            'clear_data': mysql.clear_data,
+        }
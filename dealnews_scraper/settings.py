@@ -1,4 +1,5 @@
 # Scrapy settings for dealnews_scraper project
+import os
 
 BOT_NAME = 'dealnews_scraper'
 
@@ -19,9 +20,11 @@ LOG_FILE = 'error.log'  # Single log file
 LOG_FILE_APPEND = False  # Overwrite log file on each run to prevent huge files
 
 # OPTIMIZED settings for ULTRA-FAST extraction (15-20 minutes)
-import os
 DOWNLOAD_DELAY = float(os.getenv('DOWNLOAD_DELAY', '0.1'))  # Minimal delay for speed
-AUTOTHROTTLE_ENABLED = os.getenv('AUTOTHROTTLE_ENABLED', 'true').lower() == 'true'
+# Adaptive (AIMD) concurrency per domain and per PROXY_LIST proxy; the concurrency
+# settings below become ceilings and AutoThrottle is turned off (see concurrency.py)
+ADAPTIVE_CONCURRENCY_ENABLED = os.getenv('ADAPTIVE_CONCURRENCY_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+AUTOTHROTTLE_ENABLED = os.getenv('AUTOTHROTTLE_ENABLED', 'true').lower() == 'true' and not ADAPTIVE_CONCURRENCY_ENABLED
 AUTOTHROTTLE_START_DELAY = float(os.getenv('AUTOTHROTTLE_START_DELAY', '0.5'))
 AUTOTHROTTLE_MAX_DELAY = float(os.getenv('AUTOTHROTTLE_MAX_DELAY', '3'))
 AUTOTHROTTLE_TARGET_CONCURRENCY = float(os.getenv('AUTOTHROTTLE_TARGET_CONCURRENCY', '20.0'))  # Optimized concurrency
@@ -38,12 +41,23 @@ REACTOR_THREADPOOL_SIZE = 32  # Optimized thread pool
 DOWNLOADER_MIDDLEWARES = {
     # Enable improved custom middleware (higher than RetryMiddleware so 407 handling wins)
     'dealnews_scraper.middlewares.ProxyMiddleware': 600,
+    # Drops speculative listing pages past the end of their category (see pagination.py)
+    'dealnews_scraper.middlewares.PaginationCancelMiddleware': 50,
+    # If-None-Match / If-Modified-Since from the validator store; 304 = unchanged (CONDITIONAL_REQUESTS_ENABLED)
+    'dealnews_scraper.middlewares.ConditionalRequestMiddleware': 580,
+    # Bytes per callback / proxy / status and byte budgets; below HttpCompression (590) to see decompressed sizes
+    'dealnews_scraper.middlewares.BandwidthMiddleware': 585,
     # Enable default user agent middleware
     'scrapy.downloadermiddlewares.useragent.UserAgentMiddleware': 400,
     'scrapy.downloadermiddlewares.retry.RetryMiddleware': 550,
     # Custom error handling is already built into our ProxyMiddleware
 }
 
+SPIDER_MIDDLEWARES = {
+    # Same instance as the downloader middleware: saves a page's validators once its items are in MySQL
+    'dealnews_scraper.middlewares.ConditionalRequestMiddleware': 950,
+}
+
 # Add browser-like headers
 DEFAULT_REQUEST_HEADERS = {
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -84,6 +98,12 @@ RETRY_TIMES_PER_STATUS = {
     503: 3,  # Fewer retries for server errors
 }
 
+# 403/429/503 and download-error retries wait outside the downloader for
+# RETRY_BACKOFF_BASE * 2^attempt seconds (with jitter, or Retry-After), capped at
+# RETRY_BACKOFF_MAX; budgets from RETRY_TIMES_PER_STATUS / RETRY_TIMES
+RETRY_BACKOFF_BASE = float(os.getenv('RETRY_BACKOFF_BASE', '5'))
+RETRY_BACKOFF_MAX = float(os.getenv('RETRY_BACKOFF_MAX', '120'))
+
 # Skip 404 errors to avoid infinite retries
 SKIP_404_ERRORS = True
 
@@ -91,6 +111,124 @@ ITEM_PIPELINES = {
     'dealnews_scraper.normalized_pipeline.NormalizedMySQLPipeline': 300,
 }
 
+# Buffered MySQL writes: rows are collected in memory and flushed with multi-row
+# upserts in one transaction. MYSQL_BATCH_SIZE=0 restores one write per item.
+MYSQL_BATCH_SIZE = int(os.getenv('MYSQL_BATCH_SIZE', '500'))  # Deals per flush
+MYSQL_FLUSH_INTERVAL = float(os.getenv('MYSQL_FLUSH_INTERVAL', '5'))  # Max seconds between flushes
+# Batches queued on the MySQL writer thread before the crawl is throttled
+MYSQL_MAX_PENDING_WRITES = int(os.getenv('MYSQL_MAX_PENDING_WRITES', '4'))
+
+# Seen-URL store used to skip deals already stored. 'memory' keeps an exact set of
+# 64-bit URL fingerprints; 'bloom' uses a fixed-size Bloom filter file (mmap).
+# Files live under .scrapy/ unless SEEN_URLS_PATH is set.
+SEEN_URLS_BACKEND = os.getenv('SEEN_URLS_BACKEND', 'memory')
+SEEN_URLS_PATH = os.getenv('SEEN_URLS_PATH', '')
+SEEN_URLS_CAPACITY = int(os.getenv('SEEN_URLS_CAPACITY', '5000000'))  # Bloom filter only
+SEEN_URLS_ERROR_RATE = float(os.getenv('SEEN_URLS_ERROR_RATE', '0.001'))  # Bloom filter only
+# Seed an empty store from the deals table once (e.g. after switching backends)
+SEEN_URLS_SEED_FROM_DB = os.getenv('SEEN_URLS_SEED_FROM_DB', 'false').lower() in ('1', 'true', 'yes')
+
+# Request dupefilter with 8-byte integer fingerprints ('set' exact, 'bloom' scalable);
+# persisted to JOBDIR when one is set
+DUPEFILTER_CLASS = 'dealnews_scraper.dupefilter.FingerprintDupeFilter'
+DUPEFILTER_BACKEND = os.getenv('DUPEFILTER_BACKEND', 'set')
+DUPEFILTER_CAPACITY = int(os.getenv('DUPEFILTER_CAPACITY', '1000000'))  # Bloom only: first slice size
+DUPEFILTER_ERROR_RATE = float(os.getenv('DUPEFILTER_ERROR_RATE', '0.0001'))  # Bloom only
+
+# Deal links on each side of a deal on a listing page stored as its related deals
+RELATED_DEALS_WINDOW = int(os.getenv('RELATED_DEALS_WINDOW', '2'))
+# Deals whose emitted related URLs are kept for their detail page (LRU); detail
+# requests themselves only carry the dealid
+DETAIL_CONTEXT_CACHE_SIZE = int(os.getenv('DETAIL_CONTEXT_CACHE_SIZE', '10000'))
+
+# Speculative pagination: listing pages kept in flight per category. The window
+# grows by one page per full page (up to PAGINATION_MAX_WINDOW), halves on a short
+# page, and pages past an empty page or a 400 are cancelled
+PAGINATION_PAGE_SIZE = int(os.getenv('PAGINATION_PAGE_SIZE', '20'))  # start= step
+PAGINATION_WINDOW = int(os.getenv('PAGINATION_WINDOW', '2'))
+PAGINATION_MIN_WINDOW = int(os.getenv('PAGINATION_MIN_WINDOW', '1'))
+PAGINATION_MAX_WINDOW = int(os.getenv('PAGINATION_MAX_WINDOW', '8'))
+
+# Incremental crawl: stop a category's pagination at the first listing page with no
+# new deals, using per-listing deal-id digests kept in a SQLite file under .scrapy/
+INCREMENTAL_CRAWL = os.getenv('INCREMENTAL_CRAWL', 'false').lower() in ('1', 'true', 'yes')
+LISTING_STATE_PATH = os.getenv('LISTING_STATE_PATH', '')
+
+# On-disk response cache for development and replay (append-only pack file under
+# .scrapy/httpcache/). RESPONSE_CACHE_MODE: 'off', 'record' (serve cached, fetch and
+# store the rest), 'replay' (cached only, no network) or 'refresh' (re-fetch entries
+# older than RESPONSE_CACHE_TTL seconds)
+RESPONSE_CACHE_MODE = os.getenv('RESPONSE_CACHE_MODE', 'off').lower()
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '86400'))
+RESPONSE_CACHE_COMPRESSION = os.getenv('RESPONSE_CACHE_COMPRESSION', 'auto')  # zstd when installed, else gzip
+HTTPCACHE_ENABLED = RESPONSE_CACHE_MODE in ('record', 'replay', 'refresh')
+HTTPCACHE_STORAGE = 'dealnews_scraper.httpcache.PackFileCacheStorage'
+HTTPCACHE_POLICY = 'scrapy.extensions.httpcache.DummyPolicy'
+HTTPCACHE_DIR = os.getenv('RESPONSE_CACHE_DIR', 'httpcache')
+HTTPCACHE_IGNORE_MISSING = RESPONSE_CACHE_MODE == 'replay'
+HTTPCACHE_EXPIRATION_SECS = RESPONSE_CACHE_TTL if RESPONSE_CACHE_MODE == 'refresh' else 0
+# Errors, throttling and bodiless 304s are never recorded
+HTTPCACHE_IGNORE_HTTP_CODES = [304, 403, 407, 429, 500, 502, 503, 504]
+
+# Conditional re-crawls: send the ETag / Last-Modified stored for a URL on earlier
+# runs and skip re-extraction on 304. Validators live in a SQLite file under .scrapy/ and
+# are saved only after the page's items are committed to MySQL. Off by default (and
+# keep it off while recording the response cache, so the cache gets full bodies)
+CONDITIONAL_REQUESTS_ENABLED = os.getenv('CONDITIONAL_REQUESTS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+VALIDATOR_STORE_PATH = os.getenv('VALIDATOR_STORE_PATH', '')
+
+# Per-callback and per-pipeline-method profile (wall/CPU time, response size, items and
+# requests yielded) written as JSON histograms at close, to PROFILE_OUTPUT or
+# .scrapy/profile/. PROFILE_SAMPLER: '' (none), 'cprofile' (every PROFILE_SAMPLE_EVERY-th
+# callback run, saved as .pstats) or 'pyinstrument' (whole run, HTML; pip install pyinstrument)
+PROFILE_ENABLED = os.getenv('PROFILE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PROFILE_OUTPUT = os.getenv('PROFILE_OUTPUT', '')
+PROFILE_SAMPLER = os.getenv('PROFILE_SAMPLER', '').lower()
+PROFILE_SAMPLE_EVERY = int(os.getenv('PROFILE_SAMPLE_EVERY', '100'))
+
+# Bandwidth accounting (bandwidth/* stats, deals per MB). BANDWIDTH_BUDGETS is JSON,
+# callback -> MB, e.g. {"parse_related_detail": 200}: past its budget, a callback yielding
+# fewer than BANDWIDTH_MIN_ITEMS_PER_MB items per MB has its requests deprioritized
+# (BANDWIDTH_PRIORITY_ADJUST) or dropped, per BANDWIDTH_BUDGET_ACTION ('deprioritize' / 'stop')
+BANDWIDTH_ACCOUNTING_ENABLED = os.getenv('BANDWIDTH_ACCOUNTING_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+BANDWIDTH_BUDGETS = os.getenv('BANDWIDTH_BUDGETS', '{}')
+BANDWIDTH_BUDGET_ACTION = os.getenv('BANDWIDTH_BUDGET_ACTION', 'deprioritize').lower()
+BANDWIDTH_MIN_ITEMS_PER_MB = float(os.getenv('BANDWIDTH_MIN_ITEMS_PER_MB', '5'))
+BANDWIDTH_PRIORITY_ADJUST = int(os.getenv('BANDWIDTH_PRIORITY_ADJUST', '-100'))
+
+# Adaptive concurrency: a decision every ADAPTIVE_CONCURRENCY_INTERVAL seconds per lane;
+# +1 while healthy and saturated, x ADAPTIVE_CONCURRENCY_BACKOFF on a 403/429 burst (at least
+# ADAPTIVE_CONCURRENCY_BAN_BURST and ADAPTIVE_CONCURRENCY_BAN_RATE of the responses), x 0.75
+# when p95 latency exceeds ADAPTIVE_CONCURRENCY_LATENCY_FACTOR x baseline.
+# Decisions go to ADAPTIVE_CONCURRENCY_LOG (JSON lines, default .scrapy/concurrency/)
+ADAPTIVE_CONCURRENCY_INTERVAL = float(os.getenv('ADAPTIVE_CONCURRENCY_INTERVAL', '5'))
+ADAPTIVE_CONCURRENCY_START = int(os.getenv('ADAPTIVE_CONCURRENCY_START', '8'))
+ADAPTIVE_CONCURRENCY_MIN = int(os.getenv('ADAPTIVE_CONCURRENCY_MIN', '2'))
+ADAPTIVE_CONCURRENCY_BACKOFF = float(os.getenv('ADAPTIVE_CONCURRENCY_BACKOFF', '0.5'))
+ADAPTIVE_CONCURRENCY_BAN_BURST = int(os.getenv('ADAPTIVE_CONCURRENCY_BAN_BURST', '3'))
+ADAPTIVE_CONCURRENCY_BAN_RATE = float(os.getenv('ADAPTIVE_CONCURRENCY_BAN_RATE', '0.05'))
+ADAPTIVE_CONCURRENCY_LATENCY_FACTOR = float(os.getenv('ADAPTIVE_CONCURRENCY_LATENCY_FACTOR', '2.0'))
+ADAPTIVE_CONCURRENCY_LOG = os.getenv('ADAPTIVE_CONCURRENCY_LOG', '')
+
+EXTENSIONS = {
+    'dealnews_scraper.profiling.CallbackProfiler': 500,  # PROFILE_ENABLED
+    'dealnews_scraper.concurrency.AdaptiveConcurrency': 510,  # ADAPTIVE_CONCURRENCY_ENABLED
+}
+
+# Health-scored PROXY_LIST routing: at most PROXY_MAX_IN_FLIGHT requests per proxy;
+# PROXY_BAN_THRESHOLD 403/429s within PROXY_BAN_WINDOW seconds, or PROXY_FAILURE_THRESHOLD
+# errors in a row, quarantine a proxy for PROXY_COOLDOWN seconds (doubling on repeats,
+# up to PROXY_MAX_COOLDOWN)
+PROXY_MAX_IN_FLIGHT = int(os.getenv('PROXY_MAX_IN_FLIGHT', '8'))
+PROXY_BAN_WINDOW = float(os.getenv('PROXY_BAN_WINDOW', '60'))
+PROXY_BAN_THRESHOLD = int(os.getenv('PROXY_BAN_THRESHOLD', '3'))
+PROXY_FAILURE_THRESHOLD = int(os.getenv('PROXY_FAILURE_THRESHOLD', '5'))
+PROXY_COOLDOWN = float(os.getenv('PROXY_COOLDOWN', '30'))
+PROXY_MAX_COOLDOWN = float(os.getenv('PROXY_MAX_COOLDOWN', '600'))
+
+# Extra brand dictionary (one brand per line) loaded after dealnews_scraper/data/brands.txt
+BRANDS_FILE = os.getenv('BRANDS_FILE', '')
+
 FEED_EXPORT_ENCODING = 'utf-8'
 
 # Disable exports when MySQL pipeline is enabled to maximize speed
@@ -0,0 +1,18 @@
+"""
+Custom crawler signals sent by NormalizedMySQLPipeline.
+
+Components that must not act on an item before it is in MySQL (the validator
+store of ConditionalRequestMiddleware) use them as a commit barrier:
+
+- batch_flushing(batch_id, spider): the rows buffered so far were handed to the
+  writer thread as batch batch_id; every item the pipeline received before this
+  point belongs to it or to an earlier batch.
+- batch_committed(batch_id, stored, spider): batch batch_id was committed
+  (stored=True) or dropped after its retries (stored=False). The writer runs
+  batches in order, so earlier batches have finished too.
+
+A flush with nothing buffered still sends both, once the writer has reached it.
+"""
+
+batch_flushing = object()
+batch_committed = object()
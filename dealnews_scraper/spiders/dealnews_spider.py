@@ -1,14 +1,27 @@
 import scrapy
+from scrapy.exceptions import IgnoreRequest
 import re
+import sys
 import time
 from dealnews_scraper.items import DealnewsItem, DealImageItem, DealCategoryItem, RelatedDealItem
+from dealnews_scraper.dealids import make_dealid, DETAIL_ID_RE
+from dealnews_scraper.fingerprints import FingerprintSet, open_seen_url_store
+from dealnews_scraper.structured_data import StructuredDataCache
+from dealnews_scraper.candidates import find_deal_candidates
+from dealnews_scraper.extraction_plan import ExtractionPlan
+from dealnews_scraper import classifier as deal_classifier
+from dealnews_scraper.related import PageDealLinks, DetailContextCache
+from dealnews_scraper.fingerprints import fingerprint
+from dealnews_scraper.pagination import PaginationPlanner, with_offset, offset_of
+from dealnews_scraper.listing_state import open_listing_state
+from dealnews_scraper.detail_page import find_detail_container, collect_related_links, DETAIL_PATH_RE
 from urllib.parse import urljoin, urlparse, parse_qs
 from datetime import datetime
 
 class DealnewsSpider(scrapy.Spider):
     name = "dealnews"
     allowed_domains = ["dealnews.com"]
-    handle_httpstatus_list = [400, 403, 404]  # Handle these status codes explicitly
+    handle_httpstatus_list = [304, 400, 403, 404]  # Handle these status codes explicitly (304: ConditionalRequestMiddleware)
     
     def __init__(self):
         super().__init__()
@@ -17,35 +30,112 @@ class DealnewsSpider(scrapy.Spider):
         self.max_deals = 100000  # Target: 100,000+ deals
         self.detail_pages_visited = 0
         self.max_detail_pages = 5000  # Increased limit to get more related deals (was 1000)
-        self.discovered_categories = set()  # Track discovered category pages
-        self.discovered_stores = set()  # Track discovered store pages
+        self.discovered_categories = FingerprintSet()  # Track discovered category pages
+        self.discovered_stores = FingerprintSet()  # Track discovered store pages
         self.category_discovery_enabled = True  # Enable category discovery for 100k+ deals
-        
-        # URL Deduplication System
-        self.scanned_urls = set()
-        self.load_existing_urls()
+        self.plan = ExtractionPlan(inc_stat=self._inc_stat)  # Compiled field cascades for extract_deal_item
+        self.classifier = deal_classifier.DealClassifier()  # Filter-variable keywords and brand dictionary
+        self.related_window = 2  # Nearby deal links on each side used as related deals (RELATED_DEALS_WINDOW)
+        # Detail requests carry only the dealid; related URLs already emitted per deal wait here (LRU)
+        self.detail_context = DetailContextCache()
+        self.pagination = PaginationPlanner()  # Speculative listing-page offsets per category (PAGINATION_*)
+        self.listing_state = None  # Per-listing deal-id digests from the last run (INCREMENTAL_CRAWL)
+        
+        # URL Deduplication System - compact fingerprint store; from_crawler swaps in
+        # the persisted store selected by SEEN_URLS_BACKEND. Only URLs of deals the
+        # pipeline has stored go there (NormalizedMySQLPipeline.mark_seen); URLs
+        # extracted or queued during this run are deduplicated in memory only, so a
+        # failed write or an interrupted crawl does not hide them from the next run
+        self.scanned_urls = FingerprintSet()
+        self.queued_urls = FingerprintSet()
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.scanned_urls = open_seen_url_store(crawler.settings)
+        spider.logger.info(
+            f"💾 Seen-URL store: {type(spider.scanned_urls).__name__} with {len(spider.scanned_urls):,} URLs "
+            f"({spider.scanned_urls.nbytes / 1048576:.1f} MB)"
+        )
+        if not len(spider.scanned_urls) and crawler.settings.getbool('SEEN_URLS_SEED_FROM_DB'):
+            spider.load_existing_urls()
+        spider.related_window = crawler.settings.getint('RELATED_DEALS_WINDOW', spider.related_window)
+        spider.detail_context = DetailContextCache(crawler.settings.getint('DETAIL_CONTEXT_CACHE_SIZE', 10000))
+        spider.pagination = PaginationPlanner.from_settings(crawler.settings)
+        spider.listing_state = open_listing_state(crawler.settings)
+        if spider.listing_state is not None:
+            spider.logger.info(f"🔁 Incremental crawl: {len(spider.listing_state):,} listing pages known from the last run")
+        brands_file = crawler.settings.get('BRANDS_FILE')
+        if brands_file:
+            spider.classifier = deal_classifier.DealClassifier(
+                brands=deal_classifier.load_brands(deal_classifier.BRANDS_PATH, brands_file))
+            spider.logger.info(f"🏷️ Brand dictionary: {len(spider.classifier.brands):,} brands (extra: {brands_file})")
+        return spider
+
+    def _inc_stat(self, key, count=1):
+        """Increment a crawl stat; no-op when the spider runs without a crawler (tests)"""
+        crawler = getattr(self, 'crawler', None)
+        if crawler is not None and crawler.stats is not None:
+            crawler.stats.inc_value(key, count, spider=self)
+
+    def _cpu_timed(self, callback, results, response=None):
+        """Yield from a callback's generator, adding its own CPU time to cpu/<callback>/* stats.
+        
+        Only time spent inside the generator is counted, not the time Scrapy spends
+        on the yielded items and requests in between. With the profiling extension
+        on (PROFILE_ENABLED), the run also goes to its per-callback histograms.
+        """
+        profiler = getattr(self, 'profiler', None)
+        if profiler is not None:
+            results = profiler.timed('callback', callback, results, response)
+        cpu = 0.0
+        iterator = iter(results)
+        try:
+            while True:
+                start = time.process_time()
+                try:
+                    result = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    cpu += time.process_time() - start
+                yield result
+        finally:
+            self._inc_stat(f'cpu/{callback}/responses')
+            self._inc_stat(f'cpu/{callback}/seconds', cpu)
+
+    def _max_stat(self, key, value):
+        """Raise a crawl stat to value if higher; no-op without a crawler"""
+        crawler = getattr(self, 'crawler', None)
+        if crawler is not None and crawler.stats is not None:
+            crawler.stats.max_value(key, value, spider=self)
+
+    def is_seen(self, url):
+        """URL already extracted or queued in this run, or stored by an earlier one"""
+        return url in self.queued_urls or url in self.scanned_urls
 
     def load_existing_urls(self):
-        """Load all existing URLs from database to avoid redundant traffic"""
-        import os
+        """Seed the seen-URL store from the deals table (one-off, for an empty store)"""
         import mysql.connector
-        from dotenv import load_dotenv
-        load_dotenv()
-        
+        from dealnews_scraper.runtime_config import RuntimeConfig
+
+        crawler = getattr(self, 'crawler', None)
+        config = RuntimeConfig.from_crawler(crawler) if crawler is not None else RuntimeConfig.from_settings()
         try:
             conn = mysql.connector.connect(
-                host=os.getenv('MYSQL_HOST', 'localhost'),
-                port=int(os.getenv('MYSQL_PORT', '3306')),
-                user=os.getenv('MYSQL_USER', 'root'),
-                password=os.getenv('MYSQL_PASSWORD', 'root'),
-                database=os.getenv('MYSQL_DATABASE', 'dealnews')
+                **config.mysql.connect_kwargs(),
+                database=config.mysql.database
             )
             cursor = conn.cursor()
             cursor.execute("SELECT url FROM deals WHERE url IS NOT NULL")
-            rows = cursor.fetchall()
-            for row in rows:
-                if row[0]:
-                    self.scanned_urls.add(row[0])
+            # Stream in chunks so the full URL list is never held in memory
+            while True:
+                rows = cursor.fetchmany(10000)
+                if not rows:
+                    break
+                for row in rows:
+                    if row[0]:
+                        self.scanned_urls.add(row[0])
             conn.close()
             self.logger.info(f"💾 Loaded {len(self.scanned_urls)} existing URLs from database for deduplication.")
         except Exception as e:
@@ -84,7 +174,7 @@ class DealnewsSpider(scrapy.Spider):
             url="https://www.dealnews.com/sitemap/",
             callback=self.parse_sitemap,
             errback=self.errback_http,
-            meta={'dont_cache': True},
+            meta={'dont_revalidate': True},
             dont_filter=True
         )
         
@@ -94,11 +184,14 @@ class DealnewsSpider(scrapy.Spider):
                 url=url,
                 callback=self.parse,
                 errback=self.errback_http,
-                meta={'dont_cache': True}
+                meta={'dont_revalidate': True}
             )
     
     def parse_sitemap(self, response):
         """Parse sitemap to discover all category pages upfront for 100k+ deals"""
+        return self._cpu_timed('parse_sitemap', self._parse_sitemap(response), response)
+
+    def _parse_sitemap(self, response):
         if response.status != 200:
             self.logger.warning(f"Sitemap not available: {response.url} - continuing with regular discovery")
             return
@@ -132,6 +225,7 @@ class DealnewsSpider(scrapy.Spider):
                         url=normalized,
                         callback=self.parse,
                         errback=self.errback_http,
+                        meta={'dont_revalidate': True},  # discovery needs the full page
                         dont_filter=False
                     )
                     discovered += 1
@@ -143,142 +237,85 @@ class DealnewsSpider(scrapy.Spider):
 
     def errback_http(self, failure):
         """Handle HTTP errors"""
+        if failure.check(IgnoreRequest):
+            self.logger.debug(f"Request dropped: {failure.request.url} - {failure.value}")
+            return
         self.logger.error(f"Request failed: {failure.request.url} - {failure.value}")
 
     def parse(self, response):
         """Main parsing method with IMPROVED DEAL EXTRACTION"""
+        return self._cpu_timed('parse', self._parse(response), response)
+
+    def _parse(self, response):
         if response.status == 400:
             self.logger.warning(f"400 error for URL: {response.url} - stopping this branch")
+            if 'start=' in response.url:
+                self.pagination.on_end(response.url)  # cancels queued pages past this offset
             return
         if response.status == 404:
             self.logger.warning(f"404 error for URL: {response.url}")
+            if 'start=' in response.url:
+                self.pagination.on_end(response.url)
             return
         
         if response.status == 403:
             self.logger.warning(f"403 error for URL: {response.url}")
             return
+        if response.status == 304:
+            yield from self.handle_not_modified_listing(response)
+            return
         
         self.logger.info(f"Parsing: {response.url}")
         
-        # IMPROVED DEAL EXTRACTION - Try multiple strategies
-        deals = []
-        
-        # Strategy 1: Look for deal links (most reliable)
-        deal_links = response.css('a[href*="/deals/"], a[href*="/deal/"], a[href*="/d/"]')
-        for link in deal_links:
-            # Get parent container
-            parent = link.xpath('./ancestor::*[contains(@class, "deal") or contains(@class, "item") or contains(@class, "card")][1]')
-            if parent:
-                deals.extend(parent)
-            else:
-                # Use the link itself as deal container
-                deals.append(link.xpath('./..'))
-        
-        # Strategy 2: Data attributes
-        data_deals = response.css('[data-deal-id], [data-rec-id], [data-deal], [data-id*="deal"]')
-        deals.extend(data_deals)
-        
-        # Strategy 3: Common deal container classes
-        container_selectors = [
-            'article.deal', 'article[class*="deal"]',
-            'div.deal-item', 'div[class*="deal-item"]',
-            'div.deal-card', 'div[class*="deal-card"]',
-            'div.deal-tile', 'div[class*="deal-tile"]',
-            'div[class*="deal-container"]',
-            'div[class*="deal-wrapper"]',
-            'div[class*="deal-box"]',
-            'div[class*="deal-content"]',
-            'div[class*="deal-listing"]',
-            'div[class*="deal-post"]',
-            'div[class*="deal-entry"]',
-            '.item[class*="deal"]',
-            '.card[class*="deal"]',
-            '.tile[class*="deal"]',
-        ]
+        # IMPROVED DEAL EXTRACTION - six candidate strategies (deal links, data attributes,
+        # container classes, product/offer containers, JSON-LD, click-out links) evaluated
+        # in one pass over the tree; see candidates.py.
+        # JSON-LD is decoded once here and shared with parse_json_ld_deals() and the per-deal lookups
+        structured = StructuredDataCache(response, inc_stat=self._inc_stat)
+        strategy_counts = {}
+        unique_deals = find_deal_candidates(response, structured, stats=strategy_counts)
+        for name, count in strategy_counts.items():
+            self._inc_stat(f'candidates/{name}', count)
         
-        for selector in container_selectors:
-            found = response.css(selector)
-            if found:
-                deals.extend(found)
-        
-        # Strategy 4: Look for product/offer containers
-        product_containers = response.css('[class*="product"], [class*="offer"], [class*="listing"]')
-        for container in product_containers:
-            # Check if it has deal-like content
-            text = container.get()
-            if text and ('deal' in text.lower() or '$' in text or 'off' in text.lower() or 'sale' in text.lower()):
-                deals.append(container)
-        
-        # Strategy 5: Extract from JSON-LD structured data first (fastest)
-        json_deals = response.css('script[type="application/ld+json"]::text').getall()
-        if json_deals:
-            import json
-            for json_str in json_deals:
-                try:
-                    data = json.loads(json_str)
-                    if isinstance(data, dict) and data.get('@type') in ['Offer', 'Product', 'ItemList']:
-                        # Create a virtual deal container for JSON data
-                        deals.append(response.css('body').xpath('./script[contains(text(), "@type")][1]'))
-                except:
-                    pass
+        self.logger.info(f"Total unique deals found on {response.url}: {len(unique_deals)}")
         
-        # Strategy 6: DealNews click-out links (very common on listing pages)
-        click_links = response.css('a[href*="lw/click.html"]')
-        for a in click_links:
-            # Prefer nearest meaningful container
-            parent = (
-                a.xpath('./ancestor::article[1]') or
-                a.xpath('./ancestor::*[contains(@class, "deal") or contains(@class, "offer") or contains(@class, "snippet") or contains(@class, "item") or contains(@class, "card")][1]')
-            )
-            if parent:
-                deals.extend(parent)
-            else:
-                # Fallback to link's immediate parent
-                deals.append(a.xpath('..'))
-        
-        # Remove duplicates
-        seen = set()
-        unique_deals = []
-        for deal in deals:
-            if deal:
-                deal_html = deal.get() or ''
-                deal_id = deal.css('::attr(data-deal-id)').get() or deal.css('::attr(data-rec-id)').get() or ''
-                deal_url = deal.css('a::attr(href)').get() or ''
-                
-                # Create unique identifier
-                unique_id = deal_id or deal_url or hash(deal_html[:200])
-                if unique_id not in seen:
-                    seen.add(unique_id)
-                    unique_deals.append(deal)
+        # Deal links of the page, indexed once for the proximity-based related deals
+        page_links = PageDealLinks(response)
         
-        self.logger.info(f"Total unique deals found on {response.url}: {len(unique_deals)}")
+        # Ordered deal ids and new deals of the page, for incremental change detection
+        page_dealids = []
+        new_on_page = 0
         
         for deal in unique_deals:
             if self.deals_extracted >= self.max_deals:
                 self.logger.info(f"Reached maximum deals limit: {self.max_deals}")
                 return
             
-            # Extract deal link for deduplication check
-            link = deal.css('::attr(data-offer-url)').get() or deal.css('a::attr(href)').get()
-            if link:
-                try:
-                    link = response.urljoin(link)
-                    if link in self.scanned_urls:
-                        self.logger.debug(f"⏭️ Skipping already scanned URL: {link}")
-                        continue
-                except Exception:
-                    pass  # If urljoin fails, continue with extraction
+            # Deal id and URL exactly as the item gets them, for change detection and deduplication
+            try:
+                identity = self.deal_identity(deal, response)
+            except Exception:
+                identity = None  # extract_deal_item logs the failure
+            if identity is not None:
+                deal_detail_url, dealid, _ = identity
+                if self.listing_state is not None:
+                    page_dealids.append(dealid)
+                # Deals without a detail page get the listing URL, which says nothing about the deal
+                if deal_detail_url and self.is_seen(deal_detail_url):
+                    self.logger.debug(f"⏭️ Skipping already scanned URL: {deal_detail_url}")
+                    continue
 
-            item = self.extract_deal_item(deal, response)
+            item = self.extract_deal_item(deal, response, structured, identity)
             if item:
-                self.scanned_urls.add(item.get('url')) # Add to memory set
+                self.queued_urls.add(item.get('url'))
                 self.deals_extracted += 1
+                new_on_page += 1
                 yield item
                 
                 # Extract related data
                 yield from self.extract_deal_images(deal, item)
-                yield from self.extract_deal_categories(deal, item, response)
-                yield from self.extract_related_deals(deal, item, response)
+                yield from self.extract_deal_categories(deal, item, response, structured)
+                yield from self.extract_related_deals(deal, item, response, page_links)
                 
                 # Visit detail page for related deals (use DealNews detail page URL, not external merchant URL)
                 deal_detail_url = item.get('url', '')  # This should be the DealNews detail page URL
@@ -286,15 +323,14 @@ class DealnewsSpider(scrapy.Spider):
                     # Only visit if it's a DealNews detail page (contains .html and dealnews.com)
                     if '.html' in deal_detail_url and 'dealnews.com' in deal_detail_url:
                         # Check if it's actually a detail page (not a listing page)
-                        import re
-                        is_detail_page = re.search(r'/\d+\.html', deal_detail_url) is not None
+                        is_detail_page = DETAIL_ID_RE.search(deal_detail_url) is not None
                         
                         if is_detail_page:
                             # Visit every deal's detail page to get all related deals
                             yield scrapy.Request(
                                 url=deal_detail_url,
                                 callback=self.parse_deal_detail,
-                                meta={'dealid': item['dealid'], 'item': item},
+                                meta={'dealid': item['dealid']},
                                 errback=self.errback_http,
                                 dont_filter=True
                             )
@@ -309,6 +345,10 @@ class DealnewsSpider(scrapy.Spider):
                 elif self.detail_pages_visited >= self.max_detail_pages:
                     self.logger.debug(f"⚠️  Reached max detail pages limit ({self.max_detail_pages})")
         
+        if unique_deals:
+            self._inc_stat('related/listing_pages')
+            self._max_stat('related/max_links_per_page', page_links.emitted)
+        
         # Discover category and store pages for comprehensive crawling (100k+ deals)
         # Always discover categories (even if we're close to max) to ensure we get all paths
         if self.category_discovery_enabled:
@@ -318,40 +358,56 @@ class DealnewsSpider(scrapy.Spider):
             if len(self.discovered_stores) < 200:  # Discover stores too
                 yield from self.discover_store_pages(response)
         
+        # Also extract deals from JSON-LD structured data (new DealNews format); before the
+        # incremental check below, so its new deals count and its deal ids are in the digest
+        extracted = self.deals_extracted
+        yield from self._cpu_timed('parse_json_ld_deals', self.parse_json_ld_deals(response, structured, page_dealids), response)
+        new_on_page += self.deals_extracted - extracted
+        self.logger.debug(f"JSON-LD on {response.url}: {structured.decodes} decodes, {structured.decodes_saved} saved by cache")
+        
+        # Incremental mode: a page with nothing new (all deals seen, or the same deal ids
+        # as last run) ends its category - later offsets only hold older deals
+        if self.listing_state is not None and unique_deals:
+            unchanged = self.listing_state.record(response.url, page_dealids, new_on_page)
+            self._inc_stat('incremental/pages_unchanged' if unchanged else 'incremental/pages_changed')
+            if new_on_page:
+                self._inc_stat('incremental/new_deals', new_on_page)
+            if unchanged or not new_on_page:
+                self.logger.info(f"🔁 No new deals on {response.url}; stopping pagination for this category")
+                self._inc_stat('incremental/streams_stopped')
+                self.pagination.on_end(response.url)  # cancels pages already queued past this one
+                return
+        
         # Handle pagination
         if len(unique_deals) == 0 and 'start=' in response.url:
             # Likely reached the end for this pagination stream (e.g., invalid/high start offset)
             self.logger.info(f"No deals found on {response.url}; stopping further pagination for this path")
+            self.pagination.on_end(response.url)
             return
-        yield from self.handle_pagination(response)
+        yield from self.handle_pagination(response, len(unique_deals))
         
         # Log progress
         elapsed_time = time.time() - self.start_time
         rate = self.deals_extracted / elapsed_time if elapsed_time > 0 else 0
         self.logger.info(f"Progress: {self.deals_extracted} deals extracted in {elapsed_time:.1f}s (rate: {rate:.1f} deals/sec)")
-        
-        # Also extract deals from JSON-LD structured data (new DealNews format)
-        yield from self.parse_json_ld_deals(response)
 
-    def parse_json_ld_deals(self, response):
-        """Extract deals from JSON-LD structured data (new DealNews format)"""
-        import json
+    def parse_json_ld_deals(self, response, structured=None, page_dealids=None):
+        """Extract deals from JSON-LD structured data (new DealNews format)
+        
+        page_dealids, when given, collects the deal id of every offer, seen or not.
+        """
+        if structured is None:
+            structured = StructuredDataCache(response, inc_stat=self._inc_stat)
         
         # Look for JSON-LD structured data in script tags
-        json_scripts = response.css('script[type="application/ld+json"]::text').getall()
         json_deals = []
-        
-        for script_content in json_scripts:
-            try:
-                data = json.loads(script_content)
-                if isinstance(data, dict) and data.get('@type') == 'Offer':
-                    json_deals.append(data)
-                elif isinstance(data, list):
-                    for item in data:
-                        if isinstance(item, dict) and item.get('@type') == 'Offer':
-                            json_deals.append(item)
-            except (json.JSONDecodeError, TypeError):
-                continue
+        for data in structured.page_blocks():
+            if isinstance(data, dict) and data.get('@type') == 'Offer':
+                json_deals.append(data)
+            elif isinstance(data, list):
+                for item in data:
+                    if isinstance(item, dict) and item.get('@type') == 'Offer':
+                        json_deals.append(item)
         
         self.logger.info(f"Found {len(json_deals)} JSON-LD deals on {response.url}")
         
@@ -362,13 +418,15 @@ class DealnewsSpider(scrapy.Spider):
             
             item = self.extract_deal_from_json(deal_data, response)
             if item:
+                if page_dealids is not None:
+                    page_dealids.append(item['dealid'])
                 # URL deduplication check
                 deal_url = item.get('url')
-                if deal_url in self.scanned_urls:
+                if self.is_seen(deal_url):
                     self.logger.debug(f"⏭️ Skipping already scanned JSON-LD URL: {deal_url}")
                     continue
                 
-                self.scanned_urls.add(deal_url)
+                self.queued_urls.add(deal_url)
                 self.deals_extracted += 1
                 yield item
                 
@@ -381,13 +439,12 @@ class DealnewsSpider(scrapy.Spider):
                 deal_detail_url = item.get('url', '')
                 if deal_detail_url and self.detail_pages_visited < self.max_detail_pages:
                     if '.html' in deal_detail_url and 'dealnews.com' in deal_detail_url:
-                        import re
-                        is_detail_page = re.search(r'/\d+\.html', deal_detail_url) is not None
+                        is_detail_page = DETAIL_ID_RE.search(deal_detail_url) is not None
                         if is_detail_page:
                             yield scrapy.Request(
                                 url=deal_detail_url,
                                 callback=self.parse_deal_detail,
-                                meta={'dealid': item['dealid'], 'item': item},
+                                meta={'dealid': item['dealid']},
                                 errback=self.errback_http,
                                 dont_filter=True
                             )
@@ -404,9 +461,9 @@ class DealnewsSpider(scrapy.Spider):
             json_url = deal_data.get('url', response.url)
             # Prefer stable id derived from absolute deal URL to maximize uniqueness
             if json_url:
-                item['dealid'] = f"deal_{hash(json_url)}"
+                item['dealid'] = make_dealid(url=json_url)
             else:
-                item['dealid'] = deal_data.get('id', f"json_deal_{hash(str(deal_data))}")
+                item['dealid'] = deal_data.get('id') or make_dealid(fallback=json.dumps(deal_data, sort_keys=True))
             item['title'] = deal_data.get('name', '')
             item['detail'] = deal_data.get('description', '')  # Use 'detail' instead of 'description'
             item['price'] = deal_data.get('price', '')
@@ -442,34 +499,10 @@ class DealnewsSpider(scrapy.Spider):
             detail_text = item.get('detail', '')
             combined_text = f"{title_text} {detail_text}".lower()
             
-            # Look for discount patterns in title or description
-            import re
-            # Pattern 1: Standard discount patterns
-            deal_patterns = [
-                r'Up to \d+% off',
-                r'Up to \d+%',
-                r'Save \d+%',
-                r'\d+% off',
-                r'\$\d+ off',
-                r'\$\d+ gift card',
-                r'\d+-\w+ deals?',  # e.g., "1-cent deals"
-                r'\$\d+/\w+',  # e.g., "$5/item"
-            ]
-            
-            # Try title first
-            for pattern in deal_patterns:
-                deal_match = re.search(pattern, title_text, re.IGNORECASE)
-                if deal_match:
-                    deal_text = deal_match.group(0)
-                    break
-            
-            # If not found in title, try description
+            # Look for discount patterns in title or description (title first)
+            deal_text = deal_classifier.first_match(deal_classifier.JSON_DEAL_TEXT_PATTERNS, title_text)
             if not deal_text:
-                for pattern in deal_patterns:
-                    deal_match = re.search(pattern, detail_text, re.IGNORECASE)
-                    if deal_match:
-                        deal_text = deal_match.group(0)
-                        break
+                deal_text = deal_classifier.first_match(deal_classifier.JSON_DEAL_TEXT_PATTERNS, detail_text)
             
             # Special case: "1-cent" deals
             if not deal_text and ('1-cent' in title_text.lower() or '1 cent' in title_text.lower()):
@@ -477,7 +510,7 @@ class DealnewsSpider(scrapy.Spider):
             
             # Special case: Gift card deals
             if not deal_text and ('gift card' in combined_text):
-                gift_match = re.search(r'\$?\d+ gift card', title_text, re.IGNORECASE)
+                gift_match = deal_classifier.GIFT_CARD_RE.search(title_text)
                 if gift_match:
                     deal_text = gift_match.group(0)
             
@@ -489,7 +522,7 @@ class DealnewsSpider(scrapy.Spider):
                     dealplus_text = 'free shipping w/ Prime'
                 elif 'w/ $' in combined_text or 'w/$' in combined_text:
                     # Extract minimum amount (e.g., "free shipping w/ $25")
-                    amount_match = re.search(r'free shipping\s+w/?\s*\$?(\d+)', combined_text, re.IGNORECASE)
+                    amount_match = deal_classifier.FREE_SHIPPING_MIN_RE.search(combined_text)
                     if amount_match:
                         dealplus_text = f"free shipping w/ ${amount_match.group(1)}"
                     else:
@@ -500,7 +533,7 @@ class DealnewsSpider(scrapy.Spider):
                 dealplus_text = 'free shipping w/ Prime'
             elif 'w/ $' in combined_text or 'w/$' in combined_text:
                 # Check for other shipping conditions
-                amount_match = re.search(r'w/?\s*\$?(\d+)', combined_text, re.IGNORECASE)
+                amount_match = deal_classifier.SHIPPING_MIN_RE.search(combined_text)
                 if amount_match:
                     dealplus_text = f"free shipping w/ ${amount_match.group(1)}"
             
@@ -529,20 +562,20 @@ class DealnewsSpider(scrapy.Spider):
             popularity_text = ''
             # Check in title first (sometimes it's in the title)
             if '/5' in title_text or 'popularity' in title_text.lower():
-                pop_match = re.search(r'(Popularity:?\s*\d+/\d+|\d+/\d+)', title_text, re.IGNORECASE)
+                pop_match = deal_classifier.JSON_POPULARITY_RE.search(title_text)
                 if pop_match:
                     popularity_text = pop_match.group(1)
             
             # Check in description
             if not popularity_text and ('/5' in detail_text or 'popularity' in detail_text.lower()):
-                pop_match = re.search(r'(Popularity:?\s*\d+/\d+|\d+/\d+)', detail_text, re.IGNORECASE)
+                pop_match = deal_classifier.JSON_POPULARITY_RE.search(detail_text)
                 if pop_match:
                     popularity_text = pop_match.group(1)
             
             # Also check JSON-LD name field (sometimes popularity is in the name)
             json_name = deal_data.get('name', '')
             if not popularity_text and json_name and ('/5' in json_name or 'popularity' in json_name.lower()):
-                pop_match = re.search(r'(Popularity:?\s*\d+/\d+|\d+/\d+)', json_name, re.IGNORECASE)
+                pop_match = deal_classifier.JSON_POPULARITY_RE.search(json_name)
                 if pop_match:
                     popularity_text = pop_match.group(1)
             
@@ -719,8 +752,75 @@ class DealnewsSpider(scrapy.Spider):
         if False:
             yield
 
-    def extract_deal_item(self, deal, response):
-        """Extract main deal item with IMPROVED SELECTORS"""
+    def deal_identity(self, deal, response):
+        """(detail page URL or None, dealid, deal link) of a listing deal, as extract_deal_item sets them.
+        
+        parse() uses it to check the seen-URL store and build the page's deal ids
+        before paying for the full extraction.
+        """
+        node = deal.root
+        plan = self.plan
+        
+        # Basic deal information - site-provided ids first (new DealNews structure)
+        content_id = plan.first('content_id', node)
+        site_id = plan.first('site_id', node) or plan.first('element_id', node)
+        dealid = content_id or site_id
+        # Get actual deal URL from data-offer-url (new structure) or href
+        link = plan.first('offer_url', node) or plan.first('first_href', node)
+        if link:
+            try:
+                # Make absolute
+                link = response.urljoin(link)
+            except Exception:
+                pass
+
+        # Extract DealNews detail page URL (not listing page URL)
+        # DealNews detail pages have format: /Title/21791913.html
+        def accept_detail_url(url):
+            """DealNews detail page (/Title/21791913.html), not a /deals/ listing page"""
+            if not url.strip():
+                return None
+            # Make absolute URL
+            if not url.startswith('http'):
+                url = response.urljoin(url)
+            if '.html' in url and 'dealnews.com' in url and '/deals/' not in url.split('.html')[0]:
+                if DETAIL_ID_RE.search(url):
+                    return url
+            return None
+        
+        deal_detail_url = plan.extract('detail_url', node, accept=accept_detail_url)
+        
+        # Fallback: try to find link with deal ID pattern (e.g., 21791913)
+        if not deal_detail_url:
+            # Extract numeric deal ID from dealid if possible
+            deal_id_num = None
+            if dealid:
+                # Try to extract numeric ID from dealid
+                id_match = re.search(r'\d+', dealid.replace('deal_', '').replace('-', ''))
+                if id_match:
+                    deal_id_num = id_match.group(0)
+            
+            if deal_id_num:
+                # Look for links containing this deal ID
+                id_links = deal.css(f'a[href*="{deal_id_num}"]::attr(href)').getall()
+                for link in id_links:
+                    if '.html' in link and 'dealnews.com' in link:
+                        deal_detail_url = response.urljoin(link)
+                        break
+        
+        # Stable dealid: numeric DealNews id when available, else a digest of the deal URL
+        # (the text fallback only matters for deals without any link)
+        fallback_text = None
+        if not (deal_detail_url or link):
+            all_text = plan.all('text', node)
+            fallback_text = (response.url + (all_text[0] if all_text else ''))[:200]
+        dealid = make_dealid(url=deal_detail_url or link, content_id=content_id, site_id=site_id, fallback=fallback_text)
+        return deal_detail_url, dealid, link
+
+    def extract_deal_item(self, deal, response, structured=None, identity=None):
+        """Extract main deal item with IMPROVED SELECTORS (identity: deal_identity() result, if known)"""
+        if structured is None:
+            structured = StructuredDataCache(response, inc_stat=self._inc_stat)
         try:
             # Skip navigation/menu items that are not real deals
             deal_html = deal.get()
@@ -739,93 +839,16 @@ class DealnewsSpider(scrapy.Spider):
             
             item = DealnewsItem()
             
-            # Basic deal information - improved dealid generation (prefer absolute deal link)
-            # Try data-content-id first (new DealNews structure)
-            dealid = deal.css('::attr(data-content-id)').get() or deal.css('::attr(data-deal-id)').get() or deal.css('::attr(id)').get()
-            # Get actual deal URL from data-offer-url (new structure) or href
-            link = deal.css('::attr(data-offer-url)').get() or deal.css('a::attr(href)').get()
-            if link:
-                try:
-                    # Make absolute
-                    link = response.urljoin(link)
-                except Exception:
-                    pass
-            # If no provided dealid, derive from absolute link; else fallback to content hash
-            if not dealid:
-                if link:
-                    dealid = f"deal_{hash(link)}"
-                else:
-                    deal_text = deal.css('::text').get() or ''
-                    dealid = f"deal_{hash((response.url + deal_text)[:200])}"
-            # Clean up dealid - remove "auto-id-" prefix if present
-            if dealid and dealid.startswith('auto-id-'):
-                # Use content-id or hash of link instead
-                content_id = deal.css('::attr(data-content-id)').get()
-                if content_id:
-                    dealid = f"deal_{content_id}"
-                elif link:
-                    dealid = f"deal_{hash(link)}"
-
-            item['dealid'] = dealid
-            item['recid'] = deal.css('::attr(data-rec-id)').get() or ''
-            
-            # Extract DealNews detail page URL (not listing page URL)
-            # DealNews detail pages have format: /Title/21791913.html
-            deal_detail_url = None
-            detail_url_selectors = [
-                # Priority 1: Title links (most reliable)
-                '.title-link::attr(href)',
-                '.pitch .title-link::attr(href)',
-                '.deal-title a::attr(href)',
-                'h2 a::attr(href), h3 a::attr(href)',  # Headings with links
-                # Priority 2: Any .html link in deal container
-                'a[href*=".html"]::attr(href)',  # Links ending in .html (DealNews detail pages)
-                # Priority 3: Deal links
-                'a[href*="/deals/"]::attr(href)',  # Deal links (but these might be listing pages)
-            ]
-            
-            for selector in detail_url_selectors:
-                urls = deal.css(selector).getall()  # Get all matches, not just first
-                for url in urls:
-                    if not url or not url.strip():
-                        continue
-                    # Make absolute URL
-                    if not url.startswith('http'):
-                        url = response.urljoin(url)
-                    # Check if it's a DealNews detail page
-                    # Detail pages: contain .html, are on dealnews.com, and have numeric ID pattern
-                    if '.html' in url and 'dealnews.com' in url:
-                        # Check if it's NOT a /deals/ listing page
-                        url_before_html = url.split('.html')[0]
-                        if '/deals/' not in url_before_html:
-                            # Check if it has a numeric ID pattern (e.g., /21791913.html)
-                            import re
-                            if re.search(r'/\d+\.html', url):
-                                deal_detail_url = url
-                                break
-                if deal_detail_url:
-                    break
-            
-            # Fallback: try to find link with deal ID pattern (e.g., 21791913)
-            if not deal_detail_url:
-                # Extract numeric deal ID from dealid if possible
-                deal_id_num = None
-                if dealid:
-                    # Try to extract numeric ID from dealid
-                    import re
-                    id_match = re.search(r'\d+', dealid.replace('deal_', '').replace('-', ''))
-                    if id_match:
-                        deal_id_num = id_match.group(0)
-                
-                if deal_id_num:
-                    # Look for links containing this deal ID
-                    id_links = deal.css(f'a[href*="{deal_id_num}"]::attr(href)').getall()
-                    for link in id_links:
-                        if '.html' in link and 'dealnews.com' in link:
-                            deal_detail_url = response.urljoin(link)
-                            break
+            # Field cascades and queries are precompiled in self.plan (see extraction_plan.py)
+            node = deal.root
+            plan = self.plan
             
+            # Basic deal information - detail page URL and stable dealid (shared with parse's seen check)
+            deal_detail_url, dealid, link = identity or self.deal_identity(deal, response)
+            item['recid'] = plan.first('recid', node) or ''
             item['url'] = deal_detail_url or response.url  # Fallback to listing page if not found
+            item['dealid'] = dealid
+            all_text = plan.all('text', node)
             
             # Log for debugging
             if deal_detail_url:
@@ -834,113 +857,24 @@ class DealnewsSpider(scrapy.Spider):
                 self.logger.debug(f"⚠️  Could not extract detail page URL for deal {dealid}, using listing page: {response.url}")
             
             # IMPROVED Title extraction with UPDATED DealNews selectors
-            title_selectors = [
-                # New DealNews structure (priority)
-                '.title-link::text',  # Actual deal title link
-                '.title a::text',  # Title with link
-                '.pitch .title::text',  # Title in pitch section
-                '.pitch .title-link::text',  # Title link in pitch
-                # DealNews specific (current site structure)
-                '.deal-title::text',
-                '.deal-name::text',
-                '.deal-headline::text',
-                '.deal-text::text',
-                '.deal-description::text',
-                '.deal-summary::text',
-                # Current site selectors
-                '.deal-title-text::text',
-                '.deal-content h3::text',
-                '.deal-content h4::text',
-                '.deal-content .title::text',
-                # Generic fallbacks (avoid .title::text as it matches "More Options" button)
-                'h1::text',
-                'h2::text',
-                'h3::text',
-                'h4::text',
-                '.product-title::text',
-                '.item-title::text',
-                '.listing-title::text',
-                '.post-title::text',
-                '.entry-title::text',
-                # Link text (more targeted)
-                'a[href*="/deals/"]::text',
-                'a[href*="/deal/"]::text',
-                'a[href*="/products/"]::text',
-                # Other possibilities
-                '.name::text',
-                '.headline::text',
-                '.description::text',
-                '.summary::text'
-            ]
-            
-            for selector in title_selectors:
-                title = deal.css(selector).get()
-                if title and title.strip() and len(title.strip()) > 5:
-                    # Skip common non-title text
-                    if title.strip().lower() not in ['more options', 'more', 'less', 'buy now', 'shop now', 'read more']:
-                        item['title'] = title.strip()
-                        break
+            title = plan.extract('title', node)
+            if title:
+                item['title'] = title
             else:
                 # Fallbacks: aria-label/title attributes or nearby snippet text
-                attr_title = deal.css('[aria-label*="details"], [aria-label*="Read More"]::attr(aria-label)').get()
-                if not attr_title:
-                    attr_title = deal.css('[title]::attr(title)').get()
-                para = deal.css('.snippet.summary p::text, .summary p::text').get()
+                attr_title = plan.extract('title_attr', node)
+                para = plan.extract('title_para', node)
                 item['title'] = (attr_title or para or 'No title found').strip()
             
             # IMPROVED Price extraction with UPDATED selectors
-            price_selectors = [
-                # DealNews specific (current site)
-                '.deal-price::text',
-                '.price::text',
-                '.sale-price::text',
-                '.current-price::text',
-                '.deal-amount::text',
-                '.deal-cost::text',
-                # Current site structure
-                '.price-amount::text',
-                '.price-value::text',
-                '.price-text::text',
-                '.price-current::text',
-                '.deal-price-value::text',
-                # With spans (current structure)
-                'span[class*="price"]::text',
-                'span[class*="cost"]::text',
-                'span[class*="amount"]::text',
-                '.price span::text',
-                '.deal-price span::text',
-                # With divs (current structure)
-                'div[class*="price"]::text',
-                'div[class*="cost"]::text',
-                'div[class*="amount"]::text',
-                '.price div::text',
-                # Generic fallbacks
-                '.cost::text',
-                '.amount::text',
-                '.value::text',
-                # Look for price patterns
-                'span:contains("$")::text',
-                'div:contains("$")::text',
-                # Very generic
-                '*::text'  # Last resort - scan all text for price patterns
-            ]
-            
-            for selector in price_selectors:
-                price = deal.css(selector).get()
-                if price and ('$' in price or 'USD' in price or 'price' in price.lower()):
-                    item['price'] = price.strip()
-                    break
-            else:
-                item['price'] = ''
+            item['price'] = plan.extract('price', node) or ''
             
             # IMPROVED Store extraction - try JSON-LD first, then data attributes, then CSS
             store = ''
             # Try to extract from JSON-LD script tag
-            json_ld_script = deal.css('script[type="application/ld+json"]::text').get()
-            if json_ld_script:
+            json_data = structured.first_in(deal)
+            if json_data:
                 try:
-                    import json
-                    json_data = json.loads(json_ld_script)
                     # Check for seller in offers
                     if 'offers' in json_data and isinstance(json_data['offers'], list) and len(json_data['offers']) > 0:
                         seller = json_data['offers'][0].get('seller', {})
@@ -957,49 +891,23 @@ class DealnewsSpider(scrapy.Spider):
             # Try data-store attribute (store ID) - we can look it up or use key-attribute
             if not store:
                 # Extract from key-attribute line (e.g., "Best Buy · 4 hrs ago")
-                store_text = deal.css('.key-attribute::text').get()
+                store_text = plan.extract('store_line', node)
                 if store_text:
                     # Extract store name before "·" or "|"
                     store = store_text.split('·')[0].split('|')[0].strip()
             
             # Fallback to CSS selectors
             if not store:
-                store_selectors = [
-                # DealNews specific
-                '.store::text',
-                '.merchant::text',
-                '.retailer::text',
-                '.vendor::text',
-                '.deal-store::text',
-                '.deal-merchant::text',
-                # Generic
-                '.store-name::text',
-                '.merchant-name::text',
-                '.retailer-name::text',
-                '.vendor-name::text',
-                # With spans
-                'span[class*="store"]::text',
-                'span[class*="merchant"]::text',
-                'span[class*="retailer"]::text',
-                'span[class*="vendor"]::text'
-            ]
-            
-            for selector in store_selectors:
-                store = deal.css(selector).get()
-                if store and store.strip():
-                    store = store.strip()
-                    break
+                store = plan.extract('store', node)
             
             item['store'] = store or ''
             
             # Extract category from deal element - try JSON-LD first, then data attributes, then CSS
             category_value = ''
             # Try to extract from JSON-LD script tag
-            json_ld_script = deal.css('script[type="application/ld+json"]::text').get()
-            if json_ld_script:
+            json_data = structured.first_in(deal)
+            if json_data:
                 try:
-                    import json
-                    json_data = json.loads(json_ld_script)
                     # Check for category in offers
                     if 'offers' in json_data and isinstance(json_data['offers'], list) and len(json_data['offers']) > 0:
                         category_obj = json_data['offers'][0].get('category', {})
@@ -1015,22 +923,7 @@ class DealnewsSpider(scrapy.Spider):
             
             # Fallback to CSS selectors
             if not category_value:
-                category_selectors = [
-                '.category::text',
-                '.deal-category::text',
-                '.breadcrumb::text',
-                '.deal-breadcrumb::text',
-                '.category-name::text',
-                '.cat::text',
-                '.section::text',
-                '.department::text'
-            ]
-            
-            for selector in category_selectors:
-                category = deal.css(selector).get()
-                if category and category.strip():
-                    category_value = category.strip()
-                    break
+                category_value = plan.extract('category', node) or ''
             
             item['category'] = category_value
 
@@ -1063,62 +956,27 @@ class DealnewsSpider(scrapy.Spider):
             # IMPROVED Deal text extraction - look for patterns like "Up to 80% off"
             deal_text = ''
             # First, try to find text containing discount patterns
-            all_text = deal.css('::text').getall()
-            import re
             for text in all_text:
                 if text and text.strip():
-                    text_lower = text.lower().strip()
                     # Look for discount patterns: "Up to X% off", "X% off", "Save X%", etc.
-                    # Use regex for more precise matching
-                    deal_patterns = [
-                        r'Up to \d+% off',
-                        r'Up to \d+%',
-                        r'Save \d+%',
-                        r'\d+% off',
-                        r'\$\d+ off',
-                        r'\d+-\w+ deals?',  # e.g., "1-cent deals"
-                    ]
-                    for pattern in deal_patterns:
-                        match = re.search(pattern, text, re.IGNORECASE)
-                        if match:
-                            deal_text = match.group(0).strip()
-                            # Prefer shorter, more specific deal text
-                            if len(deal_text) < 50:
-                                break
+                    deal_text = deal_classifier.first_match(deal_classifier.DEAL_TEXT_PATTERNS, text).strip()
                     if deal_text:
                         break
             
             # Fallback to CSS selectors
             if not deal_text:
-                deal_text_selectors = [
-                    '.deal-text::text',
-                    '.deal-description::text',
-                    '.discount::text',
-                    '.savings::text',
-                    '[class*="deal"]::text',
-                    '[class*="discount"]::text',
-                    '.promo-text::text',
-                    '.offer-text::text'
-                ]
-                for selector in deal_text_selectors:
-                    deal_text = deal.css(selector).get()
-                    if deal_text and deal_text.strip():
-                        deal_text = deal_text.strip()
-                        # Validate it looks like a deal text
-                        if '%' in deal_text or 'off' in deal_text.lower() or 'save' in deal_text.lower():
-                            break
+                deal_text = plan.extract('deal_text', node)
             item['deal'] = deal_text or ''
             
             # IMPROVED Dealplus extraction - look for "free shipping", "w/ Prime", etc.
             dealplus_text = ''
-            import re
             # Check for free shipping patterns with amounts
             for text in all_text:
                 if text and text.strip():
                     text_lower = text.lower().strip()
                     # Pattern 1: "free shipping w/ $25" or "free shipping w/$25"
                     if 'free shipping' in text_lower:
-                        amount_match = re.search(r'free shipping\s+w/?\s*\$?(\d+)', text_lower)
+                        amount_match = deal_classifier.FREE_SHIPPING_MIN_RE.search(text_lower)
                         if amount_match:
                             dealplus_text = f"free shipping w/ ${amount_match.group(1)}"
                             break
@@ -1135,37 +993,18 @@ class DealnewsSpider(scrapy.Spider):
             
             # Fallback to CSS selectors
             if not dealplus_text:
-                dealplus_selectors = [
-                    '.deal-plus::text',
-                    '.shipping::text',
-                    '.bonus::text',
-                    '[class*="plus"]::text',
-                    '[class*="shipping"]::text'
-                ]
-                for selector in dealplus_selectors:
-                    dealplus_text = deal.css(selector).get()
-                    if dealplus_text and dealplus_text.strip():
-                        dealplus_text = dealplus_text.strip()
-                        # Clean up the text
-                        if 'free shipping' in dealplus_text.lower():
-                            if 'prime' in dealplus_text.lower():
-                                dealplus_text = 'free shipping w/ Prime'
-                            else:
-                                dealplus_text = 'free shipping'
-                        break
+                dealplus_text = plan.extract('dealplus', node)
             item['dealplus'] = dealplus_text or ''
             
-            item['promo'] = deal.css('.promo::text').get() or deal.css('.promotion::text').get() or ''
+            item['promo'] = plan.extract('promo', node) or ''
             
             # Use the absolute deal link if available (prefer actual deal URL over click.html redirect)
             # If link is a click.html redirect, try to get the actual deal URL from JSON-LD or data-offer-url
             if link and 'lw/click.html' in link:
                 # Try to get actual deal URL from JSON-LD
-                json_ld_script = deal.css('script[type="application/ld+json"]::text').get()
-                if json_ld_script:
+                json_data = structured.first_in(deal)
+                if json_data:
                     try:
-                        import json
-                        json_data = json.loads(json_ld_script)
                         # Check for url in offers
                         if 'offers' in json_data and isinstance(json_data['offers'], list) and len(json_data['offers']) > 0:
                             offer_url = json_data['offers'][0].get('url', '')
@@ -1180,14 +1019,14 @@ class DealnewsSpider(scrapy.Spider):
             item['deallink'] = link or ''
             
             # IMPROVED Dealtext and dealhover - extract from "Shop Now" button/link using XPath
-            shop_now_link = deal.xpath('.//a[contains(text(), "Shop Now") or contains(text(), "Buy Now")]/@href').get()
-            shop_now_text = deal.xpath('.//a[contains(text(), "Shop Now") or contains(text(), "Buy Now")]/text()').get()
-            shop_now_title = deal.xpath('.//a[contains(text(), "Shop Now") or contains(text(), "Buy Now")]/@title').get()
+            shop_now_link = plan.first('shop_now_href', node)
+            shop_now_text = plan.first('shop_now_text', node)
+            shop_now_title = plan.first('shop_now_title', node)
             
             if shop_now_link:
                 item['deallink'] = response.urljoin(shop_now_link) if shop_now_link else item['deallink']
-            item['dealtext'] = shop_now_text or deal.css('.deal-description::text').get() or deal.css('.deal-summary::text').get() or ''
-            item['dealhover'] = shop_now_title or deal.css('::attr(title)').get() or ''
+            item['dealtext'] = shop_now_text or plan.extract('dealtext', node) or ''
+            item['dealhover'] = shop_now_title or plan.first('hover', node) or ''
             
             # IMPROVED Published timestamp - look for "Published X hr ago", "X hrs ago", etc.
             published_text = ''
@@ -1198,19 +1037,7 @@ class DealnewsSpider(scrapy.Spider):
             
             # Fallback to CSS selectors
             if not published_text:
-                published_selectors = [
-                    '.published::text',
-                    '.date::text',
-                    '.timestamp::text',
-                    '.time::text',
-                    '[class*="published"]::text',
-                    '[class*="date"]::text'
-                ]
-                for selector in published_selectors:
-                    published_text = deal.css(selector).get()
-                    if published_text and published_text.strip():
-                        published_text = published_text.strip()
-                        break
+                published_text = plan.extract('published', node)
             item['published'] = published_text or ''
             
             # IMPROVED Popularity - look for "5/5", "Popularity: 5/5", etc.
@@ -1219,32 +1046,14 @@ class DealnewsSpider(scrapy.Spider):
             for text in all_text:
                 if text and text.strip():
                     # Look for patterns like "5/5", "Popularity: 5/5", "Rating: 4/5"
-                    pop_match = re.search(r'(Popularity:?\s*)?(\d+/\d+)', text, re.IGNORECASE)
+                    pop_match = deal_classifier.POPULARITY_RE.search(text)
                     if pop_match:
                         popularity_text = pop_match.group(2)  # Just the "5/5" part
                         break
             
             # Fallback to CSS selectors
             if not popularity_text:
-                popularity_selectors = [
-                    '.popularity::text',
-                    '.rating::text',
-                    '.score::text',
-                    '[class*="popularity"]::text',
-                    '[class*="rating"]::text',
-                    '[data-popularity]::attr(data-popularity)',
-                    '[data-rating]::attr(data-rating)'
-                ]
-                for selector in popularity_selectors:
-                    pop_val = deal.css(selector).get()
-                    if pop_val and pop_val.strip():
-                        # Extract just the rating part (e.g., "5/5" from "Popularity: 5/5")
-                        pop_match = re.search(r'(\d+/\d+)', pop_val)
-                        if pop_match:
-                            popularity_text = pop_match.group(1)
-                        else:
-                            popularity_text = pop_val.strip()
-                        break
+                popularity_text = plan.extract('popularity', node)
             item['popularity'] = popularity_text or ''
             
             # IMPROVED Staffpick - look for "Staff Pick", "Deals so good we bought one", etc.
@@ -1256,28 +1065,18 @@ class DealnewsSpider(scrapy.Spider):
             
             # Fallback to CSS selectors
             if not staffpick_text:
-                staffpick_selectors = [
-                    '.staff-pick::text',
-                    '.featured::text',
-                    '[class*="staff"]::text',
-                    '[class*="pick"]::text'
-                ]
-                for selector in staffpick_selectors:
-                    staffpick_text = deal.css(selector).get()
-                    if staffpick_text and staffpick_text.strip():
-                        staffpick_text = staffpick_text.strip()
-                        break
+                staffpick_text = plan.extract('staffpick', node)
             item['staffpick'] = staffpick_text or ''
             
             # IMPROVED Detail - full description text
-            detail_text = deal.css('.deal-detail::text').get() or deal.css('.details::text').get() or deal.css('.description::text').get() or ''
+            detail_text = plan.extract('detail', node) or ''
             # Also try to get full paragraph text
             if not detail_text:
-                detail_paragraphs = deal.css('p::text').getall()
+                detail_paragraphs = plan.all('paragraphs', node)
                 if detail_paragraphs:
                     detail_text = ' '.join([p.strip() for p in detail_paragraphs if p.strip()])
             item['detail'] = detail_text or ''
-            item['raw_html'] = deal.get()
+            item['raw_html'] = deal_html
             
             # Extract filter variables from deal content
             self.extract_filter_variables(item, deal, response)
@@ -1285,13 +1084,7 @@ class DealnewsSpider(scrapy.Spider):
             # Populate images and related deals on main item for pipeline usage
             try:
                 # Try multiple image selectors to find deal images
-                images = (
-                    deal.css('img::attr(src)').getall() or
-                    deal.css('img::attr(data-src)').getall() or  # Lazy-loaded images
-                    deal.css('img::attr(data-lazy-src)').getall() or
-                    deal.css('[class*="image"] img::attr(src)').getall() or
-                    deal.css('[class*="deal"] img::attr(src)').getall()
-                )
+                images = plan.all('images', node)
                 # Filter out empty and invalid images
                 item['images'] = [u.strip() for u in images if u and u.strip() and not u.startswith('data:')]
                 if item['images']:
@@ -1303,11 +1096,7 @@ class DealnewsSpider(scrapy.Spider):
             # Note: Related deals are typically only on detail pages, not listing pages
             try:
                 # Try specific selectors for related/similar deals (not all deal links)
-                related_links = (
-                    deal.css('.related-deals a::attr(href), .related a::attr(href), .similar a::attr(href)').getall() or
-                    deal.css('[class*="related"] a::attr(href), [class*="similar"] a::attr(href)').getall() or
-                    []
-                )
+                related_links = plan.all('related_links', node)
                 # Filter out the current deal's own link and make absolute URLs
                 current_link = link or item.get('deallink', '') or ''
                 filtered_links = []
@@ -1336,8 +1125,6 @@ class DealnewsSpider(scrapy.Spider):
         if not url:
             return ''
         
-        import re
-        
         # DealNews pattern: /c123/Category-Name/ or /c123/Category/Subcategory/
         # Extract full category path
         match = re.search(r'/c\d+/([^/?]+)', url)
@@ -1375,14 +1162,8 @@ class DealnewsSpider(scrapy.Spider):
 
     def extract_deal_images(self, deal, item):
         """Extract deal images with multiple selectors"""
-        # Try multiple image selectors
-        images = (
-            deal.css('img::attr(src)').getall() or
-            deal.css('img::attr(data-src)').getall() or  # Lazy-loaded images
-            deal.css('img::attr(data-lazy-src)').getall() or
-            deal.css('[class*="image"] img::attr(src)').getall() or
-            deal.css('[class*="deal"] img::attr(src)').getall()
-        )
+        # Try multiple image selectors (compiled in self.plan)
+        images = self.plan.all('images', deal.root)
         
         seen_images = set()
         for img_url in images:
@@ -1395,8 +1176,10 @@ class DealnewsSpider(scrapy.Spider):
                 image_item['imageurl'] = img_url
                 yield image_item
 
-    def extract_deal_categories(self, deal, item, response):
+    def extract_deal_categories(self, deal, item, response, structured=None):
         """Extract ONLY deal-specific categories from within the deal container (NOT page-level)"""
+        if structured is None:
+            structured = StructuredDataCache(response, inc_stat=self._inc_stat)
         categories_yielded = 0
         
         # ALWAYS extract category from URL first (this is the most reliable source)
@@ -1422,11 +1205,9 @@ class DealnewsSpider(scrapy.Spider):
                 self.logger.debug(f"✅ Extracted URL category '{url_category}' for deal {item['dealid']}")
         
         # Extract category from JSON-LD within the deal container (for homepage deals or as fallback)
-        json_ld_script = deal.css('script[type="application/ld+json"]::text').get()
-        if json_ld_script:  # Always try JSON-LD, even if URL category exists (for completeness)
+        json_data = structured.first_in(deal)
+        if json_data:  # Always try JSON-LD, even if URL category exists (for completeness)
             try:
-                import json
-                json_data = json.loads(json_ld_script)
                 if isinstance(json_data, dict):
                     # Check for category in the offer
                     category_obj = json_data.get('category', {})
@@ -1495,8 +1276,10 @@ class DealnewsSpider(scrapy.Spider):
                 category_item['category_name'] = tag_text
                 yield category_item
 
-    def extract_related_deals(self, deal, item, response):
+    def extract_related_deals(self, deal, item, response, page_links=None):
         """Extract related deals from deal container and nearby deals on listing page"""
+        if page_links is None:
+            page_links = PageDealLinks(response)
         related_links = []
         
         # 1. Extract from deal container (explicit related deals)
@@ -1508,26 +1291,11 @@ class DealnewsSpider(scrapy.Spider):
         related_links.extend(container_links)
         
         # 2. Extract nearby deals on the same page (related by proximity)
-        # Get all deal links on the page and use nearby ones as related
-        all_deal_links = response.css('a[href*="/deals/"]::attr(href), a[href*="/deal/"]::attr(href)').getall()
+        # The page's deal links are collected and indexed once per response (see related.py)
         current_deallink = item.get('deallink', '') or item.get('url', '')
-        current_index = -1
-        
-        # Find current deal's position in the list
-        for idx, link in enumerate(all_deal_links):
-            if link == current_deallink or current_deallink in link or link in current_deallink:
-                current_index = idx
-                break
-        
-        # Add nearby deals (2 before and 2 after) as related deals
-        if current_index >= 0:
-            start_idx = max(0, current_index - 2)
-            end_idx = min(len(all_deal_links), current_index + 3)
-            for idx in range(start_idx, end_idx):
-                if idx != current_index:
-                    link = all_deal_links[idx]
-                    if link and link.strip():
-                        related_links.append(link)
+        for link in page_links.neighbours(current_deallink, self.related_window):
+            if link and link.strip():
+                related_links.append(link)
         
         # 3. Also try to extract from deal's main item if available
         if item.get('related_deals'):
@@ -1535,6 +1303,7 @@ class DealnewsSpider(scrapy.Spider):
         
         # Filter out duplicates and invalid links
         seen_links = set()
+        emitted = []
         
         for link in related_links:
             if not link or not link.strip():
@@ -1557,105 +1326,82 @@ class DealnewsSpider(scrapy.Spider):
                 related_item = RelatedDealItem()
                 related_item['dealid'] = item['dealid']
                 related_item['relatedurl'] = link
+                page_links.emitted += 1
+                self._inc_stat('related/links_emitted')
+                emitted.append(link)
                 yield related_item
+        
+        # Remembered for the deal's detail page, which would otherwise emit them again
+        if emitted:
+            self.detail_context.put(item['dealid'], emitted)
 
     def parse_deal_detail(self, response):
         """Parse individual deal detail page to extract related deals"""
+        return self._cpu_timed('parse_deal_detail', self._parse_deal_detail(response), response)
+
+    def _parse_deal_detail(self, response):
         dealid = response.meta.get('dealid', '')
-        item = response.meta.get('item', {})
         
         if not dealid:
             self.logger.warning(f"No dealid found in detail page response: {response.url}")
             return
         
+        already_emitted = self.detail_context.pop(dealid)
+        if response.status == 304:
+            self.logger.debug(f"♻️ Detail page not modified since last run: {response.url}")
+            self._inc_stat('conditional/skipped/parse_deal_detail')
+            return
+        
         self.logger.info(f"🔍 Parsing detail page for deal {dealid}: {response.url}")
+        self._inc_stat('detail_context/hits' if already_emitted else 'detail_context/misses')
+        yield from self.extract_detail_related_deals(response, dealid, already_emitted)
+
+    def parse_related_detail(self, response):
+        """Parse a related deal's detail page: its one deal plus its related deals.
         
-        # Extract related deals from detail page (more likely to have them)
-        # COMPREHENSIVE extraction for DealNews detail pages
-        self.logger.info(f"🔍 Extracting related deals from detail page: {response.url}")
-        
-        # Strategy 1: Look for all .html links on the page (DealNews detail pages)
-        all_html_links = response.css('a[href*=".html"]::attr(href)').getall()
-        self.logger.debug(f"Found {len(all_html_links)} total .html links on page")
-        
-        # Strategy 2: Look in specific related/similar sections
-        related_selectors = [
-            # DealNews specific related sections (highest priority)
-            'section[class*="related"] a[href*=".html"]::attr(href)',
-            'section[class*="similar"] a[href*=".html"]::attr(href)',
-            'section[class*="recommended"] a[href*=".html"]::attr(href)',
-            'section[class*="more"] a[href*=".html"]::attr(href)',
-            '.related-deals a[href*=".html"]::attr(href)',
-            '.related-items a[href*=".html"]::attr(href)',
-            '.similar-deals a[href*=".html"]::attr(href)',
-            '.recommended-deals a[href*=".html"]::attr(href)',
-            '.you-may-also-like a[href*=".html"]::attr(href)',
-            # Generic related sections
-            '[class*="related"] a[href*=".html"]::attr(href)',
-            '[class*="similar"] a[href*=".html"]::attr(href)',
-            '[class*="recommended"] a[href*=".html"]::attr(href)',
-            # Sidebar and recommendations
-            'aside a[href*=".html"]::attr(href)',
-            '.sidebar a[href*=".html"]::attr(href)',
-            'nav[class*="related"] a[href*=".html"]::attr(href)',
-            # DealNews specific containers
-            '.deal-list a[href*=".html"]::attr(href)',
-            '.deal-items a[href*=".html"]::attr(href)',
-            '.deals-grid a[href*=".html"]::attr(href)',
-            '.deals-list a[href*=".html"]::attr(href)',
-            # Main content area (but exclude navigation/footer)
-            'main article a[href*=".html"]::attr(href)',
-            'main section a[href*=".html"]::attr(href)',
-            'article[class*="deal"] a[href*=".html"]::attr(href)',
-            # Generic patterns
-            'article a[href*=".html"]::attr(href)',
-            '.deal-item a[href*=".html"]::attr(href)',
-        ]
+        Detail pages hold a single deal, so this skips the listing-page candidate
+        strategies, category/store discovery and pagination that parse() runs.
+        """
+        return self._cpu_timed('parse_related_detail', self._parse_related_detail(response), response)
+
+    def _parse_related_detail(self, response):
+        if response.status in (400, 403, 404):
+            self.logger.warning(f"{response.status} error for related deal URL: {response.url}")
+            return
+        if response.status == 304:
+            self.logger.debug(f"♻️ Related deal page not modified since last run: {response.url}")
+            self._inc_stat('conditional/skipped/parse_related_detail')
+            return
+        if self.deals_extracted >= self.max_deals:
+            return
         
-        related_links = []
-        seen_selectors = set()
-        for selector in related_selectors:
-            if selector in seen_selectors:
-                continue
-            seen_selectors.add(selector)
-            links = response.css(selector).getall()
-            if links:
-                related_links.extend(links)
-                self.logger.info(f"✅ Found {len(links)} related deals using selector: {selector[:60]}...")
-        
-        # Strategy 3: If no specific sections found, use all .html links but filter intelligently
-        if not related_links and all_html_links:
-            # Filter: exclude current page, navigation, footer, and non-deal pages
-            current_url_path = response.url.split('/')[-1]  # e.g., "21791913.html"
-            for link in all_html_links:
-                # Make absolute
-                if not link.startswith('http'):
-                    link = response.urljoin(link)
-                # Skip current deal
-                if link == response.url or current_url_path in link:
-                    continue
-                # Only include if it looks like a deal detail page (has deal ID pattern)
-                # DealNews detail pages have format: /Title/21791913.html
-                if '.html' in link and 'dealnews.com' in link:
-                    # Check if it has a numeric ID in the URL (deal ID pattern)
-                    import re
-                    if re.search(r'/\d+\.html', link):
-                        related_links.append(link)
-            
-            if related_links:
-                self.logger.info(f"✅ Found {len(related_links)} related deals from all .html links (filtered)")
+        structured = StructuredDataCache(response, inc_stat=self._inc_stat)
+        deal = find_detail_container(response)
+        item = self.extract_deal_item(deal, response, structured) if deal is not None else None
+        if not item:
+            self.logger.debug(f"⚠️  No deal found on related detail page: {response.url}")
+            return
         
-        # Strategy 4: Fallback to /deals/ pattern
-        if not related_links:
-            sidebar_deals = response.css('aside a[href*="/deals/"]::attr(href), .sidebar a[href*="/deals/"]::attr(href)').getall()
-            if sidebar_deals:
-                related_links.extend(sidebar_deals[:10])  # Increased limit
-                self.logger.info(f"✅ Found {len(sidebar_deals)} deals in sidebar")
+        self.queued_urls.add(item.get('url'))
+        self.deals_extracted += 1
+        yield item
+        yield from self.extract_deal_images(deal, item)
+        yield from self.extract_deal_categories(deal, item, response, structured)
+        yield from self.extract_detail_related_deals(response, item['dealid'])
+
+    def extract_detail_related_deals(self, response, dealid, already_emitted=frozenset()):
+        """Related deal items for a detail page, plus requests to follow new ones.
+        
+        already_emitted holds fingerprints of related URLs the listing page yielded
+        for this deal; those are not yielded again (but are still followed).
+        """
+        # COMPREHENSIVE extraction for DealNews detail pages (queries compiled in detail_page.py)
+        related_links, source = collect_related_links(response)
         
         if not related_links:
             self.logger.warning(f"⚠️  No related deals found on detail page: {response.url}")
         else:
-            self.logger.info(f"📊 Total related deals found: {len(related_links)}")
+            self.logger.info(f"📊 Total related deals found: {len(related_links)} (from {source})")
         
         # Yield related deal items - COMPREHENSIVE filtering
         seen_links = set()
@@ -1696,8 +1442,7 @@ class DealnewsSpider(scrapy.Spider):
             # Check if it's a DealNews detail page (.html with deal ID pattern)
             if '.html' in link and 'dealnews.com' in link:
                 # DealNews detail pages have format: /Title/21791913.html
-                import re
-                if re.search(r'/\d+\.html', link):  # Has numeric ID before .html
+                if DETAIL_PATH_RE.search(link):  # Has numeric ID before .html
                     is_dealnews_deal = True
                 elif '/deals/' not in link.split('.html')[0]:  # Not a /deals/ listing page
                     # Might still be a detail page, include it
@@ -1709,34 +1454,74 @@ class DealnewsSpider(scrapy.Spider):
                     is_dealnews_deal = True
             
             if is_dealnews_deal:
-                related_item = RelatedDealItem()
-                related_item['dealid'] = dealid
-                related_item['relatedurl'] = link
-                yield related_item
-                related_count += 1
-                self.logger.debug(f"✅ Yielding related deal #{related_count} for {dealid}: {link[:80]}...")
+                if already_emitted and fingerprint(link) in already_emitted:
+                    self._inc_stat('detail_context/related_skipped')
+                else:
+                    related_item = RelatedDealItem()
+                    related_item['dealid'] = dealid
+                    related_item['relatedurl'] = link
+                    yield related_item
+                    related_count += 1
+                    self.logger.debug(f"✅ Yielding related deal #{related_count} for {dealid}: {link[:80]}...")
                 
-                # RECURSION: Follow related deal if not already scanned
-                # CRITICAL FIX: Use parse callback (not parse_deal_detail) to actually extract the deal content
-                if link not in self.scanned_urls:
+                # RECURSION: Follow related deal if not already scanned. Detail pages go to the
+                # lightweight detail parser; /deals/ listing pages still need the full parse().
+                # Follow-ups count against max_detail_pages like parse()'s detail requests,
+                # so related pages cannot keep fanning out on their own.
+                if self.is_seen(link):
+                    pass
+                elif self.detail_pages_visited >= self.max_detail_pages:
+                    self.logger.debug(f"⚠️  Reached max detail pages limit ({self.max_detail_pages}); not following {link}")
+                    self._inc_stat('related/follow_capped')
+                else:
                     self.logger.info(f"🔄 Recursing into related deal: {link}")
-                    self.scanned_urls.add(link)  # Mark as scanned to avoid re-crawling
+                    self.queued_urls.add(link)  # Queued once per run; stored deals reach scanned_urls via the pipeline
                     yield scrapy.Request(
                         url=link,
-                        callback=self.parse,  # Changed from parse_deal_detail to parse
+                        callback=self.parse_related_detail if DETAIL_PATH_RE.search(link) else self.parse,
                         errback=self.errback_http,
                         dont_filter=False
                     )
+                    self.detail_pages_visited += 1
         
         if related_count > 0:
             self.logger.info(f"✅ Successfully extracted {related_count} related deals for deal {dealid} from {response.url}")
         else:
             self.logger.warning(f"⚠️  No valid related deals extracted for {dealid} from {response.url}")
 
-    def handle_pagination(self, response):
+    def handle_not_modified_listing(self, response):
+        """304 for a listing page: its deals were stored on an earlier run, skip extraction.
+        
+        The detail pages the page queued last time (kept with its validators) are
+        queued again, since they can have new related deals. Incremental crawls end
+        the category here like any page without new deals; full crawls keep
+        paginating, treating the page as a full one.
+        """
+        self.logger.debug(f"♻️ Listing page not modified since last run: {response.url}")
+        self._inc_stat('conditional/skipped/parse')
+        for dealid, url in response.meta.get('revalidated_details', ()):
+            if self.detail_pages_visited >= self.max_detail_pages:
+                self.logger.debug(f"⚠️  Reached max detail pages limit ({self.max_detail_pages})")
+                break
+            yield scrapy.Request(
+                url=url,
+                callback=self.parse_deal_detail,
+                meta={'dealid': dealid},
+                errback=self.errback_http,
+                dont_filter=True
+            )
+            self.detail_pages_visited += 1
+            self._inc_stat('conditional/details_requeued')
+        if self.listing_state is not None:
+            self._inc_stat('incremental/streams_stopped')
+            self.pagination.on_end(response.url)
+            return
+        yield from self.handle_pagination(response, max(1, self.pagination.stream(response.url).fullest))
+
+    def handle_pagination(self, response, deal_count=1):
         """Handle pagination and infinite scroll for DealNews - OPTIMIZED for 100k+ deals"""
-        # Stop paginating on non-200 responses
-        if response.status != 200:
+        # Stop paginating on error responses (304 is an unchanged page, see handle_not_modified_listing)
+        if response.status not in (200, 304):
             self.logger.info(f"Skipping pagination due to status {response.status} for {response.url}")
             return
         if self.deals_extracted >= self.max_deals:
@@ -1744,28 +1529,20 @@ class DealnewsSpider(scrapy.Spider):
         
         self.logger.info(f"Handling pagination for: {response.url}")
         
-        # Extract current start parameter
-        current_start = 0
-        if 'start=' in response.url:
-            match = re.search(r'start=(\d+)', response.url)
-            if match:
-                current_start = int(match.group(1))
-        
-        # Generate ONLY the immediate next page to avoid flooding requests
-        next_start = current_start + 20
-        if next_start > current_start:
-            # Build next page URL
-            if '?' in response.url:
-                if 'start=' in response.url:
-                    next_url = re.sub(r'start=\d+', f'start={next_start}', response.url)
-                else:
-                    next_url = f"{response.url}&start={next_start}"
-            else:
-                next_url = f"{response.url}?start={next_start}"
-            
-            if self.is_valid_dealnews_url(next_url):
-                yield response.follow(next_url, self.parse, errback=self.errback_http, dont_filter=False)
-                return  # Do not expand further via HTML links in the same response
+        # Keep a window of upcoming offsets in flight for this category (see pagination.py);
+        # the planner grows it while pages come back full and stops at the end of the stream
+        next_url = with_offset(response.url, offset_of(response.url) + self.pagination.page_size)
+        if self.is_valid_dealnews_url(next_url):
+            planned = self.pagination.on_page(response.url, deal_count)
+            for url in planned:
+                yield response.follow(url, self.parse, errback=self.errback_http, dont_filter=False,
+                                      meta={'pagination': True})
+            if planned:
+                self._inc_stat('pagination/issued', len(planned))
+                self.logger.info(f"📑 Queued {len(planned)} page(s) ahead of {response.url}")
+            return  # Do not expand further via HTML links in the same response
+        
+        pagination_found = 0
         
         # Also look for pagination links in HTML
         pagination_patterns = [
@@ -1783,6 +1560,7 @@ class DealnewsSpider(scrapy.Spider):
             for link in links[:50]:  # Limit to avoid too many requests
                 if link and 'start=' in link and self.is_valid_dealnews_url(link):
                     yield response.follow(link, self.parse, errback=self.errback_http, dont_filter=False)
+                    pagination_found += 1
         
         # Look for "Load More" or "Show More" buttons - avoid generic selectors
         load_more_selectors = [
@@ -1829,58 +1607,14 @@ class DealnewsSpider(scrapy.Spider):
         # Extract offer type from deal text
         deal_text = (item.get('deal', '') + ' ' + item.get('dealplus', '') + ' ' + item.get('detail', '')).lower()
         
-        # Offer type extraction
-        if any(word in deal_text for word in ['free shipping', 'free delivery']):
-            item['offer_type'] = 'Free Shipping'
-        elif any(word in deal_text for word in ['coupon', 'discount code', 'promo code']):
-            item['offer_type'] = 'Coupon'
-        elif any(word in deal_text for word in ['rebate', 'cashback', 'cash back']):
-            item['offer_type'] = 'Rebate'
-        elif any(word in deal_text for word in ['clearance', 'sale', 'off']):
-            item['offer_type'] = 'Sale'
-        else:
-            item['offer_type'] = ''
-        
-        # Condition extraction
-        if any(word in deal_text for word in ['new', 'brand new']):
-            item['condition'] = 'New'
-        elif any(word in deal_text for word in ['used', 'pre-owned', 'second hand']):
-            item['condition'] = 'Used'
-        elif any(word in deal_text for word in ['refurbished', 'refurb']):
-            item['condition'] = 'Refurbished'
-        else:
-            item['condition'] = 'New'  # Default to new
-        
-        # Events extraction
-        if any(word in deal_text for word in ['black friday', 'cyber monday', 'prime day']):
-            item['events'] = 'Black Friday'
-        elif any(word in deal_text for word in ['christmas', 'holiday', 'xmas']):
-            item['events'] = 'Holiday'
-        elif any(word in deal_text for word in ['back to school', 'school']):
-            item['events'] = 'Back to School'
-        else:
-            item['events'] = ''
-        
-        # Offer status extraction
-        if any(word in deal_text for word in ['limited time', 'expires', 'ending soon']):
-            item['offer_status'] = 'Limited'
-        elif any(word in deal_text for word in ['expired', 'ended', 'no longer available']):
-            item['offer_status'] = 'Expired'
-        else:
-            item['offer_status'] = 'Active'  # Default to active
+        # Offer type, condition, events and offer status in one scan of the text
+        item.update(self.classifier.classify(deal_text))
         
         # Include expired (default to No)
         item['include_expired'] = 'No'
         
         # Brand extraction from title
-        title = item.get('title', '').lower()
-        brands = ['apple', 'samsung', 'nike', 'adidas', 'sony', 'microsoft', 'google', 'amazon', 'walmart', 'target', 'best buy']
-        for brand in brands:
-            if brand in title:
-                item['brand'] = brand.title()
-                break
-        else:
-            item['brand'] = ''
+        item['brand'] = self.classifier.brand(item.get('title', ''))
         
         # Collection extraction from URL
         item['collection'] = self.extract_collection_from_url(response.url)
@@ -1994,6 +1728,7 @@ class DealnewsSpider(scrapy.Spider):
                             url=normalized,
                             callback=self.parse,
                             errback=self.errback_http,
+                            meta={'dont_revalidate': True},  # discovery needs the full page
                             dont_filter=False
                         )
                         discovered_count += 1
@@ -2070,6 +1805,7 @@ class DealnewsSpider(scrapy.Spider):
                             url=normalized,
                             callback=self.parse,
                             errback=self.errback_http,
+                            meta={'dont_revalidate': True},  # discovery needs the full page
                             dont_filter=False
                         )
                         discovered_count += 1
@@ -2092,3 +1828,55 @@ class DealnewsSpider(scrapy.Spider):
         self.logger.info(f"Spider closed. Reason: {reason}")
         self.logger.info(f"Final stats: {self.deals_extracted} deals extracted in {elapsed_time:.1f} seconds")
         self.logger.info(f"Average rate: {rate:.1f} deals per second")
+        
+        # Selectors that never won, per field (see plan/* stats for the full picture)
+        if self.deals_extracted:
+            for field, rows in self.plan.report().items():
+                dead = [css for css, wins in rows if not wins and css != 'none']
+                if dead:
+                    self.logger.info(f"🧹 Extraction plan '{field}': {len(dead)}/{len(rows) - 1} selectors never matched")
+        
+        # Per-response parse CPU time of the listing and detail-page paths
+        crawler = getattr(self, 'crawler', None)
+        if crawler is not None and crawler.stats is not None:
+            for callback in ('parse', 'parse_sitemap', 'parse_json_ld_deals', 'parse_deal_detail', 'parse_related_detail'):
+                responses = crawler.stats.get_value(f'cpu/{callback}/responses', 0)
+                if responses:
+                    seconds = crawler.stats.get_value(f'cpu/{callback}/seconds', 0.0)
+                    crawler.stats.set_value(f'cpu/{callback}/ms_per_response', round(seconds * 1000 / responses, 3))
+                    self.logger.info(f"⏱️ {callback}: {seconds * 1000 / responses:.2f} ms CPU per response over {responses:,} responses")
+            
+            # Peak RSS of the crawl (ru_maxrss is KB on Linux, bytes on macOS) and the detail side-cache
+            try:
+                import resource
+                peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                if sys.platform == 'darwin':
+                    peak_rss /= 1024
+                crawler.stats.set_value('memory/peak_rss_mb', round(peak_rss / 1024, 1))
+                self.logger.info(f"🧠 Peak RSS: {peak_rss / 1024:.1f} MB")
+            except ImportError:
+                pass  # resource is not available on Windows
+            crawler.stats.set_value('detail_context/entries', len(self.detail_context))
+            crawler.stats.set_value('detail_context/evictions', self.detail_context.evictions)
+            crawler.stats.set_value('pagination/streams', len(self.pagination.streams))
+            crawler.stats.set_value('pagination/streams_ended', self.pagination.ended)
+            if self.listing_state is not None:
+                for category, new_deals in self.listing_state.new_by_category.items():
+                    crawler.stats.set_value(f'incremental/new_deals/{category}', new_deals)
+                busiest = sorted(self.listing_state.new_by_category.items(), key=lambda row: -row[1])[:10]
+                self.logger.info(f"🔁 New deals since last run: {self.deals_extracted:,} across "
+                                 f"{len(self.listing_state.new_by_category):,} categories; top: {busiest}")
+        
+        # Persist the listing digests for the next incremental run
+        if self.listing_state is not None:
+            try:
+                self.listing_state.close()
+            except Exception as e:
+                self.logger.error(f"⚠️ Failed to save listing state: {e}")
+        
+        # Persist the seen-URL store for the next run
+        try:
+            self.scanned_urls.close()
+            self.logger.info(f"💾 Saved seen-URL store ({len(self.scanned_urls):,} URLs)")
+        except Exception as e:
+            self.logger.error(f"⚠️ Failed to save seen-URL store: {e}")
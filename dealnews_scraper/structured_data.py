@@ -0,0 +1,74 @@
+"""
+Per-response cache of decoded JSON-LD blocks.
+
+Listing pages carry one application/ld+json script per offer plus a few
+page-level blocks. Strategy 5, parse_json_ld_deals() and the store / category /
+click-link lookups in extract_deal_item() used to json.loads() the same scripts
+again and again. StructuredDataCache decodes each script node once, on first
+access, and hands out the same object afterwards, so callers must treat the
+decoded data as read-only.
+"""
+import json
+from parsel import Selector
+
+JSON_LD_XPATH = 'descendant-or-self::script[@type="application/ld+json"]'
+
+
+class StructuredDataCache:
+    """Lazily decoded JSON-LD for one response, keyed by script node"""
+
+    def __init__(self, response, inc_stat=None):
+        self.response = response
+        self.inc_stat = inc_stat
+        # lxml element -> decoded data (None if it failed to decode). Holding the
+        # element keeps its proxy alive, so lxml hands back the same key next time.
+        self.by_node = {}
+        self.page_nodes = None
+        self.decodes = 0
+        self.decodes_saved = 0
+
+    def decode(self, node):
+        """Decoded JSON for one script element (None if empty or invalid)"""
+        if node in self.by_node:
+            self.decodes_saved += 1
+            if self.inc_stat:
+                self.inc_stat('jsonld/decodes_saved')
+            return self.by_node[node]
+        data = None
+        if node.text:
+            self.decodes += 1
+            if self.inc_stat:
+                self.inc_stat('jsonld/decodes')
+            try:
+                data = json.loads(node.text)
+            except (ValueError, TypeError):
+                data = None
+        self.by_node[node] = data
+        return data
+
+    def page_blocks(self):
+        """All successfully decoded JSON-LD blocks on the page, in document order"""
+        if self.page_nodes is None:
+            self.page_nodes = self.response.selector.root.xpath('//script[@type="application/ld+json"]')
+        blocks = []
+        for node in self.page_nodes:
+            data = self.decode(node)
+            if data is not None:
+                blocks.append(data)
+        return blocks
+
+    def first_in(self, deal):
+        """Decoded JSON of the first non-empty JSON-LD script in a deal container.
+
+        Same lookup as deal.css('script[type="application/ld+json"]::text').get()
+        followed by json.loads(). deal may be a Selector or a SelectorList.
+        """
+        selectors = [deal] if isinstance(deal, Selector) else deal
+        for selector in selectors:
+            root = selector.root
+            if not hasattr(root, 'xpath'):
+                continue
+            for node in root.xpath(JSON_LD_XPATH):
+                if node.text:
+                    return self.decode(node)
+        return None
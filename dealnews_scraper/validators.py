@@ -0,0 +1,94 @@
+"""
+HTTP validator store for conditional re-crawls.
+
+ConditionalRequestMiddleware revalidates pages fetched on an earlier run with
+If-None-Match / If-Modified-Since, so an unchanged page comes back as an empty
+304 instead of its full HTML over the proxy. ValidatorStore keeps the ETag and
+Last-Modified of every 200 response in a SQLite file, keyed by the 64-bit URL
+fingerprint, together with the response size, which is what a 304 saves, and
+the detail pages a listing page queued, so a 304 listing can queue them again.
+The middleware only stores a page's validators once the items extracted from
+it have been committed to MySQL.
+"""
+import os
+import json
+import time
+import sqlite3
+from dealnews_scraper.fingerprints import url_fingerprint
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS validators (
+    fingerprint INTEGER PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    details TEXT
+)
+"""
+
+
+def signed(fp):
+    """SQLite integers are signed 64-bit; map an unsigned fingerprint onto them"""
+    return fp - (1 << 64) if fp >= (1 << 63) else fp
+
+
+class ValidatorStore:
+    """url -> (ETag, Last-Modified, response size, detail pages) of the last 200 response"""
+
+    COMMIT_EVERY = 500
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(SCHEMA)
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(validators)')]
+        if 'details' not in columns:
+            self.conn.execute('ALTER TABLE validators ADD COLUMN details TEXT')  # stores from earlier versions
+        self.pending = 0
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM validators').fetchone()[0]
+
+    def get(self, url):
+        """(etag, last_modified, size, details) for url, or None.
+        
+        details is a list of (dealid, url) detail pages the page queued.
+        """
+        row = self.conn.execute(
+            'SELECT etag, last_modified, size, details FROM validators WHERE fingerprint = ?',
+            (signed(url_fingerprint(url)),),
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, size, details = row
+        return etag, last_modified, size, [tuple(d) for d in json.loads(details)] if details else []
+
+    def put(self, url, etag, last_modified, size, details=()):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO validators (fingerprint, etag, last_modified, size, stored_at, details) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (signed(url_fingerprint(url)), etag, last_modified, size, time.time(),
+             json.dumps([list(d) for d in details]) if details else None),
+        )
+        self.pending += 1
+        if self.pending >= self.COMMIT_EVERY:
+            self.commit()
+
+    def discard(self, url):
+        self.conn.execute('DELETE FROM validators WHERE fingerprint = ?', (signed(url_fingerprint(url)),))
+        self.pending += 1
+
+    def commit(self):
+        if self.pending:
+            self.conn.commit()
+            self.pending = 0
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.commit()
+        self.conn.close()
+        self.conn = None
@@ -10,9 +10,9 @@ CRON_ERROR_LOG="$SCRIPT_DIR/logs/cron_error.log"
 mkdir -p "$SCRIPT_DIR/logs"
 
 # Create the cron job command
-# Run daily at 2 AM
+# Run daily at 2 AM, incrementally (each category stops at its first page with no new deals)
 CRON_SCHEDULE="0 2 * * *"
-CRON_COMMAND="cd $SCRIPT_DIR && /usr/bin/python3 $SCRIPT_DIR/run_scraper.py >> $CRON_LOG 2>> $CRON_ERROR_LOG"
+CRON_COMMAND="cd $SCRIPT_DIR && INCREMENTAL_CRAWL=true /usr/bin/python3 $SCRIPT_DIR/run_scraper.py >> $CRON_LOG 2>> $CRON_ERROR_LOG"
 
 # Check if cron job already exists
 if crontab -l 2>/dev/null | grep -q "run_scraper.py"; then
@@ -25,7 +25,7 @@ fi
 
 echo "✅ Cron job setup complete!"
 echo ""
-echo "Schedule: Daily at 2:00 AM"
+echo "Schedule: Daily at 2:00 AM (INCREMENTAL_CRAWL=true)"
 echo "Log file: $CRON_LOG"
 echo "Error log: $CRON_ERROR_LOG"
 echo ""
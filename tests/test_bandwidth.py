@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Unit tests for bandwidth accounting and byte budgets
+"""
+import unittest
+import scrapy
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+from dealnews_scraper.items import DealnewsItem, RelatedDealItem
+from dealnews_scraper.middlewares import BandwidthMiddleware
+from dealnews_scraper.spiders.dealnews_spider import DealnewsSpider
+
+URL = 'https://www.dealnews.com/Some-Deal/123.html'
+MB = 1048576
+
+
+class TestBandwidthMiddleware(unittest.TestCase):
+    """Test byte accounting, yields, budgets and the close report"""
+
+    def setUp(self):
+        self.crawler = get_crawler(DealnewsSpider, {'BANDWIDTH_BUDGETS': '{"parse_related_detail": 1}'})
+        self.spider = self.crawler._create_spider()
+        self.crawler.stats.open_spider(self.spider)
+        self.middleware = BandwidthMiddleware.from_crawler(self.crawler)
+
+    def download(self, callback, body_size, items=(), proxy=None, status=200, wire_size=None):
+        request = scrapy.Request(URL, callback=callback, meta={'proxy': proxy} if proxy else {})
+        wire = HtmlResponse(URL, status=status, body=b'x' * (wire_size or body_size), request=request)
+        self.middleware.response_downloaded(wire, request, self.spider)
+        response = HtmlResponse(URL, status=status, body=b'x' * body_size, request=request)
+        self.middleware.process_response(request, response, self.spider)
+        for item in items:
+            self.middleware.item_scraped(item, response, self.spider)
+        return request
+
+    def test_groups_and_deals_per_mb(self):
+        self.download(self.spider.parse_deal_detail, MB, [DealnewsItem(), DealnewsItem()],
+                      proxy='http://user:pw@10.0.0.1:8000', wire_size=MB // 4)
+        self.download(self.spider.parse, MB // 2, [DealnewsItem(), RelatedDealItem()], status=404)
+        report = self.middleware.report()
+        self.assertEqual((report['responses'], report['body_bytes'], report['deals']), (2, MB + MB // 2, 3))
+        self.assertAlmostEqual(report['deals_per_mb'], 3 / 0.75, places=1)
+        self.assertEqual(report['callback']['parse_deal_detail']['items'], 2)
+        self.assertEqual(set(report['proxy']), {'10.0.0.1:8000', 'direct'})
+        self.assertEqual(report['status']['404']['responses'], 1)
+        self.middleware.spider_closed(self.spider)
+        self.assertEqual(self.crawler.stats.get_value('bandwidth/deals_per_mb'), report['deals_per_mb'])
+
+    def test_budget_deprioritizes_low_yield_callback_once(self):
+        request = scrapy.Request(URL, callback=self.spider.parse_related_detail)
+        self.assertIsNone(self.middleware.process_request(request, self.spider))
+        self.download(self.spider.parse_related_detail, 2 * MB, [RelatedDealItem()])
+        retry = self.middleware.process_request(request, self.spider)
+        self.assertEqual((retry.priority, retry.dont_filter), (-100, True))
+        self.assertIsNone(self.middleware.process_request(retry, self.spider))
+        # Other callbacks have no budget
+        self.assertIsNone(self.middleware.process_request(scrapy.Request(URL, callback=self.spider.parse), self.spider))
+
+    def test_budget_is_ignored_while_yield_is_high(self):
+        self.download(self.spider.parse_related_detail, 2 * MB, [RelatedDealItem()] * 20)
+        request = scrapy.Request(URL, callback=self.spider.parse_related_detail)
+        self.assertIsNone(self.middleware.process_request(request, self.spider))
+
+    def test_stop_action(self):
+        middleware = BandwidthMiddleware(budgets={'parse_related_detail': 1}, action='stop')
+        self.middleware = middleware
+        self.download(self.spider.parse_related_detail, 2 * MB)
+        with self.assertRaises(IgnoreRequest):
+            middleware.process_request(scrapy.Request(URL, callback=self.spider.parse_related_detail), self.spider)
+        with self.assertRaises(NotConfigured):
+            BandwidthMiddleware(action='throttle')
+
+
+if __name__ == '__main__':
+    unittest.main()
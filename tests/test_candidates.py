@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Unit tests for single-pass deal candidate discovery
+"""
+import unittest
+from scrapy.http import HtmlResponse
+from benchmarks.bench_candidates import legacy_candidates, candidate_roots
+from benchmarks.fixtures import synthetic_pages, make_response
+from dealnews_scraper.candidates import find_deal_candidates
+from dealnews_scraper.structured_data import StructuredDataCache
+
+
+class TestCandidates(unittest.TestCase):
+    """Test that the single pass finds the same containers as the six strategies"""
+
+    def test_matches_legacy_strategies(self):
+        """Same containers, same order as the old per-strategy queries, except
+        Strategy 4 matches that only came from markup (classes, URLs)"""
+        for url, html in synthetic_pages(count=6, deals=15):
+            response = make_response(url, html)
+            expected = candidate_roots(legacy_candidates(response))
+            found = candidate_roots(find_deal_candidates(response, StructuredDataCache(response)))
+            self.assertEqual(found, [node for node in expected if node in found], url)
+            for node in expected:
+                if node not in found:
+                    self.assertRegex(node.get('class') or '', 'product|offer|listing')
+
+    def test_product_text_predicate(self):
+        """Strategy 4 looks at text only, and only at the outermost container"""
+        html = """<html><body>
+            <div class="offer-list"><a href="https://www.dealnews.com/x">Coupons</a></div>
+            <div class="product-grid"><div class="product">Save $10 today</div><div class="product">$5</div></div>
+        </body></html>"""
+        response = HtmlResponse(url="https://www.dealnews.com/", body=html.encode(), encoding='utf-8')
+        stats = {}
+        candidates = find_deal_candidates(response, stats=stats)
+        self.assertEqual([c.attrib.get('class') for c in candidates], ['product-grid'])
+        self.assertEqual(stats['product_checks'], 2)
+        self.assertEqual(stats['products_covered'], 2)
+
+    def test_link_without_container_uses_parent(self):
+        """Links outside deal containers fall back to their parent element"""
+        html = '<html><body><p id="wrap"><a href="https://www.dealnews.com/lw/click.html?1">Shop</a></p></body></html>'
+        response = HtmlResponse(url="https://www.dealnews.com/", body=html.encode(), encoding='utf-8')
+        stats = {}
+        candidates = find_deal_candidates(response, stats=stats)
+        self.assertEqual([c.attrib.get('id') for c in candidates], ['wrap'])
+        self.assertEqual(stats['click_links'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the filter-variable classifier
+"""
+import os
+import tempfile
+import unittest
+from dealnews_scraper.classifier import DealClassifier, load_brands, first_match, DEAL_TEXT_PATTERNS
+
+
+class TestDealClassifier(unittest.TestCase):
+    """Test keyword priorities, overlapping keywords and brand lookup"""
+
+    def setUp(self):
+        self.classifier = DealClassifier(brands=['Apple', 'Samsung', 'Best Buy', 'HP', "Levi's", 'The North Face'])
+
+    def test_priority_and_defaults(self):
+        """Earlier labels win, fields without a keyword get their default"""
+        labels = self.classifier.classify('20% off w/ coupon, free shipping')
+        self.assertEqual(labels['offer_type'], 'Free Shipping')
+        self.assertEqual(labels['condition'], 'New')
+        self.assertEqual(labels['events'], '')
+        self.assertEqual(labels['offer_status'], 'Active')
+        self.assertEqual(self.classifier.classify('refurbished, expired')['condition'], 'Refurbished')
+        self.assertEqual(self.classifier.classify('refurbished, expired')['offer_status'], 'Expired')
+
+    def test_substring_semantics(self):
+        """Keywords still match inside words, as the any(word in text) checks did"""
+        labels = self.classifier.classify('office chair, renewed')
+        self.assertEqual(labels['offer_type'], 'Sale')
+        self.assertEqual(labels['condition'], 'New')
+
+    def test_overlapping_keywords(self):
+        """A keyword starting inside another match is still found"""
+        self.assertIn('back to school', self.classifier.keywords_in('5% cash back to school shoppers'))
+        self.assertEqual(self.classifier.classify('5% cash back to school shoppers')['events'], 'Back to School')
+        self.assertEqual(self.classifier.keywords_in('brand new'), {'brand new', 'new'})
+
+    def test_brand_whole_words_and_order(self):
+        """Brands match whole words only; the earliest-listed brand wins"""
+        self.assertEqual(self.classifier.brand('Samsung Galaxy at Best Buy'), 'Samsung')
+        self.assertEqual(self.classifier.brand("LEVI'S 501 Jeans"), "Levi's")
+        self.assertEqual(self.classifier.brand('The North Face Jacket'), 'The North Face')
+        self.assertEqual(self.classifier.brand('Free shipping on pineapple slicers'), '')
+
+    def test_load_brands(self):
+        """Comments, blank lines and duplicates are skipped; extra files append"""
+        with tempfile.TemporaryDirectory() as directory:
+            first = os.path.join(directory, 'brands.txt')
+            extra = os.path.join(directory, 'extra.txt')
+            with open(first, 'w') as f:
+                f.write('# header\nApple\n\nSamsung\n')
+            with open(extra, 'w') as f:
+                f.write('apple\nAcme Tools\n')
+            self.assertEqual(load_brands(first, extra, os.path.join(directory, 'missing.txt')),
+                             ['Apple', 'Samsung', 'Acme Tools'])
+
+    def test_bundled_brand_dictionary(self):
+        """The bundled list loads and keeps the original brands first"""
+        classifier = DealClassifier()
+        self.assertGreater(len(classifier.brands), 1000)
+        self.assertEqual(classifier.brand('Apple Watch at Target'), 'Apple')
+        self.assertEqual(classifier.brand('Lodge Cast Iron 12" Skillet'), 'Lodge Cast Iron')
+        self.assertEqual(classifier.brand('Stanley 1913 Quencher 40-oz. Tumbler'), 'Stanley 1913')
+        for title in ('Shark Week Plush Toy', 'Ski Lodge Weekend Getaway', 'Mourning Dove Bird Feeder',
+                      '5,000-Count Box of Staples', 'Tide Clock Wall Decor', 'Family Crest Print',
+                      'Husky dog bed for large breeds', 'Bounty hunter metal detector',
+                      'Ninja warrior obstacle kit for kids', 'Stanley Cup hockey jersey',
+                      'Brooks and streams photo book', 'Star Trek 4K Blu-ray Collection',
+                      'Up to 40% off on running shoes'):
+            self.assertEqual(classifier.brand(title), '', title)
+
+    def test_deal_text_pattern_order(self):
+        """Patterns are tried in list order, not by position in the text"""
+        self.assertEqual(first_match(DEAL_TEXT_PATTERNS, 'Save 20% or up to 50% off'), 'up to 50% off')
+        self.assertEqual(first_match(DEAL_TEXT_PATTERNS, 'No discount'), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
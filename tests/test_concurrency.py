@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the adaptive (AIMD) concurrency controller
+"""
+import os
+import json
+import random
+import tempfile
+import unittest
+from types import SimpleNamespace
+import scrapy
+from scrapy.core.downloader import Slot
+from scrapy.exceptions import NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+from twisted.internet.task import Clock
+from dealnews_scraper.concurrency import AdaptiveConcurrency, Lane
+from dealnews_scraper.proxy_pool import ProxyPool
+from dealnews_scraper.spiders.dealnews_spider import DealnewsSpider
+
+URL = 'https://www.dealnews.com/c142/Electronics/'
+DOMAIN = 'www.dealnews.com'
+PROXY = 'http://10.0.0.1:8000'
+
+
+def feed(lane, count, status=200, latency=0.1, in_flight=None):
+    for _ in range(count):
+        lane.record(status, latency, lane.limit if in_flight is None else in_flight)
+
+
+class TestLane(unittest.TestCase):
+    """Test additive increase, multiplicative decrease and the hold cases"""
+
+    def setUp(self):
+        self.lane = Lane('domain', DOMAIN, start=8, minimum=2, maximum=10)
+
+    def decide(self):
+        decision = self.lane.decide(backoff=0.5, ban_burst=3, ban_rate=0.05, latency_factor=2.0)
+        self.lane.reset()
+        return decision[:2]
+
+    def test_grows_only_when_saturated(self):
+        feed(self.lane, 20, in_flight=3)
+        self.assertEqual(self.decide(), ('hold', 'not saturated'))
+        feed(self.lane, 20)
+        self.assertEqual(self.decide(), ('increase', 'healthy'))
+        self.assertEqual(self.lane.limit, 9)
+        feed(self.lane, 5)
+        self.assertEqual(self.decide(), ('hold', 'few responses'))
+
+    def test_ban_burst_halves_then_cools_down(self):
+        feed(self.lane, 40)
+        feed(self.lane, 1, status=429)
+        self.assertEqual(self.decide()[0], 'increase')  # one ban is not a burst
+        feed(self.lane, 20)
+        feed(self.lane, 3, status=403)
+        self.assertEqual(self.decide(), ('decrease', 'bans'))
+        self.assertEqual(self.lane.limit, 4)
+        feed(self.lane, 20)
+        self.assertEqual(self.decide(), ('hold', 'cooldown'))
+
+    def test_latency_over_baseline_backs_off(self):
+        feed(self.lane, 20, latency=0.1)
+        self.decide()
+        feed(self.lane, 20, latency=0.5)
+        self.assertEqual(self.decide(), ('decrease', 'latency'))
+        self.assertEqual(self.lane.limit, 6)
+        self.lane.limit = 2
+        feed(self.lane, 20, latency=2.0)
+        self.assertEqual(self.decide(), ('hold', 'latency (at minimum)'))
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    """Test applying limits to downloader slots and pool proxies, and the decision log"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, 'concurrency.jsonl')
+        self.clock = Clock()
+        self.slot = Slot(4, 0, False)
+        self.downloader = SimpleNamespace(slots={DOMAIN: self.slot}, total_concurrency=64)
+        self.spider = DealnewsSpider()
+        self.controller = AdaptiveConcurrency(self.output, interval=5, start=4, clock=self.clock)
+        self.controller.pool = ProxyPool([PROXY], clock=self.clock, rng=random.Random(1))
+        self.controller.attach(self.downloader, self.spider)
+
+    def tearDown(self):
+        self.controller.spider_closed(self.spider)
+        self.directory.cleanup()
+
+    def respond(self, count, status=200):
+        for _ in range(count):
+            request = scrapy.Request(URL, meta={'download_slot': DOMAIN, 'proxy_slot': PROXY,
+                                                'download_latency': 0.1})
+            self.slot.transferring = set(range(self.slot.concurrency))  # saturated
+            self.controller.pool.health[PROXY].in_flight = 8
+            self.controller.response_downloaded(HtmlResponse(URL, status=status), request, self.spider)
+
+    def test_disabled_by_default(self):
+        with self.assertRaises(NotConfigured):
+            AdaptiveConcurrency.from_crawler(get_crawler(DealnewsSpider))
+
+    def test_limits_follow_decisions(self):
+        self.assertEqual(self.downloader.total_concurrency, 4)
+        self.respond(20)
+        self.assertEqual((self.slot.concurrency, self.controller.pool.health[PROXY].limit), (4, 4))
+        self.clock.advance(5)
+        self.assertEqual((self.slot.concurrency, self.downloader.total_concurrency), (5, 5))
+        self.assertEqual(self.controller.pool.health[PROXY].limit, 5)
+        self.respond(10)
+        self.respond(10, status=429)
+        self.clock.advance(5)
+        self.assertEqual(self.slot.concurrency, 2)
+        with open(self.output) as f:
+            rows = [json.loads(line) for line in f]
+        decreases = [row for row in rows if row.get('action') == 'decrease']
+        self.assertEqual({(row['lane'], row['reason']) for row in decreases}, {('domain', 'bans'), ('proxy', 'bans')})
+        self.assertIn({'t': rows[-1]['t'], 'lane': 'total', 'limit_before': 5, 'limit': 2}, rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Unit tests for conditional re-crawls (validator store and middleware)
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+import scrapy
+from scrapy.http import HtmlResponse, Response
+from scrapy.utils.test import get_crawler
+from dealnews_scraper.middlewares import ConditionalRequestMiddleware
+from dealnews_scraper.validators import ValidatorStore
+from dealnews_scraper.spiders.dealnews_spider import DealnewsSpider
+
+URL = 'https://www.dealnews.com/c142/Electronics/?start=20'
+
+
+class TestValidatorStore(unittest.TestCase):
+    """Test persistence and fingerprint keys"""
+
+    def test_put_get_across_runs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'validators.sqlite')
+            store = ValidatorStore(path)
+            store.put(URL, '"abc"', None, 51200, [('deal_1', 'https://www.dealnews.com/Deal/1.html')])
+            store.close()
+            store = ValidatorStore(path)
+            self.assertEqual(store.get(URL), ('"abc"', None, 51200, [('deal_1', 'https://www.dealnews.com/Deal/1.html')]))
+            self.assertIsNone(store.get(URL + '0'))
+            store.discard(URL)
+            self.assertIsNone(store.get(URL))
+            store.close()
+
+    def test_store_without_details_column(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'validators.sqlite')
+            conn = sqlite3.connect(path)
+            conn.execute('CREATE TABLE validators (fingerprint INTEGER PRIMARY KEY, etag TEXT, '
+                         'last_modified TEXT, size INTEGER NOT NULL, stored_at REAL NOT NULL)')
+            conn.close()
+            store = ValidatorStore(path)
+            store.put(URL, '"abc"', None, 100)
+            self.assertEqual(store.get(URL), ('"abc"', None, 100, []))
+            store.close()
+
+
+class TestConditionalRequestMiddleware(unittest.TestCase):
+    """Test conditional headers, 304 accounting, commit barrier and opt-out"""
+
+    def setUp(self):
+        self.crawler = get_crawler(DealnewsSpider)
+        self.spider = self.crawler._create_spider()
+        self.stats = self.crawler.stats
+        self.stats.open_spider(self.spider)
+        self.middleware = ConditionalRequestMiddleware(ValidatorStore(), self.stats)
+
+    def fetch(self, status=200, headers=None, meta=None, body=b'<html>' + b'x' * 994):
+        request = scrapy.Request(URL, meta=meta or {})
+        self.middleware.process_request(request, self.spider)
+        response = Response(URL, status=status, headers=headers or {}, body=body if status == 200 else b'')
+        response = self.middleware.process_response(request, response, self.spider)
+        response.request = request
+        return request, response
+
+    def parse(self, response, outputs=()):
+        """Run the spider-middleware side over a callback's outputs"""
+        return list(self.middleware.process_spider_output(response, iter(outputs), self.spider))
+
+    def commit(self, batch_id=1, stored=True):
+        self.middleware.batch_flushing(batch_id=batch_id, spider=self.spider)
+        self.middleware.batch_committed(batch_id=batch_id, stored=stored, spider=self.spider)
+
+    def test_revalidates_with_stored_validators(self):
+        first, response = self.fetch(headers={'ETag': '"v1"', 'Last-Modified': 'Tue, 13 Oct 2026 10:00:00 GMT'})
+        self.assertNotIn('If-None-Match', first.headers)
+        self.parse(response)
+        self.commit()
+        second, response = self.fetch(status=304)
+        self.assertEqual(second.headers['If-None-Match'], b'"v1"')
+        self.assertEqual(second.headers['If-Modified-Since'], b'Tue, 13 Oct 2026 10:00:00 GMT')
+        self.assertEqual(response.status, 304)
+        self.assertEqual(self.stats.get_value('conditional/not_modified'), 1)
+        self.assertEqual(self.stats.get_value('conditional/bytes_saved'), 1000)
+        self.middleware.spider_closed(self.spider)
+        self.assertEqual(self.stats.get_value('conditional/not_modified_ratio'), 1.0)
+
+    def test_saved_only_after_batch_commit(self):
+        _, response = self.fetch(headers={'ETag': '"v1"'})
+        self.assertIsNone(self.middleware.store.get(URL))
+        self.parse(response)
+        self.middleware.batch_flushing(batch_id=1, spider=self.spider)
+        self.assertIsNone(self.middleware.store.get(URL))
+        self.middleware.batch_committed(batch_id=1, stored=True, spider=self.spider)
+        self.assertEqual(self.middleware.store.get(URL)[0], '"v1"')
+        self.assertEqual(self.stats.get_value('conditional/validators_saved'), 1)
+
+    def test_dropped_batch_discards_validators(self):
+        _, response = self.fetch(headers={'ETag': '"v1"'})
+        self.parse(response)
+        self.commit(stored=False)
+        self.assertIsNone(self.middleware.store.get(URL))
+        self.assertEqual(self.stats.get_value('conditional/validators_dropped'), 1)
+
+    def test_unparsed_page_not_saved(self):
+        """A page still being parsed when a batch is taken waits for the next one"""
+        self.fetch(headers={'ETag': '"v1"'})
+        self.commit()
+        self.assertIsNone(self.middleware.store.get(URL))
+
+    def test_detail_requests_kept_with_validators(self):
+        _, response = self.fetch(headers={'ETag': '"v1"'})
+        detail = scrapy.Request('https://www.dealnews.com/Deal/1.html', callback=self.spider.parse_deal_detail,
+                                meta={'dealid': 'deal_1'})
+        self.assertEqual(self.parse(response, [detail]), [detail])
+        self.commit()
+        request, _ = self.fetch(status=304)
+        self.assertEqual(request.meta['revalidated_details'], [('deal_1', 'https://www.dealnews.com/Deal/1.html')])
+
+    def test_dont_revalidate(self):
+        _, response = self.fetch(headers={'ETag': '"v1"'})
+        self.parse(response)
+        self.commit()
+        request, _ = self.fetch(meta={'dont_revalidate': True})
+        self.assertNotIn('If-None-Match', request.headers)
+
+
+class TestNotModifiedCallbacks(unittest.TestCase):
+    """Test that callbacks skip extraction on 304"""
+
+    def setUp(self):
+        self.spider = DealnewsSpider()
+
+    def not_modified(self, url, meta=None):
+        request = scrapy.Request(url, meta=meta or {})
+        return HtmlResponse(url=url, status=304, body=b'', request=request)
+
+    def test_detail_page_skipped(self):
+        response = self.not_modified('https://www.dealnews.com/Deal/21791913.html', {'dealid': 'deal_21791913'})
+        self.assertEqual(list(self.spider.parse_deal_detail(response)), [])
+        self.assertEqual(list(self.spider.parse_related_detail(response)), [])
+
+    def test_listing_page_keeps_paginating(self):
+        results = list(self.spider.parse(self.not_modified(URL)))
+        self.assertTrue(results)
+        self.assertTrue(all(isinstance(r, scrapy.Request) and r.meta.get('pagination') for r in results))
+
+    def test_listing_page_requeues_detail_pages(self):
+        details = [('deal_1', 'https://www.dealnews.com/Deal/1.html'), ('deal_2', 'https://www.dealnews.com/Deal/2.html')]
+        self.spider.max_detail_pages = 1
+        results = list(self.spider.parse(self.not_modified(URL, {'revalidated_details': details})))
+        detail_requests = [r for r in results if r.callback == self.spider.parse_deal_detail]
+        self.assertEqual([(r.meta['dealid'], r.url) for r in detail_requests], details[:1])
+        self.assertEqual(self.spider.detail_pages_visited, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
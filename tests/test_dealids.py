@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Unit tests for stable deal id generation
+"""
+import os
+import subprocess
+import sys
+import unittest
+from dealnews_scraper.dealids import make_dealid, stable_dealid_for_row
+
+
+class TestDealIds(unittest.TestCase):
+    """Test deterministic dealid scheme"""
+
+    def test_numeric_id_from_detail_url(self):
+        """Detail URLs map to the numeric DealNews id"""
+        url = "https://www.dealnews.com/Apple-AirPods-Pro/21791913.html"
+        self.assertEqual(make_dealid(url=url), "deal_21791913")
+
+    def test_content_id_wins(self):
+        """data-content-id is used before anything else"""
+        self.assertEqual(make_dealid(url="https://www.dealnews.com/x/1.html", content_id="21791913"), "deal_21791913")
+
+    def test_auto_id_is_ignored(self):
+        """Template auto-ids fall through to the URL digest"""
+        dealid = make_dealid(url="https://www.dealnews.com/lw/click.html?id=5", site_id="auto-id-77")
+        self.assertTrue(dealid.startswith("deal_u"))
+        self.assertEqual(len(dealid), len("deal_u") + 16)
+
+    def test_canonical_url_digest(self):
+        """Equivalent URLs (query order, fragment) get the same id"""
+        a = make_dealid(url="https://www.dealnews.com/lw/click.html?a=1&b=2#top")
+        b = make_dealid(url="https://www.dealnews.com/lw/click.html?b=2&a=1")
+        self.assertEqual(a, b)
+
+    def test_stable_across_processes(self):
+        """Ids do not depend on PYTHONHASHSEED"""
+        code = "from dealnews_scraper.dealids import make_dealid; print(make_dealid(url='https://www.dealnews.com/lw/click.html?id=9'))"
+        outputs = set()
+        for seed in ('1', '2'):
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env,
+                                    cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            outputs.add(result.stdout.strip())
+        self.assertEqual(len(outputs), 1)
+
+    def test_backfill_mapping(self):
+        """Legacy ids are rewritten, stable ones are left alone"""
+        self.assertEqual(stable_dealid_for_row("deal_-4242424242424242424", "https://www.dealnews.com/x/123.html"), "deal_123")
+        self.assertEqual(stable_dealid_for_row("21791913", "https://www.dealnews.com/"), "deal_21791913")
+        stable = make_dealid(url="https://www.dealnews.com/lw/click.html?id=9")
+        self.assertEqual(stable_dealid_for_row(stable, "https://www.dealnews.com/"), stable)
+        self.assertEqual(stable_dealid_for_row("test123", "https://www.dealnews.com/"), "test123")
+
+    def test_backfill_leaves_link_digest_rows(self):
+        """Hash ids keyed on the offer URL are not rebuilt from the stored deallink"""
+        offer_url = "https://www.dealnews.com/lw/click.html?id=9"
+        self.assertTrue(make_dealid(url=offer_url).startswith("deal_u"))
+        # The row's deallink is the "Shop Now" href, not the offer URL the spider digests
+        self.assertIsNone(stable_dealid_for_row("deal_-4242424242424242424", "https://www.dealnews.com/c142/Electronics/"))
+        self.assertIsNone(stable_dealid_for_row("json_deal_8181818181818181818", "https://www.dealnews.com/"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the detail-page parsing path
+"""
+import unittest
+import scrapy
+from scrapy.http import HtmlResponse
+from dealnews_scraper.items import DealnewsItem, RelatedDealItem
+from dealnews_scraper.detail_page import find_detail_container, collect_related_links
+from dealnews_scraper.spiders.dealnews_spider import DealnewsSpider
+
+DETAIL_URL = 'https://www.dealnews.com/Apple-AirPods-Pro/21791913.html'
+DETAIL_HTML = """<html><body>
+<nav class="nav-menu-main"><a href="https://www.dealnews.com/c142/Electronics/">Electronics</a></nav>
+<main>
+  <div class="content-card deal-item" data-content-id="21791913" data-offer-url="https://www.dealnews.com/lw/click.html?1_21791913">
+    <h1 class="title"><a href="/Apple-AirPods-Pro/21791913.html">Apple AirPods Pro 2nd Gen for $189</a></h1>
+    <div class="callout">$189.00</div>
+    <div class="snippet summary">Save $60 off list price. Free shipping.</div>
+  </div>
+  <section class="related-deals">
+    <a href="/Apple-AirPods-Max/21791914.html">AirPods Max</a>
+    <a href="https://www.dealnews.com/Beats-Studio-Buds/21791915.html">Beats Studio Buds</a>
+    <a href="/Apple-AirPods-Pro/21791913.html">This deal again</a>
+  </section>
+</main>
+<aside class="sidebar">
+  <div class="content-card" data-content-id="21000001"><a href="/Sidebar-Deal/21000001.html">Sidebar deal</a></div>
+</aside>
+<div class="pagination"><a href="?start=20">Next</a></div>
+</body></html>"""
+
+
+def detail_response():
+    return HtmlResponse(url=DETAIL_URL, body=DETAIL_HTML.encode('utf-8'), encoding='utf-8')
+
+
+class TestDetailPage(unittest.TestCase):
+    """Test the detail-page queries and parse_related_detail()"""
+
+    def test_container_prefers_main_column(self):
+        """The main deal is picked over sidebar deal cards"""
+        container = find_detail_container(detail_response())
+        self.assertEqual(container.attrib.get('data-content-id'), '21791913')
+
+    def test_related_links_from_sections(self):
+        links, source = collect_related_links(detail_response())
+        self.assertEqual(source, 'sections')
+        self.assertIn('/Apple-AirPods-Max/21791914.html', links)
+
+    def test_parse_related_detail(self):
+        """One deal, its related deals and follow-ups only; no discovery or pagination"""
+        spider = DealnewsSpider()
+        results = list(spider.parse_related_detail(detail_response()))
+        deals = [r for r in results if isinstance(r, DealnewsItem)]
+        related = [r['relatedurl'] for r in results if isinstance(r, RelatedDealItem)]
+        requests = [r for r in results if isinstance(r, scrapy.Request)]
+
+        self.assertEqual(len(deals), 1)
+        self.assertEqual(deals[0]['url'], DETAIL_URL)
+        self.assertIn('https://www.dealnews.com/Apple-AirPods-Max/21791914.html', related)
+        self.assertNotIn(DETAIL_URL, related)
+        self.assertTrue(requests)
+        for request in requests:
+            self.assertEqual(request.callback, spider.parse_related_detail)
+            self.assertNotIn('start=', request.url)
+            self.assertNotIn('/c142/', request.url)
+
+
+    def test_related_follow_ups_count_against_max_detail_pages(self):
+        """Follow-up requests stop once max_detail_pages is reached"""
+        spider = DealnewsSpider()
+        spider.max_detail_pages = 1
+        requests = [r for r in spider.parse_related_detail(detail_response()) if isinstance(r, scrapy.Request)]
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(spider.detail_pages_visited, 1)
+        requests = [r for r in spider.parse_related_detail(detail_response()) if isinstance(r, scrapy.Request)]
+        self.assertEqual(requests, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the compiled field-extraction plan
+"""
+import unittest
+from lxml import html as lxml_html
+from dealnews_scraper.extraction_plan import ExtractionPlan, ContainerProfile, selector_requirements
+
+
+def container(markup):
+    return lxml_html.fromstring(markup)
+
+
+class TestExtractionPlan(unittest.TestCase):
+    """Test cascade order, accept predicates and winner stats"""
+
+    def setUp(self):
+        self.stats = []
+        self.plan = ExtractionPlan(inc_stat=self.stats.append)
+
+    def test_first_accepted_selector_wins(self):
+        """Short titles are rejected and the next selector is tried"""
+        node = container('<div><a class="title-link">More</a><h3>Apple AirPods Pro</h3></div>')
+        self.assertEqual(self.plan.extract('title', node), 'Apple AirPods Pro')
+        self.assertIn('plan/title/h3::text', self.stats)
+
+    def test_price_needs_currency(self):
+        """Price text without a currency marker falls through to later selectors"""
+        node = container('<div><span class="price">Great</span><div class="callout">$19.99</div></div>')
+        self.assertEqual(self.plan.extract('price', node), '$19.99')
+
+    def test_miss_is_recorded(self):
+        """Fields with no match count as 'none'"""
+        self.assertIsNone(self.plan.extract('staffpick', container('<div><p>Nothing here</p></div>')))
+        self.assertIn('plan/staffpick/none', self.stats)
+        self.assertEqual(dict(self.plan.report()['staffpick'])['none'], 1)
+
+    def test_profile_skips_impossible_selectors(self):
+        """Containers without the class or tag a selector needs are ruled out"""
+        profile = ContainerProfile(container('<div class="deal-card"><span class="sale-price">$5</span></div>'))
+        self.assertTrue(profile.may_match(selector_requirements('.sale-price::text')))
+        self.assertTrue(profile.may_match(selector_requirements('span[class*="price"]::text')))
+        self.assertFalse(profile.may_match(selector_requirements('.deal-price span::text')))
+        self.assertFalse(profile.may_match(selector_requirements('h2 a::attr(href), h3 a::attr(href)')))
+
+    def test_named_query_alternatives(self):
+        """Named queries fall back to the next alternative when the first is empty"""
+        node = container('<div><img data-src="https://img.dealnews.com/1.jpg"></div>')
+        self.assertEqual(self.plan.all('images', node), ['https://img.dealnews.com/1.jpg'])
+
+
+if __name__ == '__main__':
+    unittest.main()
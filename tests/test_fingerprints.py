@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the seen-URL fingerprint stores
+"""
+import os
+import tempfile
+import unittest
+from scrapy import Request
+from dealnews_scraper.dupefilter import FingerprintDupeFilter
+from dealnews_scraper.fingerprints import FingerprintSet, BloomFilter, ScalableBloomFilter, url_fingerprint
+
+
+class TestFingerprintSet(unittest.TestCase):
+    """Test the exact 64-bit fingerprint set"""
+
+    def test_add_and_contains(self):
+        """Added URLs are found, others are not"""
+        store = FingerprintSet()
+        store.add("https://www.dealnews.com/a/1.html")
+        self.assertIn("https://www.dealnews.com/a/1.html", store)
+        self.assertNotIn("https://www.dealnews.com/a/2.html", store)
+
+    def test_canonical_urls_match(self):
+        """Query order and fragments do not change the fingerprint"""
+        self.assertEqual(url_fingerprint("https://www.dealnews.com/?b=2&a=1#x"),
+                         url_fingerprint("https://www.dealnews.com/?a=1&b=2"))
+
+    def test_merge_keeps_everything(self):
+        """Fingerprints survive merges into the sorted buffer without duplicates"""
+        store = FingerprintSet()
+        store.MIN_PENDING = 16
+        urls = [f"https://www.dealnews.com/d/{n}.html" for n in range(500)]
+        for url in urls + urls:
+            store.add(url)
+        self.assertEqual(len(store), 500)
+        self.assertTrue(all(url in store for url in urls))
+        self.assertEqual(list(store.sorted), sorted(store.sorted))
+
+    def test_persistence(self):
+        """A saved set is reloaded by the next run"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'seen.fp')
+            store = FingerprintSet(path)
+            store.add("https://www.dealnews.com/a/1.html")
+            store.close()
+            reloaded = FingerprintSet(path)
+            self.assertEqual(len(reloaded), 1)
+            self.assertIn("https://www.dealnews.com/a/1.html", reloaded)
+
+
+class TestBloomFilter(unittest.TestCase):
+    """Test the mmap-backed Bloom filter"""
+
+    def test_persistence_and_no_false_negatives(self):
+        """Every added URL is found after reopening the file"""
+        urls = [f"https://www.dealnews.com/d/{n}.html" for n in range(2000)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'seen.bloom')
+            bloom = BloomFilter(path, capacity=10000, error_rate=0.01)
+            for url in urls:
+                bloom.add(url)
+            bloom.close()
+            reopened = BloomFilter(path)
+            self.assertEqual(len(reopened), 2000)
+            self.assertTrue(all(url in reopened for url in urls))
+            misses = sum(f"https://www.dealnews.com/x/{n}.html" in reopened for n in range(2000))
+            self.assertLess(misses, 60)
+            reopened.close()
+
+    def test_scalable_filter_grows(self):
+        """New slices are added once the current one is full"""
+        bloom = ScalableBloomFilter(initial_capacity=100, error_rate=0.01)
+        urls = [f"https://www.dealnews.com/d/{n}.html" for n in range(1000)]
+        for url in urls:
+            bloom.add(url)
+        self.assertGreater(len(bloom.slices), 1)
+        self.assertTrue(all(url in bloom for url in urls))
+        self.assertLess(bloom.false_positive_rate(), 0.02)
+
+
+class TestFingerprintDupeFilter(unittest.TestCase):
+    """Test the integer-fingerprint request dupefilter"""
+
+    def test_filters_repeats_and_persists(self):
+        """Repeated requests are filtered, also after reopening the job dir"""
+        with tempfile.TemporaryDirectory() as jobdir:
+            for backend in ('set', 'bloom'):
+                dupefilter = FingerprintDupeFilter(jobdir, backend=backend, capacity=1000)
+                self.assertFalse(dupefilter.request_seen(Request("https://www.dealnews.com/c142/")))
+                self.assertTrue(dupefilter.request_seen(Request("https://www.dealnews.com/c142/")))
+                dupefilter.close('finished')
+                reopened = FingerprintDupeFilter(jobdir, backend=backend, capacity=1000)
+                self.assertTrue(reopened.request_seen(Request("https://www.dealnews.com/c142/")))
+                self.assertFalse(reopened.request_seen(Request("https://www.dealnews.com/c196/")))
+                reopened.close('finished')
+
+
+if __name__ == '__main__':
+    unittest.main()
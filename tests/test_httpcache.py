@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the pack-file response cache
+"""
+import os
+import tempfile
+import unittest
+import scrapy
+from scrapy.http import HtmlResponse, Headers
+from scrapy.utils.test import get_crawler
+from dealnews_scraper.httpcache import ResponsePack, PackFileCacheStorage, INDEX_ROW
+from dealnews_scraper.spiders.dealnews_spider import DealnewsSpider
+
+URL = 'https://www.dealnews.com/c142/Electronics/'
+BODY = b'<html><body>' + b'<div class="deal-item">Deal</div>' * 50 + b'</body></html>'
+HEADERS = Headers({'Content-Type': 'text/html; charset=utf-8', 'ETag': '"v1"'})
+
+
+class TestResponsePack(unittest.TestCase):
+    """Test round trips, body de-duplication and recovery on reopen"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache', 'dealnews')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip_and_dedup(self):
+        pack = ResponsePack(self.path)
+        pack.put(b'a' * 20, URL, 200, HEADERS, BODY)
+        pack.put(b'b' * 20, URL + '?start=0', 200, HEADERS, BODY)
+        self.assertEqual((len(pack), len(pack.bodies)), (2, 1))
+        self.assertLess(pack.nbytes, len(BODY))
+        response = pack.get(b'b' * 20)
+        self.assertIsInstance(response, HtmlResponse)
+        self.assertEqual((response.url, response.status, response.body), (URL + '?start=0', 200, BODY))
+        self.assertEqual(response.headers['ETag'], b'"v1"')
+        self.assertIsNone(pack.get(b'c' * 20))
+        pack.close()
+
+    def test_reopen_ignores_torn_index_row(self):
+        pack = ResponsePack(self.path)
+        pack.put(b'a' * 20, URL, 200, HEADERS, BODY)
+        pack.close()
+        with open(f"{self.path}.idx", 'ab') as f:
+            f.write(b'\0' * (INDEX_ROW.size // 2))
+        pack = ResponsePack(self.path)
+        self.assertEqual([r.body for r in pack.responses()], [BODY])
+        pack.close()
+
+
+class TestPackFileCacheStorage(unittest.TestCase):
+    """Test the HTTPCACHE_STORAGE interface and expiration"""
+
+    def test_store_retrieve_expire(self):
+        with tempfile.TemporaryDirectory() as directory:
+            crawler = get_crawler(DealnewsSpider, {'HTTPCACHE_DIR': directory, 'HTTPCACHE_EXPIRATION_SECS': 3600})
+            spider = crawler._create_spider()
+            storage = PackFileCacheStorage(crawler.settings)
+            storage.open_spider(spider)
+            request = scrapy.Request(URL)
+            self.assertIsNone(storage.retrieve_response(spider, request))
+            storage.store_response(spider, request, HtmlResponse(URL, headers=HEADERS, body=BODY))
+            self.assertEqual(storage.retrieve_response(spider, request).body, BODY)
+            fingerprint = crawler.request_fingerprinter.fingerprint(request)
+            offset, length, codec, _ = storage.pack.entries[fingerprint]
+            storage.pack.entries[fingerprint] = (offset, length, codec, 0)  # stored long ago
+            self.assertIsNone(storage.retrieve_response(spider, request))
+            storage.close_spider(spider)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit tests for incremental-crawl listing state
+"""
+import os
+import tempfile
+import unittest
+import scrapy
+from scrapy.http import HtmlResponse
+from dealnews_scraper.listing_state import ListingStateStore, category_of, listing_digest
+from dealnews_scraper.spiders.dealnews_spider import DealnewsSpider
+
+URL = 'https://www.dealnews.com/c142/Electronics/'
+
+
+def listing(ids, offer_urls=False, json_ld=()):
+    offer = ' data-offer-url="https://www.example-store.com/item?id={}"' if offer_urls else ''
+    deals = ''.join(
+        f'<div class="deal-item" data-content-id="{i}"{offer.format(i)}><h3 class="title"><a href="/Deal-{i}/{i}.html">'
+        f'Deal {i} for $10</a></h3><span class="price">$10</span></div>' for i in ids
+    )
+    offers = ''.join(
+        f'<script type="application/ld+json">{{"@type": "Offer", "name": "Deal {i}", '
+        f'"url": "https://www.dealnews.com/Deal-{i}/{i}.html"}}</script>' for i in json_ld
+    )
+    body = f'<html><head>{offers}</head><body>{deals}</body></html>'
+    return HtmlResponse(url=URL, body=body.encode('utf-8'), encoding='utf-8')
+
+
+class TestListingStateStore(unittest.TestCase):
+    """Test digests, categories and persistence between runs"""
+
+    def test_category_of(self):
+        self.assertEqual(category_of(URL + '?start=40'), 'c142/Electronics')
+        self.assertEqual(category_of('https://www.dealnews.com/?sort=new&start=20'), 'home?sort=new')
+
+    def test_digest_depends_on_order(self):
+        self.assertEqual(listing_digest(['deal_1', 'deal_2']), listing_digest(['deal_1', 'deal_2']))
+        self.assertNotEqual(listing_digest(['deal_1', 'deal_2']), listing_digest(['deal_2', 'deal_1']))
+
+    def test_unchanged_across_runs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state', 'listing_state.sqlite')
+            store = ListingStateStore(path)
+            self.assertFalse(store.record(URL, ['deal_1', 'deal_2'], 2))
+            store.close()
+
+            store = ListingStateStore(path)
+            self.assertEqual(len(store), 1)
+            self.assertTrue(store.record(URL, ['deal_1', 'deal_2'], 0))
+            self.assertFalse(store.record(URL + '?start=20', ['deal_3'], 1))
+            self.assertEqual(store.new_by_category, {'c142/Electronics': 1})
+            self.assertEqual((store.unchanged, store.changed), (1, 1))
+            store.close()
+
+
+class TestIncrementalParse(unittest.TestCase):
+    """Test that a listing page with nothing new ends its category"""
+
+    def setUp(self):
+        self.spider = DealnewsSpider()
+        self.spider.category_discovery_enabled = False
+        self.spider.listing_state = ListingStateStore()
+
+    def pages_requested(self, response):
+        return [r for r in self.spider.parse(response)
+                if isinstance(r, scrapy.Request) and r.meta.get('pagination')]
+
+    def test_new_deals_keep_paginating(self):
+        self.assertTrue(self.pages_requested(listing([101, 102, 103])))
+        self.assertEqual(self.spider.listing_state.new_by_category['c142/Electronics'], 3)
+
+    def test_extracted_deals_not_persisted(self):
+        items = [r for r in self.spider.parse(listing([101, 102])) if isinstance(r, scrapy.Item)]
+        self.assertEqual(len(self.spider.scanned_urls), 0)
+        self.assertIn('https://www.dealnews.com/Deal-101/101.html', self.spider.queued_urls)
+        repeat = [r for r in self.spider.parse(listing([101, 102])) if isinstance(r, scrapy.Item)]
+        self.assertEqual(self.spider.deals_extracted, 2)
+        self.assertTrue(items)
+        self.assertFalse([r for r in repeat if r.get('url')])
+
+    def test_known_deals_stop_pagination(self):
+        for i in (101, 102, 103):
+            self.spider.scanned_urls.add(f'https://www.dealnews.com/Deal-{i}/{i}.html')
+        self.assertEqual(self.pages_requested(listing([101, 102, 103])), [])
+        self.assertTrue(self.spider.pagination.is_cancelled(URL + '?start=20'))
+        self.assertEqual(self.spider.listing_state.new_by_category['c142/Electronics'], 0)
+
+
+    def test_seen_check_uses_item_url(self):
+        """Deals linking to the merchant are matched on their DealNews URL and id"""
+        for i in (101, 102):
+            self.spider.scanned_urls.add(f'https://www.dealnews.com/Deal-{i}/{i}.html')
+        self.assertEqual(self.pages_requested(listing([101, 102], offer_urls=True)), [])
+        digest, = self.spider.listing_state.conn.execute('SELECT digest FROM listing_state WHERE url = ?', (URL,)).fetchone()
+        self.assertEqual(digest, listing_digest(['deal_101', 'deal_102']))
+
+    def test_json_ld_deals_count_as_new(self):
+        for i in (101, 102):
+            self.spider.scanned_urls.add(f'https://www.dealnews.com/Deal-{i}/{i}.html')
+        self.assertTrue(self.pages_requested(listing([101, 102], json_ld=[103])))
+        self.assertEqual(self.spider.listing_state.new_by_category['c142/Electronics'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the speculative pagination planner
+"""
+import unittest
+from types import SimpleNamespace
+from scrapy import Request
+from scrapy.exceptions import IgnoreRequest
+from dealnews_scraper.pagination import PaginationPlanner, stream_key, offset_of, with_offset
+from dealnews_scraper.middlewares import PaginationCancelMiddleware, ProxyMiddleware
+
+BASE = 'https://www.dealnews.com/c142/Electronics/'
+
+
+def page(start):
+    return with_offset(BASE, start) if start else BASE
+
+
+class TestPaginationUrls(unittest.TestCase):
+    """Test stream keys and offsets"""
+
+    def test_stream_key_and_offsets(self):
+        self.assertEqual(stream_key(BASE + '?start=40'), BASE)
+        self.assertEqual(stream_key(BASE + '?sort=new&start=40'), BASE + '?sort=new')
+        self.assertEqual(stream_key(BASE + '?start=40&sort=new'), BASE + '?sort=new')
+        self.assertEqual(offset_of(BASE + '?sort=new&start=40'), 40)
+        self.assertEqual(offset_of(BASE), 0)
+        self.assertEqual(with_offset(BASE, 20), BASE + '?start=20')
+        self.assertEqual(with_offset(BASE + '?sort=new', 20), BASE + '?sort=new&start=20')
+        self.assertEqual(with_offset(BASE + '?start=20&sort=new', 40), BASE + '?start=40&sort=new')
+
+
+class TestPaginationPlanner(unittest.TestCase):
+    """Test window growth, shrinking and end-of-stream cancellation"""
+
+    def test_window_grows_on_full_pages(self):
+        planner = PaginationPlanner(initial_window=2, max_window=4)
+        self.assertEqual(planner.on_page(page(0), 20), [page(20), page(40)])
+        self.assertEqual(planner.on_page(page(20), 20), [page(60), page(80)])  # window 3
+        self.assertEqual(planner.on_page(page(40), 20), [page(100), page(120)])  # window 4
+        self.assertEqual(planner.on_page(page(60), 20), [page(140)])  # capped at 4
+
+    def test_short_page_shrinks_window(self):
+        planner = PaginationPlanner(initial_window=4, max_window=8)
+        planner.on_page(page(0), 20)
+        self.assertEqual(planner.on_page(page(20), 5), [])  # window 2: up to 60, already issued
+        self.assertEqual(planner.streams[BASE].window, 2)
+
+    def test_empty_page_cancels_later_offsets(self):
+        planner = PaginationPlanner(initial_window=4)
+        planner.on_page(page(0), 20)
+        self.assertEqual(planner.on_page(page(40), 0), [])
+        self.assertTrue(planner.is_cancelled(page(60)))
+        self.assertFalse(planner.is_cancelled(page(20)))
+        self.assertFalse(planner.is_cancelled('https://www.dealnews.com/c39/Computers/?start=60'))
+        # A late full page before the end issues nothing past it
+        self.assertEqual(planner.on_page(page(20), 20), [])
+
+    def test_out_of_order_responses_issue_each_offset_once(self):
+        planner = PaginationPlanner(initial_window=2, max_window=2)
+        issued = planner.on_page(page(0), 20)
+        issued += planner.on_page(page(40), 20)
+        issued += planner.on_page(page(20), 20)
+        self.assertEqual(issued, [page(20), page(40), page(60), page(80)])
+
+
+class TestPaginationCancelMiddleware(unittest.TestCase):
+    """Test that cancelled pages are dropped before download"""
+
+    def test_drops_pages_past_the_end(self):
+        planner = PaginationPlanner(initial_window=4)
+        planner.on_page(page(0), 20)
+        planner.on_end(page(40))
+        spider = SimpleNamespace(pagination=planner)
+        middleware = PaginationCancelMiddleware()
+        with self.assertRaises(IgnoreRequest):
+            middleware.process_request(Request(page(60), meta={'pagination': True}), spider)
+        self.assertIsNone(middleware.process_request(Request(page(20), meta={'pagination': True}), spider))
+        self.assertIsNone(middleware.process_request(Request(page(80)), spider))  # not speculative
+        self.assertEqual(planner.cancelled, 1)
+
+    def test_dropped_pages_are_not_retried(self):
+        """ProxyMiddleware's retry-on-exception leaves IgnoreRequest alone"""
+        request = Request(page(60), meta={'pagination': True})
+        self.assertIsNone(ProxyMiddleware().process_exception(request, IgnoreRequest(), SimpleNamespace()))
+
+
+if __name__ == '__main__':
+    unittest.main()
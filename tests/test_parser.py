@@ -5,6 +5,7 @@ Unit tests for DealNews parser
 import unittest
 from scrapy.http import HtmlResponse
 from dealnews_scraper.spiders.dealnews_spider import DealnewsSpider
+from dealnews_scraper.structured_data import StructuredDataCache
 
 class TestDealnewsParser(unittest.TestCase):
     """Test parser functionality"""
@@ -80,6 +81,28 @@ class TestDealnewsParser(unittest.TestCase):
             self.assertIn('dealid', deal)
             self.assertIn('title', deal)
 
+    def test_json_ld_decoded_once_per_script(self):
+        """Page-level and per-deal JSON-LD lookups share one decode per script"""
+        html = """
+        <div data-deal-id="1" class="deal-item">
+            <h3 class="deal-title">Deal One</h3>
+            <script type="application/ld+json">{"@type": "Offer", "seller": {"name": "Amazon"}}</script>
+        </div>
+        <div data-deal-id="2" class="deal-item">
+            <h3 class="deal-title">Deal Two</h3>
+            <script type="application/ld+json">{"@type": "Offer", "seller": {"name": "Walmart"}}</script>
+        </div>
+        """
+        response = HtmlResponse(url="https://www.dealnews.com/", body=html.encode(), encoding='utf-8')
+        structured = StructuredDataCache(response)
+        self.assertEqual(len(structured.page_blocks()), 2)
+        deals = response.css('div.deal-item')
+        self.assertEqual(structured.first_in(deals[1])['seller']['name'], 'Walmart')
+        item = self.spider.extract_deal_item(deals[0], response, structured)
+        self.assertEqual(item['store'], 'Amazon')
+        self.assertEqual(structured.decodes, 2)
+        self.assertGreater(structured.decodes_saved, 0)
+
 if __name__ == '__main__':
     unittest.main()
 
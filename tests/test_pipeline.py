@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the buffered write path of NormalizedMySQLPipeline
+"""
+import logging
+import unittest
+from unittest import mock
+import mysql.connector
+from twisted.internet import defer
+from dealnews_scraper.fingerprints import FingerprintSet
+from dealnews_scraper.items import DealnewsItem, DealImageItem
+from dealnews_scraper.normalized_pipeline import NormalizedMySQLPipeline
+from dealnews_scraper.signals import batch_committed, batch_flushing
+
+
+class FakeCursor:
+    """Records statements instead of talking to MySQL"""
+
+    def __init__(self):
+        self.executed = []
+        self.executemany_calls = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def executemany(self, sql, rows):
+        self.executemany_calls.append((sql, list(rows)))
+
+    def close(self):
+        pass
+
+
+class FailingCursor(FakeCursor):
+    """Fails every statement like a lost MySQL server"""
+
+    def execute(self, sql, params=None):
+        raise mysql.connector.Error('MySQL server has gone away')
+
+
+class FakeConnection:
+    def __init__(self):
+        self.transactions = 0
+        self.commits = 0
+
+    def start_transaction(self):
+        self.transactions += 1
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeSpider:
+    logger = logging.getLogger('test_pipeline')
+
+
+class FakeSignals:
+    """Records signals sent with send_catch_log"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_catch_log(self, signal, **kwargs):
+        kwargs.pop('spider')
+        self.sent.append((signal, kwargs))
+
+
+def make_deal(dealid, **extra):
+    item = DealnewsItem()
+    item['dealid'] = dealid
+    item['title'] = f'Deal {dealid}'
+    item['url'] = f'https://www.dealnews.com/Deal/{dealid}.html'
+    item['images'] = [f'https://img.dealnews.com/{dealid}.jpg']
+    item['categories'] = [{'category_name': 'Electronics', 'category_id': '142'}]
+    item['related_deals'] = []
+    item.update(extra)
+    return item
+
+
+class TestBufferedPipeline(unittest.TestCase):
+    """Test buffered, batched MySQL writes"""
+
+    def setUp(self):
+        self.spider = FakeSpider()
+        self.pipeline = NormalizedMySQLPipeline(batch_size=3, flush_interval=0)
+        self.pipeline.mysql_enabled = True
+        self.pipeline.conn = FakeConnection()
+        self.pipeline.cursor = FakeCursor()
+        self.pipeline.deals_saved = 0
+        self.pipeline.images_saved = 0
+        self.pipeline.categories_saved = 0
+        self.pipeline.related_deals_saved = 0
+
+    def test_rows_are_buffered_until_batch_size(self):
+        """Nothing is written before the batch is full"""
+        self.pipeline.process_item(make_deal('deal_1'), self.spider)
+        self.pipeline.process_item(make_deal('deal_2'), self.spider)
+        self.assertEqual(self.pipeline.cursor.executed, [])
+        self.assertEqual(self.pipeline.cursor.executemany_calls, [])
+        self.assertEqual(len(self.pipeline.deal_rows), 2)
+
+    def test_flush_on_size_uses_one_transaction(self):
+        """A full batch is written with executemany in a single transaction"""
+        for n in range(3):
+            self.pipeline.process_item(make_deal(f'deal_{n}'), self.spider)
+        cursor = self.pipeline.cursor
+        self.assertEqual(self.pipeline.conn.transactions, 1)
+        self.assertEqual(self.pipeline.conn.commits, 1)
+        self.assertEqual(cursor.executed, [])
+        statements = [sql for sql, _ in cursor.executemany_calls]
+        self.assertIn(NormalizedMySQLPipeline.DEAL_UPSERT_SQL, statements)
+        self.assertIn(NormalizedMySQLPipeline.IMAGE_UPSERT_SQL, statements)
+        deal_rows = dict(cursor.executemany_calls)[NormalizedMySQLPipeline.DEAL_UPSERT_SQL]
+        self.assertEqual(len(deal_rows), 3)
+        self.assertEqual(self.pipeline.deals_saved, 3)
+        self.assertEqual(self.pipeline.pending_rows(), 0)
+
+    def test_category_id_folded_into_buffered_deal_row(self):
+        """Categories for a buffered deal set category_id without an UPDATE"""
+        self.pipeline.process_item(make_deal('deal_1'), self.spider)
+        self.assertEqual(self.pipeline.deal_rows['deal_1'][7], '142')
+        self.assertEqual(self.pipeline.deal_category_rows, [])
+
+    def test_child_item_for_flushed_deal(self):
+        """Standalone child items are buffered too"""
+        image = DealImageItem()
+        image['dealid'] = 'deal_9'
+        image['imageurl'] = 'https://img.dealnews.com/9.jpg'
+        self.pipeline.process_item(image, self.spider)
+        self.assertEqual(self.pipeline.image_rows, [('deal_9', 'https://img.dealnews.com/9.jpg')])
+
+    def test_close_spider_flushes_remaining_rows(self):
+        """Partial batches are written when the spider closes"""
+        self.pipeline.process_item(make_deal('deal_1'), self.spider)
+        self.pipeline.close_spider(self.spider)
+        self.assertEqual(self.pipeline.conn.commits, 1)
+        self.assertEqual(self.pipeline.deals_saved, 1)
+
+    def test_flushed_deals_marked_seen(self):
+        """Deal URLs reach the seen-URL store only once their batch is written"""
+        self.spider.scanned_urls = FingerprintSet()
+        for n in range(2):
+            self.pipeline.process_item(make_deal(f'deal_{n}'), self.spider)
+        self.assertEqual(len(self.spider.scanned_urls), 0)
+        self.pipeline.process_item(make_deal('deal_2'), self.spider)
+        self.assertIn('https://www.dealnews.com/Deal/deal_0.html', self.spider.scanned_urls)
+        self.assertEqual(len(self.spider.scanned_urls), 3)
+
+    def test_flush_signals_commit_barrier(self):
+        """Each flush is announced and confirmed; an empty flush still confirms"""
+        self.pipeline.signals = FakeSignals()
+        self.pipeline.process_item(make_deal('deal_1'), self.spider)
+        self.pipeline.flush(self.spider)
+        self.pipeline.flush(self.spider)
+        self.assertEqual(self.pipeline.signals.sent, [
+            (batch_flushing, {'batch_id': 1}), (batch_committed, {'batch_id': 1, 'stored': True}),
+            (batch_flushing, {'batch_id': 2}), (batch_committed, {'batch_id': 2, 'stored': True}),
+        ])
+
+    def test_unbuffered_failed_write_not_committed(self):
+        """A deal upsert that fails every retry confirms its write as not stored"""
+        self.pipeline.batch_size = 0
+        self.pipeline.cursor = FailingCursor()
+        self.pipeline.signals = FakeSignals()
+        results = []
+        with mock.patch('time.sleep'), mock.patch.object(self.pipeline, 'reconnect'):
+            self.pipeline.process_item(make_deal('deal_1'), self.spider).addCallback(results.append)
+        self.assertEqual(self.pipeline.signals.sent, [
+            (batch_flushing, {'batch_id': 1}), (batch_committed, {'batch_id': 1, 'stored': False}),
+        ])
+        self.assertEqual(results[0]['dealid'], 'deal_1')
+        self.assertEqual(self.pipeline.deals_saved, 0)
+
+    def test_unbuffered_failed_write_not_marked_seen(self):
+        """Only a successful unbuffered upsert adds the deal URL to the seen-URL store"""
+        self.pipeline.batch_size = 0
+        self.spider.scanned_urls = FingerprintSet()
+        self.pipeline.process_item(make_deal('deal_1'), self.spider)
+        self.assertIn('https://www.dealnews.com/Deal/deal_1.html', self.spider.scanned_urls)
+        self.pipeline.cursor = FailingCursor()
+        with mock.patch('time.sleep'), mock.patch.object(self.pipeline, 'reconnect'):
+            self.pipeline.process_item(make_deal('deal_2'), self.spider)
+        self.assertNotIn('https://www.dealnews.com/Deal/deal_2.html', self.spider.scanned_urls)
+        self.assertEqual(len(self.spider.scanned_urls), 1)
+
+    def test_backpressure_holds_items_until_writer_drains(self):
+        """Items wait on a Deferred while too many batches are queued"""
+        self.pipeline.max_pending_writes = 0
+        self.pipeline.pending_writes = 1
+        result = self.pipeline.process_item(make_deal('deal_1'), self.spider)
+        self.assertIsInstance(result, defer.Deferred)
+        released = []
+        result.addCallback(released.append)
+        self.assertEqual(released, [])
+        self.pipeline.writer_done(None)
+        self.assertEqual(released[0]['dealid'], 'deal_1')
+
+
+if __name__ == '__main__':
+    unittest.main()
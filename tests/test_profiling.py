@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the per-callback profiling extension
+"""
+import os
+import json
+import pstats
+import tempfile
+import unittest
+import scrapy
+from scrapy.exceptions import NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+from dealnews_scraper.items import DealnewsItem
+from dealnews_scraper.profiling import CallbackProfiler, Histogram
+from dealnews_scraper.spiders.dealnews_spider import DealnewsSpider
+
+URL = 'https://www.dealnews.com/c142/Electronics/'
+
+
+def results():
+    yield DealnewsItem(dealid='1')
+    yield scrapy.Request(URL + '?start=20')
+    yield DealnewsItem(dealid='2')
+
+
+class FakePipeline:
+    def store_item(self, item, spider):
+        return self.process_deal_item(item, spider)
+
+    def process_deal_item(self, item, spider):
+        return item
+
+
+class TestHistogram(unittest.TestCase):
+    """Test bucket counts and percentiles"""
+
+    def test_percentiles(self):
+        histogram = Histogram((1, 10, 100))
+        for value in (0.5, 0.5, 5, 50, 500):
+            histogram.add(value)
+        self.assertEqual(histogram.counts, [2, 1, 1, 1])
+        self.assertEqual(histogram.percentile(40), 1)
+        self.assertEqual(histogram.percentile(60), 10)
+        self.assertEqual(histogram.percentile(99, maximum=500), 500)
+        self.assertEqual(Histogram((1,)).percentile(50), 0.0)
+
+
+class TestCallbackProfiler(unittest.TestCase):
+    """Test callback and pipeline recording and the JSON report"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, 'profile.json')
+        self.spider = DealnewsSpider()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_disabled_by_default(self):
+        with self.assertRaises(NotConfigured):
+            CallbackProfiler.from_crawler(get_crawler(DealnewsSpider))
+
+    def test_timed_counts_items_requests_and_size(self):
+        profiler = CallbackProfiler(self.output)
+        response = HtmlResponse(url=URL, body=b'x' * 2048)
+        self.assertEqual(len(list(profiler.timed('callback', 'parse', results(), response))), 3)
+        row = profiler.report()['callbacks']['parse']
+        self.assertEqual((row['calls'], row['items'], row['requests'], row['kb_total']), (1, 2, 1, 2.0))
+        self.assertEqual(sum(row['histograms']['wall_ms']['counts']), 1)
+
+    def test_spider_callbacks_feed_the_profiler(self):
+        profiler = CallbackProfiler(self.output)
+        self.spider.profiler = profiler
+        response = HtmlResponse(url=URL, body=b'<html><body></body></html>', encoding='utf-8')
+        list(self.spider.parse(response))
+        self.assertEqual(set(profiler.report()['callbacks']), {'parse', 'parse_json_ld_deals'})
+
+    def test_pipeline_methods_and_report(self):
+        profiler = CallbackProfiler(self.output)
+        pipeline = FakePipeline()
+        profiler.wrap_pipeline(pipeline)
+        item = DealnewsItem(dealid='1')
+        self.assertIs(pipeline.store_item(item, self.spider), item)
+        profiler.spider_closed(self.spider)
+        with open(self.output) as f:
+            report = json.load(f)
+        self.assertEqual(report['pipeline']['store_item']['calls'], 1)
+        self.assertEqual(report['pipeline']['process_deal_item']['calls'], 1)
+        self.assertNotIn('items', report['pipeline']['store_item'])
+
+    def test_cprofile_sampling(self):
+        profiler = CallbackProfiler(self.output, sampler='cprofile', sample_every=2)
+        for _ in range(4):
+            list(profiler.timed('callback', 'parse', results()))
+        self.assertEqual(profiler.sampled, 2)
+        profiler.spider_closed(self.spider)
+        self.assertTrue(pstats.Stats(os.path.join(self.directory.name, 'profile.pstats')).total_calls)
+
+    def test_unknown_sampler(self):
+        with self.assertRaises(NotConfigured):
+            CallbackProfiler(self.output, sampler='yappi')
+
+
+if __name__ == '__main__':
+    unittest.main()
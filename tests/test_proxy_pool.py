@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the health-scored proxy pool and its use in ProxyMiddleware
+"""
+import os
+import random
+import unittest
+from unittest import mock
+import scrapy
+from scrapy.http import HtmlResponse
+from twisted.internet.task import Clock
+from dealnews_scraper.middlewares import ProxyMiddleware
+from dealnews_scraper.proxy_pool import ProxyPool
+from dealnews_scraper.retry_scheduler import RequestParked
+from dealnews_scraper.spiders.dealnews_spider import DealnewsSpider
+
+FAST, SLOW = 'http://10.0.0.1:8000', 'http://10.0.0.2:8000'
+URL = 'https://www.dealnews.com/c142/Electronics/'
+
+
+def make_pool(**kwargs):
+    clock = Clock()
+    return ProxyPool([FAST, SLOW], clock=clock, rng=random.Random(7), **kwargs), clock
+
+
+class TestProxyPool(unittest.TestCase):
+    """Test weighted routing, per-proxy caps, waits and quarantine"""
+
+    def test_prefers_fast_healthy_proxy(self):
+        pool, _ = make_pool(max_in_flight=0)
+        pool.release(pool.acquire(avoid=SLOW), 0.1, 200)
+        pool.release(pool.acquire(avoid=FAST), 2.0, 200)
+        picks = [pool.acquire() for _ in range(500)]
+        self.assertGreater(picks.count(FAST), 400)
+        self.assertGreater(picks.count(SLOW), 0)
+
+    def test_cap_and_wait(self):
+        pool, _ = make_pool(max_in_flight=1)
+        first, second = pool.acquire(), pool.acquire()
+        self.assertEqual({first, second}, {FAST, SLOW})
+        self.assertIsNone(pool.acquire())
+        got = []
+        pool.wait().addCallback(got.append)
+        self.assertEqual(got, [])
+        pool.release(second, 0.5, 200)
+        self.assertEqual(got, [second])
+        self.assertEqual(pool.health[second].in_flight, 1)
+
+    def test_bans_quarantine_with_doubling_cooldown(self):
+        pool, clock = make_pool(ban_threshold=2, cooldown=10, max_cooldown=15)
+        for _ in range(2):
+            pool.release(pool.acquire(avoid=SLOW), 0.2, 429)
+        self.assertEqual(pool.quarantined(), [FAST])
+        self.assertEqual({pool.acquire() for _ in range(5)}, {SLOW})
+        clock.advance(10)
+        self.assertEqual(pool.quarantined(), [])
+        for _ in range(2):
+            pool.release(FAST, 0.2, 403)
+        self.assertEqual(pool.health[FAST].quarantined_until, clock.seconds() + 15)
+        report = pool.report()['10.0.0.1:8000']
+        self.assertEqual((report['banned'], report['quarantines'], report['quarantined_seconds']), (4, 2, 25))
+
+    def test_waiters_wake_when_quarantine_ends(self):
+        pool, clock = make_pool(failure_threshold=1, cooldown=30)
+        pool.release(pool.acquire(avoid=SLOW), error=True)
+        pool.release(pool.acquire(avoid=FAST), status=503)
+        self.assertIsNone(pool.acquire())
+        got = []
+        pool.wait().addCallback(got.append)
+        clock.advance(29)
+        self.assertEqual(got, [])
+        clock.advance(1)
+        self.assertEqual(len(got), 1)
+
+    def test_dropped_request_records_nothing(self):
+        pool, _ = make_pool()
+        proxy = pool.acquire()
+        pool.release(proxy)
+        health = pool.health[proxy]
+        self.assertEqual((health.in_flight, health.succeeded, health.failed, health.latency), (0, 0, 0, None))
+
+
+class TestProxyMiddlewarePool(unittest.TestCase):
+    """Test slot handling in ProxyMiddleware with PROXY_LIST set"""
+
+    def setUp(self):
+        env = {'PROXY_LIST': f'{FAST},{SLOW}', 'PROXY_USER': 'user', 'PROXY_PASS': 'secret',
+               'PROXY_URL': '', 'DISABLE_PROXY': 'false'}
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.middleware = ProxyMiddleware()
+        self.middleware.pool.clock = Clock()
+        self.middleware.retries.clock = Clock()
+        self.spider = DealnewsSpider()
+
+    def test_429_releases_slot_and_avoids_proxy(self):
+        request = scrapy.Request(URL)
+        self.assertIsNone(self.middleware.process_request(request, self.spider))
+        proxy = request.meta['proxy_slot']
+        self.assertIn('user:secret@', request.meta['proxy'])
+        self.assertTrue(request.headers['Proxy-Authorization'].startswith(b'Basic '))
+
+        with self.assertRaises(RequestParked):
+            self.middleware.process_response(request, HtmlResponse(URL, status=429), self.spider)
+        self.assertNotIn('proxy_slot', request.meta)
+        self.assertEqual(self.middleware.pool.health[proxy].in_flight, 0)
+        self.assertEqual(self.middleware.pool.health[proxy].banned, 1)
+
+        self.middleware.process_request(request, self.spider)
+        self.assertNotEqual(request.meta['proxy_slot'], proxy)
+
+    def test_success_records_latency(self):
+        request = scrapy.Request(URL)
+        self.middleware.process_request(request, self.spider)
+        proxy = request.meta['proxy_slot']
+        request.meta['download_latency'] = 0.25
+        self.middleware.process_response(request, HtmlResponse(URL, status=200), self.spider)
+        self.assertEqual(self.middleware.pool.health[proxy].latency, 0.25)
+
+
+if __name__ == '__main__':
+    unittest.main()
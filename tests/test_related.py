@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the page deal-link index and detail side-cache used for related deals
+"""
+import unittest
+import scrapy
+from scrapy.http import HtmlResponse
+from dealnews_scraper.fingerprints import fingerprint
+from dealnews_scraper.related import PageDealLinks, DetailContextCache
+from dealnews_scraper.spiders.dealnews_spider import DealnewsSpider
+
+
+def listing(count=8):
+    links = ''.join(f'<div class="deal-item"><a href="/deals/item-{i}/">Deal {i}</a></div>' for i in range(count))
+    body = f'<html><body><a href="/about/">About</a>{links}</body></html>'
+    return HtmlResponse(url='https://www.dealnews.com/c142/Electronics/', body=body.encode('utf-8'), encoding='utf-8')
+
+
+class TestPageDealLinks(unittest.TestCase):
+    """Test link positions and neighbour slices"""
+
+    def test_index_of_relative_and_absolute(self):
+        """Relative hrefs are found by absolute URL, with or without a query string"""
+        links = PageDealLinks(listing())
+        self.assertEqual(links.index_of('https://www.dealnews.com/deals/item-3/'), 3)
+        self.assertEqual(links.index_of('https://www.dealnews.com/deals/item-3/?utm_source=x'), 3)
+        self.assertEqual(links.index_of('https://www.dealnews.com/about/'), -1)
+        self.assertEqual(links.index_of(''), -1)
+
+    def test_neighbours_window(self):
+        """Neighbours are clipped at the page edges and exclude the deal itself"""
+        links = PageDealLinks(listing())
+        self.assertEqual(links.neighbours('https://www.dealnews.com/deals/item-3/', 2),
+                         ['/deals/item-1/', '/deals/item-2/', '/deals/item-4/', '/deals/item-5/'])
+        self.assertEqual(links.neighbours('https://www.dealnews.com/deals/item-0/', 1), ['/deals/item-1/'])
+        self.assertEqual(links.neighbours('https://www.dealnews.com/deals/item-0/', 0), [])
+        self.assertEqual(links.neighbours('https://www.dealnews.com/deals/missing/', 2), [])
+
+
+class TestExtractRelatedDeals(unittest.TestCase):
+    """Test the spider's proximity-based related deals"""
+
+    def test_window_setting(self):
+        """related_window controls how many neighbours become related deals"""
+        response = listing()
+        spider = DealnewsSpider()
+        spider.related_window = 1
+        page_links = PageDealLinks(response)
+        item = {'dealid': 'deal_1', 'deallink': 'https://www.dealnews.com/deals/item-3/'}
+        related = [r['relatedurl'] for r in spider.extract_related_deals(response.css('div')[3], item, response, page_links)]
+        self.assertEqual(related, ['https://www.dealnews.com/deals/item-2/', 'https://www.dealnews.com/deals/item-4/'])
+        self.assertEqual(page_links.emitted, 2)
+
+
+class TestDetailContextCache(unittest.TestCase):
+    """Test the LRU side-cache for detail pages"""
+
+    def test_lru_eviction(self):
+        """The least recently put dealid is evicted first"""
+        cache = DetailContextCache(maxsize=2)
+        cache.put('a', ['https://www.dealnews.com/deals/a/'])
+        cache.put('b', ['https://www.dealnews.com/deals/b/'])
+        cache.put('a', ['https://www.dealnews.com/deals/a/'])
+        cache.put('c', ['https://www.dealnews.com/deals/c/'])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.pop('b'), frozenset())
+        self.assertIn(fingerprint('https://www.dealnews.com/deals/a/'), cache.pop('a'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.pop('a'), frozenset())
+
+    def test_detail_requests_carry_only_dealid(self):
+        """Listing pages queue detail visits with a compact meta"""
+        from benchmarks.fixtures import listing_page, make_response
+        spider = DealnewsSpider()
+        response = make_response('https://www.dealnews.com/c142/Electronics/', listing_page(0, 5))
+        requests = [r for r in spider.parse(response)
+                    if isinstance(r, scrapy.Request) and r.callback == spider.parse_deal_detail]
+        self.assertTrue(requests)
+        for request in requests:
+            self.assertNotIn('item', request.meta)
+            self.assertTrue(request.meta['dealid'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the non-blocking retry backoff
+"""
+import random
+import unittest
+import scrapy
+from scrapy.exceptions import DontCloseSpider
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+from twisted.internet.task import Clock
+from dealnews_scraper.middlewares import ProxyMiddleware
+from dealnews_scraper.retry_scheduler import RequestParked, RetryScheduler, retry_after_seconds
+from dealnews_scraper.spiders.dealnews_spider import DealnewsSpider
+
+URL = 'https://www.dealnews.com/c142/Electronics/'
+
+
+class TestRetryScheduler(unittest.TestCase):
+    """Test the delay queue, budgets and Retry-After"""
+
+    def setUp(self):
+        self.clock = Clock()
+        self.crawled = []
+        self.retries = RetryScheduler({503: 2}, base_delay=4, max_delay=10, clock=self.clock,
+                                      crawl=self.crawled.append, rng=random.Random(1))
+
+    def test_requests_come_back_in_due_order(self):
+        late, early = scrapy.Request(URL + '?start=20'), scrapy.Request(URL)
+        late.meta['retry_503_count'] = 1        # second attempt: 4-8s
+        self.assertTrue(self.retries.park(late, 503, None))
+        self.assertTrue(self.retries.park(early, 503, None))  # first attempt: 2-4s
+        self.assertEqual(len(self.retries), 2)
+        self.clock.advance(4)
+        self.assertEqual(self.crawled, [early])
+        self.clock.advance(4)
+        self.assertEqual(self.crawled, [early, late])
+        self.assertTrue(late.dont_filter)
+        self.assertEqual((late.priority, late.meta['retry_503_count']), (-1, 2))
+
+    def test_budget_and_unknown_status(self):
+        request = scrapy.Request(URL)
+        request.meta['retry_503_count'] = 2
+        self.assertFalse(self.retries.park(request, 503, None))
+        self.assertFalse(self.retries.park(scrapy.Request(URL), 502, None))
+        self.assertEqual(len(self.retries), 0)
+
+    def test_retry_after_is_capped(self):
+        self.assertEqual(retry_after_seconds(b'7'), 7.0)
+        self.assertIsNone(retry_after_seconds('soon'))
+        self.assertEqual(self.retries.delay(0, retry_after=60), 10)
+
+
+class TestProxyMiddlewareRetries(unittest.TestCase):
+    """Test that ProxyMiddleware parks retries and keeps the spider open"""
+
+    def setUp(self):
+        self.crawler = get_crawler(DealnewsSpider, {'RETRY_TIMES_PER_STATUS': {403: 1, 503: 1}})
+        self.spider = self.crawler._create_spider()
+        self.middleware = ProxyMiddleware.from_crawler(self.crawler)
+        self.middleware.retries.clock = Clock()
+        self.crawler.stats.open_spider(self.spider)
+
+    def test_503_parks_then_passes_response_on(self):
+        request = scrapy.Request(URL)
+        response = HtmlResponse(URL, status=503, headers={'Retry-After': '3'})
+        with self.assertRaises(RequestParked):
+            self.middleware.process_response(request, response, self.spider)
+        with self.assertRaises(DontCloseSpider):
+            self.middleware.spider_idle(self.spider)
+        self.assertIs(self.middleware.process_response(request, response, self.spider), response)
+        self.assertTrue(request.meta['dont_retry'])
+        stats = self.crawler.stats
+        self.assertEqual(stats.get_value('retry_backoff/count'), 1)
+        self.assertEqual(stats.get_value('retry_backoff/seconds'), 3)
+        self.assertEqual(stats.get_value('retry_backoff/gave_up/503'), 1)
+        self.middleware.spider_closed(self.spider)
+        self.assertEqual(stats.get_value('retry_backoff/dropped_at_close'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()